@@ -65,6 +65,14 @@ from app.models.user_data_source_overlay import UserDataSourceTable as UserOverl
 from app.models.connection import Connection
 from app.models.connection_indexing import ConnectionIndexing
 from app.models.connection_rate_limit_counter import ConnectionRateLimitCounter
+from app.models.query_concurrency_lease import QueryConcurrencyLease
+from app.models.query_fingerprint import QueryFingerprint, QueryFingerprintDay
+from app.models.acceleration_candidate import AccelerationCandidate
+from app.models.context_cache import ContextCacheVersion, ContextCacheEntry
+from app.models.llm_response_cache import LLMResponseCacheEntry
+from app.models.event_transport_message import EventTransportMessage
+from app.models.completion_event import CompletionEventRecord
+from app.models.agent_run import AgentRun
 from app.models.connection_table import ConnectionTable
 from app.models.note import Note
 from app.models.connection_tool import ConnectionTool
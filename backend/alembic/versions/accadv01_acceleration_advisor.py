@@ -0,0 +1,93 @@
+"""acceleration advisor: query history and candidates
+
+Revision ID: accadv01
+Revises: qclease01
+Create Date: 2026-10-16 00:00:00.000000
+
+  - query_fingerprints      : per-connection aggregates of captured agent
+                              queries, one row per normalized query shape.
+  - acceleration_candidates : ranked custom-query proposals computed from
+                              them, with the admin's accept/dismiss decision.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'accadv01'
+down_revision: Union[str, None] = 'qclease01'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _base_columns():
+    return [
+        sa.Column('id', sa.String(length=36), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column('deleted_at', sa.DateTime(), nullable=True),
+    ]
+
+
+def upgrade() -> None:
+    op.create_table(
+        'query_fingerprints',
+        *_base_columns(),
+        sa.Column('organization_id', sa.String(length=36), nullable=False),
+        sa.Column('connection_id', sa.String(length=36), nullable=False),
+        sa.Column('fingerprint', sa.String(length=64), nullable=False),
+        sa.Column('sample_sql', sa.Text(), nullable=False),
+        sa.Column('tables', sa.JSON(), nullable=False),
+        sa.Column('executions', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('total_ms', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('max_ms', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('total_rows', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('total_bytes', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('first_seen_at', sa.DateTime(), nullable=False),
+        sa.Column('last_seen_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['organization_id'], ['organizations.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['connection_id'], ['connections.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('connection_id', 'fingerprint', name='uq_query_fingerprint_connection'),
+    )
+    op.create_index('ix_query_fingerprint_recent', 'query_fingerprints', ['connection_id', 'last_seen_at'])
+    op.create_index(op.f('ix_query_fingerprints_id'), 'query_fingerprints', ['id'])
+
+    op.create_table(
+        'acceleration_candidates',
+        *_base_columns(),
+        sa.Column('organization_id', sa.String(length=36), nullable=False),
+        sa.Column('connection_id', sa.String(length=36), nullable=False),
+        sa.Column('cluster_key', sa.String(length=64), nullable=False),
+        sa.Column('tables', sa.JSON(), nullable=False),
+        sa.Column('definition_sql', sa.Text(), nullable=False),
+        sa.Column('suggested_name', sa.String(length=63), nullable=False),
+        sa.Column('fingerprints', sa.JSON(), nullable=False),
+        sa.Column('query_shapes', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('executions', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('total_ms', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('score', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('estimate', sa.JSON(), nullable=True),
+        sa.Column('estimated_at', sa.DateTime(), nullable=True),
+        sa.Column('status', sa.String(length=16), nullable=False, server_default='open'),
+        sa.Column('custom_query_id', sa.String(length=36), nullable=True),
+        sa.Column('computed_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['organization_id'], ['organizations.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['connection_id'], ['connections.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('connection_id', 'cluster_key', name='uq_accel_candidate_cluster'),
+    )
+    op.create_index(
+        op.f('ix_acceleration_candidates_connection_id'), 'acceleration_candidates', ['connection_id'],
+    )
+    op.create_index(op.f('ix_acceleration_candidates_id'), 'acceleration_candidates', ['id'])
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_acceleration_candidates_id'), table_name='acceleration_candidates')
+    op.drop_index(op.f('ix_acceleration_candidates_connection_id'), table_name='acceleration_candidates')
+    op.drop_table('acceleration_candidates')
+    op.drop_index(op.f('ix_query_fingerprints_id'), table_name='query_fingerprints')
+    op.drop_index('ix_query_fingerprint_recent', table_name='query_fingerprints')
+    op.drop_table('query_fingerprints')
@@ -0,0 +1,47 @@
+"""acceleration advisor: per-day query load
+
+Revision ID: accadv02
+Revises: agrun01
+Create Date: 2026-10-16 00:00:00.000000
+
+  - query_fingerprint_days : one row per (connection, query shape, day) with
+                             that day's executions and source time; the
+                             advisor ranks on the buckets inside its lookback
+                             window instead of the lifetime totals.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'accadv02'
+down_revision: Union[str, None] = 'agrun01'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'query_fingerprint_days',
+        sa.Column('id', sa.String(length=36), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column('deleted_at', sa.DateTime(), nullable=True),
+        sa.Column('connection_id', sa.String(length=36), nullable=False),
+        sa.Column('fingerprint', sa.String(length=64), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('executions', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('total_ms', sa.Float(), nullable=False, server_default='0'),
+        sa.ForeignKeyConstraint(['connection_id'], ['connections.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('connection_id', 'fingerprint', 'day', name='uq_query_fingerprint_day'),
+    )
+    op.create_index('ix_query_fingerprint_day_window', 'query_fingerprint_days', ['connection_id', 'day'])
+    op.create_index(op.f('ix_query_fingerprint_days_id'), 'query_fingerprint_days', ['id'])
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_query_fingerprint_days_id'), table_name='query_fingerprint_days')
+    op.drop_index('ix_query_fingerprint_day_window', table_name='query_fingerprint_days')
+    op.drop_table('query_fingerprint_days')
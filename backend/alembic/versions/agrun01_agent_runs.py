@@ -0,0 +1,52 @@
+"""agent run queue
+
+Revision ID: agrun01
+Revises: cevlog01
+Create Date: 2026-10-16 00:00:00.000000
+
+  - agent_runs : agent runs queued by web workers for bow-agent-worker
+                 processes, with the claiming worker's lease.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'agrun01'
+down_revision: Union[str, None] = 'cevlog01'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'agent_runs',
+        sa.Column('id', sa.String(length=36), nullable=False),
+        sa.Column('system_completion_id', sa.String(length=36), nullable=False),
+        sa.Column('report_id', sa.String(length=36), nullable=False),
+        sa.Column('head_completion_id', sa.String(length=36), nullable=False),
+        sa.Column('status', sa.String(length=16), nullable=False),
+        sa.Column('options', sa.JSON(), nullable=True),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('holder', sa.String(length=128), nullable=True),
+        sa.Column('enqueued_at', sa.DateTime(), nullable=False),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.Column('lease_expires_at', sa.DateTime(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column('deleted_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['system_completion_id'], ['completions.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('system_completion_id'),
+    )
+    op.create_index(op.f('ix_agent_runs_id'), 'agent_runs', ['id'])
+    op.create_index('ix_agent_runs_status_enqueued', 'agent_runs', ['status', 'enqueued_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_agent_runs_status_enqueued', table_name='agent_runs')
+    op.drop_index(op.f('ix_agent_runs_id'), table_name='agent_runs')
+    op.drop_table('agent_runs')
@@ -0,0 +1,37 @@
+"""completion event log
+
+Revision ID: cevlog01
+Revises: evtx01
+Create Date: 2026-10-16 00:00:00.000000
+
+  - completion_events : per-completion, sequence-numbered SSE events, read
+                        back to resume a stream from Last-Event-ID.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'cevlog01'
+down_revision: Union[str, None] = 'evtx01'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'completion_events',
+        sa.Column('completion_id', sa.String(length=36), nullable=False),
+        sa.Column('seq', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('event', sa.String(length=64), nullable=False),
+        sa.Column('payload', sa.Text(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('completion_id', 'seq'),
+    )
+    op.create_index(op.f('ix_completion_events_created_at'), 'completion_events', ['created_at'])
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_completion_events_created_at'), table_name='completion_events')
+    op.drop_table('completion_events')
@@ -0,0 +1,69 @@
+"""context cache: version stamps and shared entries
+
+Revision ID: ctxcache01
+Revises: accadv01
+Create Date: 2026-10-16 00:00:00.000000
+
+  - context_cache_versions : per-organization stamp of the schema and the
+                             instruction context, bumped in the writer's
+                             transaction whenever a feeding row changes.
+  - context_cache_entries  : serialized context sections shared by every
+                             worker, keyed by a digest that includes the
+                             stamps.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'ctxcache01'
+down_revision: Union[str, None] = 'accadv01'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _base_columns():
+    return [
+        sa.Column('id', sa.String(length=36), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column('deleted_at', sa.DateTime(), nullable=True),
+    ]
+
+
+def upgrade() -> None:
+    op.create_table(
+        'context_cache_versions',
+        *_base_columns(),
+        sa.Column('organization_id', sa.String(length=36), nullable=False),
+        sa.Column('kind', sa.String(length=16), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False, server_default='0'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('organization_id', 'kind', name='uq_context_cache_version_org_kind'),
+    )
+    op.create_index(op.f('ix_context_cache_versions_id'), 'context_cache_versions', ['id'])
+
+    op.create_table(
+        'context_cache_entries',
+        *_base_columns(),
+        sa.Column('cache_key', sa.String(length=64), nullable=False),
+        sa.Column('organization_id', sa.String(length=36), nullable=False),
+        sa.Column('kind', sa.String(length=16), nullable=False),
+        sa.Column('payload', sa.LargeBinary(), nullable=False),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('cache_key'),
+    )
+    op.create_index(
+        'ix_context_cache_entries_org_expires', 'context_cache_entries', ['organization_id', 'expires_at'],
+    )
+    op.create_index(op.f('ix_context_cache_entries_id'), 'context_cache_entries', ['id'])
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_context_cache_entries_id'), table_name='context_cache_entries')
+    op.drop_index('ix_context_cache_entries_org_expires', table_name='context_cache_entries')
+    op.drop_table('context_cache_entries')
+    op.drop_index(op.f('ix_context_cache_versions_id'), table_name='context_cache_versions')
+    op.drop_table('context_cache_versions')
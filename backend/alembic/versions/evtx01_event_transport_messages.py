@@ -0,0 +1,41 @@
+"""event transport messages
+
+Revision ID: evtx01
+Revises: llmrc01
+Create Date: 2026-10-16 00:00:00.000000
+
+  - event_transport_messages : cross-worker events that did not travel
+                               inline — NOTIFY payloads too large for
+                               Postgres, and every event on SQLite, where
+                               workers poll for new ids.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'evtx01'
+down_revision: Union[str, None] = 'llmrc01'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'event_transport_messages',
+        sa.Column('id', sa.BigInteger().with_variant(sa.Integer(), 'sqlite'), autoincrement=True, nullable=False),
+        sa.Column('channel', sa.String(), nullable=False),
+        sa.Column('origin', sa.String(length=128), nullable=False),
+        sa.Column('payload', sa.Text(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(
+        op.f('ix_event_transport_messages_created_at'), 'event_transport_messages', ['created_at'],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_event_transport_messages_created_at'), table_name='event_transport_messages')
+    op.drop_table('event_transport_messages')
@@ -0,0 +1,41 @@
+"""incremental refresh on custom queries
+
+Revision ID: fastq003
+Revises: shrdata01
+Create Date: 2026-10-16 00:00:00.000000
+
+An opt-in mode where a refresh fetches only rows past a stored high-water mark
+and applies them to a copy of the previous artifact, instead of re-running the
+whole query. Existing rows keep refresh_mode NULL, which means 'full'.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'fastq003'
+down_revision: Union[str, None] = 'shrdata01'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('connection_tables', sa.Column('refresh_mode', sa.String(), nullable=True))
+    op.add_column('connection_tables', sa.Column('watermark_column', sa.String(), nullable=True))
+    op.add_column('connection_tables', sa.Column('merge_key', sa.String(), nullable=True))
+    op.add_column('connection_tables', sa.Column('full_refresh_every', sa.Integer(), nullable=True))
+    op.add_column('connection_tables', sa.Column('watermark_value', sa.JSON(), nullable=True))
+    op.add_column(
+        'connection_tables',
+        sa.Column('refreshes_since_full', sa.Integer(), nullable=False, server_default='0'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('connection_tables', 'refreshes_since_full')
+    op.drop_column('connection_tables', 'watermark_value')
+    op.drop_column('connection_tables', 'full_refresh_every')
+    op.drop_column('connection_tables', 'merge_key')
+    op.drop_column('connection_tables', 'watermark_column')
+    op.drop_column('connection_tables', 'refresh_mode')
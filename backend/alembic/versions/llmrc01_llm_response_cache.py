@@ -0,0 +1,62 @@
+"""llm response cache
+
+Revision ID: llmrc01
+Revises: ctxcache01
+Create Date: 2026-10-16 00:00:00.000000
+
+  - llm_response_cache_entries : stored responses of opted-in auxiliary LLM
+                                 calls, keyed by a digest of model, prompt,
+                                 temperature and tool schemas.
+  - llm_usage_records.cache_hit : marks the zero-cost record a cache hit
+                                  leaves in place of a provider call.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'llmrc01'
+down_revision: Union[str, None] = 'ctxcache01'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'llm_response_cache_entries',
+        sa.Column('id', sa.String(length=36), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column('deleted_at', sa.DateTime(), nullable=True),
+        sa.Column('cache_key', sa.String(length=64), nullable=False),
+        sa.Column('organization_id', sa.String(length=36), nullable=True),
+        sa.Column('scope', sa.String(), nullable=False),
+        sa.Column('llm_model_id', sa.String(length=36), nullable=True),
+        sa.Column('response', sa.Text(), nullable=False),
+        sa.Column('prompt_tokens', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('completion_tokens', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('hits', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('cache_key'),
+    )
+    op.create_index(op.f('ix_llm_response_cache_entries_id'), 'llm_response_cache_entries', ['id'])
+    op.create_index(
+        'ix_llm_response_cache_org_scope', 'llm_response_cache_entries', ['organization_id', 'scope'],
+    )
+    op.create_index('ix_llm_response_cache_expires', 'llm_response_cache_entries', ['expires_at'])
+
+    with op.batch_alter_table('llm_usage_records') as batch_op:
+        batch_op.add_column(
+            sa.Column('cache_hit', sa.Boolean(), nullable=False, server_default=sa.false())
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('llm_usage_records') as batch_op:
+        batch_op.drop_column('cache_hit')
+    op.drop_index('ix_llm_response_cache_expires', table_name='llm_response_cache_entries')
+    op.drop_index('ix_llm_response_cache_org_scope', table_name='llm_response_cache_entries')
+    op.drop_index(op.f('ix_llm_response_cache_entries_id'), table_name='llm_response_cache_entries')
+    op.drop_table('llm_response_cache_entries')
@@ -0,0 +1,55 @@
+"""cluster-wide query concurrency leases
+
+Revision ID: qclease01
+Revises: steprs01
+Create Date: 2026-10-16 00:00:00.000000
+
+Adds query_concurrency_leases, the shared queue + slot table behind
+BOW_QUERY_CONCURRENCY_SCOPE=global. Unused (and empty) in the default
+per-replica scope.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'qclease01'
+down_revision: Union[str, None] = 'steprs01'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'query_concurrency_leases',
+        sa.Column('id', sa.String(length=36), nullable=False),
+        sa.Column('connection_id', sa.String(length=36), nullable=False),
+        sa.Column('slot_no', sa.Integer(), nullable=True),
+        sa.Column('holder', sa.String(length=128), nullable=False),
+        sa.Column('enqueued_at', sa.DateTime(), nullable=False),
+        sa.Column('acquired_at', sa.DateTime(), nullable=True),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column('deleted_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['connection_id'], ['connections.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('connection_id', 'slot_no', name='uq_query_lease_connection_slot'),
+    )
+    op.create_index(
+        'ix_query_lease_queue',
+        'query_concurrency_leases',
+        ['connection_id', 'enqueued_at'],
+    )
+    op.create_index(
+        op.f('ix_query_concurrency_leases_id'),
+        'query_concurrency_leases',
+        ['id'],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_query_concurrency_leases_id'), table_name='query_concurrency_leases')
+    op.drop_index('ix_query_lease_queue', table_name='query_concurrency_leases')
+    op.drop_table('query_concurrency_leases')
@@ -0,0 +1,32 @@
+"""step result row store
+
+Revision ID: steprs01
+Revises: fastq003
+Create Date: 2026-10-16 00:00:00.000000
+
+Large step results move out of steps.data into an encrypted DuckDB file per
+step; steps.data keeps a bounded preview. Existing rows keep these NULL and
+are served from steps.data exactly as before.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'steprs01'
+down_revision: Union[str, None] = 'fastq003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('steps', sa.Column('result_path', sa.String(), nullable=True))
+    op.add_column('steps', sa.Column('result_key_enc', sa.Text(), nullable=True))
+    op.add_column('steps', sa.Column('result_rows', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('steps', 'result_rows')
+    op.drop_column('steps', 'result_key_enc')
+    op.drop_column('steps', 'result_path')
@@ -0,0 +1,238 @@
+"""``bow-agent-worker``: a process that executes queued agent runs.
+
+Runs next to the web tier when ``BOW_AGENT_EXECUTION=queue`` (see
+`app.services.agent_run_queue` for the queue and its leases). Each process
+keeps up to ``BOW_AGENT_WORKER_CONCURRENCY`` runs in flight (default:
+``BOW_MAX_CONCURRENT_AGENTS``, 12). It claims new runs when woken by an
+enqueue on the event transport, or every ``BOW_AGENT_WORKER_POLL_SECONDS``
+(2s) otherwise, renews its leases, and sweeps expired leases of dead
+workers.
+
+A run executes exactly like a dispatcher-started turn in a web worker
+(`CompletionService._run_dispatched_agent`): the stream is registered here
+and reaches clients through the cross-worker transport and the completion
+event log, while stop and steering reach the agent through the DB and the
+completion event bus as before.
+
+On SIGTERM the worker stops claiming and gives in-flight runs
+``BOW_AGENT_WORKER_DRAIN_SECONDS`` (300s) to finish, renewing their leases
+meanwhile. Runs still going then
+are cancelled and their leases expired at once, so another worker recovers
+them without waiting out the lease.
+
+    bow-agent-worker                # or: python -m app.agent_worker
+"""
+
+import asyncio
+import logging
+import os
+import signal
+import socket
+import uuid
+from typing import Awaitable, Callable, Dict, Optional
+
+from sqlalchemy import select
+
+from app.models.agent_run import AgentRun
+from app.models.completion import Completion
+from app.services import agent_run_queue
+from app.settings.database import create_async_session_factory
+from app.streaming import event_transport
+
+logger = logging.getLogger(__name__)
+
+Runner = Callable[[AgentRun], Awaitable[None]]
+
+
+def _env_number(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+async def run_agent(run: AgentRun) -> None:
+    """Execute one claimed run (errors are recorded on the completion)."""
+    from app.services.completion_service import CompletionService
+    options = run.options or {}
+    await CompletionService()._run_dispatched_agent(
+        run.report_id,
+        run.head_completion_id,
+        run.system_completion_id,
+        build_id=options.get("build_id"),
+        platform=options.get("platform"),
+    )
+
+
+class AgentWorker:
+    def __init__(self, *, concurrency: Optional[int] = None, runner: Optional[Runner] = None):
+        default = _env_number("BOW_MAX_CONCURRENT_AGENTS", 12)
+        self.concurrency = max(1, int(concurrency or _env_number("BOW_AGENT_WORKER_CONCURRENCY", default)))
+        # Host and pid alone repeat across container restarts (pid 1 again on
+        # the same hostname), which would let a new worker renew and finish the
+        # leases of the one it replaced.
+        self.holder = f"{socket.gethostname()[:100]}:{os.getpid()}:{uuid.uuid4().hex[:12]}"
+        self._runner = runner or run_agent
+        self._session_factory = create_async_session_factory()
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._wake = asyncio.Event()
+
+    @property
+    def running(self) -> int:
+        return len(self._tasks)
+
+    def _on_enqueued(self, payload: dict) -> None:
+        self._wake.set()
+
+    async def claim_and_start(self) -> int:
+        """Claim as many runs as there are free slots and start them."""
+        free = self.concurrency - len(self._tasks)
+        if free <= 0:
+            return 0
+        async with self._session_factory() as db:
+            runs = await agent_run_queue.claim(db, holder=self.holder, limit=free)
+        for run in runs:
+            logger.info(f"[agent_worker] claimed run {run.id} (completion {run.system_completion_id}, attempt {run.attempts})")
+            self._tasks[str(run.id)] = asyncio.get_running_loop().create_task(self._execute(run))
+        return len(runs)
+
+    async def _execute(self, run: AgentRun) -> None:
+        status, error = "done", None
+        try:
+            async with self._session_factory() as db:
+                completion_status = (await db.execute(
+                    select(Completion.status).where(Completion.id == run.system_completion_id)
+                )).scalar_one_or_none()
+            if completion_status == "in_progress":
+                await self._runner(run)
+            else:
+                # Stopped (or deleted) while it waited in the queue.
+                logger.info(f"[agent_worker] skipping run {run.id}: completion is {completion_status}")
+        except asyncio.CancelledError:
+            try:
+                async with self._session_factory() as db:
+                    await agent_run_queue.abandon(db, run_id=str(run.id), holder=self.holder)
+            except Exception:
+                logger.exception(f"[agent_worker] could not abandon run {run.id}")
+            raise
+        except Exception as e:
+            logger.exception(f"[agent_worker] run {run.id} failed")
+            status, error = "failed", f"{type(e).__name__}: {e}"
+        finally:
+            self._tasks.pop(str(run.id), None)
+            self._wake.set()
+        try:
+            async with self._session_factory() as db:
+                if not await agent_run_queue.finish(db, run_id=str(run.id), holder=self.holder, status=status, error=error):
+                    logger.warning(f"[agent_worker] run {run.id} finished after its lease was lost")
+        except Exception:
+            logger.exception(f"[agent_worker] could not record the end of run {run.id}")
+
+    async def renew_leases(self) -> None:
+        """Extend held leases; stop runs this worker no longer holds."""
+        if not self._tasks:
+            return
+        async with self._session_factory() as db:
+            held = await agent_run_queue.renew(db, holder=self.holder, run_ids=list(self._tasks))
+        for run_id, task in list(self._tasks.items()):
+            if run_id not in held:
+                logger.warning(f"[agent_worker] lost the lease on run {run_id}; stopping it")
+                task.cancel()
+
+    async def recover(self) -> None:
+        async with self._session_factory() as db:
+            requeued, failed = await agent_run_queue.recover_expired(db)
+        if requeued:
+            self._wake.set()
+
+    async def _maintenance(self, stop: asyncio.Event) -> None:
+        interval = agent_run_queue.lease_seconds() / 3
+        while True:
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=interval)
+                return
+            except asyncio.TimeoutError:
+                pass
+            for step in (self.renew_leases, self.recover):
+                try:
+                    await step()
+                except Exception:
+                    logger.exception(f"[agent_worker] {step.__name__} failed")
+
+    async def serve(self, stop: asyncio.Event) -> None:
+        """Claim and execute runs until `stop` is set, then drain."""
+        transport = event_transport.get_transport()
+        transport.listen(agent_run_queue.ENQUEUED_CHANNEL, self._on_enqueued)
+        # Not `stop`: leases must keep being renewed while draining, or they
+        # expire mid-drain and another worker recovers runs still going here.
+        drained = asyncio.Event()
+        maintenance = asyncio.get_running_loop().create_task(self._maintenance(drained))
+        poll = max(0.1, _env_number("BOW_AGENT_WORKER_POLL_SECONDS", 2.0))
+        logger.info(f"[agent_worker] {self.holder} serving up to {self.concurrency} runs")
+        try:
+            while not stop.is_set():
+                self._wake.clear()
+                try:
+                    await self.claim_and_start()
+                except Exception:
+                    logger.exception("[agent_worker] claim failed")
+                waiters = [asyncio.ensure_future(self._wake.wait()), asyncio.ensure_future(stop.wait())]
+                try:
+                    await asyncio.wait(waiters, timeout=poll, return_when=asyncio.FIRST_COMPLETED)
+                finally:
+                    for w in waiters:
+                        w.cancel()
+        finally:
+            transport.unlisten(agent_run_queue.ENQUEUED_CHANNEL, self._on_enqueued)
+            try:
+                await self._drain()
+            finally:
+                drained.set()
+                maintenance.cancel()
+
+    async def _drain(self) -> None:
+        tasks = list(self._tasks.values())
+        if not tasks:
+            return
+        grace = max(0.0, _env_number("BOW_AGENT_WORKER_DRAIN_SECONDS", 300.0))
+        logger.info(f"[agent_worker] waiting up to {grace:.0f}s for {len(tasks)} run(s)")
+        _, pending = await asyncio.wait(tasks, timeout=grace)
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+
+async def _serve() -> None:
+    from app.ai.llm.clients import client_pool as llm_client_pool
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except (NotImplementedError, RuntimeError):
+            pass
+    try:
+        from app.services.agent_runtime_warmup import warm_agent_runtime
+        await warm_agent_runtime()
+    except Exception:
+        logger.exception("Agent runtime warmup failed; continuing startup")
+    transport = event_transport.get_transport()
+    await transport.start()
+    try:
+        await AgentWorker().serve(stop)
+    finally:
+        await transport.stop()
+        await llm_client_pool.aclose_all()
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    if not agent_run_queue.enabled():
+        logger.warning("BOW_AGENT_EXECUTION is not 'queue': web workers run agents themselves and enqueue nothing")
+    asyncio.run(_serve())
+
+
+if __name__ == "__main__":
+    main()
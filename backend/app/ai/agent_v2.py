@@ -368,6 +368,7 @@ from app.ai.context import ContextHub, ContextBuildSpec
 from app.ai.context.context_hub import DEFAULT_CONTEXT_LIMITS
 from app.ai.context.builders.observation_context_builder import ObservationContextBuilder
 from app.ai.context.parts import ToolCallPart
+from app.ai.context.render_memo import SectionRenderMemo
 from app.ai.context.result_parts import build_result_part
 from app.ai.context.transcript import Transcript
 from app.ai.registry import ToolRegistry, ToolCatalogFilter
@@ -395,12 +396,14 @@ from app.ai.agents.judge.judge import Judge, judge_model_allowed
 from app.ai.agents.suggest_instructions import InstructionTriggerEvaluator
 from app.dependencies import async_session_maker
 from app.core.telemetry import telemetry
+from app.core import phase_trace
 from app.ai.utils.token_counter import count_tokens
 from app.services.instruction_usage_service import InstructionUsageService
 from app.ai.llm.types import ImageInput
 from app.ai.llm.image_utils import normalize_image_input
 from app.ai.llm.usage_attribution import set_usage_attribution, reset_usage_attribution
 from app.services.usage_policy_service import UsageLimitContext
+from app.services import step_result_store
 from app.core.otel import get_tracer
 
 INDEX_LIMIT = 1000  # Number of tables to include in the index
@@ -608,19 +611,22 @@ class AgentV2:
         # Uploaded images for this run, resolved once (base64 of every attached
         # picture) and reused each iteration.
         self._user_images_cache: Optional[list] = None
+        # Rendered context sections, reused across iterations while their
+        # content is unchanged (see app.ai.context.render_memo).
+        self._render_memo = SectionRenderMemo()
 
         # Steering: user messages injected into this run while it executes
         # (role='user', message_type='steering', parent_id=system_completion.id
-        # rows). The websocket broadcast is the same-worker fast path; the main
-        # loop also polls the DB each iteration so steers submitted through
-        # another uvicorn worker still land.
+        # rows). The event bus delivers them instantly, from this worker or
+        # relayed from another; the main loop also polls the DB each iteration
+        # so a steer whose relay was dropped still lands.
         self._steering_pending: dict[str, str] = {}   # id -> content, from WS fast path
         self._steering_seen_ids: set[str] = set()     # ids already injected
         self._steering_texts: list[str] = []          # injected texts, arrival order
-        # Hard steer: set on same-worker steering arrival so the in-flight
-        # planner stream can abort and re-plan immediately instead of waiting
-        # for the current decision to finish. (Cross-worker steers land at the
-        # next loop-top DB poll — they can't interrupt mid-stream.)
+        # Hard steer: set on steering arrival through the event bus so the
+        # in-flight planner stream can abort and re-plan immediately instead
+        # of waiting for the current decision to finish. (Steers only found by
+        # the loop-top DB poll can't interrupt mid-stream.)
         self._steering_interrupt = asyncio.Event()
 
         # SSE event queue for streaming
@@ -1298,9 +1304,8 @@ class AgentV2:
                             columns = [c.get("name") for c in cols if isinstance(c, dict) and c.get("name")]
                         data_payload = step.data if isinstance(step.data, dict) else None
                         if data_payload:
-                            rows = data_payload.get("rows")
-                            if isinstance(rows, list):
-                                row_count = len(rows)
+                            if isinstance(data_payload.get("rows"), list):
+                                row_count = step_result_store.row_count(data_payload)
                             if not columns:
                                 data_cols = data_payload.get("columns") or []
                                 columns = [
@@ -1491,7 +1496,11 @@ class AgentV2:
             except Exception as e:
                 logger.warning(f"Failed to build context during token estimation: {e}", exc_info=True)
             prompt_text = await self._build_planner_prompt_text()
-            prompt_tokens = count_tokens(prompt_text, getattr(self.model, "model_id", None))
+            prompt_tokens = count_tokens(
+                prompt_text,
+                getattr(self.model, "model_id", None),
+                provider=getattr(getattr(self.model, "provider", None), "provider_type", None),
+            )
 
             model_limit = getattr(self.model, "context_window_tokens", None)
             remaining_tokens = None
@@ -2340,6 +2349,10 @@ class AgentV2:
                 )
                 * self._context_budget_factor
             )
+            # Measured in the current model's calibration (it may have
+            # changed mid-run through routing or fallback).
+            self.transcript.provider = getattr(getattr(self.model, "provider", None), "provider_type", None)
+            self.transcript.model_id = getattr(self.model, "model_id", None)
             stats = self.transcript.fit_to_budget(max(budget, 1))
             if stats.get("digested") or stats.get("dropped"):
                 logger.info(
@@ -2747,9 +2760,11 @@ class AgentV2:
         """Persist partial planning reasoning/content into the (pre-created)
         decision block, inserting the skeleton row on first call.
 
-        Called on the PlanningTextStreamer snapshot cadence (~1.2s) so a client
-        resuming from persisted state — page refresh, watch-endpoint DB tail —
-        sees live partial text instead of an empty block. decision.final's
+        Called on the PlanningTextStreamer snapshot cadence (~1.2s), for the
+        first snapshot and whenever `_append_planning_block_partial` can't
+        extend the stored text. A client resuming from persisted state (a page
+        refresh, the watch endpoint's DB tail) then sees live partial text
+        instead of an empty block. decision.final's
         upsert_block_for_decision finds this row by (agent_execution_id,
         loop_index, source_type='decision') and completes it in place, keeping
         the block id stable with the streamed placeholder.
@@ -2787,6 +2802,36 @@ class AgentV2:
             except Exception:
                 pass
 
+    async def _append_planning_block_partial(self, block_id: str, field: str, offset: int, text: str) -> bool:
+        """Append streamed planning text to the decision block's `field`.
+
+        The incremental form of `_persist_planning_block_partial`: one UPDATE
+        carrying only the new text, applied only while the stored value is
+        exactly `offset` characters long. Returns False when nothing matched
+        (no row yet, or the stored text diverged) so the caller rewrites the
+        whole field instead.
+        """
+        try:
+            if not block_id or field not in ("reasoning", "content"):
+                return False
+            from app.models.completion_block import CompletionBlock
+            column = getattr(CompletionBlock, field)
+            stored = func.coalesce(column, "")
+            result = await self.db.execute(
+                sa_update(CompletionBlock)
+                .where(CompletionBlock.id == block_id, func.length(stored) == offset)
+                .values({field: stored.concat(text)})
+                .execution_options(synchronize_session="fetch")
+            )
+            await self.db.commit()
+            return result.rowcount == 1
+        except Exception:
+            try:
+                await self.db.rollback()
+            except Exception:
+                pass
+            return False
+
     async def _capture_telemetry_background(self, event_name: str, properties: dict):
         """Capture telemetry in background to avoid blocking main execution."""
         try:
@@ -4168,23 +4213,26 @@ class AgentV2:
                         messages_section = view.warm.messages
                         if messages_section is None:
                             messages_section = await self.context_hub.message_builder.build(max_messages=DEFAULT_CONTEXT_LIMITS["messages_max"])
-                        messages_context = messages_section.render() if messages_section else ""
+                        # Sections render through the run's memo: one whose content
+                        # is unchanged since the last iteration reuses that string.
+                        _memo = self._render_memo
+                        messages_context = _memo.render(messages_section)
                         # Use cached resources from prime_static() - static, no need to rebuild
                         resources_section = view.static.resources
-                        resources_context = resources_section.render() if resources_section else ""
+                        resources_context = _memo.render(resources_section)
                         # Smaller combined excerpt to control tokens per-iteration
                         try:
-                            resources_combined_small = resources_section.render_combined(top_k_per_repo=10, index_limit=200) if resources_section else ""
+                            resources_combined_small = _memo.render(resources_section, "render_combined", top_k_per_repo=10, index_limit=200)
                         except Exception:
                             resources_combined_small = resources_context
                         # Files context (uploaded files schemas/metadata) - use cached
-                        files_context = view.static.files.render() if getattr(view.static, "files", None) else ""
+                        files_context = _memo.render(getattr(view.static, "files", None))
                         # Mentions context (current user turn mentions)
-                        mentions_context = (view.warm.mentions.render() if getattr(view.warm, "mentions", None) else "")
+                        mentions_context = _memo.render(getattr(view.warm, "mentions", None))
                         # Entities context (catalog entities relevant to this turn)
-                        entities_context = (view.warm.entities.render() if getattr(view.warm, "entities", None) else "")
+                        entities_context = _memo.render(getattr(view.warm, "entities", None))
                         # Active scheduled tasks for this report (for dedupe + cancellation)
-                        scheduled_tasks_context = (view.warm.scheduled_tasks.render() if getattr(view.warm, "scheduled_tasks", None) else "")
+                        scheduled_tasks_context = _memo.render(getattr(view.warm, "scheduled_tasks", None))
                         # Loadable prior steps (so the planner prefers reuse via load_step)
                         available_steps_context = await self._build_available_steps_context()
 
@@ -4270,6 +4318,7 @@ class AgentV2:
                             past_observations=self.context_hub.observation_builder.tool_observations,
                             transcript=self.transcript,
                             provider_name=getattr(getattr(self.model, "provider", None), "provider_type", None),
+                            model_id=getattr(self.model, "model_id", None),
                             context_window_tokens=getattr(self.model, "context_window_tokens", None),
                             external_platform=self.platform,
                             tool_catalog=self.planner.tool_catalog,
@@ -4317,6 +4366,7 @@ class AgentV2:
                             planner_input,
                             model_context_window=_ctx_window,
                         )
+                        self._trace_prompt_render(planner_input, loop_index)
                         # Kick off early scoring in background without blocking the loop (isolated DB session).
                         # Only on the first planner step: this scores the *initial* instructions/context
                         # effectiveness for the turn. It previously fired every iteration, doing N redundant
@@ -4407,6 +4457,8 @@ class AgentV2:
                                 reasoning=reasoning,
                                 content=content,
                             )
+                        async def _append_partial(field: str, offset: int, text: str, _bid=current_block_id):
+                            return await self._append_planning_block_partial(_bid, field, offset, text)
                         plan_streamer = PlanningTextStreamer(
                             emit=self._emit_sse_event,
                             seq_fn=_next_seq,
@@ -4414,6 +4466,7 @@ class AgentV2:
                             agent_execution_id=str(self.current_execution.id),
                             block_id=current_block_id,
                             persist=_persist_partials,
+                            persist_append=_append_partial,
                         )
                     else:
                         plan_streamer = None
@@ -6473,6 +6526,27 @@ class AgentV2:
                 except Exception:
                     pass
 
+    def _trace_prompt_render(self, planner_input, loop_index: int) -> None:
+        """Report this iteration's section rendering through phase_trace: time
+        spent, memo hit ratio, and whether the run-stable prompt prefix moved
+        (a moved prefix misses the provider's prompt cache)."""
+        try:
+            changed = self._render_memo.static_prefix(
+                getattr(planner_input, attr, None)
+                for attr in (
+                    "project_context", "instructions", "agents_roster", "schemas_combined",
+                    "files_context", "resources_combined", "tools_context",
+                )
+            )
+            stats = self._render_memo.take_iteration_stats()
+            if phase_trace.ENABLED and self.system_completion is not None:
+                phase_trace.mark(
+                    str(self.system_completion.id), "planner_prompt_render",
+                    loop_index=loop_index, static_prefix_changed=changed, **stats,
+                )
+        except Exception:
+            logger.debug("prompt render trace failed", exc_info=True)
+
     async def _build_planner_prompt_text(self, view=None) -> str:
         if view is None:
             view = self.context_hub.get_view()
@@ -6486,6 +6560,7 @@ class AgentV2:
         try:
             schemas_ctx = await self.context_hub.schema_builder.build(
                 with_stats=True,
+                query=getattr(self.context_hub, "retrieval_query", None),
             )
             schemas_combined, agents_roster = await self._render_schemas_with_roster(schemas_ctx)
         except Exception:
@@ -11,6 +11,14 @@ from app.schemas.ai.planner import PlannerInput
 import asyncio
 
 
+def _is_json_object(response) -> bool:
+    """Cache check for the scoring calls: only a response they can parse."""
+    try:
+        return isinstance(json.loads(response), dict)
+    except (TypeError, ValueError):
+        return False
+
+
 def judge_model_allowed(model) -> bool:
     """Whether the BACKGROUND scoring judge may run on this model.
 
@@ -88,8 +96,11 @@ class Judge:
         # retry the inference once before declaring the judge unusable —
         # a parse failure here fails the CASE, not just the rule.
         for _attempt in range(2):
+            # Only a parseable verdict is cached, so the retry below never
+            # replays the response it is retrying.
             response = await asyncio.to_thread(
-                self.llm.inference, judge_prompt, usage_scope="judge.test_case"
+                self.llm.inference, judge_prompt, usage_scope="judge.test_case",
+                cache_response=True, cache_accept=lambda r: self._parse_verdict(r) is not None,
             )
             result = self._parse_verdict(response)
             if result is not None:
@@ -188,7 +199,8 @@ class Judge:
 
             # Offload potentially blocking LLM call to a thread to avoid blocking the event loop
             response = await asyncio.to_thread(
-                self.llm.inference, scoring_prompt, usage_scope="judge.instructions_context"
+                self.llm.inference, scoring_prompt, usage_scope="judge.instructions_context",
+                cache_response=True, cache_accept=_is_json_object,
             )
             try:
                 scores = json.loads(response)
@@ -263,7 +275,8 @@ class Judge:
 
             # Offload potentially blocking LLM call to a thread to avoid blocking the event loop
             response = await asyncio.to_thread(
-                self.llm.inference, scoring_prompt, usage_scope="judge.response_quality"
+                self.llm.inference, scoring_prompt, usage_scope="judge.response_quality",
+                cache_response=True, cache_accept=_is_json_object,
             )
 
             try:
@@ -49,6 +49,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.ai.llm import LLM
 from app.ai.llm.types import (
+    CacheBreakpoints,
     LLMStreamEvent,
     Message,
     MessageStopEvent,
@@ -178,6 +179,10 @@ class PlannerV3:
             )
             for t in v3_input.tools
         ]
+        # The system prompt, tool schemas and settled transcript turns are
+        # byte-stable across iterations; mark them once for every provider's
+        # prompt cache.
+        cache = CacheBreakpoints.for_prefix(v3_input.system, tools)
 
         # Per-tool accumulators. Anthropic supports multiple tool_use blocks
         # per response (parallel tool calls); we now collect ALL of them so
@@ -215,6 +220,7 @@ class PlannerV3:
                 usage_scope="planner",
                 usage_scope_ref_id=None,
                 prompt_tokens_estimate=prompt_tokens_est,
+                cache=cache,
             ):
                 _etype = getattr(evt, "type", None) or evt.__class__.__name__
                 event_type_counts[_etype] = event_type_counts.get(_etype, 0) + 1
@@ -160,7 +160,10 @@ def build_transcript(planner_input: Any, static_context: str, ask: str) -> Trans
     Turn 0 carries the static context — byte-stable for the run, so it is the
     natural cache prefix. Turn 1 is the ask.
     """
-    t = Transcript()
+    t = Transcript(
+        provider=getattr(planner_input, "provider_name", None),
+        model_id=getattr(planner_input, "model_id", None),
+    )
     if static_context:
         t.add_user_text(static_context)
     if ask:
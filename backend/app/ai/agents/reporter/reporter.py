@@ -53,7 +53,8 @@ class Reporter:
         # wired on the usage context, that check raises immediately. Offload
         # to a worker thread so the sync check has no loop to collide with.
         return await asyncio.to_thread(
-            self.llm.inference, text, usage_scope="report.title"
+            self.llm.inference, text, usage_scope="report.title",
+            cache_response=True, cache_accept=lambda r: bool(r and r.strip()),
         )
 
     async def generate_follow_ups(
@@ -89,7 +90,9 @@ class Reporter:
 
         try:
             raw = await asyncio.to_thread(
-                self.llm.inference, text, usage_scope="report.follow_ups"
+                self.llm.inference, text, usage_scope="report.follow_ups",
+                cache_response=True,
+                cache_accept=lambda r: bool(self._parse_follow_ups(r, max_suggestions)),
             )
         except Exception:
             return []
@@ -28,6 +28,16 @@ ALLOWED_CATEGORIES = set(INSTRUCTION_CATEGORIES.keys())
 MIN_CONFIDENCE_THRESHOLD = 0.6
 
 
+def _has_suggestions(response: str) -> bool:
+    """Cache check for suggestion streams: a complete, non-empty list."""
+    try:
+        parsed = json.loads(response)
+    except (TypeError, ValueError):
+        return False
+    items = parsed.get("instructions") if isinstance(parsed, dict) else parsed
+    return isinstance(items, list) and bool(items)
+
+
 class SuggestInstructions:
 
     def __init__(
@@ -274,6 +284,10 @@ Return a single JSON object matching this schema exactly:
             prompt,
             usage_scope=usage_scope,
             usage_scope_ref_id=None,
+            # Reruns over the same context send the same prompt; only a
+            # response carrying suggestions is worth replaying.
+            cache_response=True,
+            cache_accept=_has_suggestions,
         ):
             if not chunk:
                 continue
@@ -95,7 +95,8 @@ def _stdout_router() -> _ThreadLocalStdoutRouter:
         sys.stdout = router
         return router
 from app.schemas.organization_settings_schema import OrganizationSettingsConfig, FeatureState
-from app.data_sources import query_concurrency
+from app.data_sources import query_concurrency, query_result_cache
+from app.data_sources.fast import query_router
 from app.services.usage_policy_service import UsageLimitContext
 from app.services.connection_rate_limit_service import connection_rate_limit_service
 from typing import TYPE_CHECKING
@@ -651,6 +652,8 @@ def augment_db_error_hint(error_text: str) -> str:
 # Sentinel for "no positional query was passed". Distinct from None so a client
 # that legitimately receives None as its first argument is not misread.
 _NO_QUERY = object()
+# Returned by `_serve_from_fast` when the query must go to the source.
+_NOT_ROUTED = object()
 
 
 def _describe_keyword_call(kwargs: dict) -> str:
@@ -677,6 +680,8 @@ class QueryCapturingClientWrapper:
     in `query_timeout_seconds`, raises QueryTimeoutError. The orphan thread is left
     daemon so it doesn't block process exit; the DB-side query may continue until
     the connection is closed.
+    With a positive `result_cache_ttl_seconds`, repeated read-only statements are
+    answered from `query_result_cache` without reaching the source (see there).
     """
 
     def __init__(
@@ -688,8 +693,11 @@ class QueryCapturingClientWrapper:
         client_key: Optional[str] = None,
         query_timeout_seconds: int = DEFAULT_QUERY_TIMEOUT_SECONDS,
         max_concurrent_queries: Optional[int] = None,
+        result_cache_ttl_seconds: int = 0,
+        query_memo: Optional["query_result_cache.RunMemo"] = None,
     ):
         self._original = original_client
+        self._query_memo = query_memo
         self._captured_queries = captured_queries
         self._captured_timings = captured_timings
         self._usage_context = usage_context
@@ -708,6 +716,13 @@ class QueryCapturingClientWrapper:
             if isinstance(max_concurrent_queries, (int, float)) and max_concurrent_queries > 0
             else query_concurrency.DEFAULT_MAX_CONCURRENT_QUERIES
         )
+        # 0 (the constructor default) keeps every call on the source; the
+        # agent path passes the resolved per-connection TTL.
+        self._result_cache_ttl = (
+            int(result_cache_ttl_seconds)
+            if isinstance(result_cache_ttl_seconds, (int, float)) and result_cache_ttl_seconds > 0
+            else 0
+        )
 
     def execute_query(self, query=_NO_QUERY, *args, **kwargs):
         """Intercept execute_query calls to capture the query string and wall-clock duration.
@@ -732,7 +747,49 @@ class QueryCapturingClientWrapper:
         with _tracer.start_as_current_span("datasource.execute_query") as span:
             span.set_attribute("datasource.type", type(self._original).__name__)
             span.set_attribute("datasource.query_timeout_seconds", self._query_timeout_seconds)
+            cache_key = None
+            if self._result_cache_ttl and query is not _NO_QUERY:
+                cache_key = query_result_cache.cache_key(self._original, query, args, kwargs)
+                if cache_key is None:
+                    query_result_cache.record_bypass()
+                else:
+                    cached = query_result_cache.get(cache_key)
+                    if cached is not None:
+                        # Answered without touching the source: no rate-limit
+                        # hit, no quota, no concurrency slot.
+                        result, meta = cached
+                        span.set_attribute("datasource.cache", "hit")
+                        self._captured_timings.append({
+                            "index": idx,
+                            "query_ms": round((_time.monotonic() - _q_start) * 1000.0, 1),
+                            "rows": meta["rows"],
+                            "result_bytes": meta["result_bytes"],
+                            "sql": capture[:500] if isinstance(capture, str) else None,
+                            "cache": "hit",
+                            "cache_age_s": meta["age_s"],
+                        })
+                        return result
+            flight, leader = None, False
+            if self._query_memo is not None and query is not _NO_QUERY:
+                memo_key = query_result_cache.memo_key(self._original, query, args, kwargs)
+                if memo_key is not None:
+                    flight, leader = self._query_memo.join(memo_key)
+                    if not leader:
+                        return self._wait_for_shared(flight, capture, idx, _q_start, span)
+            route_reason = None
             try:
+                # A FAST relation covering everything the query reads answers
+                # it locally, before any of the source's limits apply — the
+                # source is never touched. Anything the router is unsure of
+                # continues below exactly as before.
+                sibling = getattr(self._original, "_bow_fast_sibling", None)
+                if sibling is not None and isinstance(query, str) and not args and not kwargs:
+                    result, route_reason = self._serve_from_fast(query, sibling, capture, idx, _q_start, span)
+                    if result is not _NOT_ROUTED:
+                        if leader:
+                            rows = len(result) if hasattr(result, '__len__') else None
+                            flight.set_result(result, rows=rows, result_bytes=estimate_result_size_bytes(result))
+                        return result
                 self._enforce_rate_limit(capture)
                 self._consume_query_quota(capture)
                 # Hold a per-connection concurrency slot for the duration of
@@ -740,9 +797,18 @@ class QueryCapturingClientWrapper:
                 # source all at once; the wait budget is the same wall clock
                 # the query itself would have been given, because a slot that
                 # never opens in that time is a failure either way.
+                # In the global scope the slot is also a cluster-wide lease
+                # in the app DB, taken on every path (agent or not).
                 span.set_attribute("datasource.max_concurrent_queries", self._max_concurrent_queries)
+                span.set_attribute("datasource.slot_scope", query_concurrency.scope())
+                _connection_id = self._connection_id()
+                if _connection_id:
+                    span.set_attribute(
+                        "datasource.slot_queue_depth",
+                        query_concurrency.queue_depth(_connection_id),
+                    )
                 with query_concurrency.slot(
-                    self._connection_id(),
+                    _connection_id,
                     self._max_concurrent_queries,
                     wait_seconds=self._query_timeout_seconds,
                     connection_name=getattr(self._original, "_bow_connection_name", None),
@@ -755,13 +821,27 @@ class QueryCapturingClientWrapper:
                 if rows is not None:
                     span.set_attribute("datasource.result_rows", rows)
                 span.set_attribute("datasource.result_bytes", result_bytes)
-                self._captured_timings.append({
+                timing = {
                     "index": idx,
                     "query_ms": round(_q_ms, 1),
                     "rows": rows,
                     "result_bytes": result_bytes,
                     "sql": capture[:500] if isinstance(capture, str) else None,
-                })
+                }
+                if route_reason:
+                    timing.update(route="source", route_reason=route_reason)
+                self._captured_timings.append(timing)
+                self._record_query_sample(capture, _q_ms, rows, result_bytes)
+                if cache_key is not None:
+                    try:
+                        query_result_cache.put(
+                            cache_key, result, self._result_cache_ttl,
+                            result_bytes=result_bytes, rows=rows,
+                        )
+                    except Exception as e:  # pragma: no cover - defensive
+                        logger.debug("Query result not cached: %s", e)
+                if leader:
+                    flight.set_result(result, rows=rows, result_bytes=result_bytes)
                 return result
             except QueryTimeoutError as e:
                 _q_ms = (_time.monotonic() - _q_start) * 1000.0
@@ -777,6 +857,8 @@ class QueryCapturingClientWrapper:
                 })
                 if self._last_cancel_outcome:
                     span.set_attribute("datasource.cancellation", self._last_cancel_outcome)
+                if leader:
+                    flight.set_error(e)
                 span.set_status(StatusCode.ERROR, str(e))
                 span.record_exception(e)
                 raise
@@ -789,11 +871,92 @@ class QueryCapturingClientWrapper:
                     "sql": capture[:500] if isinstance(capture, str) else None,
                     "error": str(e)[:200],
                 })
+                if leader:
+                    flight.set_error(e)
                 span.set_status(StatusCode.ERROR, str(e))
                 span.record_exception(e)
                 raise
+            finally:
+                if leader:
+                    # Whatever ended the query — including an error raised in
+                    # the bookkeeping — the steps waiting on it are released.
+                    flight.finish()
+
+    def _wait_for_shared(self, flight, capture, idx, q_start, span):
+        """Take the result of an identical query another step of this run is
+        executing (or already executed).
+
+        The source is touched once, so nothing here is rate-limited, metered,
+        or holds a concurrency slot. The timing entry still appears in this
+        step's trace — marked `"cache": "shared"` — and a shared failure is
+        recorded as this step's failure too, so swallowed-error detection sees
+        it.
+        """
+        span.set_attribute("datasource.cache", "shared")
+        try:
+            result, meta = flight.wait()
+        except Exception as e:
+            self._captured_timings.append({
+                "index": idx,
+                "query_ms": round((_time.monotonic() - q_start) * 1000.0, 1),
+                "rows": None,
+                "sql": capture[:500] if isinstance(capture, str) else None,
+                "error": str(e)[:200],
+                "cache": "shared",
+            })
+            span.set_status(StatusCode.ERROR, str(e))
+            raise
+        self._captured_timings.append({
+            "index": idx,
+            "query_ms": round((_time.monotonic() - q_start) * 1000.0, 1),
+            "rows": meta["rows"],
+            "result_bytes": meta["result_bytes"],
+            "sql": capture[:500] if isinstance(capture, str) else None,
+            "cache": "shared",
+        })
+        return result
+
+    def _serve_from_fast(self, query: str, fast_client, capture, idx, q_start, span):
+        """Answer `query` from the sibling FAST client if `query_router` allows.
+
+        Returns ``(result, "")`` when served, else ``(_NOT_ROUTED, reason)``.
+        A routed query that fails locally falls back to the source rather than
+        surfacing an error the source might not have raised; a local timeout
+        does not, because the time it was given is already spent.
+        """
+        route, reason = query_router.plan(query, self._original, fast_client)
+        span.set_attribute("datasource.route", "fast" if route is not None else "source")
+        if route is None:
+            span.set_attribute("datasource.route_reason", reason)
+            return _NOT_ROUTED, reason
+        try:
+            result = self._call_with_timeout(route.sql, (), {}, client=route.client)
+        except QueryTimeoutError:
+            raise
+        except Exception as e:
+            logger.debug("FAST route failed, falling back to the source: %s", e)
+            query_router.record_fallback("fast_error")
+            span.set_attribute("datasource.route", "source")
+            span.set_attribute("datasource.route_reason", "fast_error")
+            return _NOT_ROUTED, "fast_error"
+        query_router.record_routed()
+        rows = len(result) if hasattr(result, '__len__') else None
+        result_bytes = estimate_result_size_bytes(result)
+        if rows is not None:
+            span.set_attribute("datasource.result_rows", rows)
+        span.set_attribute("datasource.result_bytes", result_bytes)
+        self._captured_timings.append({
+            "index": idx,
+            "query_ms": round((_time.monotonic() - q_start) * 1000.0, 1),
+            "rows": rows,
+            "result_bytes": result_bytes,
+            "sql": capture[:500] if isinstance(capture, str) else None,
+            "route": "fast",
+            "relations": route.relations,
+        })
+        return result, ""
 
-    def _call_with_timeout(self, query, args, kwargs):
+    def _call_with_timeout(self, query, args, kwargs, client=None):
         """Run original.execute_query in a daemon thread; abandon it on timeout.
 
         Threading is intentional rather than asyncio.wait_for: we're already
@@ -805,18 +968,20 @@ class QueryCapturingClientWrapper:
         running there until it completes on its own. So before raising we ask
         the database to cancel it (`query_cancellation`), naming the thread we
         are about to orphan — the client may have other queries in flight and
-        those must survive.
+        those must survive. `client` runs the call on another client (a FAST
+        route) under the same guard.
         """
         holder: Dict[str, Any] = {}
+        target = client if client is not None else self._original
 
         def runner():
             try:
                 if query is _NO_QUERY:
                     # Keyword-only client call — there was no positional to
                     # forward (args is necessarily empty in this case).
-                    holder["value"] = self._original.execute_query(**kwargs)
+                    holder["value"] = target.execute_query(**kwargs)
                 else:
-                    holder["value"] = self._original.execute_query(query, *args, **kwargs)
+                    holder["value"] = target.execute_query(query, *args, **kwargs)
             except BaseException as exc:
                 holder["exc"] = exc
 
@@ -828,7 +993,7 @@ class QueryCapturingClientWrapper:
         t.start()
         t.join(self._query_timeout_seconds)
         if t.is_alive():
-            self._last_cancel_outcome = self._cancel_orphan(t)
+            self._last_cancel_outcome = self._cancel_orphan(t, target)
             raise QueryTimeoutError(
                 self._query_timeout_seconds,
                 sql=query if isinstance(query, str) else None,
@@ -837,7 +1002,7 @@ class QueryCapturingClientWrapper:
             raise holder["exc"]
         return holder.get("value")
 
-    def _cancel_orphan(self, thread: threading.Thread) -> str:
+    def _cancel_orphan(self, thread: threading.Thread, client=None) -> str:
         """Best-effort source-side cancellation of an abandoned query.
 
         Never raises: the timeout is the outcome the caller cares about, and a
@@ -851,7 +1016,9 @@ class QueryCapturingClientWrapper:
             ident = thread.ident
             if ident is None:
                 return "not_running"
-            outcome = query_cancellation.cancel_thread(self._original, ident)
+            outcome = query_cancellation.cancel_thread(
+                client if client is not None else self._original, ident
+            )
             logger.info(
                 "Query timed out after %ss; source cancellation: %s",
                 self._query_timeout_seconds, outcome,
@@ -942,6 +1109,23 @@ class QueryCapturingClientWrapper:
             logger.debug("Skipping data-bytes quota check; SQLite is locked")
         context.add_data_bytes(str(connection_id), result_bytes, metadata)
 
+    def _record_query_sample(self, capture, query_ms: float, rows, result_bytes) -> None:
+        """Keep this source query for the acceleration advisor.
+
+        Buffered on the usage context and persisted by its end-of-run flush;
+        only queries that reached the source are recorded (cache hits and
+        shared results return before this), and never a FAST relation's.
+        """
+        context = self._usage_context
+        if context is None or not isinstance(capture, str):
+            return
+        if not getattr(self._original, "QUERY_HISTORY", True):
+            return
+        try:
+            context.add_query_sample(self._connection_id(), capture, query_ms, rows, result_bytes)
+        except Exception as e:  # pragma: no cover - defensive
+            logger.debug("Query sample not buffered: %s", e)
+
     def _connection_id(self) -> Optional[str]:
         connection_id = getattr(self._original, "_bow_connection_id", None)
         return str(connection_id) if connection_id else None
@@ -978,12 +1162,14 @@ def wrap_clients_for_capture(
     captured_timings: List[dict],
     usage_context: Optional[UsageLimitContext] = None,
     organization_settings: Optional[OrganizationSettingsConfig] = None,
+    query_memo: Optional["query_result_cache.RunMemo"] = None,
 ) -> Dict:
     """Wrap all database clients to capture queries and per-query timing.
 
     The per-query timeout is resolved per-client so that a single tool
     invocation hitting multiple connections gets the right value for each
-    underlying database.
+    underlying database. `query_memo` is shared by every execution of one
+    batch run (a report rerun) so identical queries run once.
     """
     wrapped = {}
     for key, client in (ds_clients or {}).items():
@@ -996,6 +1182,8 @@ def wrap_clients_for_capture(
                 client_key=str(key),
                 query_timeout_seconds=resolve_query_timeout(client, organization_settings),
                 max_concurrent_queries=query_concurrency.effective_limit(client, organization_settings),
+                result_cache_ttl_seconds=query_result_cache.effective_ttl(client, organization_settings),
+                query_memo=query_memo,
             )
         else:
             wrapped[key] = client
@@ -1045,11 +1233,13 @@ class StreamingCodeExecutor:
         logger=None,
         context_hub=None,
         usage_context: Optional[UsageLimitContext] = None,
+        query_memo: Optional["query_result_cache.RunMemo"] = None,
     ):
         self.organization_settings = organization_settings
         self.logger = logger
         self.context_hub = context_hub
         self.usage_context = usage_context
+        self.query_memo = query_memo
 
     def execute_code(self, *, code: str, ds_clients: Dict, excel_files: List,
                      captured_timings: Optional[List[dict]] = None,
@@ -1090,6 +1280,7 @@ class StreamingCodeExecutor:
                 _timings,
                 self.usage_context,
                 organization_settings=self.organization_settings,
+                query_memo=self.query_memo,
             )
 
             # Inject a sync HTTP client when the org has web fetch enabled. The
@@ -243,7 +243,9 @@ class LoadablesResolver:
                         f"Available steps: {sorted({s.title for s in steps if s.title})}"
                     )
                     continue
-                result["steps"][key] = grid_to_df(step.data)
+                # All rows, not the inline preview, when the step has a store.
+                from app.services.step_result_store import full_data
+                result["steps"][key] = grid_to_df(await full_data(step))
 
         for ref in entity_refs or []:
             key = str(ref)
@@ -0,0 +1,370 @@
+"""Compiled table catalog behind `describe_tables`.
+
+Every `describe_tables` call used to run `SchemaContextBuilder.build` with
+name patterns: reload every table row of every data source, rebuild and
+rescore a `PromptTable` per table, and only then apply the regexes — O(catalog)
+database and Python work to return a handful of tables, several times per run
+in an exploration-heavy session.
+
+A compiled catalog is that build done once per (org, schema version stamp,
+data-source set, instruction build, catalog identity), plus the lookup
+structures describe_tables needs:
+
+  * **Segment keys.** describe_tables turns each query into two anchored
+    patterns: the query as the whole name or its last ``.``/``/`` segment,
+    and the query as a leading segment followed by a separator
+    (``security`` → ``security-*``, ``json_app`` → ``app::json_app``). Both
+    only ever match a substring that starts at the name start or after one
+    of ``./:`` and ends at the name end or before one of ``-:._*/``. Every
+    such substring of every name is a key (lowercased; the patterns are
+    case-insensitive), so a literal query is one dict lookup.
+  * **Sorted names.** Lowercased names in sorted order; an explicit regex
+    anchored at ``^`` with a literal prefix bisects to its range and only
+    tests the names inside it. Other regexes test names, not rows.
+  * **Column map.** Lowercased column name → tables. A query naming a column
+    rather than a table (``customer_id``) used to return nothing; now it
+    returns the tables carrying that column.
+  * **Fragments.** Each table's ``<table>`` XML is rendered on first use
+    and kept, so a table described twice is rendered once.
+  * **File scopes.** The per-file rows of file-source connections are indexed
+    by name too; a lookup narrows each scope descriptor to the files it
+    matched, as the builder does after its name filter.
+
+The catalog's tables are shared by every lookup until it expires: a caller
+that wants to change one (describe_tables sampling a thin table's columns)
+replaces it in the result with a copy.
+
+Results render through the usual `TablesSchemaContext.render_combined`, on
+sections assembled from the matched tables without validation. Catalogs live
+for `BOW_SCHEMA_CATALOG_TTL_S` (default 300 s, the schema cache's TTL), are
+dropped by `invalidate_schema_cache`, and are not found again once a schema
+write bumps the org's stamp (`app.ai.context.context_cache`), on any worker.
+"""
+
+import bisect
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+from app.ai.context import context_cache
+from app.ai.context.builders import table_index
+from app.ai.context.sections.tables_schema_section import (
+    FileScopeItem,
+    TablesSchemaContext,
+    render_table_xml,
+)
+from app.ai.prompt_formatters import Table as PromptTable
+
+DEFAULT_TTL_S = 300.0
+DEFAULT_MAX_CATALOGS = 32
+
+# Where a describe_tables literal pattern may start and end a match.
+_START_AFTER = "./:"
+_END_BEFORE = "-:._*/"
+# describe_tables also tries a query as a regex when it contains one of these.
+_REGEX_SPECIAL = re.compile(r"[\^\$\.\*\+\?\[\]\(\)\{\}\|]")
+
+_lock = threading.Lock()
+_catalogs: "OrderedDict[Hashable, Tuple[float, CompiledCatalog]]" = OrderedDict()
+_metrics = {"hits": 0, "misses": 0, "compiles": 0, "lookups": 0, "fragments_rendered": 0}
+
+
+def _env_number(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def ttl_seconds() -> float:
+    return max(0.0, _env_number("BOW_SCHEMA_CATALOG_TTL_S", DEFAULT_TTL_S))
+
+
+def max_catalogs() -> int:
+    return max(1, int(_env_number("BOW_SCHEMA_CATALOGS", DEFAULT_MAX_CATALOGS)))
+
+
+def segment_keys(name: str) -> Set[str]:
+    """Every substring of `name` a describe_tables literal pattern can match."""
+    low = name.lower()
+    starts = [0] + [i + 1 for i, ch in enumerate(low) if ch in _START_AFTER]
+    ends = [i for i, ch in enumerate(low) if ch in _END_BEFORE] + [len(low)]
+    keys = set()
+    for s in starts:
+        for e in ends:
+            if e > s:
+                keys.add(low[s:e])
+    return keys
+
+
+def _literal_prefix(pattern: str) -> Optional[str]:
+    """The literal text a ``^``-anchored regex must start with, if any."""
+    body = pattern[4:] if pattern.startswith("(?i)") else pattern
+    # A top-level alternative need not share the prefix; not worth parsing.
+    if not body.startswith("^") or "|" in body:
+        return None
+    out = []
+    for ch in body[1:]:
+        if ch == "\\" or _REGEX_SPECIAL.match(ch):
+            # A quantifier applies to the previous char, which is then optional.
+            if ch in "*?{" and out:
+                out.pop()
+            break
+        out.append(ch)
+    return "".join(out).lower() or None
+
+
+class _Source:
+    """Lookup structures for one data source of the catalog.
+
+    Positions below `len(tables)` are tables; the rest are the per-file rows
+    of its file scopes, matched by name only.
+    """
+
+    def __init__(self, section: TablesSchemaContext.DataSource):
+        self.section = section
+        self.tables: List[PromptTable] = list(section.tables or [])
+        self.rows: List[PromptTable] = self.tables + list(section.file_tables or [])
+        self.keys: Dict[str, List[int]] = {}
+        self.columns: Dict[str, List[int]] = {}
+        named = []
+        for pos, t in enumerate(self.rows):
+            name = t.name or ""
+            named.append((name.lower(), pos))
+            for key in segment_keys(name):
+                self.keys.setdefault(key, []).append(pos)
+            if pos >= len(self.tables):
+                continue
+            for col in {(c.name or "").lower() for c in (t.columns or [])}:
+                if col:
+                    self.columns.setdefault(col, []).append(pos)
+        named.sort()
+        self.sorted_names = [n for n, _ in named]
+        self.sorted_pos = [p for _, p in named]
+
+    def match(self, query: str, allow_regex: bool) -> Set[int]:
+        hits = set(self.keys.get(query.lower(), ()))
+        if allow_regex and _REGEX_SPECIAL.search(query):
+            try:
+                rx = re.compile(f"(?i){query}")
+            except re.error:
+                rx = None
+            if rx is not None:
+                prefix = _literal_prefix(query)
+                if prefix:
+                    lo = bisect.bisect_left(self.sorted_names, prefix)
+                    hi = bisect.bisect_left(self.sorted_names, prefix + "\U0010ffff")
+                    candidates = [self.sorted_pos[i] for i in range(lo, hi)]
+                else:
+                    candidates = range(len(self.rows))
+                hits.update(p for p in candidates if rx.search(self.rows[p].name or ""))
+        return hits
+
+    def file_scopes(self, positions: Iterable[int], conn_filter: Optional[Set[str]]) -> List[FileScopeItem]:
+        """The section's scopes summarized over the matched file rows."""
+        by_conn: Dict[str, List[PromptTable]] = {}
+        for p in sorted(positions):
+            t = self.rows[p]
+            by_conn.setdefault(str(t.connection_id or ""), []).append(t)
+        out = []
+        for fs in self.section.file_scopes or []:
+            cid = str(fs.connection_id or "")
+            if conn_filter is not None and cid not in conn_filter:
+                continue
+            out.append(fs.model_copy(update=FileScopeItem.summarize(by_conn.get(cid, []))))
+        return out
+
+
+class CompiledCatalog:
+    """The full schema catalog of one scope, indexed for describe_tables."""
+
+    def __init__(self, ctx: TablesSchemaContext, index_key: Hashable):
+        self.ctx = ctx
+        self.index_key = index_key
+        self.sources: List[_Source] = [_Source(ds) for ds in (ctx.data_sources or [])]
+        self._fragments: Dict[int, str] = {}
+        self._fragments_lock = threading.Lock()
+        self._own = {id(t) for s in self.sources for t in s.tables}
+        self._relevance_synced = False
+
+    def __len__(self) -> int:
+        return sum(len(s.tables) for s in self.sources)
+
+    def table_xml(self, t: PromptTable) -> str:
+        """`render_table_xml`, memoized for the catalog's own tables.
+
+        A table that is not one of them (a copy describe_tables filled with
+        sampled columns) renders fresh every time and is not kept.
+        """
+        if id(t) not in self._own:
+            return render_table_xml(t)
+        with self._fragments_lock:
+            hit = self._fragments.get(id(t))
+        if hit is not None:
+            return hit
+        xml = render_table_xml(t)
+        with self._fragments_lock:
+            self._fragments[id(t)] = xml
+        _count("fragments_rendered")
+        return xml
+
+    def _relevance(self, src_idx: int, positions: List[int], query: str) -> Dict[int, float]:
+        src = self.sources[src_idx]
+        ds_id = str(src.section.info.id)
+        key = (self.index_key, ds_id)
+        if not self._relevance_synced:
+            for s in self.sources:
+                table_index.for_source((self.index_key, str(s.section.info.id))).sync(
+                    (_doc(t, p) for p, t in enumerate(s.tables)), complete=True,
+                )
+            self._relevance_synced = True
+        scores = table_index.for_source(key).score(query)
+        raw = {p: scores.get(_doc(src.tables[p], p)[0], 0.0) for p in positions}
+        best = max(raw.values(), default=0.0)
+        return {p: (v / best if best > 0 else 0.0) for p, v in raw.items()}
+
+    def lookup(
+        self,
+        queries: Iterable[str],
+        data_source_ids: Optional[Iterable[str]] = None,
+        connection_ids: Optional[Iterable[str]] = None,
+        relevance_query: Optional[str] = None,
+    ) -> TablesSchemaContext:
+        """Tables matching any of `queries`, per data source, best first.
+
+        Matching mirrors describe_tables' name patterns (literal name or
+        segment, plus the query as a regex when it has regex syntax); a
+        query that names no table falls back to tables with such a column.
+        """
+        _count("lookups")
+        queries = [q for q in queries if isinstance(q, str) and q]
+        ds_filter = {str(x) for x in data_source_ids} if data_source_ids else None
+        conn_filter = {str(x) for x in connection_ids} if connection_ids else None
+        weight = table_index.blend_weight()
+        sections = []
+        for src_idx, src in enumerate(self.sources):
+            section = src.section
+            if ds_filter and str(section.info.id) not in ds_filter:
+                continue
+            hits: Set[int] = set()
+            for q in queries:
+                found = src.match(q, allow_regex=True)
+                if not found:
+                    found = set(src.columns.get(q.lower(), ()))
+                hits |= found
+            files = {p for p in hits if p >= len(src.tables)}
+            hits -= files
+            if conn_filter is not None:
+                hits = {p for p in hits if str(src.tables[p].connection_id or "") in conn_filter}
+            positions = sorted(hits)
+            if relevance_query and weight > 0 and len(positions) > 1:
+                rel = self._relevance(src_idx, positions, relevance_query)
+                # Same blend as SchemaContextBuilder, cached relations first.
+                positions.sort(key=lambda p: (
+                    not src.tables[p].is_cached,
+                    -((src.tables[p].score or 0.0) + weight * rel[p]),
+                    p,
+                ))
+            tables = [src.tables[p] for p in positions]
+            sections.append(section.model_construct(**{
+                **dict(section),
+                "tables": tables,
+                "file_scopes": src.file_scopes(files, conn_filter),
+                "file_tables": [],
+            }))
+        return TablesSchemaContext.model_construct(data_sources=sections)
+
+
+def _doc(t: PromptTable, pos: int) -> Tuple[str, str, str]:
+    """(doc_id, name, body) for `table_index`, read off a rendered table."""
+    cols = [{"name": c.name, "description": c.description} for c in (t.columns or [])]
+    item = {
+        "name": t.name,
+        "description": t.description,
+        "columns": cols,
+        "metadata_json": t.metadata_json,
+    }
+    name, body = table_index.table_text(item)
+    return (str(t.id or f"name:{t.name or pos}"), name, body)
+
+
+def catalog_key(context_hub: Any, schema_stamp: Optional[int] = None) -> Tuple:
+    """(org, schema stamp, data sources, instruction build, catalog identity)
+    of a hub. `schema_stamp` is the org's current schema version stamp, or
+    None when the stamps cannot be read (the TTL alone bounds staleness)."""
+    return (
+        str(context_hub.organization.id) if context_hub.organization else "",
+        schema_stamp,
+        tuple(sorted(str(d.id) for d in (context_hub.data_sources or []))),
+        str(context_hub.build_id) if getattr(context_hub, "build_id", None) else None,
+        context_hub._schema_identity_key(),
+    )
+
+
+def get(key: Hashable) -> Optional[CompiledCatalog]:
+    with _lock:
+        entry = _catalogs.get(key)
+        if entry is None or (time.monotonic() - entry[0]) >= ttl_seconds():
+            if entry is not None:
+                _catalogs.pop(key, None)
+            _metrics["misses"] += 1
+            return None
+        _catalogs.move_to_end(key)
+        _metrics["hits"] += 1
+        return entry[1]
+
+
+def put(key: Hashable, catalog: CompiledCatalog) -> None:
+    with _lock:
+        _catalogs[key] = (time.monotonic(), catalog)
+        _catalogs.move_to_end(key)
+        _metrics["compiles"] += 1
+        while len(_catalogs) > max_catalogs():
+            _catalogs.popitem(last=False)
+
+
+async def for_hub(context_hub: Any) -> CompiledCatalog:
+    """The hub's compiled catalog, building the full schema once if needed."""
+    org_id = str(context_hub.organization.id) if context_hub.organization else ""
+    stamps = await context_cache.stamps(org_id)
+    key = catalog_key(context_hub, stamps[context_cache.SCHEMA] if stamps else None)
+    catalog = get(key)
+    if catalog is None:
+        ctx = await context_hub.schema_builder.build(with_stats=True, keep_file_tables=True)
+        catalog = CompiledCatalog(ctx, index_key=("catalog",) + key)
+        put(key, catalog)
+    return catalog
+
+
+def invalidate(org_id: Optional[str] = None) -> None:
+    """Drop compiled catalogs. Pass org_id to scope; None drops all."""
+    with _lock:
+        if org_id is None:
+            _catalogs.clear()
+            return
+        for k in [k for k in _catalogs if k[0] == str(org_id)]:
+            _catalogs.pop(k, None)
+
+
+def _count(name: str, n: int = 1) -> None:
+    with _lock:
+        _metrics[name] += n
+
+
+def stats() -> dict:
+    with _lock:
+        return {
+            **_metrics,
+            "catalogs": len(_catalogs),
+            "tables": sum(len(c) for _, c in _catalogs.values()),
+        }
+
+
+def reset() -> None:
+    with _lock:
+        _catalogs.clear()
+        for k in _metrics:
+            _metrics[k] = 0
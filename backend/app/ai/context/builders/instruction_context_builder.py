@@ -18,6 +18,7 @@ from app.models.user import User
 from app.models.user_data_source_overlay import UserDataSourceTable
 from app.core.main_build import resolve_main_build
 
+from app.ai.context.builders import instruction_index
 from app.ai.context.sections.instructions_section import InstructionsSection, InstructionItem, InstructionLabelItem, SkillCatalogItem
 
 logger = logging.getLogger(__name__)
@@ -462,16 +463,22 @@ class InstructionContextBuilder:
         table_refs = await self._batch_load_table_refs([str(i.id) for i in all_instructions])
 
         # Score every candidate. Zero-score candidates are NOT dropped — they
-        # rank last (by usage) and can still fill remaining capacity.
-        scored: List[Tuple[Instruction, float]] = []
-        for instruction in all_instructions:
-            score = 0.0
-            if keywords:
-                score = self._score_instruction(
-                    instruction, keywords,
-                    extra_text=" ".join(table_refs.get(str(instruction.id), [])),
-                )
-            scored.append((instruction, score))
+        # rank last (by usage) and can still fill remaining capacity. Without a
+        # build the org's live instructions are indexed instead, keyed by org.
+        scores: Dict[str, float] = {}
+        if keywords:
+            index = instruction_index.for_build(
+                ("org", str(self.organization.id)), self._extract_keywords, self._stem
+            )
+            scores = index.score(keywords, [
+                (str(inst.id), *self._instruction_score_texts(
+                    inst, extra_text=" ".join(table_refs.get(str(inst.id), [])),
+                ))
+                for inst in all_instructions
+            ])
+        scored: List[Tuple[Instruction, float]] = [
+            (instruction, scores.get(str(instruction.id), 0.0)) for instruction in all_instructions
+        ]
 
         # Sort by score desc, then aggregated usage desc (org-wide stats)
         usage_counts = await self._batch_load_usage_counts([str(i.id) for i, _ in scored])
@@ -896,17 +903,30 @@ class InstructionContextBuilder:
 
         # Rank ALL intelligent candidates by score (labels + table names count),
         # then aggregated usage. Zero-score candidates rank last but are kept.
+        # Scores come from the build's inverted index (`instruction_index`),
+        # which holds each version's text already tokenized and returns the
+        # scores `_score_instruction_version` would.
         keywords = self._extract_keywords(query) if query else set()
-        ranked: List[Tuple[InstructionItem, float, InstructionVersion]] = []
+        candidates = []
         for content, instruction, version in intelligent_contents:
-            inst_id = str(instruction.id)
-            refs = _table_refs_for(inst_id, version)
+            refs = _table_refs_for(str(instruction.id), version)
             label_names = " ".join(
                 l.name for l in (self._extract_labels(instruction) or []) if l.name
             )
-            score = self._score_instruction_version(
-                version, keywords, extra_text=" ".join(refs) + " " + label_names,
+            body, priority = self._version_score_texts(
+                version, extra_text=" ".join(refs) + " " + label_names,
             )
+            candidates.append((instruction, version, refs, body, priority))
+        scores: Dict[str, float] = {}
+        if keywords:
+            index = instruction_index.for_build(str(build.id), self._extract_keywords, self._stem)
+            scores = index.score(
+                keywords, [(str(v.id), body, priority) for _, v, _, body, priority in candidates]
+            )
+        ranked: List[Tuple[InstructionItem, float, InstructionVersion]] = []
+        for instruction, version, refs, _, _ in candidates:
+            inst_id = str(instruction.id)
+            score = scores.get(str(version.id), 0.0)
             item = InstructionItem(
                 id=inst_id,
                 category=instruction.category,
@@ -1521,14 +1541,15 @@ class InstructionContextBuilder:
                 )
         return filtered
 
-    def _extract_keywords(self, text: str) -> Set[str]:
+    @classmethod
+    def _extract_keywords(cls, text: str) -> Set[str]:
         """Extract meaningful keywords from text."""
         # Lowercase and split on non-alphanumeric (including underscores for better matching)
         words = re.split(r'[^a-z0-9]+', text.lower())
         # Filter out stopwords and short words
         keywords = {
             w for w in words
-            if w and len(w) >= 2 and w not in self.STOPWORDS
+            if w and len(w) >= 2 and w not in cls.STOPWORDS
         }
         return keywords
 
@@ -1573,6 +1594,10 @@ class InstructionContextBuilder:
         Matches in title/labels/table names are weighted above body matches.
         Returns a score between 0 and 1.
         """
+        return self._combined_score(*self._instruction_score_texts(instruction, extra_text), keywords)
+
+    def _instruction_score_texts(self, instruction: Instruction, extra_text: str = "") -> Tuple[str, str]:
+        """(body, priority) text `_score_instruction` scores an instruction on."""
         searchable = self._build_searchable_text(instruction)
         priority_parts = []
         if instruction.title:
@@ -1584,7 +1609,7 @@ class InstructionContextBuilder:
             pass  # labels not loaded (lazy='raise') — skip
         if extra_text:
             priority_parts.append(extra_text)
-        return self._combined_score(searchable, " ".join(priority_parts), keywords)
+        return searchable, " ".join(priority_parts)
 
     def _score_instruction_version(
         self,
@@ -1599,6 +1624,11 @@ class InstructionContextBuilder:
         priority fields (title, labels, referenced table names).
         Returns a score between 0 and 1.
         """
+        return self._combined_score(*self._version_score_texts(version, extra_text), keywords)
+
+    @staticmethod
+    def _version_score_texts(version: InstructionVersion, extra_text: str = "") -> Tuple[str, str]:
+        """(body, priority) text `_score_instruction_version` scores a version on."""
         parts = [version.text or ""]
         if version.structured_data:
             if isinstance(version.structured_data, dict):
@@ -1611,7 +1641,7 @@ class InstructionContextBuilder:
             priority_parts.append(version.title)
         if extra_text:
             priority_parts.append(extra_text)
-        return self._combined_score(" ".join(parts), " ".join(priority_parts), keywords)
+        return " ".join(parts), " ".join(priority_parts)
 
     def _combined_score(self, body: str, priority: str, keywords: Set[str]) -> float:
         """Coverage score over the body, boosted by matches in priority text
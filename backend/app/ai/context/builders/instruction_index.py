@@ -0,0 +1,269 @@
+"""Inverted index over intelligent-instruction text, kept per instruction build.
+
+`InstructionContextBuilder` ranks every in-scope intelligent instruction
+against the user's query on each context build. Scoring one instruction means
+tokenizing its whole text (body, title, labels, table references), stemming
+every token, and testing each query keyword against all of it — for an org
+with thousands of instructions synced from dbt or LookML, that is a visible
+slice of per-completion setup, repeated for text that has not changed since
+the build was cut.
+
+This index does the text work once per document and keeps it with the build:
+
+  * **Postings per field.** The scorer reads two texts per instruction: the
+    body (everything, priority text included) and the priority text (title,
+    labels, table names). Each field keeps postings from keyword → documents,
+    stem → documents and raw token → documents.
+  * **Same tiers, same arithmetic.** `_score_text`'s four match tiers map onto
+    lookups: exact keyword (1.0), stem (0.9), substring of the raw text (0.8 —
+    a keyword is ``[a-z0-9]+``, so it occurs in the text exactly when it
+    occurs inside one raw token) and keyword containment (0.7). Per-document
+    sums run over the query keywords in the same order as the scorer's, so a
+    score is the same float, not merely close, and ties break as before.
+  * **Only matching documents are scored.** A document in no posting list for
+    any query keyword scores 0.0, as it would have.
+  * **Keyed by content.** A document is identified by its id plus a digest of
+    both texts. Instruction versions in a build never change, but the labels
+    and table references in the priority text can; a changed text is simply
+    a new document, never a stale score.
+
+Indexes are cached per process by build id (`BOW_INSTRUCTION_INDEX_BUILDS`,
+LRU), and grow lazily: a request indexes whatever of its candidates is not
+there yet, so differently scoped agents on one build share the work.
+"""
+
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+# The split `InstructionContextBuilder._extract_keywords` uses.
+_TOKEN_SPLIT = re.compile(r'[^a-z0-9]+')
+
+DEFAULT_MAX_BUILDS = 16
+# Superseded documents (an id whose text changed) stay in the postings until
+# they outnumber the live ones, and at least this many; then the index is
+# rebuilt rather than kept growing.
+_MIN_REBUILD_DOCS = 2048
+
+_lock = threading.Lock()
+_indexes: "OrderedDict[Hashable, InstructionIndex]" = OrderedDict()
+_metrics = {"hits": 0, "misses": 0, "docs_indexed": 0, "rebuilds": 0}
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def max_builds() -> int:
+    return max(1, _env_int("BOW_INSTRUCTION_INDEX_BUILDS", DEFAULT_MAX_BUILDS))
+
+
+def _tokens(text: str) -> List[str]:
+    return _TOKEN_SPLIT.split(text.lower())
+
+
+def doc_key(doc_id: str, body: str, priority: str) -> Tuple[str, str]:
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(body.encode("utf-8", "surrogatepass"))
+    digest.update(b"\x00")
+    digest.update(priority.encode("utf-8", "surrogatepass"))
+    return (doc_id, digest.hexdigest())
+
+
+class _Field:
+    """Postings for one of the two texts the scorer reads."""
+
+    __slots__ = ("exact", "stems", "tokens", "long_keywords")
+
+    def __init__(self):
+        self.exact: Dict[str, Set[int]] = {}
+        self.stems: Dict[str, Set[int]] = {}
+        self.tokens: Dict[str, Set[int]] = {}
+        # Keywords of 4+ chars, the only ones the containment tier compares.
+        self.long_keywords: Set[str] = set()
+
+    def add(self, doc: int, text: str, keywords: Set[str], stem: Callable[[str], str]) -> None:
+        for kw in keywords:
+            self.exact.setdefault(kw, set()).add(doc)
+            self.stems.setdefault(stem(kw), set()).add(doc)
+            if len(kw) >= 4:
+                self.long_keywords.add(kw)
+        for tok in set(_tokens(text)):
+            if tok:
+                self.tokens.setdefault(tok, set()).add(doc)
+
+    def weights(self, kw: str, stem: Callable[[str], str]) -> Dict[int, float]:
+        """doc -> the tier `kw` matches at in this field (absent: no match).
+
+        Lower tiers are written first so a higher one overwrites them — the
+        scorer takes the first tier that matches, which is the highest.
+        """
+        out: Dict[int, float] = {}
+        if len(kw) >= 4:
+            for sk in self.long_keywords:
+                if kw in sk or sk in kw:
+                    for d in self.exact[sk]:
+                        out[d] = 0.7
+        if len(kw) >= 3:
+            for tok, docs in self.tokens.items():
+                if kw in tok:
+                    for d in docs:
+                        out[d] = 0.8
+        for d in self.stems.get(stem(kw), ()):
+            out[d] = 0.9
+        for d in self.exact.get(kw, ()):
+            out[d] = 1.0
+        return out
+
+
+class InstructionIndex:
+    """Inverted index over (body, priority) texts, scored like `_combined_score`."""
+
+    def __init__(self, extract_keywords: Callable[[str], Set[str]], stem: Callable[[str], str]):
+        self._extract = extract_keywords
+        self._stem = stem
+        self._lock = threading.Lock()
+        self._docs: Dict[Tuple[str, str], int] = {}
+        # doc_id -> its current key; older keys for the same id are stale.
+        self._live: Dict[str, Tuple[str, str]] = {}
+        self._stale = 0
+        self._has_priority: List[bool] = []
+        self._body = _Field()
+        self._priority = _Field()
+        # (field, kw) -> weights; valid until the next document is added.
+        self._weights: Dict[Tuple[int, str], Dict[int, float]] = {}
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def _add(self, key: Tuple[str, str], body: str, priority: str) -> int:
+        doc = len(self._has_priority)
+        self._docs[key] = doc
+        if self._live.get(key[0]) is not None:
+            self._stale += 1
+        self._live[key[0]] = key
+        self._has_priority.append(bool(priority))
+        combined = f"{body} {priority}"
+        self._body.add(doc, combined, self._extract(combined), self._stem)
+        if priority:
+            self._priority.add(doc, priority, self._extract(priority), self._stem)
+        self._weights.clear()
+        return doc
+
+    def _field_weights(self, field: int, kw: str) -> Dict[int, float]:
+        cached = self._weights.get((field, kw))
+        if cached is None:
+            cached = (self._body if field == 0 else self._priority).weights(kw, self._stem)
+            self._weights[(field, kw)] = cached
+        return cached
+
+    def score(
+        self,
+        keywords: Set[str],
+        docs: Iterable[Tuple[str, str, str]],
+    ) -> Dict[str, float]:
+        """Scores for `docs` — ``(doc_id, body, priority)`` — that match at all.
+
+        Documents missing from the result scored 0.0. Indexes any document
+        not seen before.
+        """
+        requested: List[Tuple[str, int]] = []
+        added = 0
+        with self._lock:
+            if self._stale > max(len(self._live), _MIN_REBUILD_DOCS):
+                self._reset()
+                _count("rebuilds")
+            for doc_id, body, priority in docs:
+                key = doc_key(doc_id, body, priority)
+                doc = self._docs.get(key)
+                if doc is None:
+                    doc = self._add(key, body, priority)
+                    added += 1
+                requested.append((doc_id, doc))
+            if added:
+                _count("docs_indexed", added)
+            if not keywords:
+                return {}
+            body_w = [self._field_weights(0, kw) for kw in keywords]
+            prio_w = [self._field_weights(1, kw) for kw in keywords]
+            has_priority = self._has_priority
+
+        matching = set()
+        for w in body_w:
+            matching.update(w)
+        n = len(keywords)
+        out: Dict[str, float] = {}
+        for doc_id, doc in requested:
+            if doc not in matching:
+                continue
+            matched = 0.0
+            for w in body_w:
+                matched += w.get(doc, 0.0)
+            body_score = matched / n
+            priority_score = 0.0
+            if has_priority[doc]:
+                matched = 0.0
+                for w in prio_w:
+                    matched += w.get(doc, 0.0)
+                priority_score = matched / n
+            out[doc_id] = min(1.0, body_score + 0.5 * priority_score)
+        return out
+
+    def _reset(self) -> None:
+        self._docs.clear()
+        self._live.clear()
+        self._stale = 0
+        self._has_priority = []
+        self._body = _Field()
+        self._priority = _Field()
+        self._weights.clear()
+
+
+def for_build(
+    build_key: Hashable,
+    extract_keywords: Callable[[str], Set[str]],
+    stem: Callable[[str], str],
+) -> InstructionIndex:
+    """The cached index for `build_key`, created empty on first use."""
+    with _lock:
+        index = _indexes.get(build_key)
+        if index is not None:
+            _indexes.move_to_end(build_key)
+            _metrics["hits"] += 1
+            return index
+        _metrics["misses"] += 1
+        index = InstructionIndex(extract_keywords, stem)
+        _indexes[build_key] = index
+        while len(_indexes) > max_builds():
+            _indexes.popitem(last=False)
+        return index
+
+
+def _count(name: str, n: int = 1) -> None:
+    with _lock:
+        _metrics[name] += n
+
+
+def stats() -> dict:
+    with _lock:
+        return {
+            **_metrics,
+            "builds": len(_indexes),
+            "documents": sum(len(i) for i in _indexes.values()),
+        }
+
+
+def reset(build_key: Optional[Hashable] = None) -> None:
+    with _lock:
+        if build_key is None:
+            _indexes.clear()
+            for k in _metrics:
+                _metrics[k] = 0
+        else:
+            _indexes.pop(build_key, None)
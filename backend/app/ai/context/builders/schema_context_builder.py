@@ -6,6 +6,7 @@ import re
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 from sqlalchemy import select, func, and_
+from app.ai.context.builders import table_index
 from app.ai.context.sections.tables_schema_section import TablesSchemaContext, MCPToolItem
 from app.schemas.data_source_schema import DataSourceSummarySchema
 from app.ai.prompt_formatters import Table as PromptTable, TableColumn as PromptTableColumn, ForeignKey as PromptForeignKey
@@ -180,6 +181,8 @@ class SchemaContextBuilder:
         name_patterns: Optional[List[str]] = None,
         active_only: bool = True,
         sort: str = "score",  # "score" | "usage" | "centrality" | "alpha"
+        query: Optional[str] = None,
+        keep_file_tables: bool = False,
     ) -> TablesSchemaContext:
         """Return TablesSchemaContext with optional filtering and sorting.
 
@@ -192,6 +195,13 @@ class SchemaContextBuilder:
             name_patterns: Filter tables by regex patterns.
             active_only: If True (default), only return active tables. If False, include inactive.
             sort: Sort order for tables.
+            query: The user's prompt. With the default "score" sort, each
+                table's BM25 relevance to it (see `table_index`) is blended
+                into the composite score, so the tables that survive `top_k`
+                are the ones the question is about.
+            keep_file_tables: Also keep the per-file rows of file-source
+                connections on each section (`file_tables`), next to the
+                scope descriptors that replace them in `tables`.
         """
         ds_sections: List[TablesSchemaContext.DataSource] = []
 
@@ -484,10 +494,29 @@ class SchemaContextBuilder:
                 except Exception:
                     pass  # Non-critical - continue without counts
 
+            # Query relevance, aligned with `normalized`. The index is per data
+            # source AND catalog view: an overlay user's ranking must only draw
+            # on the text their overlay shows them.
+            relevance: Optional[List[float]] = None
+            retrieval_weight = table_index.blend_weight()
+            if query and sort == "score" and retrieval_weight > 0 and normalized:
+                try:
+                    view_key = f"user:{self.user.id}" if use_overlay else "canonical"
+                    relevance = table_index.relevance(
+                        (str(ds.id), view_key),
+                        normalized,
+                        query,
+                        # Only an unfiltered active build sees the whole catalog
+                        # and may prune tables the index still holds.
+                        complete=active_only and not connection_ids,
+                    )
+                except Exception:
+                    relevance = None  # Ranking falls back to the composite alone
+
             # Common rendering and scoring
             scored: List[tuple[float, PromptTable]] = []
             tables: List[PromptTable] = []
-            for item in normalized:
+            for pos, item in enumerate(normalized):
                 columns = [
                     PromptTableColumn(name=c.get("name"), dtype=c.get("dtype"), description=c.get("description"), metadata=c.get("metadata"))
                     for c in (item.get("columns") or [])
@@ -526,6 +555,10 @@ class SchemaContextBuilder:
                     metadata_json=item.get("metadata_json"),
                     referenced_instructions_count=instruction_ref_counts.get(item.get("table_id", ""), None) or None,
                 )
+                boost = 0.0
+                if relevance is not None:
+                    tbl.relevance = round(relevance[pos], 4)
+                    boost = retrieval_weight * relevance[pos]
 
                 if with_stats:
                     table_id = str(item.get("table_id") or "")
@@ -553,6 +586,7 @@ class SchemaContextBuilder:
                         feedback_signal = (float(s.weighted_pos_feedback or 0.0) - float(s.weighted_neg_feedback or 0.0))
                         structural_signal = (float(item.get("centrality_score") or 0.0) + float(item.get("richness") or 0.0) + (0.5 if item.get("entity_like") else 0.0))
                         score = 0.35 * (usage_signal * recency) + 0.25 * success_rate + 0.2 * feedback_signal + 0.2 * structural_signal - 0.2 * (failure_count**0.5)
+                        score += boost
                         tbl.usage_count = usage_count
                         tbl.success_count = success_count
                         tbl.failure_count = failure_count
@@ -566,7 +600,7 @@ class SchemaContextBuilder:
                         scored.append((tbl.score or 0.0, tbl))
                     else:
                         structural_signal = (float(item.get("centrality_score") or 0.0) + float(item.get("richness") or 0.0) + (0.5 if item.get("entity_like") else 0.0))
-                        score = 0.1 * structural_signal
+                        score = 0.1 * structural_signal + boost
                         tbl.score = float(round(score, 6))
                         scored.append((tbl.score or 0.0, tbl))
                 else:
@@ -576,6 +610,10 @@ class SchemaContextBuilder:
             if with_stats:
                 scored.sort(key=lambda x: x[0], reverse=True)
                 tables = [t for (_, t) in scored]
+            elif relevance is not None:
+                # No composite to blend into: relevance alone, stable so the
+                # catalog order still breaks ties.
+                tables.sort(key=lambda t: t.relevance or 0.0, reverse=True)
 
             # Apply alternate sorts if requested
             try:
@@ -622,7 +660,12 @@ class SchemaContextBuilder:
             # Pull file-source connections OUT of the table pool: they render as
             # compact scope descriptors, not per-file <table> rows — so they
             # never consume the top_k budget or bloat the prompt.
+            pooled = tables
             file_scopes, tables = self._build_file_scopes(ds, tables)
+            file_tables = []
+            if keep_file_tables and file_scopes:
+                structured = {id(t) for t in tables}
+                file_tables = [t for t in pooled if id(t) not in structured]
 
             tables = _cached_first(tables)
 
@@ -652,6 +695,7 @@ class SchemaContextBuilder:
                     tables=tables,
                     mcp_tools=mcp_tools,
                     file_scopes=file_scopes,
+                    file_tables=file_tables,
                     browser_scope=self._browser_scope(ds),
                     # Only flag connections as unavailable when at least one other
                     # connection is live — if EVERY connection is down the source
@@ -770,20 +814,6 @@ class SchemaContextBuilder:
                     if cfg.get("bucket") else cfg.get("root_path"))
             cid = str(c.id)
             ftabs = by_conn.get(cid, [])
-            sample = [t.name for t in ftabs[:5] if getattr(t, 'name', None)]
-            topics, seen = [], set()
-            for t in ftabs:
-                mj = getattr(t, 'metadata_json', None) or {}
-                sub = (mj.get("network_dir") or mj.get("s3") or mj.get("graph")
-                       or mj.get("google_drive") or {}) if isinstance(mj, dict) else {}
-                for kw in (sub.get("keywords") or []):
-                    k = str(kw).lower()
-                    if k not in seen:
-                        seen.add(k); topics.append(kw)
-                    if len(topics) >= 12:
-                        break
-                if len(topics) >= 12:
-                    break
             supports_search = (c.type in self._NATIVE_SEARCH_TYPES) or (index_mode == "content")
             # Per-user OAuth connection: each user reads with their own token, so
             # the cached sample/count (if any) is not a global truth. Flag it so
@@ -793,8 +823,8 @@ class SchemaContextBuilder:
             enforces_scope = c.type not in self._TOKEN_SCOPED_TYPES
             scopes.append(FileScopeItem(
                 connection_id=cid, name=c.name, type=c.type, base=base,
-                globs=globs, index_mode=index_mode, file_count=len(ftabs),
-                capped=False, sample=sample, topics=topics,
+                globs=globs, index_mode=index_mode, capped=False,
+                **FileScopeItem.summarize(ftabs),
                 supports_search=supports_search, writable=bool(cfg.get("writable")),
                 per_user=bool(per_user), enforces_scope=enforces_scope,
             ))
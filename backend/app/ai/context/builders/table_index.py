@@ -0,0 +1,291 @@
+"""Lexical retrieval index over a data source's tables (BM25).
+
+`SchemaContextBuilder` orders tables by a composite of usage, feedback and
+structural signals and then caps the list, so on a warehouse with thousands of
+tables the handful the planner actually sees has nothing to do with the
+question. This index supplies the missing signal: how well each table's text
+matches the current prompt.
+
+  * **What is indexed.** The table name (weighted — a name hit is the
+    strongest evidence there is), the name split into identifier parts
+    (``fct_OrderLines`` → ``fct order lines``), column names split the same
+    way, table and column descriptions, and the string values of
+    ``metadata_json``. Tokens go through the instruction scorer's stemmer so
+    "orders" in a prompt meets ``order_id`` in a schema.
+  * **Okapi BM25.** Standard k1/b weighting; idf is computed over the tables
+    of the same index, so a token every table carries (``id``, ``created``)
+    counts for next to nothing.
+  * **Incremental.** A table is identified by its row id and a digest of its
+    indexed text. A build re-tokenizes only tables whose text changed since
+    the last one (a re-introspection that renamed or added columns); the
+    rest keep their postings. A build that saw the whole catalog prunes
+    tables that are gone.
+  * **Scoped.** One index per data source and catalog view: the canonical
+    catalog is shared, a per-user overlay gets its own, so ranking never
+    draws on column text a user cannot see.
+
+The builder blends relevance into the composite score with weight
+`BOW_SCHEMA_RETRIEVAL_WEIGHT` (0 turns retrieval off). Indexes are cached
+per process (`BOW_SCHEMA_INDEX_SOURCES`, LRU).
+"""
+
+import hashlib
+import math
+import os
+import re
+import threading
+from collections import Counter, OrderedDict
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
+
+from app.ai.context.builders.instruction_context_builder import InstructionContextBuilder
+
+DEFAULT_MAX_SOURCES = 64
+# Weight of relevance (0..1) added to a table's composite score. The composite
+# of a well-used table sits around 1-3, an unused one near 0.1, so at 1.0 a
+# strong textual match outranks mere structural prominence but not a table
+# the org queries every day.
+DEFAULT_BLEND_WEIGHT = 1.0
+K1 = 1.2
+B = 0.75
+# A table name token counts this many times over a column or description hit.
+NAME_WEIGHT = 3
+
+_CAMEL_BOUNDARY = re.compile(r'(?<=[a-z0-9])(?=[A-Z])|(?<=[A-Z])(?=[A-Z][a-z])')
+_TOKEN_SPLIT = re.compile(r'[^a-z0-9]+')
+
+_lock = threading.Lock()
+_indexes: "OrderedDict[Hashable, TableIndex]" = OrderedDict()
+_metrics = {"hits": 0, "misses": 0, "tables_indexed": 0, "tables_pruned": 0, "queries": 0}
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _env_number(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def blend_weight() -> float:
+    return max(0.0, _env_number("BOW_SCHEMA_RETRIEVAL_WEIGHT", DEFAULT_BLEND_WEIGHT))
+
+
+def max_sources() -> int:
+    return max(1, _env_int("BOW_SCHEMA_INDEX_SOURCES", DEFAULT_MAX_SOURCES))
+
+
+def tokenize(text: str) -> List[str]:
+    """Identifier-aware tokens: camelCase and snake_case both split, stemmed."""
+    if not text:
+        return []
+    text = _CAMEL_BOUNDARY.sub(" ", text).lower()
+    stem = InstructionContextBuilder._stem
+    return [stem(t) for t in _TOKEN_SPLIT.split(text) if len(t) >= 2]
+
+
+def query_terms(query: str) -> List[str]:
+    """Distinct query tokens, stopwords dropped."""
+    stop = InstructionContextBuilder.STOPWORDS
+    seen: Dict[str, None] = {}
+    for raw in _TOKEN_SPLIT.split(_CAMEL_BOUNDARY.sub(" ", query or "").lower()):
+        if len(raw) >= 2 and raw not in stop:
+            seen.setdefault(InstructionContextBuilder._stem(raw), None)
+    return list(seen)
+
+
+def _metadata_strings(value: Any, out: List[str], depth: int = 0) -> None:
+    if depth > 4:
+        return
+    if isinstance(value, str):
+        out.append(value)
+    elif isinstance(value, dict):
+        for v in value.values():
+            _metadata_strings(v, out, depth + 1)
+    elif isinstance(value, (list, tuple)):
+        for v in value:
+            _metadata_strings(v, out, depth + 1)
+
+
+def table_text(item: Dict[str, Any]) -> Tuple[str, str]:
+    """(name, body) to index for one normalized table entry of the builder."""
+    name = item.get("name") or ""
+    parts: List[str] = []
+    if item.get("description"):
+        parts.append(str(item["description"]))
+    for col in item.get("columns") or []:
+        if not isinstance(col, dict):
+            continue
+        parts.append(col.get("name") or "")
+        if col.get("description"):
+            parts.append(str(col["description"]))
+    _metadata_strings(item.get("metadata_json"), parts)
+    return name, "\n".join(p for p in parts if p)
+
+
+def _digest(name: str, body: str) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    h.update(name.encode("utf-8", "surrogatepass"))
+    h.update(b"\x00")
+    h.update(body.encode("utf-8", "surrogatepass"))
+    return h.hexdigest()
+
+
+class TableIndex:
+    """BM25 postings for one data source's tables."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._digests: Dict[str, str] = {}
+        self._lengths: Dict[str, int] = {}
+        self._terms: Dict[str, Tuple[str, ...]] = {}
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._digests)
+
+    def _remove(self, doc_id: str) -> None:
+        self._digests.pop(doc_id, None)
+        self._total_length -= self._lengths.pop(doc_id, 0)
+        for term in self._terms.pop(doc_id, ()):
+            posting = self._postings.get(term)
+            if posting is not None:
+                posting.pop(doc_id, None)
+                if not posting:
+                    del self._postings[term]
+
+    def _add(self, doc_id: str, digest: str, name: str, body: str) -> None:
+        tf = Counter(tokenize(body))
+        for tok in tokenize(name):
+            tf[tok] += NAME_WEIGHT
+        self._digests[doc_id] = digest
+        length = sum(tf.values())
+        self._lengths[doc_id] = length
+        self._total_length += length
+        self._terms[doc_id] = tuple(tf)
+        for term, n in tf.items():
+            self._postings.setdefault(term, {})[doc_id] = n
+
+    def sync(self, docs: Iterable[Tuple[str, str, str]], complete: bool = False) -> int:
+        """Bring the index up to date with ``(doc_id, name, body)`` entries.
+
+        Only entries whose text changed are re-tokenized. With `complete`,
+        `docs` is the whole catalog and anything else indexed is pruned.
+        Returns how many tables were (re)indexed.
+        """
+        indexed = pruned = 0
+        with self._lock:
+            seen = set()
+            for doc_id, name, body in docs:
+                seen.add(doc_id)
+                digest = _digest(name, body)
+                if self._digests.get(doc_id) == digest:
+                    continue
+                if doc_id in self._digests:
+                    self._remove(doc_id)
+                self._add(doc_id, digest, name, body)
+                indexed += 1
+            if complete:
+                for doc_id in [d for d in self._digests if d not in seen]:
+                    self._remove(doc_id)
+                    pruned += 1
+        if indexed:
+            _count("tables_indexed", indexed)
+        if pruned:
+            _count("tables_pruned", pruned)
+        return indexed
+
+    def score(self, query: str) -> Dict[str, float]:
+        """BM25 score per table for `query`; tables matching no term are absent."""
+        terms = query_terms(query)
+        _count("queries")
+        out: Dict[str, float] = {}
+        with self._lock:
+            n = len(self._digests)
+            if not terms or not n:
+                return out
+            avg_len = (self._total_length / n) or 1.0
+            lengths = self._lengths
+            for term in terms:
+                posting = self._postings.get(term)
+                if not posting:
+                    continue
+                df = len(posting)
+                idf = math.log(1.0 + (n - df + 0.5) / (df + 0.5))
+                for doc_id, tf in posting.items():
+                    norm = K1 * (1.0 - B + B * lengths[doc_id] / avg_len)
+                    out[doc_id] = out.get(doc_id, 0.0) + idf * tf * (K1 + 1.0) / (tf + norm)
+        return out
+
+
+def for_source(key: Hashable) -> TableIndex:
+    """The cached index for `key` (data source + catalog view), created empty."""
+    with _lock:
+        index = _indexes.get(key)
+        if index is not None:
+            _indexes.move_to_end(key)
+            _metrics["hits"] += 1
+            return index
+        _metrics["misses"] += 1
+        index = TableIndex()
+        _indexes[key] = index
+        while len(_indexes) > max_sources():
+            _indexes.popitem(last=False)
+        return index
+
+
+def relevance(
+    key: Hashable,
+    items: List[Dict[str, Any]],
+    query: str,
+    complete: bool = False,
+) -> List[float]:
+    """Relevance in [0, 1] for each of `items`, aligned by position.
+
+    BM25 scores are divided by the best score among `items`, so the top
+    match is 1.0 whatever the corpus size and the weight it is blended with
+    means the same thing on every source.
+    """
+    index = for_source(key)
+    docs = []
+    for pos, item in enumerate(items):
+        doc_id = str(item.get("table_id") or f"name:{item.get('name') or pos}")
+        name, body = table_text(item)
+        docs.append((doc_id, name, body))
+    index.sync(docs, complete=complete)
+    scores = index.score(query)
+    raw = [scores.get(doc_id, 0.0) for doc_id, _, _ in docs]
+    best = max(raw, default=0.0)
+    if best <= 0.0:
+        return [0.0] * len(items)
+    return [s / best for s in raw]
+
+
+def _count(name: str, n: int = 1) -> None:
+    with _lock:
+        _metrics[name] += n
+
+
+def stats() -> dict:
+    with _lock:
+        return {
+            **_metrics,
+            "sources": len(_indexes),
+            "tables": sum(len(i) for i in _indexes.values()),
+        }
+
+
+def reset(key: Optional[Hashable] = None) -> None:
+    with _lock:
+        if key is None:
+            _indexes.clear()
+            for k in _metrics:
+                _metrics[k] = 0
+        else:
+            _indexes.pop(key, None)
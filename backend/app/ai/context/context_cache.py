@@ -0,0 +1,265 @@
+"""Versioned, cross-worker cache for the schema and instruction sections.
+
+`ContextHub.prime_static` used to keep built sections in two unbounded
+per-process dicts guarded only by a TTL. With several API replicas (and
+several uvicorn workers per replica) that meant every worker rebuilt the same
+section on its own first miss, and a schema re-introspection or an edited
+instruction stayed invisible for up to the TTL on every worker that had it
+cached — `invalidate_*` only ever reached the process it ran in.
+
+  * **Version stamps.** `context_cache_versions` holds a per-organization
+    stamp for ``schema`` and ``instructions``. Writes to the rows either
+    section is built from bump the stamp as soon as the writer commits
+    (`app.models.context_cache`). Every cache key carries the current
+    stamps, so after a change no worker can reach an old entry; nothing has
+    to be broadcast.
+  * **Memory tier.** A bounded LRU (`BOW_CONTEXT_CACHE_MAX_ENTRIES`) in
+    front of everything, with the old per-kind TTLs kept so table stats and
+    LLM-ranked instructions still refresh on their own.
+  * **Shared tier.** On a memory miss the section is looked up in
+    `context_cache_entries` (Postgres, the one store every worker shares) as
+    zlib-compressed JSON; a worker that builds a section publishes it there.
+    Disable with ``BOW_CONTEXT_CACHE_SHARED=0``.
+
+Everything shared is best effort: if the stamps cannot be read (table not
+migrated, database hiccup) the key carries no stamp, the shared tier is
+skipped and the cache degrades to the per-process TTL cache it replaces.
+Shared-tier I/O uses its own short session, never the caller's.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+import uuid
+import zlib
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, Type
+
+from sqlalchemy import DateTime, LargeBinary, text
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = "schema"
+INSTRUCTIONS = "instructions"
+
+DEFAULT_MAX_ENTRIES = 256
+# Schemas only change on re-introspection (which bumps the stamp) or a
+# table_stats rollup (which does not); 5 minutes bounds the stats lag.
+DEFAULT_SCHEMA_TTL_S = 300.0
+# Instruction entries are keyed on the query, so hits are mostly retries and
+# scheduled reruns; 2 minutes bounds the lag of LLM-ranked "auto" entries.
+DEFAULT_INSTRUCTIONS_TTL_S = 120.0
+
+_lock = threading.Lock()
+_entries: "OrderedDict[Tuple, Tuple[float, Any]]" = OrderedDict()
+_metrics = {
+    "hits": 0, "misses": 0, "shared_hits": 0, "shared_misses": 0,
+    "shared_writes": 0, "shared_errors": 0, "builds": 0, "evictions": 0,
+}
+# Overridable for tests; defaults to the app's async session factory.
+_session_factory: Optional[Callable[[], Any]] = None
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _env_number(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def max_entries() -> int:
+    return max(1, _env_int("BOW_CONTEXT_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES))
+
+
+def ttl_seconds(kind: str) -> float:
+    if kind == SCHEMA:
+        return max(0.0, _env_number("BOW_SCHEMA_CACHE_TTL_S", DEFAULT_SCHEMA_TTL_S))
+    return max(0.0, _env_number("BOW_INSTRUCTIONS_CACHE_TTL_S", DEFAULT_INSTRUCTIONS_TTL_S))
+
+
+def shared_enabled() -> bool:
+    return os.environ.get("BOW_CONTEXT_CACHE_SHARED", "1").strip().lower() not in ("0", "false", "no", "off")
+
+
+def _sessions():
+    global _session_factory
+    if _session_factory is None:
+        from app.settings.database import create_async_session_factory
+        _session_factory = create_async_session_factory()
+    return _session_factory
+
+
+def key_digest(key: Tuple) -> str:
+    return hashlib.sha256(repr(key).encode("utf-8", "surrogatepass")).hexdigest()
+
+
+async def stamps(org_id: str) -> Optional[Dict[str, int]]:
+    """Current version stamps of an organization, or None if unreadable.
+
+    An organization whose rows were never written since the table existed
+    has no row yet: its stamps are 0.
+    """
+    if not org_id:
+        return None
+    try:
+        async with _sessions()() as session:
+            result = await session.execute(
+                text("SELECT kind, version FROM context_cache_versions WHERE organization_id = :org"),
+                {"org": str(org_id)},
+            )
+            out = {SCHEMA: 0, INSTRUCTIONS: 0}
+            for kind, version in result.all():
+                out[str(kind)] = int(version or 0)
+            return out
+    except Exception as e:
+        _count("shared_errors")
+        logger.debug(f"[context_cache] stamps unavailable: {e}")
+        return None
+
+
+def get(key: Tuple) -> Any:
+    """Memory-tier lookup. `key` is ``(kind, org_id, stamp, ...)``."""
+    now = time.monotonic()
+    with _lock:
+        entry = _entries.get(key)
+        if entry is None or now >= entry[0]:
+            if entry is not None:
+                _entries.pop(key, None)
+            return None
+        _entries.move_to_end(key)
+        return entry[1]
+
+
+def put(key: Tuple, value: Any, ttl: Optional[float] = None) -> None:
+    ttl = ttl_seconds(key[0]) if ttl is None else ttl
+    with _lock:
+        _entries[key] = (time.monotonic() + ttl, value)
+        _entries.move_to_end(key)
+        limit = max_entries()
+        while len(_entries) > limit:
+            _entries.popitem(last=False)
+            _metrics["evictions"] += 1
+
+
+async def _shared_get(key: Tuple, model: Type) -> Any:
+    async with _sessions()() as session:
+        result = await session.execute(
+            text(
+                "SELECT payload, expires_at FROM context_cache_entries "
+                "WHERE cache_key = :k AND expires_at > :now"
+            ).columns(payload=LargeBinary, expires_at=DateTime),
+            {"k": key_digest(key), "now": datetime.utcnow()},
+        )
+        row = result.first()
+    if row is None:
+        return None, 0.0
+    remaining = (row[1] - datetime.utcnow()).total_seconds()
+    return model.model_validate_json(zlib.decompress(row[0])), remaining
+
+
+async def _shared_put(key: Tuple, value: Any, ttl: float) -> None:
+    payload = zlib.compress(value.model_dump_json().encode("utf-8"))
+    now = datetime.utcnow()
+    async with _sessions()() as session:
+        # Drop this key's previous entry and the org's expired ones (entries
+        # under an old stamp are unreachable and only wait out their TTL).
+        await session.execute(
+            text(
+                "DELETE FROM context_cache_entries WHERE cache_key = :k "
+                "OR (organization_id = :org AND expires_at <= :now)"
+            ),
+            {"k": key_digest(key), "org": str(key[1]), "now": now},
+        )
+        await session.execute(
+            text(
+                "INSERT INTO context_cache_entries "
+                "(id, cache_key, organization_id, kind, payload, expires_at, created_at, updated_at) "
+                "VALUES (:id, :k, :org, :kind, :payload, :exp, :now, :now)"
+            ),
+            {
+                "id": str(uuid.uuid4()), "k": key_digest(key), "org": str(key[1]),
+                "kind": key[0], "payload": payload, "exp": now + timedelta(seconds=ttl), "now": now,
+            },
+        )
+        await session.commit()
+
+
+async def get_or_build(key: Tuple, model: Type, build: Callable[[], Awaitable[Any]]) -> Tuple[Any, str]:
+    """The section for `key` from memory, the shared tier, or `build()`.
+
+    `key` is ``(kind, org_id, stamp, ...)``; a None stamp keeps the entry
+    process-local. `model` is the section's pydantic class, used to
+    deserialize shared entries. Returns ``(section, source)`` where source
+    is ``"memory"``, ``"shared"`` or ``"built"``.
+    """
+    value = get(key)
+    if value is not None:
+        _count("hits")
+        return value, "memory"
+    _count("misses")
+
+    shared = key[2] is not None and shared_enabled()
+    if shared:
+        try:
+            value, remaining = await _shared_get(key, model)
+        except Exception as e:
+            value, remaining = None, 0.0
+            _count("shared_errors")
+            logger.debug(f"[context_cache] shared read failed: {e}")
+        if value is not None:
+            _count("shared_hits")
+            put(key, value, ttl=min(ttl_seconds(key[0]), max(0.0, remaining)))
+            return value, "shared"
+        _count("shared_misses")
+
+    value = await build()
+    _count("builds")
+    put(key, value)
+    if shared and value is not None:
+        try:
+            await _shared_put(key, value, ttl_seconds(key[0]))
+            _count("shared_writes")
+        except Exception as e:
+            _count("shared_errors")
+            logger.debug(f"[context_cache] shared write failed: {e}")
+    return value, "built"
+
+
+def invalidate(kind: Optional[str] = None, org_id: Optional[str] = None) -> None:
+    """Drop memory-tier entries, optionally scoped to a kind and an org.
+
+    Other workers are reached through the version stamps, not through here.
+    """
+    with _lock:
+        for k in [
+            k for k in _entries
+            if (kind is None or k[0] == kind) and (org_id is None or k[1] == str(org_id))
+        ]:
+            _entries.pop(k, None)
+
+
+def _count(name: str, n: int = 1) -> None:
+    with _lock:
+        _metrics[name] += n
+
+
+def stats() -> dict:
+    with _lock:
+        return {**_metrics, "entries": len(_entries)}
+
+
+def reset() -> None:
+    with _lock:
+        _entries.clear()
+        for k in _metrics:
+            _metrics[k] = 0
@@ -7,51 +7,32 @@ import time
 from typing import Optional, Dict, Any, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from . import context_cache
+
 _hub_logger = logging.getLogger(__name__)
 
-# Process-wide cache for the heaviest piece of `prime_static` —
-# the schema build. Keyed by (org_id, sorted ds-ids tuple, build_id).
-# Schemas only change when a data source is re-introspected or
-# table_stats roll up; in steady state they're stable for minutes.
-# Without this, every completion paid ~1.6s rebuilding the same
-# TablesSchemaContext from scratch (the dominant chunk of "setup").
-# TTL keeps freshness loose — out-of-band schema refreshes catch up
-# within the window. For correctness-critical change events, callers
-# can call `invalidate_schema_cache(org_id)` directly.
-_SCHEMA_CACHE: Dict[Tuple[str, Tuple[str, ...], Optional[str]], Tuple[float, Any]] = {}
-# 5 minutes: schemas only change on re-introspection / stats rollup,
-# and a typical user reads + types between prompts longer than 60s.
-# Bump cautiously — table_stats updates won't show up until the next
-# refresh or explicit invalidate_schema_cache() call.
-_SCHEMA_CACHE_TTL_S: float = 300.0
-
-# Instructions are keyed on query, so cross-prompt hits are rare; the
-# main win is when the same prompt fires twice (retries, scheduled
-# reruns). 2 minutes covers that without giving stale rankings a long
-# tail. Always-load instructions are query-independent so they're
-# always correct; only LLM-ranked load_mode="auto" entries lag.
-_INSTRUCTIONS_CACHE: Dict[Tuple[str, Tuple[str, ...], Optional[str], str], Tuple[float, Any]] = {}
-_INSTRUCTIONS_CACHE_TTL_S: float = 120.0
+# The heaviest pieces of `prime_static` — the schema build (~1.6s of ~1.9s
+# on a large catalog) and the instruction build — are cached in
+# `context_cache`: a bounded in-process LRU in front of a Postgres tier shared
+# by every worker, keyed by per-org version stamps that writes to data
+# sources, tables and instructions bump in their own transaction. A change is
+# therefore visible to the next completion on every worker; the TTLs there
+# only bound how long table_stats rollups and LLM-ranked instructions lag.
 
 
 def invalidate_schema_cache(org_id: Optional[str] = None) -> None:
-    """Drop cached schema entries. Pass org_id to scope; None drops all."""
-    if org_id is None:
-        _SCHEMA_CACHE.clear()
-        return
-    for k in list(_SCHEMA_CACHE.keys()):
-        if k[0] == str(org_id):
-            _SCHEMA_CACHE.pop(k, None)
+    """Drop this worker's cached schema entries. Pass org_id to scope; None drops all.
+
+    Other workers pick up changes through the version stamps.
+    """
+    from .builders import compiled_catalog
+    compiled_catalog.invalidate(org_id)
+    context_cache.invalidate(context_cache.SCHEMA, org_id)
 
 
 def invalidate_instructions_cache(org_id: Optional[str] = None) -> None:
-    """Drop cached instruction-build entries. Pass org_id to scope."""
-    if org_id is None:
-        _INSTRUCTIONS_CACHE.clear()
-        return
-    for k in list(_INSTRUCTIONS_CACHE.keys()):
-        if k[0] == str(org_id):
-            _INSTRUCTIONS_CACHE.pop(k, None)
+    """Drop this worker's cached instruction-build entries. Pass org_id to scope."""
+    context_cache.invalidate(context_cache.INSTRUCTIONS, org_id)
 
 from .context_specs import (
     ContextMetadata, ContextSnapshot, ContextBuildSpec,
@@ -75,6 +56,8 @@ from .sections.widgets_section import WidgetsSection
 from .sections.observations_section import ObservationsSection
 from .sections.resources_section import ResourcesSection
 from .sections.code_section import CodeSection
+from .sections.tables_schema_section import TablesSchemaContext
+from .sections.instructions_section import InstructionsSection
 from .builders.mention_context_builder import MentionContextBuilder
 from .builders.entity_context_builder import EntityContextBuilder
 from app.ai.utils.token_counter import count_tokens
@@ -297,6 +280,13 @@ class ContextHub:
         self.head_completion = head_completion
         self.widget = widget
         self.prompt_content = head_completion.prompt if head_completion else ""
+        # What schema retrieval ranks tables against: the current prompt until
+        # prime_static widens it to the recent conversation (the same text the
+        # instruction search uses).
+        self.retrieval_query: Optional[str] = (
+            self.prompt_content.get("content") if isinstance(self.prompt_content, dict)
+            else (str(self.prompt_content) if self.prompt_content else None)
+        )
         # Build system: specific instruction build to use (None = main build)
         self.build_id = build_id
         
@@ -694,9 +684,9 @@ class ContextHub:
             _hub_logger.info(f"[context_hub:prime_static] {name} done +{(time.monotonic()-t)*1000:.0f}ms")
             return result
 
-        # Schema cache: by (org, ds-ids, build_id, identity). Schemas dominate
-        # the prime_static cost (~1.6s of ~1.9s) and are stable across user
-        # prompts; the `query` only affects instructions, not schemas.
+        # Schema cache: by (org, stamp, ds-ids, build_id, identity). Schemas
+        # dominate the prime_static cost and are stable across user prompts;
+        # the `query` only affects instructions, not schemas.
         #
         # The identity component is REQUIRED for correctness: SchemaContextBuilder
         # is identity-scoped for `user_required` sources (it serves the caller's
@@ -705,62 +695,60 @@ class ContextHub:
         # other user of the same org+agents for the whole TTL.
         org_id = str(self.organization.id) if self.organization else ""
         ds_ids: Tuple[str, ...] = tuple(sorted(str(d.id) for d in (self.data_sources or [])))
-        cache_key = (
+        stamps = await context_cache.stamps(org_id)
+        schema_key = (
+            context_cache.SCHEMA,
             org_id,
+            stamps[context_cache.SCHEMA] if stamps else None,
             ds_ids,
             str(self.build_id) if self.build_id else None,
             self._schema_identity_key(),
         )
-        now = time.monotonic()
-        cached = _SCHEMA_CACHE.get(cache_key)
 
         async def _build_or_get_schemas():
-            if cached is not None and (now - cached[0]) < _SCHEMA_CACHE_TTL_S:
-                _hub_logger.info(
-                    f"[context_hub:prime_static] schemas cache hit (age={now - cached[0]:.1f}s)"
-                )
-                return cached[1]
             t = time.monotonic()
-            built = await self.schema_builder.build()
+            built, source = await context_cache.get_or_build(
+                schema_key, TablesSchemaContext, self.schema_builder.build,
+            )
             _hub_logger.info(
-                f"[context_hub:prime_static] schemas done (cache miss) +{(time.monotonic()-t)*1000:.0f}ms"
+                f"[context_hub:prime_static] schemas from {source} +{(time.monotonic()-t)*1000:.0f}ms"
             )
-            _SCHEMA_CACHE[cache_key] = (time.monotonic(), built)
             return built
 
         # Enrich the instruction-search query with recent user prompts from this
         # report so follow-ups ("now break it down by month") keep matching the
         # instructions the opening message matched.
         instr_query = await self._instruction_query(query)
+        if instr_query:
+            self.retrieval_query = instr_query
 
         # Same identity component as the schema cache: instructions are filtered
         # by per-user table accessibility, so they must not cross users either.
         # The builder's data_source_ids scope is part of the key: it is narrowed
         # to the roster focus per turn (globals only until an agent is picked),
         # so two turns with different focus must not share a cache entry.
+        # Instructions reference tables, so the schema stamp is part of it too.
         instr_scope = getattr(self.instruction_builder, "data_source_ids", None)
         instr_key = (
+            context_cache.INSTRUCTIONS,
             org_id,
+            (stamps[context_cache.INSTRUCTIONS], stamps[context_cache.SCHEMA]) if stamps else None,
             ds_ids,
             str(self.build_id) if self.build_id else None,
             str(instr_query or ""),
             self._schema_identity_key(),
             tuple(sorted(instr_scope)) if instr_scope is not None else None,
         )
-        instr_cached = _INSTRUCTIONS_CACHE.get(instr_key)
 
         async def _build_or_get_instructions():
-            if instr_cached is not None and (now - instr_cached[0]) < _INSTRUCTIONS_CACHE_TTL_S:
-                _hub_logger.info(
-                    f"[context_hub:prime_static] instructions cache hit (age={now - instr_cached[0]:.1f}s)"
-                )
-                return instr_cached[1]
             t = time.monotonic()
-            built = await self.instruction_builder.build(instr_query, build_id=self.build_id)
+            built, source = await context_cache.get_or_build(
+                instr_key, InstructionsSection,
+                lambda: self.instruction_builder.build(instr_query, build_id=self.build_id),
+            )
             _hub_logger.info(
-                f"[context_hub:prime_static] instructions done (cache miss) +{(time.monotonic()-t)*1000:.0f}ms"
+                f"[context_hub:prime_static] instructions from {source} +{(time.monotonic()-t)*1000:.0f}ms"
             )
-            _INSTRUCTIONS_CACHE[instr_key] = (time.monotonic(), built)
             return built
 
         # Run static builders in parallel; schemas/instructions come from
@@ -18,13 +18,21 @@ Three ideas carry the design:
   ``provider_name`` travel with the call/thinking that produced them and are
   replayed only to the provider that issued them — a mid-run fallback to a
   different provider must drop them rather than forward them.
+
+Every part carries its own token count, taken once (`part_tokens`) and
+re-taken only when decay changes what the model sees, so budgeting a
+transcript costs a sum over stored numbers rather than a re-count of the
+whole run each iteration.
 """
 from __future__ import annotations
 
+import json
 from dataclasses import dataclass, field
 from enum import Enum
 from typing import Any, Literal, Optional, Union
 
+from app.ai.utils import token_counter
+
 
 class Outcome(str, Enum):
     """How a tool call ended.
@@ -54,6 +62,8 @@ class Tier(int, Enum):
 class TextPart:
     text: str
     kind: Literal["text"] = "text"
+    # Counted once by part_tokens; not part of the part's identity.
+    tokens: Optional[int] = field(default=None, compare=False, repr=False)
 
 
 @dataclass
@@ -64,6 +74,7 @@ class ThinkingPart:
     signature: Optional[str] = None
     provider_name: Optional[str] = None
     kind: Literal["thinking"] = "thinking"
+    tokens: Optional[int] = field(default=None, compare=False, repr=False)
 
 
 @dataclass
@@ -77,6 +88,7 @@ class ToolCallPart:
     signature: Optional[str] = None
     provider_name: Optional[str] = None
     kind: Literal["tool_call"] = "tool_call"
+    tokens: Optional[int] = field(default=None, compare=False, repr=False)
 
 
 @dataclass
@@ -157,13 +169,7 @@ class Turn:
         return {p.call_id for p in self.parts if isinstance(p, ToolResultPart)}
 
     def tokens(self) -> int:
-        total = 0
-        for p in self.parts:
-            if isinstance(p, ToolResultPart):
-                total += p.tokens
-            elif isinstance(p, (TextPart, ThinkingPart)):
-                total += max(len(p.text) // 4, 0)
-        return total
+        return sum(part_tokens(p) for p in self.parts)
 
 
 def estimate_tokens(text: str) -> int:
@@ -172,5 +178,35 @@ def estimate_tokens(text: str) -> int:
     Deliberately not the billing number: provider-reported usage stays the
     source of truth for cost and quota. This exists because the ladder has to
     know what a part costs *before* the call, which no provider can tell us.
+    Script-aware and uncalibrated (`token_counter.estimate_tokens`); the
+    transcript applies the model's calibration factor to the total.
     """
-    return len(text) // 4 if text else 0
+    return token_counter.estimate_tokens(text) if text else 0
+
+
+def part_tokens(part: Any) -> int:
+    """The part's stored token count, counting it on first use.
+
+    A ToolResultPart is counted by whoever builds it (and again by the ladder
+    when its tier changes); a zero there with a non-empty body means nobody
+    did, so it is counted here.
+    """
+    if isinstance(part, ToolResultPart):
+        if not part.tokens and (part.content or part.digest):
+            part.tokens = estimate_tokens(part.model_text())
+        return part.tokens
+    n = getattr(part, "tokens", None)
+    if n is None:
+        if isinstance(part, ToolCallPart):
+            try:
+                args = json.dumps(part.args, default=str)
+            except Exception:
+                args = str(part.args)
+            n = estimate_tokens(part.tool_name) + estimate_tokens(args)
+        else:
+            n = estimate_tokens(getattr(part, "text", "") or "")
+        try:
+            part.tokens = n
+        except AttributeError:
+            pass
+    return n or 0
@@ -0,0 +1,103 @@
+"""Per-run memo of rendered context sections.
+
+Every planner iteration turns the same sections back into prompt text: the
+static ones (resources, files) come straight from `prime_static` and never
+change within a run, and the warm ones (messages, mentions, entities,
+scheduled tasks) are rebuilt by `refresh_warm` but usually carry the same
+content as on the previous iteration — only observations and the transcript
+tail move. Rendering is pure-Python string building over every item; the
+section's JSON dump is done by pydantic-core and is several times cheaper.
+
+`SectionRenderMemo` keys each rendered string by the section's class, the
+render method and its arguments, and a digest of the section's content
+(``model_dump_json``). An unchanged section costs a dump and a hash; only a
+section whose content changed is rendered again. Because a hit returns the
+very string rendered before, the prompt's static prefix stays byte-identical
+across iterations, which is what provider prompt caches key on —
+`static_prefix` records whether it did.
+
+A section that cannot be dumped (arbitrary objects in a field) is rendered
+every time; the memo never changes what is rendered, only how often.
+"""
+
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+DEFAULT_MAX_ENTRIES = 64
+
+
+def _digest(text: str) -> str:
+    return hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).hexdigest()
+
+
+class SectionRenderMemo:
+    """Rendered section strings for one agent run, keyed by content hash."""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_entries = max(1, int(max_entries))
+        self._entries: "OrderedDict[Tuple, str]" = OrderedDict()
+        self._prefix_digest: Optional[str] = None
+        self._iteration = self._fresh_counters()
+        self.totals = self._fresh_counters()
+
+    @staticmethod
+    def _fresh_counters() -> Dict[str, float]:
+        return {"hits": 0, "misses": 0, "uncacheable": 0, "render_ms": 0.0}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def render(self, section: Any, method: str = "render", **kwargs: Any) -> str:
+        """``getattr(section, method)(**kwargs)``, from the memo when unchanged."""
+        if section is None:
+            return ""
+        t0 = time.perf_counter()
+        try:
+            content = section.model_dump_json()
+        except Exception:
+            content = None
+        if content is None:
+            out = getattr(section, method)(**kwargs)
+            self._tally("uncacheable", t0)
+            return out
+        key = (type(section).__qualname__, method, tuple(sorted(kwargs.items())), _digest(content))
+        out = self._entries.get(key)
+        if out is not None:
+            self._entries.move_to_end(key)
+            self._tally("hits", t0)
+            return out
+        out = getattr(section, method)(**kwargs)
+        self._entries[key] = out
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        self._tally("misses", t0)
+        return out
+
+    def _tally(self, counter: str, t0: float) -> None:
+        ms = (time.perf_counter() - t0) * 1000.0
+        for c in (self._iteration, self.totals):
+            c[counter] += 1
+            c["render_ms"] += ms
+
+    def static_prefix(self, parts: Iterable[Optional[str]]) -> bool:
+        """Record the run-stable prompt blocks; True if they changed since the
+        previous iteration (always True the first time)."""
+        digest = _digest("\x00".join(p or "" for p in parts))
+        changed = digest != self._prefix_digest
+        self._prefix_digest = digest
+        return changed
+
+    def take_iteration_stats(self) -> Dict[str, Any]:
+        """This iteration's counters (then reset), with the hit ratio."""
+        c = self._iteration
+        self._iteration = self._fresh_counters()
+        cacheable = c["hits"] + c["misses"]
+        return {
+            "hits": int(c["hits"]),
+            "misses": int(c["misses"]),
+            "uncacheable": int(c["uncacheable"]),
+            "hit_ratio": round(c["hits"] / cacheable, 3) if cacheable else None,
+            "render_ms": round(c["render_ms"], 2),
+        }
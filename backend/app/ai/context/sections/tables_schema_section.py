@@ -1,5 +1,5 @@
-from typing import ClassVar, List, Optional, Literal, Dict, Any
-from pydantic import BaseModel
+from typing import Callable, ClassVar, List, Optional, Literal, Dict, Any
+from pydantic import BaseModel, Field
 from app.ai.context.sections.base import ContextSection, xml_tag, xml_escape
 from app.schemas.data_source_schema import DataSourceSummarySchema
 from app.ai.prompt_formatters import Table as PromptTable
@@ -71,6 +71,30 @@ class FileScopeItem(BaseModel):
     # no "else denied" language, because neither would be true.
     enforces_scope: bool = True
 
+    @staticmethod
+    def summarize(files: List[PromptTable]) -> Dict[str, Any]:
+        """`file_count`, `sample` and `topics` of a scope over `files` (its
+        connection's per-file rows, in ranking order)."""
+        topics: List[str] = []
+        seen = set()
+        for t in files:
+            mj = getattr(t, 'metadata_json', None) or {}
+            sub = (mj.get("network_dir") or mj.get("s3") or mj.get("graph")
+                   or mj.get("google_drive") or {}) if isinstance(mj, dict) else {}
+            for kw in (sub.get("keywords") or []):
+                k = str(kw).lower()
+                if k not in seen:
+                    seen.add(k); topics.append(kw)
+                if len(topics) >= 12:
+                    break
+            if len(topics) >= 12:
+                break
+        return {
+            "file_count": len(files),
+            "sample": [t.name for t in files[:5] if getattr(t, 'name', None)],
+            "topics": topics,
+        }
+
 
 def _render_powerbi_cloud_metadata_xml(t: PromptTable) -> str:
     """Render the `powerbi` (cloud) metadata block for a table, if present.
@@ -281,6 +305,96 @@ def _render_source_metadata_xml(t: PromptTable) -> str:
         return ""
 
 
+def render_table_xml(t: PromptTable) -> str:
+    """One table's full <table> element, as the schema sample renders it."""
+    col_parts = []
+    for c in (t.columns or []):
+        col_attrs = f'name="{xml_escape(c.name)}" dtype="{xml_escape(c.dtype or "")}"'
+        if getattr(c, 'description', None):
+            col_attrs += f' description="{xml_escape(c.description)}"'
+        col_meta = getattr(c, 'metadata', None)
+        if isinstance(col_meta, dict):
+            role = col_meta.get("kind") or col_meta.get("role")
+            if role:
+                col_attrs += f' role="{xml_escape(str(role).lower())}"'
+            # Query identifiers that differ from the display name
+            # (XMLA unique_name). Without these the agent has only
+            # captions and cannot author valid MDX/DAX.
+            for mk in _COLUMN_META_KEYS:
+                mv = col_meta.get(mk)
+                if mv is None or mv == "":
+                    continue
+                # Booleans render lowercase so the attribute reads
+                # as XML (hidden="true"), not Python (hidden="True").
+                mv = str(mv).lower() if isinstance(mv, bool) else str(mv)
+                col_attrs += f' {mk}="{xml_escape(mv)}"'
+        col_parts.append(f'<column {col_attrs}/>')
+    cols = "\n".join(col_parts)
+    pks = "\n".join(
+        f'<pk name="{xml_escape(pk.name)}" dtype="{xml_escape(pk.dtype or "")}"/>'
+        for pk in (t.pks or [])
+    )
+    fks = "\n".join(
+        f'<fk column="{xml_escape(fk.column.name)}" '
+        f'ref_table="{xml_escape(fk.references_name)}" '
+        f'ref_column="{xml_escape(fk.references_column.name)}"/>'
+        for fk in (t.fks or [])
+    )
+    attrs = {"name": t.name, "cols": str(len(t.columns or []))}
+    is_sv = isinstance(getattr(t, 'metadata_json', None), dict) and t.metadata_json.get("type") == "semantic_view"
+    if is_sv:
+        attrs["type"] = "semantic_view"
+    if getattr(t, 'description', None):
+        attrs["description"] = t.description
+    try:
+        if getattr(t, 'score', None) is not None:
+            attrs["score"] = str(round(float(getattr(t, 'score')), 2))
+    except Exception:
+        pass
+    try:
+        if getattr(t, 'usage_count', None) is not None:
+            attrs["usage"] = str(int(getattr(t, 'usage_count') or 0))
+    except Exception:
+        pass
+    try:
+        if getattr(t, 'referenced_instructions_count', None) is not None:
+            attrs["instructions"] = str(int(getattr(t, 'referenced_instructions_count')))
+    except Exception:
+        pass
+    note_xml = ""
+    if is_sv:
+        note_xml = xml_tag("note", "Snowflake Semantic View: query with SELECT * FROM SEMANTIC_VIEW(view_name DIMENSIONS dim1, dim2 METRICS metric1, metric2 WHERE condition). Use DIMENSIONS for role=dimension columns, METRICS for role=measure/metric columns.")
+    # PowerBI Report Server metadata — surface queryability so the planner
+    # knows pbix model tables / RDL reports / datasets are queryable here.
+    pbi_xml = ""
+    try:
+        pbi = (t.metadata_json or {}).get("powerbi_report_server") if isinstance(getattr(t, 'metadata_json', None), dict) else None
+        if isinstance(pbi, dict):
+            pbi_attrs = {}
+            for k in ("queryable", "report_type", "upstream_source", "report_id", "dataset_id"):
+                v = pbi.get(k)
+                if v is not None and v != "":
+                    pbi_attrs[k] = str(v).lower() if isinstance(v, bool) else str(v)
+            pbi_note = pbi.get("query_note")
+            pbi_inner = xml_escape(pbi_note) if pbi_note else ""
+            if pbi_attrs or pbi_inner:
+                pbi_xml = xml_tag("powerbi_report_server", pbi_inner, pbi_attrs)
+    except Exception:
+        pbi_xml = ""
+    pbi_cloud_xml = _render_powerbi_cloud_metadata_xml(t)
+    # Connector-specific identifiers the query path needs (Tableau
+    # datasourceLuid, SSAS modelType, Prometheus metric_type/unit).
+    src_meta_xml = _render_source_metadata_xml(t)
+    inner = "\n".join(filter(None, [note_xml, xml_tag("columns", cols), xml_tag("pks", pks) if pks else "", xml_tag("fks", fks) if fks else "", _render_semantic_model_xml(t), _render_analysis_services_semantics_xml(t), pbi_xml, pbi_cloud_xml, src_meta_xml]))
+    if getattr(t, 'is_cached', False):
+        attrs["cached"] = "true"
+        if getattr(t, 'cached_as_of', None):
+            attrs["as_of"] = t.cached_as_of
+        if getattr(t, 'cached_next_refresh', None):
+            attrs["next_refresh"] = t.cached_next_refresh
+    return xml_tag("table", inner, attrs)
+
+
 class TablesSchemaContext(ContextSection):
     # "Agent" is the product name for a data source; the model-facing schema
     # context uses the same vocabulary as the roster/tools (<agents>/<agent>).
@@ -292,6 +406,11 @@ class TablesSchemaContext(ContextSection):
         tables: List[PromptTable] = []
         mcp_tools: List[MCPToolItem] = []
         file_scopes: List[FileScopeItem] = []
+        # The per-file rows `file_scopes` summarize, kept only on request
+        # (`SchemaContextBuilder.build(keep_file_tables=True)`) so the compiled
+        # catalog can narrow a scope to the files a lookup matched. Never
+        # rendered or serialized.
+        file_tables: List[PromptTable] = Field(default_factory=list, exclude=True)
         # Connections dropped from `tables`/`file_scopes` because their backing
         # Connection.is_active flag is False (a cached "unreachable" health
         # signal). Retained so the render can KEEP the data source — a live
@@ -823,8 +942,12 @@ class TablesSchemaContext(ContextSection):
             payload = xml_tag("count", str(len(self.tables or []))) + xml_tag("top", ", ".join(first_five))
             return xml_tag(self.tag_name, payload, {"name": self.info.name, "type": self.info.type, "id": self.info.id})
 
-        def _render_topk_tables_full(self, top_k: int) -> str:
-            """Render top K tables with full schema, grouped by connection if multi-connection."""
+        def _render_topk_tables_full(self, top_k: int, table_xml: Optional[Callable[[PromptTable], str]] = None) -> str:
+            """Render top K tables with full schema, grouped by connection if multi-connection.
+
+            `table_xml` renders one table; a caller holding pre-rendered
+            fragments (the compiled describe_tables catalog) passes its own.
+            """
             # Cached relations are never sliced away by the cap. They rank first
             # (see schema_context_builder._cached_first), but this render path is
             # also reached from describe_tables with its own smaller k, and a
@@ -849,93 +972,7 @@ class TablesSchemaContext(ContextSection):
 
             has_multi_connection = len(conn_groups) > 1 or (len(conn_groups) == 1 and 'default' not in conn_groups)
 
-            def render_table(t):
-                col_parts = []
-                for c in (t.columns or []):
-                    col_attrs = f'name="{xml_escape(c.name)}" dtype="{xml_escape(c.dtype or "")}"'
-                    if getattr(c, 'description', None):
-                        col_attrs += f' description="{xml_escape(c.description)}"'
-                    col_meta = getattr(c, 'metadata', None)
-                    if isinstance(col_meta, dict):
-                        role = col_meta.get("kind") or col_meta.get("role")
-                        if role:
-                            col_attrs += f' role="{xml_escape(str(role).lower())}"'
-                        # Query identifiers that differ from the display name
-                        # (XMLA unique_name). Without these the agent has only
-                        # captions and cannot author valid MDX/DAX.
-                        for mk in _COLUMN_META_KEYS:
-                            mv = col_meta.get(mk)
-                            if mv is None or mv == "":
-                                continue
-                            # Booleans render lowercase so the attribute reads
-                            # as XML (hidden="true"), not Python (hidden="True").
-                            mv = str(mv).lower() if isinstance(mv, bool) else str(mv)
-                            col_attrs += f' {mk}="{xml_escape(mv)}"'
-                    col_parts.append(f'<column {col_attrs}/>')
-                cols = "\n".join(col_parts)
-                pks = "\n".join(
-                    f'<pk name="{xml_escape(pk.name)}" dtype="{xml_escape(pk.dtype or "")}"/>'
-                    for pk in (t.pks or [])
-                )
-                fks = "\n".join(
-                    f'<fk column="{xml_escape(fk.column.name)}" '
-                    f'ref_table="{xml_escape(fk.references_name)}" '
-                    f'ref_column="{xml_escape(fk.references_column.name)}"/>'
-                    for fk in (t.fks or [])
-                )
-                attrs = {"name": t.name, "cols": str(len(t.columns or []))}
-                is_sv = isinstance(getattr(t, 'metadata_json', None), dict) and t.metadata_json.get("type") == "semantic_view"
-                if is_sv:
-                    attrs["type"] = "semantic_view"
-                if getattr(t, 'description', None):
-                    attrs["description"] = t.description
-                try:
-                    if getattr(t, 'score', None) is not None:
-                        attrs["score"] = str(round(float(getattr(t, 'score')), 2))
-                except Exception:
-                    pass
-                try:
-                    if getattr(t, 'usage_count', None) is not None:
-                        attrs["usage"] = str(int(getattr(t, 'usage_count') or 0))
-                except Exception:
-                    pass
-                try:
-                    if getattr(t, 'referenced_instructions_count', None) is not None:
-                        attrs["instructions"] = str(int(getattr(t, 'referenced_instructions_count')))
-                except Exception:
-                    pass
-                note_xml = ""
-                if is_sv:
-                    note_xml = xml_tag("note", "Snowflake Semantic View: query with SELECT * FROM SEMANTIC_VIEW(view_name DIMENSIONS dim1, dim2 METRICS metric1, metric2 WHERE condition). Use DIMENSIONS for role=dimension columns, METRICS for role=measure/metric columns.")
-                # PowerBI Report Server metadata — surface queryability so the planner
-                # knows pbix model tables / RDL reports / datasets are queryable here.
-                pbi_xml = ""
-                try:
-                    pbi = (t.metadata_json or {}).get("powerbi_report_server") if isinstance(getattr(t, 'metadata_json', None), dict) else None
-                    if isinstance(pbi, dict):
-                        pbi_attrs = {}
-                        for k in ("queryable", "report_type", "upstream_source", "report_id", "dataset_id"):
-                            v = pbi.get(k)
-                            if v is not None and v != "":
-                                pbi_attrs[k] = str(v).lower() if isinstance(v, bool) else str(v)
-                        pbi_note = pbi.get("query_note")
-                        pbi_inner = xml_escape(pbi_note) if pbi_note else ""
-                        if pbi_attrs or pbi_inner:
-                            pbi_xml = xml_tag("powerbi_report_server", pbi_inner, pbi_attrs)
-                except Exception:
-                    pbi_xml = ""
-                pbi_cloud_xml = _render_powerbi_cloud_metadata_xml(t)
-                # Connector-specific identifiers the query path needs (Tableau
-                # datasourceLuid, SSAS modelType, Prometheus metric_type/unit).
-                src_meta_xml = _render_source_metadata_xml(t)
-                inner = "\n".join(filter(None, [note_xml, xml_tag("columns", cols), xml_tag("pks", pks) if pks else "", xml_tag("fks", fks) if fks else "", _render_semantic_model_xml(t), _render_analysis_services_semantics_xml(t), pbi_xml, pbi_cloud_xml, src_meta_xml]))
-                if getattr(t, 'is_cached', False):
-                    attrs["cached"] = "true"
-                    if getattr(t, 'cached_as_of', None):
-                        attrs["as_of"] = t.cached_as_of
-                    if getattr(t, 'cached_next_refresh', None):
-                        attrs["next_refresh"] = t.cached_next_refresh
-                return xml_tag("table", inner, attrs)
+            render_table = table_xml or render_table_xml
 
             if has_multi_connection:
                 # Render with nested <connection> tags
@@ -1007,10 +1044,16 @@ class TablesSchemaContext(ContextSection):
             return xml_tag(self.tag_name, "".join(ds._render_digest() for ds in self.data_sources or []))
         return xml_tag(self.tag_name, "\n\n".join(ds.render() for ds in self.data_sources or []))
 
-    def render_combined(self, top_k_per_ds: int = 10, index_limit: int = 200, include_index: bool = True) -> str:
+    def render_combined(
+        self,
+        top_k_per_ds: int = 10,
+        index_limit: int = 200,
+        include_index: bool = True,
+        table_xml: Optional[Callable[[PromptTable], str]] = None,
+    ) -> str:
         ds_chunks: List[str] = []
         for ds in (self.data_sources or []):
-            sample_xml = ds._render_topk_tables_full(top_k_per_ds)
+            sample_xml = ds._render_topk_tables_full(top_k_per_ds, table_xml=table_xml)
             index_xml = ds._render_names_index(index_limit) if include_index else ""
             # Render MCP tools for this data source
             mcp_xml = ds._render_mcp_tools_xml() if ds.mcp_tools else ""
@@ -5,10 +5,13 @@ Replaces the rebuild-one-user-message pattern: turns accumulate, and
 feeds the per-client ``_translate_messages`` implementations that already exist.
 
 The ladder (``fit_to_budget``) decays oldest-first and never splits a tool call
-from its result.
+from its result. Sizes come from the counts stored on each part, scaled by the
+calibration factor learned for the transcript's provider and model, so fitting
+a long run re-counts nothing it counted before.
 """
 from __future__ import annotations
 
+import math
 from typing import Optional
 
 from app.ai.llm.types import Message
@@ -22,7 +25,9 @@ from app.ai.context.parts import (
     ToolResultPart,
     Turn,
     estimate_tokens,
+    part_tokens,
 )
+from app.ai.utils import token_counter
 
 # Turns at the tail that are never decayed — the model must see the step it
 # just took in full, plus the one before it for continuity.
@@ -51,8 +56,11 @@ def _image_source(img: dict) -> dict:
 class Transcript:
     """Append-only list of turns for one agent run."""
 
-    def __init__(self) -> None:
+    def __init__(self, *, provider: Optional[str] = None, model_id: Optional[str] = None) -> None:
         self.turns: list[Turn] = []
+        # Whose tokenizer the budget is in; see token_counter.calibration_factor.
+        self.provider = provider
+        self.model_id = model_id
 
     # -- construction -------------------------------------------------
 
@@ -118,9 +126,20 @@ class Transcript:
             answered |= {p.call_id for p in parts}
         return synthesized
 
-    def tokens(self) -> int:
+    def raw_tokens(self) -> int:
+        """Sum of the parts' stored (uncalibrated) counts."""
         return sum(t.tokens() for t in self.turns)
 
+    def calibration(self) -> float:
+        return token_counter.calibration_factor(self.provider, self.model_id)
+
+    def tokens(self) -> int:
+        return self._scaled(self.raw_tokens(), self.calibration())
+
+    @staticmethod
+    def _scaled(raw: int, factor: float) -> int:
+        return raw if factor == 1.0 else int(math.ceil(raw * factor))
+
     # -- the ladder ---------------------------------------------------
 
     def floor_tokens(self) -> int:
@@ -132,6 +151,9 @@ class Transcript:
         decay will exhaust itself moving a handful of tokens and the real
         problem is elsewhere (usually an oversized schema block).
         """
+        return self._floor_tokens(self.raw_tokens(), self.calibration())
+
+    def _floor_tokens(self, raw_total: int, factor: float) -> int:
         decayable = self.turns[: max(len(self.turns) - PROTECT_LAST_TURNS, 0)]
         reducible = 0
         for turn in decayable:
@@ -145,8 +167,8 @@ class Transcript:
                             digest=p.digest, tier=Tier.DROPPED,
                         ).model_text()
                     )
-                    reducible += max(p.tokens - at_floor, 0)
-        return max(self.tokens() - reducible, 0)
+                    reducible += max(part_tokens(p) - at_floor, 0)
+        return self._scaled(max(raw_total - reducible, 0), factor)
 
     def fit_to_budget(self, budget_tokens: int) -> dict:
         """Decay oldest-first until the transcript fits.
@@ -164,10 +186,15 @@ class Transcript:
         context + protected tail) is not reducible here — the caller needs to
         know that rather than assume the transcript now fits.
         """
+        factor = self.calibration()
+        # Sized once; decay then adjusts the running total by the difference
+        # of the one part it changed.
+        raw = self.raw_tokens()
         stats = {
             "digested": 0, "dropped": 0,
-            "before": self.tokens(), "after": 0,
-            "floor": self.floor_tokens(), "reached": True,
+            "before": self._scaled(raw, factor), "after": 0,
+            "floor": self._floor_tokens(raw, factor), "reached": True,
+            "calibration": round(factor, 3),
         }
         if stats["before"] <= budget_tokens:
             stats["after"] = stats["before"]
@@ -180,14 +207,16 @@ class Transcript:
                 for p in turn.parts:
                     if not isinstance(p, ToolResultPart) or p.tier >= target:
                         continue
+                    before = part_tokens(p)
                     p.tier = target
                     p.tokens = estimate_tokens(p.model_text())
+                    raw += p.tokens - before
                     stats["digested" if target is Tier.DIGEST else "dropped"] += 1
-                    if self.tokens() <= budget_tokens:
-                        stats["after"] = self.tokens()
+                    if self._scaled(raw, factor) <= budget_tokens:
+                        stats["after"] = self._scaled(raw, factor)
                         return stats
 
-        stats["after"] = self.tokens()
+        stats["after"] = self._scaled(raw, factor)
         stats["reached"] = stats["after"] <= budget_tokens
         return stats
 
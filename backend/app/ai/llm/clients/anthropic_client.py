@@ -3,11 +3,13 @@ import json
 from app.ai.llm.toolcall_args import parse_tool_call_arguments
 from typing import Any, AsyncGenerator, AsyncIterator, Optional
 
-from anthropic import Anthropic as AnthropicAPI, AsyncAnthropic
+from anthropic import Anthropic as AnthropicAPI, AsyncAnthropic, DefaultAsyncHttpxClient, DefaultHttpxClient
 
+from app.ai.llm.clients import client_pool
 from app.ai.llm.clients.base import LLMClient
 from app.ai.llm.image_utils import normalize_image_input
 from app.ai.llm.types import (
+    CacheBreakpoints,
     ImageInput,
     LLMResponse,
     LLMStreamEvent,
@@ -55,8 +57,14 @@ def _accepts_temperature(model_id: str) -> bool:
 class Anthropic(LLMClient):
     def __init__(self, api_key: str, base_url: str = None, temperature: Optional[float] = None):
         super().__init__()
-        self.client = AnthropicAPI(api_key=api_key)
-        self.async_client = AsyncAnthropic(api_key=api_key)
+        # SDK clients (and their connections) are shared process-wide.
+        key = ("anthropic", None, client_pool.credentials_digest(api_key), True)
+        self.client = client_pool.get_client(AnthropicAPI, key, lambda: AnthropicAPI(
+            api_key=api_key, http_client=client_pool.http_client(DefaultHttpxClient),
+        ))
+        self.async_client = client_pool.get_client(AsyncAnthropic, key, lambda: AsyncAnthropic(
+            api_key=api_key, http_client=client_pool.async_http_client(DefaultAsyncHttpxClient),
+        ), per_loop=True)
         self.max_tokens = 32768
         # Admin-configured override, or the historical default. Either way the
         # _accepts_temperature gate stays authoritative: model families that
@@ -299,6 +307,7 @@ class Anthropic(LLMClient):
         enable_cache: bool = True,
         thinking: Optional[dict] = None,
         disable_parallel_tools: bool = True,
+        cache: Optional[CacheBreakpoints] = None,
     ) -> AsyncIterator[LLMStreamEvent]:
         # If images supplied, attach them to the last user message as image blocks.
         # (Most callers will embed images directly in messages; this is a back-compat path.)
@@ -347,10 +356,16 @@ class Anthropic(LLMClient):
         #
         # Anthropic allows at most 4 breakpoints, so this uses the third and
         # leaves one spare.
-        if enable_cache and len(msgs) > 2:
+        #
+        # Without explicit breakpoints every block is marked (the historical
+        # default); `enable_cache=False` turns all of them off.
+        if cache is None:
+            cache = CacheBreakpoints() if enable_cache else CacheBreakpoints(system=False, tools=False, history=False)
+        boundary_index = cache.history_index(len(msgs))
+        if boundary_index is not None:
             # Everything except the final turn is settled: prior steps do not
             # change once their results are recorded.
-            boundary = msgs[-2]
+            boundary = msgs[boundary_index]
             content = boundary.get("content")
             if isinstance(content, str):
                 boundary["content"] = [
@@ -361,7 +376,7 @@ class Anthropic(LLMClient):
                 content[-1] = {**content[-1], "cache_control": {"type": "ephemeral"}}
 
         if system:
-            if enable_cache:
+            if cache.system:
                 request_kwargs["system"] = [
                     {"type": "text", "text": system, "cache_control": {"type": "ephemeral"}},
                 ]
@@ -369,7 +384,7 @@ class Anthropic(LLMClient):
                 request_kwargs["system"] = system
         if tools:
             translated = self._translate_tools(tools)
-            if enable_cache and translated:
+            if cache.tools and translated:
                 # Put the breakpoint on the LAST tool — Anthropic caches everything
                 # up to and including the marked block.
                 translated[-1] = {**translated[-1], "cache_control": {"type": "ephemeral"}}
@@ -2,11 +2,13 @@ import json
 
 from app.ai.llm.toolcall_args import parse_tool_call_arguments
 import os
-from openai import AzureOpenAI, AsyncAzureOpenAI
+from openai import AzureOpenAI, AsyncAzureOpenAI, DefaultAsyncHttpxClient, DefaultHttpxClient
 from typing import AsyncGenerator, AsyncIterator, Any, Optional
 
+from app.ai.llm.clients import client_pool
 from app.ai.llm.clients.base import LLMClient
 from app.ai.llm.types import (
+    CacheBreakpoints,
     ImageInput,
     LLMResponse,
     LLMStreamEvent,
@@ -35,16 +37,20 @@ class AzureClient(LLMClient):
         self.temperature = temperature
         # endpoint_url should be the Azure OpenAI resource endpoint, e.g. https://<resource>.openai.azure.com
         effective_api_version = api_version or "2024-10-21"
-        self.client = AzureOpenAI(
+        # SDK clients (and their connections) are shared process-wide.
+        key = ("azure", endpoint_url, client_pool.credentials_digest(api_key), effective_api_version)
+        self.client = client_pool.get_client(AzureOpenAI, key, lambda: AzureOpenAI(
             api_key=api_key,
             azure_endpoint=endpoint_url,
             api_version=effective_api_version,
-        )
-        self.async_client = AsyncAzureOpenAI(
+            http_client=client_pool.http_client(DefaultHttpxClient),
+        ))
+        self.async_client = client_pool.get_client(AsyncAzureOpenAI, key, lambda: AsyncAzureOpenAI(
             api_key=api_key,
             azure_endpoint=endpoint_url,
             api_version=effective_api_version,
-        )
+            http_client=client_pool.async_http_client(DefaultAsyncHttpxClient),
+        ), per_loop=True)
 
     def _resolve_temperature(self, model_id: str) -> float:
         """Admin-configured value when set, else the historical default
@@ -258,7 +264,10 @@ class AzureClient(LLMClient):
         images: Optional[list[ImageInput]] = None,
         thinking: Optional[dict] = None,
         disable_parallel_tools: bool = True,
+        cache: Optional[CacheBreakpoints] = None,
     ) -> AsyncIterator[LLMStreamEvent]:
+        # `cache` needs no translation: Azure caches on a stable prefix
+        # automatically, and hits come back as cached_tokens (_extract_usage).
         oai_messages: list[dict] = []
         if system:
             oai_messages.append({"role": "system", "content": system})
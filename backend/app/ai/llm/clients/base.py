@@ -2,6 +2,7 @@ from abc import ABC, abstractmethod
 from typing import AsyncIterator, Optional
 
 from app.ai.llm.types import (
+    CacheBreakpoints,
     ImageInput,
     ImageOutput,
     LLMStreamEvent,
@@ -32,6 +33,7 @@ class LLMClient(ABC):
         images: Optional[list[ImageInput]] = None,
         thinking: Optional[dict] = None,
         disable_parallel_tools: bool = True,
+        cache: Optional[CacheBreakpoints] = None,
     ) -> AsyncIterator[LLMStreamEvent]:
         """Streaming inference with native tool_use support.
 
@@ -44,6 +46,10 @@ class LLMClient(ABC):
           - {"type": "adaptive"}                          # Anthropic 4.6+
           - {"type": "enabled", "budget_tokens": 5000}    # explicit budget
         ``display`` defaults to "summarized" so the UI gets readable text.
+
+        ``cache`` marks the stable prefix of the request; each client maps it
+        to its provider's prompt caching and reports cache reads and writes
+        on the :class:`UsageEvent`. None keeps the client's default.
         """
         raise NotImplementedError(
             f"{type(self).__name__} does not implement inference_stream_v2"
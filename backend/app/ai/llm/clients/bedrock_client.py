@@ -11,9 +11,11 @@ import boto3
 from botocore import UNSIGNED
 from botocore.config import Config
 
+from app.ai.llm.clients import client_pool
 from app.ai.llm.clients.base import LLMClient
 from app.ai.llm.image_utils import normalize_image_input
 from app.ai.llm.types import (
+    CacheBreakpoints,
     ImageInput,
     LLMResponse,
     LLMStreamEvent,
@@ -68,6 +70,37 @@ def _http_config(**overrides) -> Config:
     )
 
 
+# Converse prompt caching (`cachePoint` blocks). Claude models from 3.5 Haiku
+# and 3.7 Sonnet on accept them after the system prompt, the tool list and a
+# message; Nova models after the system prompt and a message only. Older
+# models reject the request outright, so they get none — and a model that
+# still refuses them is remembered and sent requests without.
+_CACHE_POINT = {"cachePoint": {"type": "default"}}
+_NO_PROMPT_CACHE_CLAUDE = (
+    "claude-v2", "claude-instant", "claude-3-haiku", "claude-3-sonnet",
+    "claude-3-opus", "claude-3-5-sonnet",
+)
+_cache_point_rejected: set[str] = set()
+
+
+def _cache_point_targets(model_id: str) -> frozenset:
+    """Where `model_id` accepts cache points: a subset of system/tools/history."""
+    mid = (model_id or "").lower()
+    if model_id in _cache_point_rejected:
+        return frozenset()
+    if "amazon.nova" in mid:
+        return frozenset({"system", "history"})
+    if "anthropic.claude" in mid and not any(m in mid for m in _NO_PROMPT_CACHE_CLAUDE):
+        return frozenset({"system", "tools", "history"})
+    return frozenset()
+
+
+def _is_cache_point_rejection(exc: Exception) -> bool:
+    response = getattr(exc, "response", None) or {}
+    code = (response.get("Error") or {}).get("Code")
+    return code == "ValidationException" and "cach" in str(exc).lower()
+
+
 # Map MIME types to Bedrock image format strings
 _MIME_TO_FORMAT = {
     "image/png": "png",
@@ -121,38 +154,58 @@ class BedrockClient(LLMClient):
         if auth_mode == "api_key":
             if not api_key:
                 raise ValueError("Bedrock auth_mode 'api_key' requires an api_key.")
-            # boto3 has no per-client parameter for Bedrock API keys, and the
-            # AWS_BEARER_TOKEN_BEDROCK env var is process-global — unsafe when
-            # multiple orgs' providers share one process. Skip SigV4 signing
-            # and inject the key as a Bearer token on this client's requests only.
-            self.client = boto3.client(
-                "bedrock-runtime",
-                region_name=region,
-                config=_http_config(signature_version=UNSIGNED),
-            )
-            def _add_bearer_auth(request, **kwargs):
-                request.headers["Authorization"] = f"Bearer {api_key}"
-
-            self.client.meta.events.register(
-                "request-created.bedrock-runtime.*", _add_bearer_auth
-            )
         elif auth_mode == "access_keys":
             if not aws_access_key_id or not aws_secret_access_key:
                 raise ValueError(
                     "Bedrock auth_mode 'access_keys' requires both "
                     "aws_access_key_id and aws_secret_access_key."
                 )
-            session = boto3.Session(
-                aws_access_key_id=aws_access_key_id,
-                aws_secret_access_key=aws_secret_access_key,
-                region_name=region,
-            )
-            self.client = session.client("bedrock-runtime", config=_http_config())
-        else:
-            self.client = boto3.client(
-                "bedrock-runtime", region_name=region, config=_http_config()
+
+        def _build():
+            if auth_mode == "api_key":
+                # boto3 has no per-client parameter for Bedrock API keys, and the
+                # AWS_BEARER_TOKEN_BEDROCK env var is process-global — unsafe when
+                # multiple orgs' providers share one process. Skip SigV4 signing
+                # and inject the key as a Bearer token on this client's requests
+                # only (pooled clients are keyed by the key's digest).
+                client = boto3.client(
+                    "bedrock-runtime",
+                    region_name=region,
+                    config=_http_config(signature_version=UNSIGNED, max_pool_connections=client_pool.max_keepalive()),
+                )
+
+                def _add_bearer_auth(request, **kwargs):
+                    request.headers["Authorization"] = f"Bearer {api_key}"
+
+                client.meta.events.register(
+                    "request-created.bedrock-runtime.*", _add_bearer_auth
+                )
+                return client
+            if auth_mode == "access_keys":
+                session = boto3.Session(
+                    aws_access_key_id=aws_access_key_id,
+                    aws_secret_access_key=aws_secret_access_key,
+                    region_name=region,
+                )
+                return session.client(
+                    "bedrock-runtime", config=_http_config(max_pool_connections=client_pool.max_keepalive())
+                )
+            return boto3.client(
+                "bedrock-runtime", region_name=region,
+                config=_http_config(max_pool_connections=client_pool.max_keepalive()),
             )
 
+        # boto3 clients are thread-safe: one per (region, auth, credentials)
+        # serves the whole process and keeps its connections warm.
+        key = (
+            "bedrock", region,
+            client_pool.credentials_digest(api_key, aws_access_key_id, aws_secret_access_key),
+            auth_mode,
+        )
+        self.client = client_pool.get_client(
+            boto3.Session if auth_mode == "access_keys" else boto3.client, key, _build,
+        )
+
         self._region = region
         self._auth_mode = auth_mode
 
@@ -335,6 +388,7 @@ class BedrockClient(LLMClient):
         images: Optional[list[ImageInput]] = None,
         thinking: Optional[dict] = None,
         disable_parallel_tools: bool = True,
+        cache: Optional[CacheBreakpoints] = None,
     ) -> AsyncIterator[LLMStreamEvent]:
         loop = asyncio.get_running_loop()
         event_queue: asyncio.Queue = asyncio.Queue()
@@ -387,10 +441,17 @@ class BedrockClient(LLMClient):
             # disableParallelToolUse in toolChoice.auto requires botocore ≥ 1.37;
             # skip it to keep compatibility with older botocore versions.
             request_kwargs["toolConfig"] = tc
+        cached = self._add_cache_points(request_kwargs, cache, model_id) if cache is not None else False
 
         def _sync_stream():
             try:
-                response = self.client.converse_stream(**request_kwargs)
+                try:
+                    response = self.client.converse_stream(**request_kwargs)
+                except Exception as e:
+                    if not (cached and _is_cache_point_rejection(e)):
+                        raise
+                    _cache_point_rejected.add(model_id)
+                    response = self.client.converse_stream(**self._strip_cache_points(request_kwargs))
                 for event in response["stream"]:
                     loop.call_soon_threadsafe(event_queue.put_nowait, event)
             finally:
@@ -404,6 +465,8 @@ class BedrockClient(LLMClient):
         current_block_index: int = -1
         prompt_tokens = 0
         completion_tokens = 0
+        cache_read_tokens = 0
+        cache_creation_tokens = 0
         stop_reason = "end_turn"
         raw_stop_reason = None
 
@@ -487,9 +550,56 @@ class BedrockClient(LLMClient):
                 usage = event["metadata"].get("usage", {})
                 prompt_tokens = usage.get("inputTokens", prompt_tokens)
                 completion_tokens = usage.get("outputTokens", completion_tokens)
+                # Like Anthropic's, inputTokens excludes cached tokens.
+                cache_read_tokens = usage.get("cacheReadInputTokens", cache_read_tokens) or 0
+                cache_creation_tokens = usage.get("cacheWriteInputTokens", cache_creation_tokens) or 0
 
         await future
 
         yield MessageStopEvent(stop_reason=stop_reason, raw_stop_reason=raw_stop_reason)
-        yield UsageEvent(input_tokens=prompt_tokens, output_tokens=completion_tokens)
-        self._set_last_usage(LLMUsage(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens))
+        yield UsageEvent(
+            input_tokens=prompt_tokens,
+            output_tokens=completion_tokens,
+            cache_read_tokens=cache_read_tokens,
+            cache_creation_tokens=cache_creation_tokens,
+        )
+        self._set_last_usage(LLMUsage(
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            cache_read_tokens=cache_read_tokens,
+            cache_creation_tokens=cache_creation_tokens,
+        ))
+
+    @staticmethod
+    def _add_cache_points(request_kwargs: dict, cache: CacheBreakpoints, model_id: str) -> bool:
+        """Append Converse cache points where `cache` marks the prefix and the
+        model supports them. Returns whether any was added."""
+        targets = _cache_point_targets(model_id)
+        added = False
+        if cache.system and "system" in targets and request_kwargs.get("system"):
+            request_kwargs["system"].append(dict(_CACHE_POINT))
+            added = True
+        tool_list = (request_kwargs.get("toolConfig") or {}).get("tools")
+        if cache.tools and "tools" in targets and tool_list:
+            tool_list.append(dict(_CACHE_POINT))
+            added = True
+        msgs = request_kwargs.get("messages") or []
+        idx = cache.history_index(len(msgs)) if "history" in targets else None
+        if idx is not None and msgs[idx].get("content"):
+            msgs[idx]["content"].append(dict(_CACHE_POINT))
+            added = True
+        return added
+
+    @staticmethod
+    def _strip_cache_points(request_kwargs: dict) -> dict:
+        """A copy of the request without any cache point."""
+        def _drop(blocks):
+            return [b for b in blocks if "cachePoint" not in b]
+
+        out = dict(request_kwargs)
+        if out.get("system"):
+            out["system"] = _drop(out["system"])
+        if out.get("toolConfig"):
+            out["toolConfig"] = {**out["toolConfig"], "tools": _drop(out["toolConfig"].get("tools") or [])}
+        out["messages"] = [{**m, "content": _drop(m.get("content") or [])} for m in out.get("messages") or []]
+        return out
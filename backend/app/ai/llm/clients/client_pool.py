@@ -0,0 +1,273 @@
+"""Process-wide pool of provider SDK clients.
+
+`LLM.__init__` builds a provider client wrapper, and every wrapper used to
+build its own SDK client (`AsyncAnthropic`, `AsyncOpenAI`, `genai.Client`,
+a boto3 client) — each with its own empty httpx connection pool. There are
+some thirty `LLM(...)` construction sites (planner, judge, titles,
+follow-ups, scoring, sub-agents), so almost every call opened a fresh TCP
+connection and paid a full TLS handshake to a provider it had talked to a
+second earlier.
+
+SDK clients are now shared, keyed by (SDK class, provider, base URL, a
+digest of the credentials, TLS settings). The wrappers stay per-`LLM` — they
+carry per-model state such as temperature and the last usage — and only
+borrow the SDK client from here.
+
+  * **Event loops.** An httpx ``AsyncClient``'s connections belong to the
+    loop that opened them, so async clients are also keyed by the running
+    loop; one built with no loop running is not pooled. Entries whose loop
+    has closed are dropped on the next lookup. Sync SDK clients and boto3
+    clients are thread-safe and shared process-wide.
+  * **Transport.** httpx-backed SDKs (OpenAI, Azure OpenAI, Anthropic) get a
+    tuned transport: HTTP/2 when ``h2`` is installed
+    (``BOW_LLM_HTTP2=0`` turns it off), ``BOW_LLM_MAX_CONNECTIONS`` and
+    ``BOW_LLM_MAX_KEEPALIVE`` connections, kept alive for
+    ``BOW_LLM_KEEPALIVE_EXPIRY_S``. Google and Bedrock keep their own
+    transports and are pooled as whole clients.
+  * **Credentials.** Only a digest of the secret is part of the key, so a
+    rotated key yields a new client; the old one ages out of the LRU
+    (``BOW_LLM_CLIENT_POOL_SIZE``) instead of being closed under a request
+    that may still be streaming on it.
+  * **Metrics.** `stats()` reports pool hits and misses plus, for the tuned
+    transports, requests sent, connections opened and TLS handshakes —
+    ``reused_requests`` is the number of requests that rode an existing
+    connection.
+
+`aclose_all()` closes every pooled client at shutdown.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POOL_SIZE = 64
+DEFAULT_MAX_CONNECTIONS = 100
+DEFAULT_MAX_KEEPALIVE = 20
+# Providers close idle connections after a minute or two; reusing one the
+# server already dropped costs a failed write and a retry.
+DEFAULT_KEEPALIVE_EXPIRY_S = 60.0
+
+try:  # HTTP/2 needs the optional h2 package (httpx[http2]).
+    import h2  # noqa: F401
+
+    _HAS_H2 = True
+except ImportError:
+    _HAS_H2 = False
+
+_lock = threading.Lock()
+# key -> (client, weakref to its loop or None)
+_clients: "OrderedDict[Tuple, Tuple[Any, Optional[weakref.ref]]]" = OrderedDict()
+_metrics = {
+    "hits": 0, "misses": 0, "unpooled": 0, "evictions": 0,
+    "requests": 0, "connections_opened": 0, "tls_handshakes": 0,
+}
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _env_number(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def pool_size() -> int:
+    return max(1, _env_int("BOW_LLM_CLIENT_POOL_SIZE", DEFAULT_POOL_SIZE))
+
+
+def max_keepalive() -> int:
+    return max(1, _env_int("BOW_LLM_MAX_KEEPALIVE", DEFAULT_MAX_KEEPALIVE))
+
+
+def http2_enabled() -> bool:
+    flag = os.environ.get("BOW_LLM_HTTP2", "1").strip().lower() not in ("0", "false", "no", "off")
+    return flag and _HAS_H2
+
+
+def limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=max(1, _env_int("BOW_LLM_MAX_CONNECTIONS", DEFAULT_MAX_CONNECTIONS)),
+        max_keepalive_connections=max_keepalive(),
+        keepalive_expiry=max(0.0, _env_number("BOW_LLM_KEEPALIVE_EXPIRY_S", DEFAULT_KEEPALIVE_EXPIRY_S)),
+    )
+
+
+def credentials_digest(*secrets: Optional[str]) -> str:
+    """Stable digest of a provider's secrets, for keys; never the secrets."""
+    h = hashlib.sha256()
+    for s in secrets:
+        h.update(b"\x00" if s is None else b"\x01" + str(s).encode("utf-8", "surrogatepass"))
+    return h.hexdigest()
+
+
+# ---------------------------------------------------------------------------
+# Transport
+# ---------------------------------------------------------------------------
+
+def _trace(event: str, info: Dict[str, Any]) -> None:
+    # httpcore trace events of the sync transport.
+    if event == "connection.connect_tcp.complete":
+        _count("connections_opened")
+    elif event == "connection.start_tls.complete":
+        _count("tls_handshakes")
+
+
+async def _atrace(event: str, info: Dict[str, Any]) -> None:
+    # httpcore requires a coroutine function on the async transport.
+    _trace(event, info)
+
+
+def _on_request(request: httpx.Request) -> None:
+    _count("requests")
+    inner = request.extensions.get("trace")
+    if inner is None:
+        request.extensions["trace"] = _trace
+    else:
+        def _both(event: str, info: Dict[str, Any]):
+            _trace(event, info)
+            return inner(event, info)
+
+        request.extensions["trace"] = _both
+
+
+async def _on_async_request(request: httpx.Request) -> None:
+    _count("requests")
+    inner = request.extensions.get("trace")
+    if inner is None:
+        request.extensions["trace"] = _atrace
+    else:
+        async def _both(event: str, info: Dict[str, Any]):
+            _trace(event, info)
+            await inner(event, info)
+
+        request.extensions["trace"] = _both
+
+
+def _transport_kwargs(verify: bool, hook: Callable) -> Dict[str, Any]:
+    return {
+        "limits": limits(),
+        "http2": http2_enabled(),
+        "verify": verify,
+        "event_hooks": {"request": [hook]},
+    }
+
+
+def http_client(factory: Callable[..., httpx.Client] = httpx.Client, *, verify: bool = True) -> httpx.Client:
+    """A sync httpx client with the pooled transport settings. `factory` is
+    the SDK's own client class (``DefaultHttpxClient``) to keep its defaults."""
+    return factory(**_transport_kwargs(verify, _on_request))
+
+
+def async_http_client(
+    factory: Callable[..., httpx.AsyncClient] = httpx.AsyncClient, *, verify: bool = True
+) -> httpx.AsyncClient:
+    """Async counterpart of `http_client`."""
+    return factory(**_transport_kwargs(verify, _on_async_request))
+
+
+# ---------------------------------------------------------------------------
+# Registry
+# ---------------------------------------------------------------------------
+
+def get_client(sdk_cls: Any, key: Tuple, build: Callable[[], Any], *, per_loop: bool = False) -> Any:
+    """The pooled SDK client for `key`, built with `build()` on a miss.
+
+    `key` is ``(provider, base_url, credentials_digest, tls...)``. `sdk_cls`
+    is part of the key, so a client class patched in a test never resolves
+    to a client built from the real one. With `per_loop`, the client is
+    pooled per running event loop and not at all when no loop is running.
+    """
+    loop = None
+    if per_loop:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            _count("unpooled")
+            return build()
+    full_key = (sdk_cls, *key, id(loop) if loop is not None else None)
+    with _lock:
+        _prune_closed_loops()
+        entry = _clients.get(full_key)
+        if entry is not None and (entry[1] is None or entry[1]() is loop):
+            _clients.move_to_end(full_key)
+            _metrics["hits"] += 1
+            return entry[0]
+    client = build()
+    with _lock:
+        entry = _clients.get(full_key)
+        if entry is not None and (entry[1] is None or entry[1]() is loop):
+            # Built concurrently by another thread; keep the first one.
+            _metrics["hits"] += 1
+            return entry[0]
+        _clients[full_key] = (client, weakref.ref(loop) if loop is not None else None)
+        _metrics["misses"] += 1
+        limit = pool_size()
+        while len(_clients) > limit:
+            _clients.popitem(last=False)
+            _metrics["evictions"] += 1
+    return client
+
+
+def _prune_closed_loops() -> None:
+    for k in [k for k, (_, ref) in _clients.items() if ref is not None and (ref() is None or ref().is_closed())]:
+        _clients.pop(k, None)
+
+
+async def aclose_all() -> None:
+    """Close every pooled client (app shutdown). Async clients are closed
+    only if they belong to the running loop; others die with their loop."""
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+    with _lock:
+        entries = list(_clients.values())
+        _clients.clear()
+    for client, ref in entries:
+        try:
+            if ref is None:
+                close = getattr(client, "close", None)
+                if close is not None:
+                    close()
+            elif ref() is loop:
+                close = getattr(client, "close", None) or getattr(client, "aclose", None)
+                result = close() if close is not None else None
+                if asyncio.iscoroutine(result):
+                    await result
+        except Exception as e:
+            logger.debug(f"[client_pool] close failed: {e}")
+
+
+def _count(name: str, n: int = 1) -> None:
+    with _lock:
+        _metrics[name] += n
+
+
+def stats() -> dict:
+    with _lock:
+        out = {**_metrics, "clients": len(_clients), "http2": http2_enabled()}
+    out["reused_requests"] = max(0, out["requests"] - out["connections_opened"])
+    return out
+
+
+def reset() -> None:
+    """Forget every pooled client without closing it (tests)."""
+    with _lock:
+        _clients.clear()
+        for k in _metrics:
+            _metrics[k] = 0
@@ -1,13 +1,19 @@
 import base64
 import json
+import logging
+import os
+import threading
+import time
 import uuid
 from typing import AsyncGenerator, AsyncIterator, Optional
 
 from google import genai
 from google.genai import types
 
+from app.ai.llm.clients import client_pool
 from app.ai.llm.clients.base import LLMClient
 from app.ai.llm.types import (
+    CacheBreakpoints,
     ImageInput,
     LLMResponse,
     LLMStreamEvent,
@@ -25,6 +31,38 @@ from app.ai.llm.types import (
     UsageEvent,
 )
 
+logger = logging.getLogger(__name__)
+
+# Gemini context caching. The planner's system instruction and tool
+# declarations are the same on every iteration of a run; held in an explicit
+# context cache they are billed at the cached rate instead of being re-sent.
+# A cache lives BOW_GEMINI_CONTEXT_CACHE_TTL_S on the provider (storage is
+# billed per hour, so short) and is reused by every request with the same
+# credentials, model and prefix until shortly before it expires. Prefixes
+# under BOW_GEMINI_CONTEXT_CACHE_MIN_TOKENS (estimated) are below Gemini's
+# minimum cacheable size and are sent as before; BOW_GEMINI_CONTEXT_CACHE=0
+# turns explicit caches off (implicit caching still applies).
+DEFAULT_CONTEXT_CACHE_TTL_S = 600
+DEFAULT_CONTEXT_CACHE_MIN_TOKENS = 4096
+# Stop handing out a cache this close to its expiry.
+_CONTEXT_CACHE_MARGIN_S = 30.0
+
+_context_cache_lock = threading.Lock()
+# (credentials digest, model, prefix key) -> (cache name, or None if creating
+# one failed, monotonic expiry)
+_context_caches: dict[tuple, tuple[Optional[str], float]] = {}
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _context_cache_enabled() -> bool:
+    return os.environ.get("BOW_GEMINI_CONTEXT_CACHE", "1").strip().lower() not in ("0", "false", "no", "off")
+
 
 class Google(LLMClient):
     # Newer Gemini models (gemini-flash-latest / 3.6-flash, gemini-flash-lite-latest,
@@ -34,9 +72,19 @@ class Google(LLMClient):
     # instead of 0 — the cost is negligible and the request actually goes through.
     MIN_THINKING_BUDGET = 128
 
+    # Class-level default so instances created without __init__ (test doubles
+    # built via __new__) still resolve the attribute.
+    credentials: Optional[str] = None
+
     def __init__(self, api_key: str | None = None, temperature: float | None = None):
         super().__init__()
-        self.client = genai.Client(api_key=api_key)
+        self.credentials = client_pool.credentials_digest(api_key)
+        # Shared process-wide (per event loop: the client also carries an
+        # async transport); genai keeps its own transport settings.
+        key = ("google", None, self.credentials)
+        self.client = client_pool.get_client(
+            genai.Client, key, lambda: genai.Client(api_key=api_key), per_loop=True,
+        )
         # Admin-configured override, or the historical default.
         self.temperature = 0.3 if temperature is None else temperature
 
@@ -278,6 +326,7 @@ class Google(LLMClient):
         images: Optional[list[ImageInput]] = None,
         thinking: Optional[dict] = None,
         disable_parallel_tools: bool = True,
+        cache: Optional[CacheBreakpoints] = None,
     ) -> AsyncIterator[LLMStreamEvent]:
         if thinking:
             budget = self._thinking_budget(thinking.get("budget_tokens") or 1024)
@@ -298,23 +347,38 @@ class Google(LLMClient):
         contents = self._translate_messages(messages)
         prompt_tokens = 0
         completion_tokens = 0
+        cache_read_tokens = 0
+        cache_creation_tokens = 0
         stop_reason = "end_turn"
 
         # google-genai sync generator — run in executor to avoid blocking
         import asyncio
         loop = asyncio.get_running_loop()
 
-        def _collect():
-            chunks = []
-            for chunk in self.client.models.generate_content_stream(
+        def _stream(kwargs: dict) -> list:
+            return list(self.client.models.generate_content_stream(
                 model=model_id,
                 contents=contents,
-                config=types.GenerateContentConfig(**config_kwargs),
-            ):
-                chunks.append(chunk)
-            return chunks
+                config=types.GenerateContentConfig(**kwargs),
+            ))
 
-        chunks = await loop.run_in_executor(None, _collect)
+        def _collect():
+            if cache is not None and cache.system and system:
+                cache_key, name, created = self._context_cache(model_id, system, tools, config_kwargs.get("tools"))
+                if name:
+                    # The cache holds the system instruction and tools; Gemini
+                    # rejects a request that also sets them.
+                    cached_kwargs = {k: v for k, v in config_kwargs.items() if k not in ("system_instruction", "tools")}
+                    try:
+                        return _stream({**cached_kwargs, "cached_content": name}), created
+                    except Exception as e:
+                        # Deleted or expired on the provider's side; send the
+                        # prefix inline and let the next call build a new one.
+                        logger.debug(f"[google] context cache {name} unusable: {e}")
+                        self._forget_context_cache(cache_key)
+            return _stream(config_kwargs), 0
+
+        chunks, cache_creation_tokens = await loop.run_in_executor(None, _collect)
 
         # Gemini doesn't hand out tool-call ids, so we mint them. Scope them to
         # this request: a bare counter restarts at 0 every turn, and the
@@ -328,6 +392,9 @@ class Google(LLMClient):
             if usage_meta:
                 prompt_tokens = getattr(usage_meta, "prompt_token_count", prompt_tokens) or prompt_tokens
                 completion_tokens = getattr(usage_meta, "candidates_token_count", completion_tokens) or completion_tokens
+                # Included in prompt_token_count; covers both explicit and
+                # implicit cache hits.
+                cache_read_tokens = getattr(usage_meta, "cached_content_token_count", None) or cache_read_tokens
 
             candidate = chunk.candidates[0] if chunk.candidates else None
             if not candidate:
@@ -376,6 +443,66 @@ class Google(LLMClient):
             yield ReasoningCompleteEvent(text="")
 
         yield MessageStopEvent(stop_reason=stop_reason)
-        yield UsageEvent(input_tokens=prompt_tokens, output_tokens=completion_tokens)
-        self._set_last_usage(LLMUsage(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens))
+        yield UsageEvent(
+            input_tokens=prompt_tokens,
+            output_tokens=completion_tokens,
+            cache_read_tokens=cache_read_tokens,
+            cache_creation_tokens=cache_creation_tokens,
+        )
+        self._set_last_usage(LLMUsage(
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            cache_read_tokens=cache_read_tokens,
+            cache_creation_tokens=cache_creation_tokens,
+        ))
+
+    def _context_cache(
+        self,
+        model_id: str,
+        system: str,
+        tools: Optional[list[ToolSpec]],
+        tool_decls: Optional[list[types.Tool]],
+    ) -> tuple[Optional[tuple], Optional[str], int]:
+        """The live context cache holding `system` and `tools` for `model_id`,
+        created if needed. Returns (registry key, cache name or None, tokens
+        written creating it). Blocking; called from the executor thread."""
+        if not _context_cache_enabled():
+            return None, None, 0
+        prefix_chars = len(system) + sum(len(t.description) + len(json.dumps(t.input_schema)) for t in tools or ())
+        if prefix_chars // 4 < max(1, _env_int("BOW_GEMINI_CONTEXT_CACHE_MIN_TOKENS", DEFAULT_CONTEXT_CACHE_MIN_TOKENS)):
+            return None, None, 0
+        key = (self.credentials, model_id, CacheBreakpoints.for_prefix(system, tools).key)
+        now = time.monotonic()
+        with _context_cache_lock:
+            entry = _context_caches.get(key)
+            if entry is not None and entry[1] - _CONTEXT_CACHE_MARGIN_S > now:
+                return key, entry[0], 0
+        ttl = max(60, _env_int("BOW_GEMINI_CONTEXT_CACHE_TTL_S", DEFAULT_CONTEXT_CACHE_TTL_S))
+        name, created = None, 0
+        try:
+            cached = self.client.caches.create(
+                model=model_id,
+                config=types.CreateCachedContentConfig(
+                    system_instruction=system,
+                    tools=tool_decls,
+                    ttl=f"{ttl}s",
+                    display_name="bow-planner-prefix",
+                ),
+            )
+            name = cached.name
+            created = int(getattr(getattr(cached, "usage_metadata", None), "total_token_count", 0) or 0)
+        except Exception as e:
+            # Model without context caching, prefix under its minimum, quota:
+            # remember the failure for a TTL instead of retrying every call.
+            logger.debug(f"[google] context cache not created for {model_id}: {e}")
+        with _context_cache_lock:
+            for k in [k for k, (_, exp) in _context_caches.items() if exp <= now]:
+                del _context_caches[k]
+            _context_caches[key] = (name, now + ttl)
+        return key, name, created
+
+    @staticmethod
+    def _forget_context_cache(key: Optional[tuple]) -> None:
+        with _context_cache_lock:
+            _context_caches.pop(key, None)
 
@@ -6,11 +6,12 @@ import os
 import uuid
 from typing import AsyncGenerator, AsyncIterator, Any, Optional
 
-import httpx
-from openai import AsyncOpenAI, OpenAI
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient, DefaultHttpxClient, OpenAI
 
+from app.ai.llm.clients import client_pool
 from app.ai.llm.clients.base import LLMClient
 from app.ai.llm.types import (
+    CacheBreakpoints,
     ImageInput,
     ImageOutput,
     LLMResponse,
@@ -47,15 +48,16 @@ class OpenAi(LLMClient):
         # rejects any temperature but their default with a 400, and no
         # name-based detection can recognize an alias.
         self.temperature = temperature
-        kwargs: dict[str, Any] = {"api_key": api_key, "base_url": base_url}
-        if not verify_ssl:
-            kwargs["http_client"] = httpx.Client(verify=verify_ssl)
-        self.client = OpenAI(**kwargs)
-
-        async_kwargs: dict[str, Any] = {"api_key": api_key, "base_url": base_url}
-        if not verify_ssl:
-            async_kwargs["http_client"] = httpx.AsyncClient(verify=verify_ssl)
-        self.async_client = AsyncOpenAI(**async_kwargs)
+        # SDK clients (and their connections) are shared process-wide.
+        key = ("openai", base_url, client_pool.credentials_digest(api_key), verify_ssl)
+        self.client = client_pool.get_client(OpenAI, key, lambda: OpenAI(
+            api_key=api_key, base_url=base_url,
+            http_client=client_pool.http_client(DefaultHttpxClient, verify=verify_ssl),
+        ))
+        self.async_client = client_pool.get_client(AsyncOpenAI, key, lambda: AsyncOpenAI(
+            api_key=api_key, base_url=base_url,
+            http_client=client_pool.async_http_client(DefaultAsyncHttpxClient, verify=verify_ssl),
+        ), per_loop=True)
 
     @staticmethod
     def _build_content(prompt: str, images: Optional[list[ImageInput]] = None) -> str | list[dict[str, Any]]:
@@ -368,7 +370,10 @@ class OpenAi(LLMClient):
         images: Optional[list[ImageInput]] = None,
         thinking: Optional[dict] = None,  # accepted for parity; reasoning needs Responses-API migration
         disable_parallel_tools: bool = True,
+        cache: Optional[CacheBreakpoints] = None,
     ) -> AsyncIterator[LLMStreamEvent]:
+        # `cache` needs no translation: OpenAI-compatible servers that cache at all do it on a stable prefix
+        # automatically, and hits come back as cached_tokens (_extract_usage).
         oai_messages: list[dict] = []
         if system:
             oai_messages.append({"role": "system", "content": system})
@@ -5,10 +5,12 @@ from app.ai.llm.toolcall_args import parse_tool_call_arguments
 import os
 from typing import AsyncGenerator, AsyncIterator, Any, Optional
 
-from openai import AsyncOpenAI, OpenAI
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient, DefaultHttpxClient, OpenAI
 
+from app.ai.llm.clients import client_pool
 from app.ai.llm.clients.base import LLMClient
 from app.ai.llm.types import (
+    CacheBreakpoints,
     ImageInput,
     ImageOutput,
     LLMResponse,
@@ -53,6 +55,7 @@ class OpenAIResponsesClient(LLMClient):
     # Class-level default so instances created without __init__ (test doubles
     # built via __new__) still resolve the attribute.
     temperature: Optional[float] = None
+    base_url: Optional[str] = None
 
     def __init__(
         self,
@@ -62,11 +65,18 @@ class OpenAIResponsesClient(LLMClient):
         temperature: Optional[float] = None,
     ):
         super().__init__()
+        self.base_url = base_url
         client_kwargs: dict[str, Any] = {"api_key": api_key}
         if base_url:
             client_kwargs["base_url"] = base_url
-        self.client = OpenAI(**client_kwargs)
-        self.async_client = AsyncOpenAI(**client_kwargs)
+        # SDK clients (and their connections) are shared process-wide.
+        key = ("openai", base_url, client_pool.credentials_digest(api_key), True)
+        self.client = client_pool.get_client(OpenAI, key, lambda: OpenAI(
+            **client_kwargs, http_client=client_pool.http_client(DefaultHttpxClient),
+        ))
+        self.async_client = client_pool.get_client(AsyncOpenAI, key, lambda: AsyncOpenAI(
+            **client_kwargs, http_client=client_pool.async_http_client(DefaultAsyncHttpxClient),
+        ), per_loop=True)
         self.enable_web_search = enable_web_search
         # Admin-configured override; None keeps each path's historical default
         # (the legacy Chat Completions helpers send 0.3/1.0, the Responses path
@@ -295,6 +305,7 @@ class OpenAIResponsesClient(LLMClient):
         disable_parallel_tools: bool = True,
         web_search: Optional[bool] = None,
         web_search_domains: Optional[list] = None,
+        cache: Optional[CacheBreakpoints] = None,
     ) -> AsyncIterator[LLMStreamEvent]:
         input_items = self._translate_messages(messages)
         if images:
@@ -317,6 +328,12 @@ class OpenAIResponsesClient(LLMClient):
             request_kwargs["temperature"] = self.temperature
         if system:
             request_kwargs["instructions"] = system
+        # Prompt caching is automatic on a stable prefix; the key routes every
+        # request that shares it to the same cache shard. Only sent to OpenAI
+        # itself — Azure's v1 endpoint caches automatically but does not
+        # document the parameter.
+        if cache is not None and cache.key and not self.base_url:
+            request_kwargs["prompt_cache_key"] = cache.key
         request_tools: list[dict] = self._translate_tools(tools) if tools else []
         if use_web_search:
             # Provider-executed server tool. Runs inside the Responses API and
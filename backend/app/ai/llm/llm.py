@@ -1,4 +1,5 @@
 import asyncio
+import json
 import random
 import re
 import time
@@ -11,6 +12,7 @@ from .clients.anthropic_client import Anthropic
 from .clients.azure_client import AzureClient
 from .clients.bedrock_client import BedrockClient
 from .types import (
+    CacheBreakpoints,
     ImageInput,
     ImageOutput,
     LLMResponse,
@@ -20,7 +22,9 @@ from .types import (
     ToolSpec,
     UsageEvent,
 )
+from app.ai.utils import token_counter
 from app.ai.utils.token_counter import count_tokens, estimate_tokens_fast
+from app.ai.llm import response_cache
 from app.ai.llm import trace as llm_trace
 from app.ai.llm.pii.loader import load_redactor_for_org
 from app.ai.llm.pii.redactor import PiiRedactor, PiiPromptBlockedError
@@ -401,13 +405,30 @@ class LLM:
         usage_scope: Optional[str] = None,
         usage_scope_ref_id: Optional[str] = None,
         should_record: bool = True,
+        cache_response: bool = False,
+        cache_accept: Optional[Callable[[str], bool]] = None,
     ) -> str:
+        """Blocking inference. With ``cache_response`` the answer may come
+        from (and is stored in) the response cache — only for auxiliary calls
+        whose prompt fully determines a usable answer; ``cache_accept`` can
+        refuse to store a response the caller could not use."""
         with tracer.start_as_current_span("llm.inference") as span:
             span.set_attribute("llm.model_id", self.model_id)
             span.set_attribute("llm.provider", self.provider)
             self._validate_vision_support(images)
             prompt = self._apply_pii(prompt, self._get_pii_redactor_sync(), span)
             logger.debug("Model: %s, prompt: %s", self.model_id, prompt)
+            cache_key = self._response_cache_key(prompt) if cache_response and not images else None
+            if cache_key is not None:
+                cached = self._run_cache_op_sync(response_cache.lookup(cache_key), wait=True)
+                if cached is not None:
+                    span.set_attribute("llm.cache_hit", True)
+                    self._schedule_usage_record(
+                        scope=usage_scope, scope_ref_id=usage_scope_ref_id,
+                        prompt_tokens=0, completion_tokens=0,
+                        should_record=should_record, cache_hit=True,
+                    )
+                    return cached.text
             prompt_tokens_estimate = self._count_tokens(prompt)
             span.set_attribute("llm.prompt_tokens_estimate", prompt_tokens_estimate)
             self._check_usage_limit_sync(prompt_tokens_estimate, should_record=should_record)
@@ -443,6 +464,14 @@ class LLM:
             span.set_attribute("llm.prompt_tokens", prompt_tokens)
             span.set_attribute("llm.completion_tokens", completion_tokens)
 
+            if cache_key is not None:
+                store = self._cache_store(
+                    cache_key, sanitized, cache_accept,
+                    scope=usage_scope, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+                )
+                if store is not None:
+                    self._run_cache_op_sync(store, wait=False)
+
             self._schedule_usage_record(
                 scope=usage_scope,
                 scope_ref_id=usage_scope_ref_id,
@@ -470,6 +499,8 @@ class LLM:
         usage_scope_ref_id: Optional[str] = None,
         should_record: bool = True,
         prompt_tokens_estimate: Optional[int] = None,
+        cache_response: bool = False,
+        cache_accept: Optional[Callable[[str], bool]] = None,
     ) -> AsyncGenerator[str, None]:
         with tracer.start_as_current_span("llm.inference_stream") as span:
             span.set_attribute("llm.model_id", self.model_id)
@@ -477,6 +508,20 @@ class LLM:
             self._validate_vision_support(images)
             prompt = self._apply_pii(prompt, await self._aget_pii_redactor(), span)
             logger.debug("Model: %s, prompt: %s", self.model_id, prompt)
+            cache_key = self._response_cache_key(prompt) if cache_response and not images else None
+            if cache_key is not None:
+                cached = await response_cache.lookup(cache_key)
+                if cached is not None:
+                    # Replayed as one chunk; the stored text is already the
+                    # payload with its fence/prefix stripped.
+                    span.set_attribute("llm.cache_hit", True)
+                    self._schedule_usage_record(
+                        scope=usage_scope, scope_ref_id=usage_scope_ref_id,
+                        prompt_tokens=0, completion_tokens=0,
+                        should_record=should_record, cache_hit=True,
+                    )
+                    yield cached.text
+                    return
             started_payload = False
             prefix = ""
             prompt_tokens = prompt_tokens_estimate if prompt_tokens_estimate is not None else self._estimate_tokens_fast(prompt)
@@ -558,6 +603,16 @@ class LLM:
             span.set_attribute("llm.completion_tokens", completion_tokens)
             span.set_attribute("llm.stream_chunks", len(streamed_chunks))
 
+            if cache_key is not None:
+                store = self._cache_store(
+                    cache_key, "".join(streamed_chunks), cache_accept,
+                    scope=usage_scope, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+                )
+                if store is not None:
+                    task = asyncio.get_running_loop().create_task(store)
+                    _PENDING_RECORD_TASKS.add(task)
+                    task.add_done_callback(_PENDING_RECORD_TASKS.discard)
+
             self._schedule_usage_record(
                 scope=usage_scope,
                 scope_ref_id=usage_scope_ref_id,
@@ -589,12 +644,15 @@ class LLM:
         usage_scope_ref_id: Optional[str] = None,
         should_record: bool = True,
         prompt_tokens_estimate: Optional[int] = None,
+        cache: Optional[CacheBreakpoints] = None,
     ):
         """Streaming inference with native tool_use support.
 
         Forwards :class:`LLMStreamEvent`s from the underlying client and records
         token usage after the stream ends (using either provider-reported usage
         or, as fallback, the prompt_tokens_estimate plus a UsageEvent count).
+        ``cache`` marks the stable prompt prefix for the provider's prompt
+        caching (see :class:`CacheBreakpoints`).
         """
         target_model_id = model_id or self.model_id
         with tracer.start_as_current_span("llm.inference_stream_v2") as span:
@@ -620,6 +678,7 @@ class LLM:
             completion_tokens = 0
             cache_read_tokens = 0
             cache_creation_tokens = 0
+            prompt_reported = False
             stream_start = time.monotonic()
             ttft_recorded = False
 
@@ -631,6 +690,8 @@ class LLM:
                 client_kwargs["web_search"] = web_search
                 if web_search_domains:
                     client_kwargs["web_search_domains"] = web_search_domains
+            if cache is not None:
+                client_kwargs["cache"] = cache
 
             # Bounded retry, but only while the stream hasn't produced anything:
             # once an event reached the consumer we can't transparently restart
@@ -690,6 +751,7 @@ class LLM:
                         if isinstance(evt, UsageEvent):
                             if evt.input_tokens:
                                 prompt_tokens = evt.input_tokens
+                                prompt_reported = True
                             if evt.output_tokens:
                                 completion_tokens = evt.output_tokens
                             if evt.cache_read_tokens:
@@ -729,11 +791,21 @@ class LLM:
                 usage = self.client.pop_last_usage()
                 if usage.prompt_tokens:
                     prompt_tokens = usage.prompt_tokens
+                    prompt_reported = True
                 if usage.completion_tokens:
                     completion_tokens = usage.completion_tokens
+                if usage.cache_read_tokens and not cache_read_tokens:
+                    cache_read_tokens = usage.cache_read_tokens
+                if usage.cache_creation_tokens and not cache_creation_tokens:
+                    cache_creation_tokens = usage.cache_creation_tokens
 
             span.set_attribute("llm.prompt_tokens", prompt_tokens)
             span.set_attribute("llm.completion_tokens", completion_tokens)
+            if prompt_reported:
+                self._observe_prompt_size(
+                    target_model_id, system, messages, tools,
+                    prompt_tokens, cache_read_tokens, cache_creation_tokens,
+                )
 
             if _trace_record is not None:
                 _trace_record.update(
@@ -742,8 +814,8 @@ class LLM:
                     completion_tokens=completion_tokens,
                     cache_read_tokens=cache_read_tokens,
                     cache_creation_tokens=cache_creation_tokens,
-                    uncached_input_tokens=max(
-                        int(prompt_tokens or 0) - int(cache_read_tokens or 0), 0
+                    uncached_input_tokens=LLMUsageRecorderService.uncached_prompt_tokens(
+                        self.provider, prompt_tokens, cache_read_tokens
                     ),
                     stop_reason=_trace_stop_reason,
                     events=_trace_events,
@@ -867,6 +939,80 @@ class LLM:
             "message": "Successfully connected to LLM",
         }
 
+    def _response_cache_key(self, prompt: str, *, tools=None) -> Optional[str]:
+        if not response_cache.enabled():
+            return None
+        org_id = getattr(self, "_organization_id", None)
+        return response_cache.cache_key(
+            organization_id=str(org_id) if org_id else None,
+            llm_model_id=str(getattr(self.model, "id", "") or ""),
+            model_id=self.model_id,
+            temperature=getattr(self.client, "temperature", None),
+            prompt=prompt,
+            tools=tools,
+        )
+
+    def _cache_store(
+        self,
+        key: str,
+        text: str,
+        accept: Optional[Callable[[str], bool]],
+        *,
+        scope: Optional[str],
+        prompt_tokens: int,
+        completion_tokens: int,
+    ):
+        """The coroutine storing `text` under `key`, or None if the caller's
+        `accept` check refuses it."""
+        if accept is not None:
+            try:
+                ok = bool(accept(text))
+            except Exception:
+                ok = False
+            if not ok:
+                response_cache.record_rejected()
+                return None
+        return response_cache.store(
+            key,
+            organization_id=getattr(self, "_organization_id", None),
+            scope=scope or "unscoped",
+            llm_model_id=getattr(self.model, "id", None),
+            response=text,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+        )
+
+    def _run_cache_op_sync(self, coro, *, wait: bool):
+        """Run a response-cache coroutine from the sync path.
+
+        `inference` runs in a worker thread (``asyncio.to_thread``); the
+        cache's async session belongs to the app loop, so the coroutine is
+        handed to that loop. Called on the loop thread itself, or with no
+        loop running, the cache is skipped rather than blocking.
+        """
+        try:
+            asyncio.get_running_loop()
+            coro.close()
+            return None
+        except RuntimeError:
+            pass
+        loop = getattr(self, "_loop", None)
+        if loop is None or not loop.is_running():
+            loop = _MAIN_LOOP
+        if loop is None or not loop.is_running():
+            coro.close()
+            return None
+        future = asyncio.run_coroutine_threadsafe(coro, loop)
+        if not wait:
+            _PENDING_RECORD_TASKS.add(future)
+            future.add_done_callback(_PENDING_RECORD_TASKS.discard)
+            return None
+        try:
+            return future.result(timeout=response_cache.lookup_timeout_s())
+        except Exception:
+            future.cancel()
+            return None
+
     def _coerce_response(self, response) -> tuple[str, LLMUsage]:
         if isinstance(response, LLMResponse):
             return response.text, response.usage or LLMUsage()
@@ -914,6 +1060,52 @@ class LLM:
         except Exception:
             return 0
 
+    def _observe_prompt_size(
+        self,
+        model_id: Optional[str],
+        system: Optional[str],
+        messages: Optional[list[Message]],
+        tools: Optional[list[ToolSpec]],
+        prompt_tokens: int,
+        cache_read_tokens: int,
+        cache_creation_tokens: int,
+    ) -> None:
+        """Feed the provider-reported prompt size of a v2 call to the token
+        counter's calibration, against the estimate of the request as sent.
+
+        Only the content is estimated — text, tool names and arguments, tool
+        results — the way transcript parts count themselves, so the learned
+        factor also absorbs the provider's framing overhead.
+        """
+        try:
+            texts = [system or ""]
+            for message in messages or []:
+                content = message.content
+                if isinstance(content, str):
+                    texts.append(content)
+                    continue
+                for block in content or []:
+                    kind = block.get("type")
+                    if kind == "text":
+                        texts.append(block.get("text") or "")
+                    elif kind == "tool_use":
+                        texts.append(block.get("name") or "")
+                        texts.append(json.dumps(block.get("input") or {}, default=str))
+                    elif kind == "tool_result":
+                        result = block.get("content")
+                        texts.append(result if isinstance(result, str) else json.dumps(result, default=str))
+            for tool in tools or []:
+                texts.append(json.dumps([tool.name, tool.description, tool.input_schema], default=str))
+            estimated = sum(token_counter.estimate_tokens(t) for t in texts)
+            reported = prompt_tokens or 0
+            pricing = LLMUsageRecorderService.CACHE_PRICING.get(self.provider)
+            if pricing is not None and not pricing[0]:
+                # Cache reads and writes reported beside the prompt count.
+                reported += (cache_read_tokens or 0) + (cache_creation_tokens or 0)
+            token_counter.observe_usage(self.provider, model_id, estimated, reported)
+        except Exception as e:
+            logger.debug(f"token calibration skipped: {e}")
+
     def _quota_total_tokens(
         self,
         *,
@@ -923,8 +1115,12 @@ class LLM:
         cache_creation_tokens: int = 0,
     ) -> int:
         total = (prompt_tokens or 0) + (completion_tokens or 0)
-        if self.provider == "anthropic":
-            total += (cache_read_tokens or 0) + (cache_creation_tokens or 0)
+        pricing = LLMUsageRecorderService.CACHE_PRICING.get(self.provider)
+        if pricing is not None:
+            reads_in_prompt = pricing[0]
+            if not reads_in_prompt:
+                total += cache_read_tokens or 0
+            total += cache_creation_tokens or 0
         return max(int(total), 0)
 
     def _quota_cost_micro_usd(
@@ -1074,8 +1270,11 @@ class LLM:
         cache_read_tokens: int = 0,
         cache_creation_tokens: int = 0,
         should_record: bool,
+        cache_hit: bool = False,
     ):
-        if not should_record or ((prompt_tokens or 0) == 0 and (completion_tokens or 0) == 0):
+        if not should_record or (
+            (prompt_tokens or 0) == 0 and (completion_tokens or 0) == 0 and not cache_hit
+        ):
             return
         # Safety net: a call that reaches here with tokens but no scope is a
         # call site that forgot to label itself. Rather than silently dropping
@@ -1125,6 +1324,7 @@ class LLM:
                             data_source_id=attribution.get("data_source_id"),
                             routed=bool(attribution.get("routed")),
                             baseline_model_id=attribution.get("baseline_model_id"),
+                            cache_hit=cache_hit,
                         )
                         await session.commit()
                     return
@@ -8,17 +8,51 @@ Design notes
   rule matches — nothing is sent to the provider.
 * The engine never records raw matched values. The audit summary carries only
   the rule id/name and a hit count, so redaction telemetry can't itself leak PII.
-* Runtime robustness: a rule whose pattern throws at match time is skipped (and
-  logged) rather than crashing the LLM call. Patterns are validated at save time
+* Runtime robustness: a pattern that does not compile is skipped (and logged)
+  rather than crashing the LLM call. Patterns are validated at save time
   (see :func:`validate_pattern`) so this should be rare.
+
+Scanning cost
+-------------
+Redaction runs on every LLM call, over the system prompt and every message of
+the conversation, so a long run re-scans the same history dozens of times.
+Three things keep that flat:
+
+* **One pass per phase.** Each phase's patterns are joined into one
+  alternation (a named group per pattern, rule by rule in rule order) and
+  the text is walked once; the group that matched attributes the hit to its
+  rule. Where two rules overlap (a ``+`` glued to a card number reads as a
+  phone number too) the earlier rule still wins: a match is only taken when
+  no higher-priority pattern matches starting inside it. Patterns that cannot
+  share an alternation (backreferences, named groups, global inline flags)
+  are searched alongside it, each on its own.
+* **Literal prefilter.** Most patterns carry a literal that every match must
+  contain (``@`` for email, the ``AKIA``/``ASIA``... prefix of an AWS key, the
+  ``EMP-`` of a custom employee id). A rule none of whose literals appear in
+  the text is left out of that text's pass; text no rule can match is
+  returned untouched without running a regex at all.
+* **Content memo.** Results for texts of ``BOW_PII_MEMO_MIN_CHARS`` and up
+  are kept per (ruleset, content digest) across redactor instances, bounded
+  by ``BOW_PII_MEMO_ENTRIES`` and ``BOW_PII_MEMO_MAX_CHARS``. A transcript
+  message that did not change since the previous call is not scanned again.
 """
 
 from __future__ import annotations
 
+import bisect
+import hashlib
 import logging
+import os
 import re
+import threading
+from collections import OrderedDict
 from dataclasses import dataclass, field
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+try:  # Python 3.11+
+    from re import _parser as _sre_parse
+except ImportError:  # pragma: no cover - older interpreters
+    import sre_parse as _sre_parse
 
 from .builtin_rules import BUILTIN_PII_RULES
 
@@ -32,6 +66,22 @@ MAX_SCAN_CHARS = 2_000_000
 
 VALID_MODES = ("replace", "block")
 
+DEFAULT_MEMO_ENTRIES = 4096
+DEFAULT_MEMO_MIN_CHARS = 256
+DEFAULT_MEMO_MAX_CHARS = 32_000_000
+# (ruleset fingerprint, text digest) -> (redacted text or None if unchanged, matches)
+_memo_lock = threading.Lock()
+_memo: "OrderedDict[Tuple[str, str], Tuple[Optional[str], Tuple[Dict[str, Any], ...]]]" = OrderedDict()
+_memo_chars = 0
+_metrics = {"scans": 0, "memo_hits": 0, "prefiltered": 0, "rules_skipped": 0, "passes": 0, "passed_over": 0}
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
 
 class PiiPromptBlockedError(Exception):
     """Raised in ``block`` mode when a prompt contains PII and must not be sent."""
@@ -91,12 +141,403 @@ def _compile_patterns(patterns: List[str], *, rule_id: str) -> List[re.Pattern]:
     return compiled
 
 
+def _literal_runs(items) -> Tuple[List[str], List[List[str]]]:
+    """Top-level literal runs of a parsed pattern (each must appear in every
+    match), plus the leading runs of each top-level alternation (one of which
+    must appear)."""
+    runs: List[str] = []
+    branches: List[List[str]] = []
+    cur: List[str] = []
+    for op, av in items:
+        if str(op) == "LITERAL":
+            cur.append(chr(av))
+            continue
+        if cur:
+            runs.append("".join(cur))
+            cur = []
+        if str(op) == "SUBPATTERN" and len(av[-1]) == 1:
+            op, av = av[-1][0]
+        if str(op) == "BRANCH":
+            leads = [_leading_literal(alt) for alt in av[1]]
+            if all(leads):
+                branches.append(leads)
+    if cur:
+        runs.append("".join(cur))
+    return runs, branches
+
+
+def _leading_literal(alt) -> str:
+    out = []
+    for op, av in alt:
+        if str(op) != "LITERAL":
+            break
+        out.append(chr(av))
+    return "".join(out)
+
+
+def _needles(pattern: str) -> Optional[Tuple[str, ...]]:
+    """Lowercased literals one of which every match of `pattern` contains, or
+    None if no such literal can be read off the pattern."""
+    try:
+        parsed = list(_sre_parse.parse(pattern, re.IGNORECASE))
+    except Exception:
+        return None
+    runs, branches = _literal_runs(parsed)
+    best = max(runs, key=len) if runs else ""
+    if len(best) >= 2:
+        return (best.lower(),)
+    if branches:
+        return tuple(sorted({x.lower() for x in max(branches, key=lambda b: min(map(len, b)))}))
+    return (best.lower(),) if best else None
+
+
+def _has_groupref(node) -> bool:
+    if isinstance(node, _sre_parse.SubPattern):
+        return any(_has_groupref(item) for item in node)
+    if isinstance(node, (tuple, list)):
+        if len(node) == 2 and str(node[0]).startswith("GROUPREF"):
+            return True
+        return any(_has_groupref(x) for x in node)
+    return False
+
+
+def _combinable(pattern: re.Pattern) -> bool:
+    """True if `pattern` means the same as one named group of a larger
+    alternation: no named groups (they could collide), no backreferences
+    (their numbers shift) and no global inline flags (they must lead the
+    whole expression)."""
+    if pattern.groupindex:
+        return False
+    try:
+        parsed = _sre_parse.parse(pattern.pattern, re.IGNORECASE)
+        re.compile(f"(?P<_s>{pattern.pattern})", re.IGNORECASE)
+    except Exception:
+        return False
+    return not _has_groupref(parsed)
+
+
+def _next_match_start(regex: re.Pattern, text: str, pos: int) -> Optional[int]:
+    """Start of the first non-empty match of `regex` at or after `pos`."""
+    while pos <= len(text):
+        m = regex.search(text, pos)
+        if m is None:
+            return None
+        if m.end() > m.start():
+            return m.start()
+        pos = m.start() + 1
+    return None
+
+
+_UNSEARCHED = object()
+
+
+class _Plan:
+    """The regexes that scan one set of candidate patterns in one pass.
+
+    Patterns are numbered ("slots") rule by rule in rule order, then in
+    pattern order within a rule; a lower slot has priority. Every combinable
+    pattern is a named group ``_s<slot>`` of one shared alternation, so at a
+    given position the highest-priority pattern matching there is the one
+    reported. A pattern that cannot be combined is searched on its own
+    alongside it.
+    """
+
+    def __init__(self, patterns: Sequence[re.Pattern], active: Tuple[int, ...], combinable: Sequence[bool]):
+        self.patterns = patterns
+        self.active = active
+        self.combinable = combinable
+        # (regex, slot) — slot None: the shared alternation, read off lastgroup.
+        self.streams: List[Tuple[re.Pattern, Optional[int]]] = []
+        shared = self._alternation([k for k in active if combinable[k]])
+        if shared is not None:
+            self.streams.append((shared, None))
+        self.streams.extend((patterns[k], k) for k in active if not combinable[k] or shared is None)
+        self._higher: Dict[int, List[re.Pattern]] = {}
+
+    def _alternation(self, slots: List[int]) -> Optional[re.Pattern]:
+        if not slots:
+            return None
+        try:
+            return re.compile(
+                "|".join(f"(?P<_s{k}>{self.patterns[k].pattern})" for k in slots), re.IGNORECASE
+            )
+        except re.error as exc:  # pragma: no cover - every part compiled alone
+            logger.debug("PII patterns not combinable, searching each alone: %s", exc)
+            return None
+
+    def higher(self, slot: int) -> List[re.Pattern]:
+        """Regexes matching exactly the active patterns that outrank `slot`."""
+        found = self._higher.get(slot)
+        if found is None:
+            above = [k for k in self.active if k < slot]
+            shared = self._alternation([k for k in above if self.combinable[k]])
+            found = ([shared] if shared is not None else []) + [
+                self.patterns[k] for k in above if not self.combinable[k] or shared is None
+            ]
+            self._higher[slot] = found
+        return found
+
+
+class _Scanner:
+    """The rules of one phase of :meth:`PiiRedactor.scan`, scanned together."""
+
+    def __init__(self, rules: Sequence["CompiledRule"]):
+        self.rules = list(rules)
+        # Slot -> (rule index, pattern), in priority order.
+        self._slots: List[Tuple[int, re.Pattern]] = [
+            (i, pattern) for i, rule in enumerate(self.rules) for pattern in rule.patterns
+        ]
+        self._patterns = [pattern for _, pattern in self._slots]
+        self._combinable = [_combinable(pattern) for pattern in self._patterns]
+        # Per rule: needle tuples of its patterns (None = always a candidate).
+        self._needles: List[Optional[List[str]]] = []
+        for rule in self.rules:
+            needles: Optional[List[str]] = []
+            for pattern in rule.patterns:
+                n = _needles(pattern.pattern)
+                if n is None:
+                    needles = None
+                    break
+                needles.extend(n)
+            self._needles.append(needles)
+        self._plans: Dict[Tuple[int, ...], _Plan] = {}
+        self._lock = threading.Lock()
+
+    def _active(self, text: str) -> Tuple[int, ...]:
+        """Slots of the rules that can match `text` at all."""
+        # Case-insensitive literal containment is only exact for ASCII text;
+        # anything else keeps every rule.
+        low = text.lower() if text.isascii() else None
+        rules = {
+            i for i, needles in enumerate(self._needles)
+            if low is None or needles is None or any(n in low for n in needles)
+        }
+        _count("rules_skipped", len(self.rules) - len(rules))
+        return tuple(k for k, (i, _) in enumerate(self._slots) if i in rules)
+
+    def _plan(self, active: Tuple[int, ...]) -> _Plan:
+        with self._lock:
+            plan = self._plans.get(active)
+        if plan is None:
+            plan = _Plan(self._patterns, active, self._combinable)
+            with self._lock:
+                if len(self._plans) >= 64:
+                    self._plans.clear()
+                self._plans[active] = plan
+        return plan
+
+    def _spans(self, text: str, plan: _Plan, tokens: Sequence[Tuple[int, int]] = ()) -> List[Tuple[int, int, int]]:
+        """(start, end, slot) of every match to replace, in text order.
+
+        The alternation finds the leftmost match, which is not always the one
+        rule order would pick: a phone number glued in front of a card number
+        starts first. So a match is only taken when no higher-priority pattern
+        matches starting inside it; otherwise the scan moves on one character
+        and the higher match is reached in turn. Where a match is passed over,
+        the lower-priority patterns at that position are tried before moving
+        on. Matches overlapping an earlier pass's `tokens` and empty matches
+        are never taken.
+        """
+        token_starts = [s for s, _ in tokens]
+        heads: Dict[int, Any] = {}
+        probes: Dict[Tuple[int, int], Optional[int]] = {}
+        spans: List[Tuple[int, int, int]] = []
+        pos = 0
+        while pos <= len(text):
+            best = None
+            for j, (regex, slot) in enumerate(plan.streams):
+                head = heads.get(j, _UNSEARCHED)
+                if head is _UNSEARCHED or (head is not None and head[0] < pos):
+                    m = regex.search(text, pos)
+                    head = heads[j] = None if m is None else (
+                        m.start(), int(m.lastgroup[2:]) if slot is None else slot, m.end()
+                    )
+                if head is not None and (best is None or head[:2] < best[:2]):
+                    best = head
+            if best is None:
+                break
+            hit = self._take(plan, text, best, tokens, token_starts, probes)
+            if hit is None:
+                pos = best[0] + 1
+            else:
+                spans.append(hit)
+                pos = hit[1]
+        return spans
+
+    def _take(self, plan, text, hit, tokens, token_starts, probes) -> Optional[Tuple[int, int, int]]:
+        """`hit`, or the best lower-priority match at its position that can
+        be taken, or None."""
+        start = hit[0]
+        candidate: Optional[Tuple[int, int, int]] = hit
+        while candidate is not None:
+            _, slot, end = candidate
+            taken = (
+                end > start
+                and not self._covers_token(tokens, token_starts, start, end)
+                and not self._outranked(plan, text, slot, start, end, probes)
+            )
+            if taken:
+                return (start, end, slot)
+            _count("passed_over")
+            candidate = None
+            for k in plan.active:
+                if k > slot:
+                    m = self._patterns[k].match(text, start)
+                    if m is not None:
+                        candidate = (start, k, m.end())
+                        break
+        return None
+
+    @staticmethod
+    def _covers_token(tokens, token_starts, start: int, end: int) -> bool:
+        i = bisect.bisect_left(token_starts, end) - 1
+        return i >= 0 and tokens[i][1] > start
+
+    @staticmethod
+    def _outranked(plan: _Plan, text: str, slot: int, start: int, end: int, probes) -> bool:
+        """True if a higher-priority pattern matches starting inside
+        (start, end). Each probe remembers where its next match starts, and
+        scan positions only move forward, so a probe walks the text once."""
+        for j, regex in enumerate(plan.higher(slot)):
+            found = probes.get((slot, j), -1)
+            if found is not None and found <= start:
+                found = probes[(slot, j)] = _next_match_start(regex, text, start + 1)
+            if found is not None and found < end:
+                return True
+        return False
+
+    def count(self, text: str) -> Dict[int, int]:
+        """Matches per rule index, without modifying the text."""
+        counts: Dict[int, int] = {}
+        active = self._active(text)
+        if not active:
+            _count("prefiltered")
+            return counts
+        _count("passes")
+        for _, _, slot in self._spans(text, self._plan(active)):
+            i = self._slots[slot][0]
+            counts[i] = counts.get(i, 0) + 1
+        return counts
+
+    def substitute(self, text: str) -> Tuple[str, Dict[int, int]]:
+        """Replace every match with its rule's token; returns (text, counts).
+
+        A replacement can create a match that was not there before — the
+        token's ``]`` puts a word boundary in front of digits that directly
+        followed an email, say. Running the rules one after another used to
+        catch those, so the pass repeats over the new text, leaving the
+        tokens alone, until it replaces nothing (at most once per rule, as
+        many chances as the sequential rules had).
+        """
+        counts: Dict[int, int] = {}
+        tokens: List[Tuple[int, int]] = []
+        for n in range(max(1, len(self.rules))):
+            active = self._active(text)
+            if not active:
+                if not n:
+                    _count("prefiltered")
+                break
+            _count("passes")
+            spans = self._spans(text, self._plan(active), tokens)
+            if not spans:
+                break
+            text, tokens = self._replace(text, spans, tokens, counts)
+        return text, counts
+
+    def _replace(self, text, spans, tokens, counts) -> Tuple[str, List[Tuple[int, int]]]:
+        parts: List[str] = []
+        moved: List[Tuple[int, int]] = []
+        last = shift = t = 0
+        for start, end, slot in spans:
+            while t < len(tokens) and tokens[t][0] < start:
+                moved.append((tokens[t][0] + shift, tokens[t][1] + shift))
+                t += 1
+            i, pattern = self._slots[slot]
+            token = self.rules[i].replacement
+            if "\\" in token:
+                # Template (\1, \g<name>): expand against the pattern's own groups.
+                m = pattern.match(text, start)
+                if m is not None:
+                    token = m.expand(token)
+            parts.append(text[last:start])
+            parts.append(token)
+            moved.append((start + shift, start + shift + len(token)))
+            shift += len(token) - (end - start)
+            last = end
+            counts[i] = counts.get(i, 0) + 1
+        moved.extend((s + shift, e + shift) for s, e in tokens[t:])
+        parts.append(text[last:])
+        return "".join(parts), moved
+
+
+def _fingerprint(mode: str, rules: Sequence["CompiledRule"]) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    h.update(repr((mode, [
+        (r.id, r.name, r.replacement, r.action, [p.pattern for p in r.patterns]) for r in rules
+    ])).encode("utf-8", "surrogatepass"))
+    return h.hexdigest()
+
+
+def _text_digest(text: str) -> str:
+    return hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).hexdigest()
+
+
+def _memo_get(key: Tuple[str, str]):
+    with _memo_lock:
+        hit = _memo.get(key)
+        if hit is not None:
+            _memo.move_to_end(key)
+            _metrics["memo_hits"] += 1
+        return hit
+
+
+def _memo_put(key: Tuple[str, str], value: Tuple[Optional[str], Tuple[Dict[str, Any], ...]]) -> None:
+    global _memo_chars
+    size = len(value[0] or "")
+    max_entries = max(1, _env_int("BOW_PII_MEMO_ENTRIES", DEFAULT_MEMO_ENTRIES))
+    max_chars = max(0, _env_int("BOW_PII_MEMO_MAX_CHARS", DEFAULT_MEMO_MAX_CHARS))
+    if size > max_chars:
+        return
+    with _memo_lock:
+        old = _memo.pop(key, None)
+        if old is not None:
+            _memo_chars -= len(old[0] or "")
+        _memo[key] = value
+        _memo_chars += size
+        while _memo and (len(_memo) > max_entries or _memo_chars > max_chars):
+            _, evicted = _memo.popitem(last=False)
+            _memo_chars -= len(evicted[0] or "")
+
+
+def _count(name: str, n: int = 1) -> None:
+    with _memo_lock:
+        _metrics[name] += n
+
+
+def stats() -> dict:
+    with _memo_lock:
+        return {**_metrics, "memo_entries": len(_memo), "memo_chars": _memo_chars}
+
+
+def reset() -> None:
+    global _memo_chars
+    with _memo_lock:
+        _memo.clear()
+        _memo_chars = 0
+        for k in _metrics:
+            _metrics[k] = 0
+
+
 class PiiRedactor:
     """Compiled, reusable redactor for one organization's ruleset."""
 
     def __init__(self, mode: str, rules: List[CompiledRule]):
         self.mode = mode if mode in VALID_MODES else "replace"
         self.rules = rules
+        self._block = _Scanner([r for r in rules if r.action == "block"])
+        self._replace = _Scanner([r for r in rules if r.action != "block"])
+        self._display = _Scanner(rules)
+        self.fingerprint = _fingerprint(self.mode, rules)
 
     @property
     def active(self) -> bool:
@@ -114,38 +555,39 @@ class PiiRedactor:
         if not text or not self.rules:
             return RedactionResult(text=text, matches=[])
 
+        _count("scans")
+        key = None
+        if len(text) >= _env_int("BOW_PII_MEMO_MIN_CHARS", DEFAULT_MEMO_MIN_CHARS):
+            key = (self.fingerprint, _text_digest(text))
+            hit = _memo_get(key)
+            if hit is not None:
+                redacted, matches = hit
+                return RedactionResult(
+                    text=text if redacted is None else redacted,
+                    matches=[dict(m) for m in matches],
+                )
+
         head = text[:MAX_SCAN_CHARS]
         tail = text[MAX_SCAN_CHARS:]
         matches: List[Dict[str, Any]] = []
 
         # Phase 1: block detection on the untouched text.
-        for rule in self.rules:
-            if rule.action != "block":
-                continue
-            count = 0
-            for pattern in rule.patterns:
-                try:
-                    count += len(pattern.findall(head))
-                except Exception as exc:  # pragma: no cover - defensive
-                    logger.warning("PII rule %s: match error, skipping pattern: %s", rule.id, exc)
-            if count:
+        if self._block.rules:
+            for i, count in sorted(self._block.count(head).items()):
+                rule = self._block.rules[i]
                 matches.append({"id": rule.id, "name": rule.name, "count": count, "action": "block"})
 
         # Phase 2: replace rules mutate the text.
-        for rule in self.rules:
-            if rule.action == "block":
-                continue
-            count = 0
-            for pattern in rule.patterns:
-                try:
-                    head, n = pattern.subn(rule.replacement, head)
-                    count += n
-                except Exception as exc:  # pragma: no cover - defensive
-                    logger.warning("PII rule %s: match error, skipping pattern: %s", rule.id, exc)
-            if count:
+        if self._replace.rules:
+            head, counts = self._replace.substitute(head)
+            for i, count in sorted(counts.items()):
+                rule = self._replace.rules[i]
                 matches.append({"id": rule.id, "name": rule.name, "count": count, "action": "replace"})
 
-        return RedactionResult(text=head + tail, matches=matches)
+        result = RedactionResult(text=head + tail if matches else text, matches=matches)
+        if key is not None:
+            _memo_put(key, (result.text if matches else None, tuple(dict(m) for m in matches)))
+        return result
 
     def redact_display(self, text: str) -> str:
         """Mask PII for *display* in the UI. Unlike ``scan``/``apply`` (which
@@ -157,13 +599,8 @@ class PiiRedactor:
             return text
         head = text[:MAX_SCAN_CHARS]
         tail = text[MAX_SCAN_CHARS:]
-        for rule in self.rules:
-            for pattern in rule.patterns:
-                try:
-                    head = pattern.sub(rule.replacement, head)
-                except Exception as exc:  # pragma: no cover - defensive
-                    logger.warning("PII rule %s: display redaction error: %s", rule.id, exc)
-        return head + tail
+        head, counts = self._display.substitute(head)
+        return head + tail if counts else text
 
     def redact_deep(self, obj: Any) -> Any:
         """Recursively redact every string value in a nested dict/list for
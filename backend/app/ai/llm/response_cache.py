@@ -0,0 +1,232 @@
+"""Response cache for deterministic auxiliary LLM calls.
+
+Besides the planner, a completion makes side calls — the Judge's scoring,
+the report title, follow-up suggestions, instruction enhancement. Retries,
+scheduled reruns and eval suites send these byte-identical prompts again and
+again, and each one used to be a paid provider round-trip for an answer
+already known.
+
+Call sites opt in (``LLM.inference(..., cache_response=True)``); nothing is
+cached by default. An entry is keyed by a digest of the organization, the
+model row and model id, the sampling temperature, the prompt as sent (after
+PII redaction) and the tool schemas, and lives in the app database
+(`llm_response_cache_entries`) so every worker shares it:
+
+  * ``BOW_LLM_RESPONSE_CACHE_TTL_S`` (default 7 days) bounds an entry's
+    life, long enough for a weekly scheduled prompt to hit; expired rows are
+    pruned by a scheduler job.
+  * ``BOW_LLM_RESPONSE_CACHE=0`` turns every lookup and write off.
+  * `purge` drops an organization's entries, optionally for one scope
+    (``DELETE /llm/response_cache``).
+
+A hit is recorded in `llm_usage_records` with ``cache_hit`` set and zero
+tokens and cost, so per-scope call counts stay complete while spend and
+quotas only see what was actually paid.
+
+Everything here is best effort: a lookup that fails or takes longer than
+``BOW_LLM_RESPONSE_CACHE_TIMEOUT_S`` is a miss, a failed write is dropped.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Callable, Iterable, Optional
+
+from sqlalchemy import text
+
+from app.models.llm_response_cache import LLMResponseCacheEntry  # noqa: F401  (table registration)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL_S = 7 * 24 * 3600.0
+DEFAULT_LOOKUP_TIMEOUT_S = 2.0
+
+_lock = threading.Lock()
+_metrics = {"hits": 0, "misses": 0, "writes": 0, "rejected": 0, "errors": 0, "purged": 0}
+# Overridable for tests; defaults to the app's async session factory.
+_session_factory: Optional[Callable[[], Any]] = None
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    text: str
+    prompt_tokens: int
+    completion_tokens: int
+
+
+def _env_number(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def enabled() -> bool:
+    return os.environ.get("BOW_LLM_RESPONSE_CACHE", "1").strip().lower() not in ("0", "false", "no", "off")
+
+
+def ttl_seconds() -> float:
+    return max(0.0, _env_number("BOW_LLM_RESPONSE_CACHE_TTL_S", DEFAULT_TTL_S))
+
+
+def lookup_timeout_s() -> float:
+    return max(0.1, _env_number("BOW_LLM_RESPONSE_CACHE_TIMEOUT_S", DEFAULT_LOOKUP_TIMEOUT_S))
+
+
+def _sessions():
+    global _session_factory
+    if _session_factory is None:
+        from app.settings.database import create_async_session_factory
+        _session_factory = create_async_session_factory()
+    return _session_factory
+
+
+def cache_key(
+    *,
+    organization_id: Optional[str],
+    llm_model_id: Optional[str],
+    model_id: str,
+    temperature: Optional[float],
+    prompt: str,
+    tools: Optional[Iterable[Any]] = None,
+) -> str:
+    """Digest of everything that determines a response."""
+    tool_specs = []
+    for tool in tools or ():
+        dump = getattr(tool, "model_dump", None)
+        tool_specs.append(dump(mode="json") if dump else tool)
+    h = hashlib.sha256()
+    h.update(json.dumps(
+        [organization_id, llm_model_id, model_id, temperature, tool_specs],
+        sort_keys=True, default=str,
+    ).encode("utf-8"))
+    h.update(b"\x00")
+    h.update(prompt.encode("utf-8", "surrogatepass"))
+    return h.hexdigest()
+
+
+async def lookup(key: str) -> Optional[CachedResponse]:
+    """The live entry for `key`, or None (missing, expired or unreadable)."""
+    if not enabled():
+        return None
+    try:
+        async with _sessions()() as session:
+            result = await session.execute(
+                text(
+                    "SELECT response, prompt_tokens, completion_tokens FROM llm_response_cache_entries "
+                    "WHERE cache_key = :k AND expires_at > :now"
+                ),
+                {"k": key, "now": datetime.utcnow()},
+            )
+            row = result.first()
+            if row is None:
+                _count("misses")
+                return None
+            await session.execute(
+                text("UPDATE llm_response_cache_entries SET hits = hits + 1 WHERE cache_key = :k"),
+                {"k": key},
+            )
+            await session.commit()
+    except Exception as e:
+        _count("errors")
+        logger.debug(f"[response_cache] lookup failed: {e}")
+        return None
+    _count("hits")
+    return CachedResponse(text=row[0], prompt_tokens=int(row[1] or 0), completion_tokens=int(row[2] or 0))
+
+
+async def store(
+    key: str,
+    *,
+    organization_id: Optional[str],
+    scope: str,
+    llm_model_id: Optional[str],
+    response: str,
+    prompt_tokens: int = 0,
+    completion_tokens: int = 0,
+) -> bool:
+    """Store (or replace) the entry for `key`. Returns whether it was written."""
+    if not enabled() or not response:
+        return False
+    ttl = ttl_seconds()
+    if ttl <= 0:
+        return False
+    now = datetime.utcnow()
+    try:
+        async with _sessions()() as session:
+            await session.execute(
+                text("DELETE FROM llm_response_cache_entries WHERE cache_key = :k"), {"k": key},
+            )
+            await session.execute(
+                text(
+                    "INSERT INTO llm_response_cache_entries "
+                    "(id, cache_key, organization_id, scope, llm_model_id, response, "
+                    "prompt_tokens, completion_tokens, hits, expires_at, created_at, updated_at) "
+                    "VALUES (:id, :k, :org, :scope, :model, :response, :pt, :ct, 0, :exp, :now, :now)"
+                ),
+                {
+                    "id": str(uuid.uuid4()), "k": key,
+                    "org": str(organization_id) if organization_id else None,
+                    "scope": scope or "unscoped", "model": str(llm_model_id) if llm_model_id else None,
+                    "response": response, "pt": int(prompt_tokens or 0), "ct": int(completion_tokens or 0),
+                    "exp": now + timedelta(seconds=ttl), "now": now,
+                },
+            )
+            await session.commit()
+    except Exception as e:
+        _count("errors")
+        logger.debug(f"[response_cache] write failed: {e}")
+        return False
+    _count("writes")
+    return True
+
+
+async def purge(db, organization_id: str, scope: Optional[str] = None) -> int:
+    """Delete an organization's entries (one scope's, if given) on `db`.
+    The caller commits. Returns the number of rows deleted."""
+    sql = "DELETE FROM llm_response_cache_entries WHERE organization_id = :org"
+    params = {"org": str(organization_id)}
+    if scope:
+        sql += " AND scope = :scope"
+        params["scope"] = scope
+    result = await db.execute(text(sql), params)
+    n = int(result.rowcount or 0)
+    _count("purged", n)
+    return n
+
+
+async def prune_expired() -> int:
+    """Delete expired entries (scheduler job)."""
+    async with _sessions()() as session:
+        result = await session.execute(
+            text("DELETE FROM llm_response_cache_entries WHERE expires_at <= :now"),
+            {"now": datetime.utcnow()},
+        )
+        await session.commit()
+    return int(result.rowcount or 0)
+
+
+def record_rejected() -> None:
+    """A response the call site declined to cache (e.g. unparseable)."""
+    _count("rejected")
+
+
+def _count(name: str, n: int = 1) -> None:
+    with _lock:
+        _metrics[name] += n
+
+
+def stats() -> dict:
+    with _lock:
+        return dict(_metrics)
+
+
+def reset() -> None:
+    with _lock:
+        for k in _metrics:
+            _metrics[k] = 0
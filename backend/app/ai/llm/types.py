@@ -1,3 +1,5 @@
+import hashlib
+import json
 from dataclasses import dataclass, field
 from typing import Any, Literal, Optional, Union
 
@@ -6,11 +8,13 @@ from typing import Any, Literal, Optional, Union
 class LLMUsage:
     prompt_tokens: int = 0
     completion_tokens: int = 0
-    # Prompt caching (Anthropic native, OpenAI/Azure automatic, Bedrock-Claude).
+    # Prompt caching (Anthropic and Bedrock breakpoints, OpenAI/Azure automatic,
+    # Gemini context caches — see CacheBreakpoints).
     # cache_read_tokens: tokens served from cache (billed at provider's reduced rate).
     # cache_creation_tokens: tokens written to cache on this call (Anthropic charges
     # 1.25x normal input for these). Both are subsets of prompt_tokens conceptually,
-    # though providers report them differently — see per-client _extract_usage.
+    # though providers report them differently — see per-client _extract_usage and
+    # LLMUsageRecorderService.CACHE_PRICING.
     cache_read_tokens: int = 0
     cache_creation_tokens: int = 0
 
@@ -91,6 +95,50 @@ class Message:
     content: Union[str, list[dict]]
 
 
+@dataclass
+class CacheBreakpoints:
+    """Where the byte-stable prefix of a request ends, provider-neutrally.
+
+    A caller whose prompt keeps the same prefix across calls (the planner:
+    system prompt, tool schemas, settled transcript turns) marks it once and
+    every client translates the marks into its own mechanism:
+
+      * Anthropic — ``cache_control`` on the system block, the last tool and
+        the last settled message.
+      * Bedrock — Converse ``cachePoint`` blocks at the same three places, on
+        models that support prompt caching.
+      * Google — an explicit Gemini context cache holding the system
+        instruction and tools, reused while it lives.
+      * OpenAI — caching is automatic on a stable prefix; `key` is sent as
+        ``prompt_cache_key`` so requests sharing the prefix are routed to the
+        same cache.
+
+    `system` and `tools` mark the end of those blocks; `history` marks the
+    last settled message — every turn but the newest, which carries fresh
+    tool results and the per-turn head.
+    """
+    system: bool = True
+    tools: bool = True
+    history: bool = True
+    key: Optional[str] = None
+
+    @classmethod
+    def for_prefix(cls, system: Optional[str], tools: Optional[list["ToolSpec"]] = None) -> "CacheBreakpoints":
+        """All breakpoints, keyed by a digest of the system prompt and tool
+        schemas — the part of the prefix shared by every call of a run."""
+        h = hashlib.sha256((system or "").encode("utf-8", "surrogatepass"))
+        for t in tools or ():
+            h.update(b"\x00")
+            h.update(json.dumps([t.name, t.description, t.input_schema], sort_keys=True, default=str).encode("utf-8"))
+        return cls(key=f"bow-{h.hexdigest()[:32]}")
+
+    def history_index(self, message_count: int) -> Optional[int]:
+        """Index of the message the history breakpoint goes on, if any."""
+        if not self.history or message_count <= 2:
+            return None
+        return message_count - 2
+
+
 # --- Streaming events ------------------------------------------------------
 
 
@@ -237,6 +237,9 @@ class Table(BaseModel):
     last_feedback_at: Optional[str] = None
     success_rate: Optional[float] = None
     score: Optional[float] = None
+    # BM25 relevance to the current prompt, 0..1 (set when the schema was
+    # built with a query; already blended into `score`)
+    relevance: Optional[float] = None
     # Instruction reference count (how many instructions reference this table)
     referenced_instructions_count: Optional[int] = None
 
@@ -33,6 +33,7 @@ from app.models.visualization import Visualization
 from app.dependencies import async_session_maker
 from app.services.thumbnail_service import ThumbnailService
 from app.services.artifact_libs import get_inline_scripts
+from app.services import step_result_store
 from app.ai.code_execution.pptx_executor import PptxCodeExecutor, PptxPreviewService
 from sqlalchemy import desc
 from app.ai.tools.implementations._sandbox_context import SANDBOX_RUNTIME_PROMPT
@@ -931,7 +932,7 @@ Output the FULL corrected code in a ```python code block. No explanations, no di
             step_data = step.data if step else {}
             _all_rows = (step_data.get("rows") or []) if step_data else []
             rows = _all_rows[:100]
-            total_row_count = len(_all_rows)
+            total_row_count = step_result_store.row_count(step_data)
             raw_columns = step_data.get("columns") or [] if step_data else []
             data_model = step.data_model if step else {}
             step_info = step_data.get("info") or {} if step_data else {}
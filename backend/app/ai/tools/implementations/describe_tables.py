@@ -4,6 +4,7 @@ from typing import AsyncIterator, Dict, Any, Type, List
 from pydantic import BaseModel
 from sqlalchemy import select, and_
 
+from app.ai.context.builders import compiled_catalog
 from app.ai.tools.base import Tool
 from app.ai.tools.metadata import ToolMetadata
 from app.ai.tools.schemas import (
@@ -18,6 +19,39 @@ from app.models.instruction_reference import InstructionReference
 from app.models.datasource_table import DataSourceTable
 
 
+def name_patterns_for(queries: List[Any]) -> List[str]:
+    """The name regexes describe_tables matches its queries with.
+
+    `compiled_catalog` answers the literal ones from its segment keys and
+    must stay in step with them.
+    """
+    name_patterns: list[str] = []
+    special = re.compile(r"[\^\$\.\*\+\?\[\]\(\)\{\}\|]")
+    for q in queries:
+        if not isinstance(q, str):
+            continue
+        # Always add escaped literal version (handles names with special chars like parens)
+        esc = re.escape(q)
+        name_patterns.append(f"(?i)(?:^|[./]){esc}$")
+        # Separator-tolerant variant: match the query as the leading segment of
+        # a delimited/pattern name so a plain query finds collapsed or namespaced
+        # tables — e.g. "security" -> "security-*" (Elasticsearch patterns),
+        # "web" -> "web::access_combined" (Splunk index::sourcetype). Bounded to a
+        # separator so it won't match unrelated names like "securityaudit". The
+        # leading anchor also allows ':' so a bare sourcetype matches a Splunk
+        # "index::sourcetype" name (e.g. "json_app" -> "app::json_app").
+        name_patterns.append(f"(?i)(?:^|[./:]){esc}(?:[-:._*/].*)?$")
+
+        # Also add as raw regex if it contains special chars (for intentional patterns like .*Opportunities.*)
+        if special.search(q or ""):
+            try:
+                re.compile(q)  # validate it's a valid regex
+                name_patterns.append(f"(?i){q}")
+            except re.error:
+                pass  # invalid regex, skip
+    return name_patterns
+
+
 class DescribeTablesTool(Tool):
     @property
     def metadata(self) -> ToolMetadata:
@@ -58,7 +92,10 @@ class DescribeTablesTool(Tool):
     async def _sample_thin_tables(self, ctx: Any, runtime_ctx: Dict[str, Any]) -> None:
         """Fill columns for matched tables that were indexed with none (thin,
         schema-on-read). Best-effort: any failure leaves the table as-is. No-op
-        for normal sources — their tables already carry columns."""
+        for normal sources — their tables already carry columns.
+
+        A sampled table is replaced in `ctx` by a filled copy: the originals
+        may belong to the compiled catalog, shared by every lookup."""
         try:
             db = runtime_ctx.get("db")
             organization = runtime_ctx.get("organization")
@@ -79,7 +116,8 @@ class DescribeTablesTool(Tool):
                 ds_obj = ds_objs.get(ds_id)
                 if ds_obj is None:
                     continue
-                for t in (getattr(ds, "tables", []) or []):
+                tables = getattr(ds, "tables", None) or []
+                for pos, t in enumerate(tables):
                     if sampled >= self._MAX_THIN_SAMPLES:
                         break
                     if (getattr(t, "columns", None) or []):
@@ -102,7 +140,7 @@ class DescribeTablesTool(Tool):
                         continue
                     cols = getattr(sampled_tbl, "columns", None) or [] if sampled_tbl else []
                     if cols:
-                        t.columns = cols
+                        tables[pos] = t.model_copy(update={"columns": cols})
                         sampled += 1
         except Exception:
             # Never let on-demand sampling break table inspection.
@@ -140,33 +178,11 @@ class DescribeTablesTool(Tool):
         # Resolve queries into name patterns (always escaped literal + optional raw regex)
         yield ToolProgressEvent(type="tool.progress", payload={"stage": "resolving_patterns"})
         queries = data.query if isinstance(data.query, list) else [data.query]
-        name_patterns: list[str] = []
-        special = re.compile(r"[\^\$\.\*\+\?\[\]\(\)\{\}\|]")
-        for q in queries:
-            if not isinstance(q, str):
-                continue
-            # Always add escaped literal version (handles names with special chars like parens)
-            esc = re.escape(q)
-            name_patterns.append(f"(?i)(?:^|[./]){esc}$")
-            # Separator-tolerant variant: match the query as the leading segment of
-            # a delimited/pattern name so a plain query finds collapsed or namespaced
-            # tables — e.g. "security" -> "security-*" (Elasticsearch patterns),
-            # "web" -> "web::access_combined" (Splunk index::sourcetype). Bounded to a
-            # separator so it won't match unrelated names like "securityaudit". The
-            # leading anchor also allows ':' so a bare sourcetype matches a Splunk
-            # "index::sourcetype" name (e.g. "json_app" -> "app::json_app").
-            name_patterns.append(f"(?i)(?:^|[./:]){esc}(?:[-:._*/].*)?$")
-
-            # Also add as raw regex if it contains special chars (for intentional patterns like .*Opportunities.*)
-            if special.search(q or ""):
-                try:
-                    re.compile(q)  # validate it's a valid regex
-                    name_patterns.append(f"(?i){q}")
-                except re.error:
-                    pass  # invalid regex, skip
+        name_patterns = name_patterns_for(queries)
 
         # Build filtered schema context via the same builder used by the agent
         schemas_excerpt = ""
+        table_xml = None
         searched_sources = 0
         matched_tables_total = 0
         truncated = False
@@ -180,12 +196,33 @@ class DescribeTablesTool(Tool):
                 builder = context_hub.schema_builder
                 # Build without top_k slicing so we can compute truncation accurately
                 yield ToolProgressEvent(type="tool.progress", payload={"stage": "generating_excerpt"})
-                ctx = await builder.build(
-                    with_stats=True,
-                    data_source_ids=data.data_source_ids,
-                    connection_ids=data.connection_ids,
-                    name_patterns=name_patterns or None,
-                )
+                # Rank the matches by what the tool asked for and what the user
+                # is asking about, so a broad pattern's top `limit` are the
+                # relevant tables rather than merely the most used ones.
+                retrieval_query = " ".join(
+                    [q for q in queries if isinstance(q, str)]
+                    + [getattr(context_hub, "retrieval_query", None) or ""]
+                ).strip()
+                # Serve the lookup from the compiled catalog: one full build per
+                # scope, then each describe costs only its matches. The
+                # builder remains the fallback (and the source of truth).
+                try:
+                    catalog = await compiled_catalog.for_hub(context_hub)
+                    ctx = catalog.lookup(
+                        queries,
+                        data_source_ids=data.data_source_ids,
+                        connection_ids=data.connection_ids,
+                        relevance_query=retrieval_query or None,
+                    )
+                    table_xml = catalog.table_xml
+                except Exception:
+                    ctx = await builder.build(
+                        with_stats=True,
+                        data_source_ids=data.data_source_ids,
+                        connection_ids=data.connection_ids,
+                        name_patterns=name_patterns or None,
+                        query=retrieval_query or None,
+                    )
                 # Sample-on-demand for THIN tables (schema-on-read sources like
                 # Splunk index a cheap catalog and leave low-volume sourcetypes
                 # with no columns). When the agent inspects such a table, fetch its
@@ -205,7 +242,7 @@ class DescribeTablesTool(Tool):
 
                 # Render combined excerpt using a per-source sample cap
                 top_k = max(1, int(data.limit or 20))
-                schemas_excerpt = ctx.render_combined(top_k_per_ds=top_k, index_limit=200)
+                schemas_excerpt = ctx.render_combined(top_k_per_ds=top_k, index_limit=200, table_xml=table_xml)
 
                 # Determine truncation if any data source has more tables than top_k
                 truncated = any(
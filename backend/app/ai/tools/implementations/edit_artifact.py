@@ -35,6 +35,7 @@ from app.models.artifact import Artifact
 from app.models.visualization import Visualization
 from app.models.query import Query
 from app.dependencies import async_session_maker
+from app.services import step_result_store
 from app.ai.tools.implementations._sandbox_context import SANDBOX_RUNTIME_PROMPT
 from app.ai.prompt_language import build_language_directive
 
@@ -952,7 +953,7 @@ Re-emit corrected SEARCH/REPLACE blocks for the SAME edit. Copy SEARCH text exac
                 "column_info": column_info,
                 # row_count = TRUE dataset size; rows is a 100-row sample
                 # (see create_artifact — same contract).
-                "row_count": len(_all_rows),
+                "row_count": step_result_store.row_count(step_data),
                 "sample_row_count": len(rows),
                 "rows": rows,
                 "dataModel": data_model or {},
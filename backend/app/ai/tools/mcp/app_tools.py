@@ -19,6 +19,7 @@ from app.models.visualization import Visualization
 from app.models.query import Query
 from app.models.step import Step
 from app.models.artifact import Artifact
+from app.services import step_result_store
 
 logger = logging.getLogger(__name__)
 
@@ -82,6 +83,9 @@ class GetVisualizationMCPTool(MCPTool):
             if not step and viz.query.steps:
                 step = viz.query.steps[-1]
 
+        # Every row, not the inline preview: the app has no way to page.
+        data = (await step_result_store.full_data(step) if step else None) or {}
+
         # Build response matching ToolWidgetPreview data shape
         return {
             "id": str(viz.id),
@@ -89,8 +93,8 @@ class GetVisualizationMCPTool(MCPTool):
             "view": viz.view or {},
             "code": step.code if step else "",
             "data": {
-                "rows": (step.data or {}).get("rows", []) if step else [],
-                "columns": (step.data or {}).get("columns", []) if step else [],
+                "rows": data.get("rows", []),
+                "columns": data.get("columns", []),
             },
             "data_model": step.data_model if step else {},
             "step_status": step.status if step else None,
@@ -171,6 +175,7 @@ class GetArtifactDataMCPTool(MCPTool):
             if not step and query.steps:
                 step = query.steps[-1]
 
+            data = (await step_result_store.full_data(step) if step else None) or {}
             for viz in (query.visualizations or []):
                 # If artifact has viz_ids, only include those
                 if viz_ids and str(viz.id) not in viz_ids:
@@ -180,8 +185,8 @@ class GetArtifactDataMCPTool(MCPTool):
                     "id": str(viz.id),
                     "title": viz.title or query.title or "Untitled",
                     "view": viz.view or {},
-                    "rows": (step.data or {}).get("rows", []) if step else [],
-                    "columns": (step.data or {}).get("columns", []) if step else [],
+                    "rows": data.get("rows", []),
+                    "columns": data.get("columns", []),
                     "dataModel": step.data_model or {} if step else {},
                     "stepStatus": step.status if step else None,
                 })
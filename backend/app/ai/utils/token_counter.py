@@ -1,9 +1,49 @@
+"""Token counting for budget decisions.
+
+Provider-reported usage is the billing number; everything here exists because
+budgets (transcript decay, compaction, overflow retries) must be decided
+*before* a call. The old counter was ``len(text) / 4``, which holds for
+English prose only: JSON observations run nearer 2.5 characters per token and
+Hebrew, Arabic or Cyrillic text nearer one, so a transcript of Hebrew
+conversation and JSON tool results was undercounted two- to threefold — the
+provider rejected the request and `_handle_context_overflow` had to retry —
+while plain English was compacted early.
+
+Three layers:
+
+  * `estimate_tokens` — a script-aware estimate: ASCII words at four
+    characters a token, JSON punctuation and digits heavier, non-Latin
+    alphabets near a token per character, CJK at one. Runs in C-speed
+    string passes and needs no tokenizer files, so it works air-gapped.
+  * **Calibration.** `observe_usage` feeds the provider-reported prompt
+    size of a call against the estimate of the same request; an exponential
+    moving average per (provider, model) gives `calibration_factor`, which
+    `count_tokens` and the transcript budget apply. A model whose tokenizer
+    runs 20% heavier than the estimate is budgeted 20% heavier after a few
+    calls.
+  * **Exact tokenizers.** `register_tokenizer(provider, factory)` plugs in
+    a real tokenizer for a provider (``factory(model_id)`` returns
+    ``text -> int`` or None). ``BOW_USE_TIKTOKEN=1`` registers tiktoken for
+    every provider, as before; its BPE files are fetched on first use, which
+    is why it stays opt-in. Exact counts of large texts are memoized by
+    content digest, so a static context re-counted every iteration costs a
+    hash.
+
+Callers that count the same text repeatedly should count it once and keep
+the number — transcript parts store theirs (see `app.ai.context.parts`).
+"""
+
 from __future__ import annotations
 
 import functools
+import hashlib
 import logging
+import math
 import os
-from typing import Optional
+import re
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
@@ -11,6 +51,42 @@ logger = logging.getLogger(__name__)
 _DEFAULT_ENCODING = "cl100k_base"
 _USE_TIKTOKEN = os.getenv("BOW_USE_TIKTOKEN", "0") == "1"
 
+# Estimate weights, in tokens per character.
+_WORD_RATE = 0.25
+_STRUCTURAL_RATE = 0.75
+_DIGIT_RATE = 1 / 3
+_ALPHABET_RATE = 0.75
+_WIDE_RATE = 1.0
+_STRUCTURAL = '{}[]":,'
+_DIGITS = "0123456789"
+_NON_ASCII_RE = re.compile(r"[^\x00-\x7f]")
+# CJK, kana, Hangul and astral characters (emoji): about a token each.
+_WIDE_RE = re.compile("[\u2e80-\u9fff\uac00-\ud7af\uf900-\ufaff\U00010000-\U0010ffff]")
+
+# Calibration: EMA weight of a new sample, bounds of the factor, and the
+# smallest request worth learning from (tiny prompts are all overhead).
+_EMA_ALPHA = 0.2
+_FACTOR_MIN = 0.5
+_FACTOR_MAX = 4.0
+_MIN_SAMPLE_TOKENS = 256
+
+# Exact counts are memoized for texts at least this long.
+_MEMO_MIN_CHARS = 1024
+DEFAULT_MEMO_SIZE = 512
+
+_lock = threading.Lock()
+_factors: Dict[Tuple[str, str], float] = {}
+_tokenizers: Dict[str, Callable[[Optional[str]], Optional[Callable[[str], int]]]] = {}
+_memo: "OrderedDict[Tuple, int]" = OrderedDict()
+_metrics = {"exact": 0, "memo_hits": 0, "calibration_samples": 0}
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
 
 @functools.lru_cache(maxsize=16)
 def _get_encoding(model_name: Optional[str]):
@@ -30,6 +106,13 @@ def _get_encoding(model_name: Optional[str]):
         return None
 
 
+def _tiktoken_factory(model_id: Optional[str]) -> Optional[Callable[[str], int]]:
+    enc = _get_encoding(model_id)
+    if enc is None:
+        return None
+    return lambda text: len(enc.encode(text, disallowed_special=()))
+
+
 def estimate_tokens_fast(text: str) -> int:
     """Cheap token estimate for latency-sensitive paths.
 
@@ -41,20 +124,141 @@ def estimate_tokens_fast(text: str) -> int:
     return max(1, (len(text) + 3) // 4)
 
 
-def count_tokens(text: str, model_name: Optional[str] = None) -> int:
-    """Count tokens. Defaults to a fast char/4 estimate.
-
-    Set BOW_USE_TIKTOKEN=1 to opt back into tiktoken-based counting.
-    """
+def estimate_tokens(text: str) -> int:
+    """Script-aware token estimate, uncalibrated."""
     if not text:
         return 0
-    if not _USE_TIKTOKEN:
-        return estimate_tokens_fast(text)
-    enc = _get_encoding(model_name)
-    if enc is None:
-        return estimate_tokens_fast(text)
+    n = len(text)
+    wide = alphabet = 0
+    if not text.isascii():
+        non_ascii = _NON_ASCII_RE.subn("", text)[1]
+        wide = _WIDE_RE.subn("", text)[1]
+        alphabet = non_ascii - wide
+        n -= non_ascii
+    structural = sum(text.count(c) for c in _STRUCTURAL)
+    digits = sum(text.count(c) for c in _DIGITS)
+    words = max(n - structural - digits, 0)
+    total = (
+        words * _WORD_RATE
+        + structural * _STRUCTURAL_RATE
+        + digits * _DIGIT_RATE
+        + alphabet * _ALPHABET_RATE
+        + wide * _WIDE_RATE
+    )
+    return max(1, math.ceil(total))
+
+
+# ---------------------------------------------------------------------------
+# Exact tokenizers
+# ---------------------------------------------------------------------------
+
+def register_tokenizer(
+    provider: str, factory: Optional[Callable[[Optional[str]], Optional[Callable[[str], int]]]]
+) -> None:
+    """Use `factory(model_id)` to count `provider`'s tokens exactly (None
+    unregisters). The factory may return None when it has no tokenizer for
+    a model; the calibrated estimate is used then."""
+    with _lock:
+        if factory is None:
+            _tokenizers.pop(provider, None)
+        else:
+            _tokenizers[provider] = factory
+    _tokenizer_for.cache_clear()
+
+
+@functools.lru_cache(maxsize=64)
+def _tokenizer_for(provider: Optional[str], model_id: Optional[str]) -> Optional[Callable[[str], int]]:
+    factory = _tokenizers.get(provider or "")
+    if factory is None and _USE_TIKTOKEN:
+        factory = _tiktoken_factory
+    if factory is None:
+        return None
     try:
-        return len(enc.encode(text))
+        return factory(model_id)
     except Exception as e:
-        logger.warning("tiktoken encode failed, using fast estimate: %s", e)
-        return estimate_tokens_fast(text)
+        logger.warning("tokenizer for %s/%s unavailable, using estimate: %s", provider, model_id, e)
+        return None
+
+
+def _count_exact(tokenize: Callable[[str], int], provider: Optional[str], model_id: Optional[str], text: str) -> int:
+    key = None
+    if len(text) >= _MEMO_MIN_CHARS:
+        digest = hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+        key = (provider, model_id, digest)
+        with _lock:
+            hit = _memo.get(key)
+            if hit is not None:
+                _memo.move_to_end(key)
+                _metrics["memo_hits"] += 1
+                return hit
+    n = int(tokenize(text))
+    with _lock:
+        _metrics["exact"] += 1
+        if key is not None:
+            _memo[key] = n
+            limit = max(1, _env_int("BOW_TOKEN_MEMO_SIZE", DEFAULT_MEMO_SIZE))
+            while len(_memo) > limit:
+                _memo.popitem(last=False)
+    return n
+
+
+def count_tokens(text: str, model_name: Optional[str] = None, provider: Optional[str] = None) -> int:
+    """Count tokens: exactly when `provider` has a tokenizer registered (or
+    ``BOW_USE_TIKTOKEN=1``), otherwise the estimate scaled by the model's
+    calibration factor."""
+    if not text:
+        return 0
+    tokenize = _tokenizer_for(provider, model_name)
+    if tokenize is not None:
+        try:
+            return _count_exact(tokenize, provider, model_name, text)
+        except Exception as e:
+            logger.warning("tokenizer failed, using estimate: %s", e)
+    return max(1, math.ceil(estimate_tokens(text) * calibration_factor(provider, model_name)))
+
+
+# ---------------------------------------------------------------------------
+# Calibration
+# ---------------------------------------------------------------------------
+
+def calibration_factor(provider: Optional[str], model_id: Optional[str]) -> float:
+    """Reported / estimated prompt size learned for this model (1.0 until
+    the first usable sample)."""
+    if not provider and not model_id:
+        return 1.0
+    with _lock:
+        return _factors.get((provider or "", model_id or ""), 1.0)
+
+
+def observe_usage(provider: Optional[str], model_id: Optional[str], estimated: int, reported: int) -> Optional[float]:
+    """Learn from one call: `estimated` is `estimate_tokens` of the request
+    as sent, `reported` the provider's prompt size (cached tokens included).
+    Returns the updated factor, or None if the sample was not usable."""
+    if not provider or estimated < _MIN_SAMPLE_TOKENS or reported <= 0:
+        return None
+    sample = min(max(reported / estimated, _FACTOR_MIN), _FACTOR_MAX)
+    key = (provider, model_id or "")
+    with _lock:
+        prev = _factors.get(key)
+        factor = sample if prev is None else prev + _EMA_ALPHA * (sample - prev)
+        _factors[key] = factor
+        _metrics["calibration_samples"] += 1
+    return factor
+
+
+def stats() -> dict:
+    with _lock:
+        return {
+            **_metrics,
+            "memo_entries": len(_memo),
+            "factors": {f"{p}/{m}": round(v, 3) for (p, m), v in _factors.items()},
+        }
+
+
+def reset() -> None:
+    """Forget calibration, memoized counts and counters (tests)."""
+    with _lock:
+        _factors.clear()
+        _memo.clear()
+        for k in _metrics:
+            _metrics[k] = 0
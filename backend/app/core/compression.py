@@ -0,0 +1,257 @@
+"""Negotiated compression of large non-streaming responses.
+
+Report and completion payloads are JSON measured in hundreds of kilobytes
+(every block, step preview and tool result of a conversation) and went out
+uncompressed. JSON of this shape compresses 5-15x, so on anything but a
+local network the transfer, not the server, dominated page load.
+
+`CompressionMiddleware` compresses a response when all of these hold:
+
+  * the client accepts an encoding we have: ``zstd`` (stdlib
+    ``compression.zstd`` on 3.14+, else the ``zstandard`` package), ``br``
+    (the ``brotli`` package) or ``gzip`` (always) — in that order of
+    preference among those the client lists with a non-zero q-value;
+  * the body arrives in one piece (``more_body`` false). Streaming
+    responses — SSE above all, also file downloads — pass through
+    untouched: buffering them would defeat the point of streaming;
+  * it is at least ``BOW_RESPONSE_COMPRESSION_MIN_BYTES`` (1024) long, has a
+    compressible content type and no ``Content-Encoding`` yet.
+
+Bodies above ``_THREAD_THRESHOLD`` are compressed in a worker thread so a
+multi-megabyte payload doesn't stall the event loop. Levels favour speed
+(zstd 3, brotli 4, gzip 5): on JSON they give most of the ratio of the
+maximum settings at a fraction of the CPU. ``BOW_RESPONSE_COMPRESSION=0``
+turns the middleware into a pass-through; ``BOW_RESPONSE_COMPRESSION_ENCODINGS``
+(``zstd,br,gzip``) restricts or reorders the encodings offered.
+"""
+
+import gzip
+import logging
+import os
+import threading
+from typing import Callable, Dict, List, Optional
+
+import anyio
+
+logger = logging.getLogger(__name__)
+
+try:  # Python 3.14+
+    from compression import zstd as _zstd_stdlib
+except ImportError:  # pragma: no cover - depends on the interpreter
+    _zstd_stdlib = None
+
+try:  # optional; clickhouse-connect and trino already pull it in
+    import zstandard
+except ImportError:  # pragma: no cover - depends on the install
+    zstandard = None
+
+try:  # optional, not installed by default
+    import brotli
+except ImportError:  # pragma: no cover - depends on the install
+    brotli = None
+
+DEFAULT_MIN_BYTES = 1024
+_THREAD_THRESHOLD = 256 * 1024
+
+_COMPRESSIBLE_PREFIXES = ("text/", "application/json", "application/javascript", "application/xml", "image/svg+xml")
+
+_lock = threading.Lock()
+_metrics: Dict[str, int] = {"compressed": 0, "skipped_small": 0, "bytes_in": 0, "bytes_out": 0}
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _zstd(body: bytes) -> bytes:
+    if _zstd_stdlib is not None:
+        return _zstd_stdlib.compress(body, level=3)
+    return zstandard.ZstdCompressor(level=3).compress(body)
+
+
+def _br(body: bytes) -> bytes:
+    return brotli.compress(body, quality=4)
+
+
+def _gzip(body: bytes) -> bytes:
+    return gzip.compress(body, compresslevel=5, mtime=0)
+
+
+def available_encodings() -> Dict[str, Callable[[bytes], bytes]]:
+    """Encodings this process can produce, in server preference order."""
+    codecs: Dict[str, Callable[[bytes], bytes]] = {}
+    if _zstd_stdlib is not None or zstandard is not None:
+        codecs["zstd"] = _zstd
+    if brotli is not None:
+        codecs["br"] = _br
+    codecs["gzip"] = _gzip
+    configured = os.environ.get("BOW_RESPONSE_COMPRESSION_ENCODINGS")
+    if configured:
+        order = [e.strip().lower() for e in configured.split(",") if e.strip()]
+        codecs = {e: codecs[e] for e in order if e in codecs}
+    return codecs
+
+
+def _accepted(accept_encoding: str) -> Dict[str, float]:
+    accepted: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[name] = q
+    return accepted
+
+
+def negotiate(accept_encoding: Optional[str]) -> Optional[str]:
+    """The encoding to use for a request's ``Accept-Encoding``, or None."""
+    if not accept_encoding:
+        return None
+    accepted = _accepted(accept_encoding)
+    wildcard = accepted.get("*", 0.0)
+    for name in available_encodings():
+        if accepted.get(name, wildcard) > 0:
+            return name
+    return None
+
+
+def _compressible(content_type: str) -> bool:
+    content_type = content_type.lower()
+    return content_type.startswith(_COMPRESSIBLE_PREFIXES) or "+json" in content_type
+
+
+def enabled() -> bool:
+    return os.environ.get("BOW_RESPONSE_COMPRESSION", "1").strip().lower() not in ("0", "false", "no", "off")
+
+
+class CompressionMiddleware:
+    """ASGI middleware; see the module docstring."""
+
+    def __init__(self, app, minimum_size: Optional[int] = None):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not enabled():
+            await self.app(scope, receive, send)
+            return
+        accept = None
+        for key, value in scope.get("headers") or ():
+            if key == b"accept-encoding":
+                accept = value.decode("latin-1")
+                break
+        encoding = negotiate(accept)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        minimum = self.minimum_size if self.minimum_size is not None else max(
+            0, _env_int("BOW_RESPONSE_COMPRESSION_MIN_BYTES", DEFAULT_MIN_BYTES)
+        )
+        responder = _CompressingSend(send, encoding, minimum)
+        await self.app(scope, receive, responder)
+
+
+class _CompressingSend:
+    def __init__(self, send, encoding: str, minimum: int):
+        self.send = send
+        self.encoding = encoding
+        self.minimum = minimum
+        self.start: Optional[dict] = None
+        self.passthrough = False
+
+    async def __call__(self, message) -> None:
+        if self.passthrough:
+            await self.send(message)
+            return
+        if message["type"] == "http.response.start":
+            self.start = message
+            return
+        self.passthrough = True
+        start, self.start = self.start, None
+        if message["type"] != "http.response.body" or start is None:
+            # e.g. http.response.pathsend: not ours to touch.
+            if start is not None:
+                await self.send(start)
+            await self.send(message)
+            return
+        body = message.get("body", b"")
+        if message.get("more_body", False) or not self._eligible(start, body):
+            await self.send(start)
+            await self.send(message)
+            return
+        codec = available_encodings()[self.encoding]
+        if len(body) > _THREAD_THRESHOLD:
+            compressed = await anyio.to_thread.run_sync(codec, body)
+        else:
+            compressed = codec(body)
+        _count("compressed")
+        _count("bytes_in", len(body))
+        _count("bytes_out", len(compressed))
+        headers = _with_encoding_headers(start.get("headers") or [], self.encoding, len(compressed))
+        await self.send({**start, "headers": headers})
+        await self.send({"type": "http.response.body", "body": compressed, "more_body": False})
+
+    def _eligible(self, start: dict, body: bytes) -> bool:
+        if start.get("status") == 206:
+            return False
+        content_type = ""
+        for key, value in start.get("headers") or ():
+            key = key.lower()
+            if key in (b"content-encoding", b"content-range"):
+                return False
+            if key == b"content-type":
+                content_type = value.decode("latin-1")
+        if not _compressible(content_type) or content_type.startswith("text/event-stream"):
+            return False
+        if len(body) < self.minimum:
+            _count("skipped_small")
+            return False
+        return True
+
+
+def _with_encoding_headers(headers: List, encoding: str, length: int) -> List:
+    out = []
+    vary = None
+    for key, value in headers:
+        lower = key.lower()
+        if lower == b"content-length":
+            continue
+        if lower == b"vary":
+            vary = value
+            continue
+        out.append((key, value))
+    out.append((b"content-encoding", encoding.encode("latin-1")))
+    out.append((b"content-length", str(length).encode("latin-1")))
+    if vary is None:
+        vary = b"Accept-Encoding"
+    elif b"accept-encoding" not in vary.lower():
+        vary = vary + b", Accept-Encoding"
+    out.append((b"vary", vary))
+    return out
+
+
+def _count(name: str, n: int = 1) -> None:
+    with _lock:
+        _metrics[name] += n
+
+
+def stats() -> dict:
+    with _lock:
+        return {**_metrics, "encodings": list(available_encodings())}
+
+
+def reset() -> None:
+    with _lock:
+        for k in _metrics:
+            _metrics[k] = 0
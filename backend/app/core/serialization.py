@@ -0,0 +1,149 @@
+"""Fast JSON encoding for the hot response paths.
+
+Two paths dominated serialization time:
+
+  * **SSE events.** `format_sse_event` ran pydantic's ``model_dump_json()``
+    once per event *per subscriber*, and the completion event log and the
+    cross-worker relay serialized the same event again. A token-streaming
+    run emits thousands of events a minute, each fanned out to every open
+    tab. `encode_sse_event` now serializes an event once; `sse_schema`
+    caches the result on the event, so the log, the relay and every
+    subscriber share it.
+  * **Large payload responses** without a ``response_model`` (the
+    ``completion_v2`` listing) went through FastAPI's ``jsonable_encoder``,
+    a recursive pure-Python walk over every block, step and tool result.
+    `FastJSONResponse` renders them directly.
+
+The encoder is the fastest library installed: ``orjson``, then ``msgspec``,
+then ``pydantic_core`` (always present — it is what pydantic itself uses).
+``BOW_JSON_BACKEND`` pins one (``orjson`` / ``msgspec`` / ``pydantic``).
+Output matches ``model_dump_json()``: compact separators, UTF-8 left
+unescaped, ISO datetimes, NaN as null, and nested models (by field name),
+dataclasses, Decimals and sets through pydantic's own conversion. A value
+the fast library refuses (an int past 64 bits, an exotic type) falls back
+to pydantic for that one call and is counted, so enabling a backend can
+never make a payload unserializable.
+"""
+
+import logging
+import os
+import threading
+from typing import Any, Callable, Optional
+
+import pydantic_core
+from pydantic import BaseModel
+from starlette.responses import JSONResponse
+
+logger = logging.getLogger(__name__)
+
+try:  # optional; trino already pulls it in
+    import orjson
+except ImportError:  # pragma: no cover - depends on the install
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # pragma: no cover - depends on the install
+    msgspec = None
+
+_lock = threading.Lock()
+_metrics = {"events": 0, "responses": 0, "fallbacks": 0}
+
+
+def _to_jsonable(value: Any) -> Any:
+    """Fallback hook for values the fast libraries don't know natively."""
+    return pydantic_core.to_jsonable_python(value, by_alias=False, inf_nan_mode="null")
+
+
+def _pydantic_dumps(obj: Any) -> bytes:
+    return pydantic_core.to_json(obj, by_alias=False, inf_nan_mode="null")
+
+
+def _orjson_dumps(obj: Any) -> bytes:
+    return orjson.dumps(obj, default=_to_jsonable, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z)
+
+
+_msgspec_encoder = msgspec.json.Encoder(enc_hook=_to_jsonable) if msgspec is not None else None
+
+
+def _msgspec_dumps(obj: Any) -> bytes:
+    return _msgspec_encoder.encode(obj)
+
+
+_BACKENDS = {"orjson": orjson is not None, "msgspec": msgspec is not None, "pydantic": True}
+
+
+def backend() -> str:
+    """The encoder in use: ``BOW_JSON_BACKEND`` if installed, else the fastest."""
+    wanted = os.environ.get("BOW_JSON_BACKEND", "").strip().lower()
+    if _BACKENDS.get(wanted):
+        return wanted
+    return next(name for name, available in _BACKENDS.items() if available)
+
+
+def _encoder(name: str) -> Callable[[Any], bytes]:
+    return {"orjson": _orjson_dumps, "msgspec": _msgspec_dumps}.get(name, _pydantic_dumps)
+
+
+def dumps(obj: Any, *, backend_name: Optional[str] = None) -> bytes:
+    """Encode `obj` as compact JSON bytes."""
+    name = backend_name or backend()
+    if name != "pydantic":
+        try:
+            return _encoder(name)(obj)
+        except (TypeError, ValueError, OverflowError) as e:
+            _count("fallbacks")
+            logger.debug(f"[serialization] {name} refused a value, using pydantic: {e}")
+    return _pydantic_dumps(obj)
+
+
+def encode_sse_event(event: BaseModel, *, backend_name: Optional[str] = None) -> str:
+    """JSON of an `SSEEvent`, identical to its ``model_dump_json()``."""
+    _count("events")
+    name = backend_name or backend()
+    if name == "pydantic":
+        return event.model_dump_json()
+    # The flat field walk pydantic would do, minus its per-field machinery;
+    # the payload under `data` is arbitrary and goes to the fast encoder.
+    doc = {field: getattr(event, field) for field in type(event).model_fields}
+    if event.__pydantic_extra__:
+        doc.update(event.__pydantic_extra__)
+    try:
+        return _encoder(name)(doc).decode("utf-8")
+    except (TypeError, ValueError, OverflowError) as e:
+        _count("fallbacks")
+        logger.debug(f"[serialization] {name} refused event {getattr(event, 'event', '?')}: {e}")
+        return event.model_dump_json()
+
+
+class FastJSONResponse(JSONResponse):
+    """`JSONResponse` that renders pydantic models and plain data in one
+    pass of pydantic's serializer instead of ``jsonable_encoder`` +
+    ``json.dumps``.
+
+    Return one from a route that would otherwise hand FastAPI a large model
+    without a ``response_model``. Content is dumped by alias, like
+    ``jsonable_encoder`` does, and field serializers still run.
+    """
+
+    def render(self, content: Any) -> bytes:
+        _count("responses")
+        if isinstance(content, BaseModel):
+            return content.model_dump_json(by_alias=True).encode("utf-8")
+        return pydantic_core.to_json(content, by_alias=True, inf_nan_mode="null")
+
+
+def _count(name: str, n: int = 1) -> None:
+    with _lock:
+        _metrics[name] += n
+
+
+def stats() -> dict:
+    with _lock:
+        return {**_metrics, "backend": backend()}
+
+
+def reset() -> None:
+    with _lock:
+        for k in _metrics:
+            _metrics[k] = 0
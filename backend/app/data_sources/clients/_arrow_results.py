@@ -0,0 +1,247 @@
+"""Streamed, Arrow-built query results for SQLAlchemy-backed clients.
+
+`pd.read_sql(text(sql), conn)` fetches the whole result as Python tuples, then
+builds the frame column by column through object arrays and type inference.
+For a million-row answer that is a million tuples, several million boxed
+values, and a peak RSS of two or three times the finished frame, all on the
+code-execution thread. The FAST extractor already streams sources in batches
+into Arrow (`fast/sources.py`); this is the same batching for the agent's
+query path.
+
+`read_frame` runs the statement on a server-side cursor, turns each batch of
+rows into a `pyarrow` table, and builds one DataFrame from the concatenated
+batches at the end:
+
+  * **Ceilings while streaming.** Rows and Arrow bytes are counted per batch;
+    past `BOW_QUERY_MAX_ROWS` / `BOW_QUERY_MAX_RESULT_BYTES` the source is
+    asked to cancel and `ResultTooLargeError` tells the agent to aggregate or
+    limit. Before, the only ceiling was the worker running out of memory.
+  * **Native Arrow when the driver has it.** A client may override
+    `DataSourceClient.native_arrow_batches` to hand back Arrow directly —
+    Snowflake's `fetch_arrow_batches` decodes its Arrow result chunks without
+    ever creating a Python row.
+  * **Same frame as before.** Callers and generated code were written against
+    `read_sql`'s output, so the conversion reproduces it: duplicate column
+    names survive, decimals become float64 (`coerce_float`), zoned timestamps
+    are converted to UTC, and nanosecond datetime dtypes are kept. A batch
+    whose values Arrow cannot type faithfully — mixed types in one column,
+    JSON objects, arrays — is built with `DataFrame.from_records` exactly as
+    `read_sql` would have, so such columns come back as Python objects.
+
+Frames are numpy-backed by default. `BOW_ARROW_RESULT_DTYPES=1` returns
+`pd.ArrowDtype` columns instead, which saves the string conversion for large
+text results but changes null handling (`pd.NA`) for any code that inspects
+values directly — hence opt-in.
+"""
+
+import logging
+import os
+import threading
+from typing import Iterator, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_ROWS = 50_000
+DEFAULT_MAX_ROWS = 10_000_000
+DEFAULT_MAX_BYTES = 2 * 1024 * 1024 * 1024
+
+
+class ResultTooLargeError(Exception):
+    """Raised when a query result passes the row or byte ceiling mid-stream.
+
+    Surfaces to the agent like any other query error; the message says what to
+    do about it, because retrying the same statement cannot succeed.
+    """
+
+    def __init__(self, rows: int, nbytes: int, max_rows: int, max_bytes: int):
+        super().__init__(
+            f"Query result is too large: over {rows:,} rows / {nbytes / 1e6:,.0f} MB "
+            f"fetched when the limit is {max_rows:,} rows / {max_bytes / 1e6:,.0f} MB. "
+            f"Aggregate in SQL (GROUP BY), select fewer columns, or add a LIMIT."
+        )
+        self.rows = rows
+        self.nbytes = nbytes
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(float(os.environ.get(name, default)))
+    except (TypeError, ValueError):
+        return int(default)
+
+
+def batch_rows() -> int:
+    return max(1, _env_int("BOW_QUERY_BATCH_ROWS", DEFAULT_BATCH_ROWS))
+
+
+def max_rows() -> int:
+    return _env_int("BOW_QUERY_MAX_ROWS", DEFAULT_MAX_ROWS)
+
+
+def max_bytes() -> int:
+    return _env_int("BOW_QUERY_MAX_RESULT_BYTES", DEFAULT_MAX_BYTES)
+
+
+def arrow_dtypes() -> bool:
+    return os.environ.get("BOW_ARROW_RESULT_DTYPES", "").strip().lower() in ("1", "true", "yes")
+
+
+# -- batches ----------------------------------------------------------------
+
+def _flat(tbl) -> bool:
+    """True when every column is a scalar Arrow type.
+
+    Nested types are where Arrow and `read_sql` disagree: a list column comes
+    back as numpy arrays instead of lists, and a JSON column becomes a struct
+    whose keys are unioned across rows.
+    """
+    import pyarrow as pa
+
+    return not any(pa.types.is_nested(f.type) for f in tbl.schema)
+
+
+def _rows_to_arrow(rows: List[tuple], names: List[str]):
+    """An Arrow table for a batch of rows, or None if it cannot be faithful."""
+    import pyarrow as pa
+
+    try:
+        arrays = [pa.array([r[i] for r in rows]) for i in range(len(names))]
+        tbl = pa.Table.from_arrays(arrays, names=names)
+    except Exception:
+        return None
+    return tbl if _flat(tbl) else None
+
+
+def _sqlalchemy_batches(conn, sql: str, size: int) -> Tuple[List[str], Iterator[list]]:
+    from sqlalchemy import text
+
+    result = conn.execution_options(stream_results=True, yield_per=size).execute(text(sql))
+    names = list(result.keys())
+
+    def _iter():
+        try:
+            while True:
+                rows = result.fetchmany(size)
+                if not rows:
+                    return
+                yield rows
+        finally:
+            result.close()
+
+    return names, _iter()
+
+
+# -- assembly ---------------------------------------------------------------
+
+def _to_pandas(tbl):
+    import pandas as pd
+    import pyarrow as pa
+
+    # read_sql's coerce_float: exact decimals become float64.
+    for i, field in enumerate(tbl.schema):
+        if pa.types.is_decimal(field.type):
+            try:
+                tbl = tbl.set_column(i, pa.field(field.name, pa.float64()),
+                                     tbl.column(i).cast(pa.float64(), safe=False))
+            except Exception:
+                pass
+    if arrow_dtypes():
+        return tbl.to_pandas(types_mapper=pd.ArrowDtype, self_destruct=True)
+    return tbl.to_pandas(coerce_temporal_nanoseconds=True, split_blocks=True,
+                         self_destruct=True)
+
+
+def _finish(parts: list, names: List[str]):
+    """One DataFrame from Arrow tables and/or fallback frames, in order."""
+    import pandas as pd
+    import pyarrow as pa
+
+    if not parts:
+        return pd.DataFrame(columns=names)
+    if all(isinstance(p, pa.Table) for p in parts):
+        try:
+            df = _to_pandas(pa.concat_tables(parts, promote_options="permissive"))
+        except Exception:
+            df = pd.concat([_to_pandas(p) for p in parts], ignore_index=True)
+    else:
+        frames = [_to_pandas(p) if isinstance(p, pa.Table) else p for p in parts]
+        df = frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+    # read_sql converts zoned timestamps to UTC.
+    for i in range(df.shape[1]):
+        col = df.iloc[:, i]
+        if isinstance(col.dtype, pd.DatetimeTZDtype) and str(col.dtype.tz) != "UTC":
+            df.isetitem(i, col.dt.tz_convert("UTC"))
+    return df
+
+
+def _abandon(client, conn) -> None:
+    """Stop the statement on the source; the rest is not worth reading."""
+    from app.data_sources import query_cancellation
+
+    try:
+        outcome = query_cancellation.cancel_thread(client, threading.get_ident())
+        logger.debug("Oversized result cancelled: %s", outcome)
+    except Exception:
+        logger.debug("Oversized result cancellation failed", exc_info=True)
+    try:
+        conn.invalidate()
+    except Exception:
+        pass
+
+
+def read_frame(client, conn, sql: str):
+    """Run `sql` on `conn` and return the result as a DataFrame.
+
+    `client` is asked for native Arrow batches first, and is who the source is
+    asked to cancel on when a ceiling is hit.
+    """
+    import pandas as pd
+    import pyarrow as pa
+
+    size = batch_rows()
+    row_cap, byte_cap = max_rows(), max_bytes()
+    native = None
+    hook = getattr(client, "native_arrow_batches", None)
+    if hook is not None:
+        native = hook(conn, sql)
+    if native is not None:
+        names, batches = native
+    else:
+        names, batches = _sqlalchemy_batches(conn, sql, size)
+
+    parts: list = []
+    rows = nbytes = 0
+    fallback_batches = 0
+    try:
+        for batch in batches:
+            if isinstance(batch, pa.Table):
+                # Native batches are typed by the driver itself; take them as-is.
+                part = batch
+            else:
+                part = _rows_to_arrow(batch, names)
+                if part is None:
+                    part = pd.DataFrame.from_records(batch, columns=names, coerce_float=True)
+                    fallback_batches += 1
+            if isinstance(part, pa.Table):
+                rows += part.num_rows
+                nbytes += part.nbytes
+            else:
+                rows += len(part)
+                nbytes += int(part.memory_usage(deep=True).sum())
+            parts.append(part)
+            if (row_cap > 0 and rows > row_cap) or (byte_cap > 0 and nbytes > byte_cap):
+                _abandon(client, conn)
+                raise ResultTooLargeError(rows, nbytes, row_cap, byte_cap)
+    finally:
+        close = getattr(batches, "close", None)
+        if close is not None:
+            try:
+                close()
+            except Exception:
+                pass
+    if fallback_batches:
+        logger.debug(
+            "query.arrow_fallback",
+            extra={"batches": fallback_batches, "parts": len(parts)},
+        )
+    return _finish(parts, names)
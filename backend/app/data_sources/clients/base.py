@@ -141,6 +141,25 @@ class DataSourceClient(ABC):
     def execute_query(self, **kwargs):
         pass
 
+    def read_sql_frame(self, conn, sql: str):
+        """Run `sql` on a SQLAlchemy `conn` and return the result as a DataFrame.
+
+        The shared execution path for SQLAlchemy-backed clients, in place of
+        `pd.read_sql(text(sql), conn)`: streams a server-side cursor into Arrow
+        batches under row/byte ceilings (see `_arrow_results`).
+        """
+        from app.data_sources.clients._arrow_results import read_frame
+
+        return read_frame(self, conn, sql)
+
+    def native_arrow_batches(self, conn, sql: str):
+        """(column names, iterator of pyarrow Tables) from the driver, or None.
+
+        Override where the driver can produce Arrow itself; None (the default)
+        means `read_sql_frame` fetches rows through the SQLAlchemy cursor.
+        """
+        return None
+
     def query(self, *args, **kwargs):
         """Alias for execute_query.
 
@@ -172,7 +172,7 @@ class MSSQLClient(DataSourceClient):
         """Execute SQL statement and return the result as a DataFrame."""
         try:
             with self.connect() as conn:
-                df = pd.read_sql(text(sql), conn)
+                df = self.read_sql_frame(conn, sql)
             return df
         except Exception as e:
             print(f"Error executing SQL: {e}")
@@ -161,13 +161,61 @@ class SnowflakeClient(DataSourceClient):
         """Run SQL statement."""
         try:
             with self.connect() as conn:
-                # Wrap SQL query with text() to handle complex SQL
-                df = pd.read_sql(text(sql), conn)
+                df = self.read_sql_frame(conn, sql)
             return df
         except Exception as e:
             print(f"Error executing SQL: {e}")
             raise
 
+    def native_arrow_batches(self, conn, sql: str):
+        """Snowflake returns results as Arrow chunks; hand them over undecoded.
+
+        Going through the SQLAlchemy cursor turns every chunk into Python rows
+        that `read_sql_frame` then turns back into Arrow. Results the server
+        sends as JSON (SHOW/DESCRIBE) cannot be fetched as Arrow, so those
+        fall back to the cursor's own rows on the same execution. Column names
+        are normalized the way the dialect normalizes them for read_sql.
+        """
+        try:
+            cursor = conn.connection.dbapi_connection.cursor()
+        except Exception:
+            return None
+        if not hasattr(cursor, "fetch_arrow_batches"):
+            cursor.close()
+            return None
+        try:
+            cursor.execute(sql)
+        except Exception:
+            cursor.close()
+            raise
+        # The raw cursor reports Snowflake's UPPERCASE identifiers; the
+        # SQLAlchemy result read_sql went through lowercased them via the
+        # dialect, and existing step code indexes frames by those names.
+        dialect = conn.dialect
+        names = [d[0] for d in (cursor.description or [])]
+        if getattr(dialect, "requires_name_normalize", False):
+            names = [dialect.normalize_name(n) or n for n in names]
+
+        def _batches():
+            try:
+                try:
+                    chunks = cursor.fetch_arrow_batches()
+                except Exception:
+                    chunks = None
+                if chunks is not None:
+                    for chunk in chunks:
+                        yield chunk.rename_columns(names)
+                    return
+                while True:
+                    rows = cursor.fetchmany(50_000)
+                    if not rows:
+                        return
+                    yield [tuple(r) for r in rows]
+            finally:
+                cursor.close()
+
+        return names, _batches()
+
     def get_tables(self) -> List[Table]:
         """Get tables with graceful fallback if enriched query fails, plus semantic views."""
         try:
@@ -68,7 +68,7 @@ class TrinoClient(DataSourceClient):
     def execute_query(self, sql: str) -> pd.DataFrame:
         try:
             with self.connect() as conn:
-                return pd.read_sql(text(sql), conn)
+                return self.read_sql_frame(conn, sql)
         except Exception as e:
             logger.error(f"Error executing SQL query: {e}")
             raise RuntimeError(f"{e}")
@@ -92,6 +92,16 @@ class Estimate:
     source_max_rows_note: str = ""
 
 
+class IncrementalUnavailable(Exception):
+    """Raised when a delta cannot be applied and a full rebuild is needed.
+
+    Not a failure of the refresh: the caller falls back to `extract_to_artifact`
+    in the same run. Raised for a previous artifact that cannot be read, a
+    watermark column the result no longer has, or a delta whose columns no
+    longer line up with the relation's.
+    """
+
+
 @dataclass
 class ExtractResult:
     row_count: int = 0
@@ -100,6 +110,13 @@ class ExtractResult:
     artifact_key: str = ""
     artifact_bytes: int = 0
     elapsed_ms: int = 0
+    # 'full' or 'incremental', and for the latter how many rows the delta
+    # carried (row_count is always the relation's total afterwards).
+    mode: str = "full"
+    delta_rows: int = 0
+    # The new high-water mark when a watermark column was named, as stored by
+    # `encode_watermark`. None when the relation is empty or has no watermark.
+    watermark: Optional[dict] = None
 
 
 def _source(client):
@@ -215,12 +232,17 @@ def extract_to_artifact(
     max_rows: int = DEFAULT_MAX_ROWS,
     max_bytes: int = DEFAULT_MAX_BYTES,
     max_seconds: int = DEFAULT_MAX_SECONDS,
+    watermark_column: Optional[str] = None,
 ) -> ExtractResult:
     """Stream `sql` into a fresh encrypted DuckDB artifact.
 
     Writes to a `.tmp` sibling and atomically renames on success, so a crashed
     or aborted refresh can never leave a half-written artifact in place. The
     caller keeps serving the previous artifact until the swap lands.
+
+    `watermark_column` names the column an incremental relation advances on;
+    its maximum is read back from the finished artifact so the next refresh
+    can start from there.
     """
     started = time.monotonic()
     src = _source(client)
@@ -248,43 +270,10 @@ def extract_to_artifact(
             # Arrow batches from the source, appended straight into DuckDB.
             # Peak memory is O(batch), independent of result size, and a
             # source whose API is already Arrow (BigQuery) pays no conversion.
-            first = True
-            batches = src.stream_batches(sql, BATCH_ROWS)
-            try:
-                for tbl in batches:
-                    _elapsed_guard()
-                    row_count += tbl.num_rows
-                    if row_count > max_rows:
-                        raise ExtractionAborted(
-                            f"Query returned more than the {max_rows:,}-row limit "
-                            f"for a custom query and was aborted."
-                        )
-                    con.register("bow_batch", tbl)
-                    if first:
-                        con.execute(
-                            f'CREATE TABLE "{safe_rel}" AS SELECT * FROM bow_batch'
-                        )
-                        columns = [
-                            {"name": f.name, "dtype": _arrow_type_name(f.type)}
-                            for f in tbl.schema
-                        ]
-                        first = False
-                    elif tbl.num_rows:
-                        con.execute(
-                            f'INSERT INTO "{safe_rel}" SELECT * FROM bow_batch'
-                        )
-                    con.unregister("bow_batch")
-
-                    if artifacts.artifact_size(str(tmp_path)) > max_bytes:
-                        raise ExtractionAborted(
-                            f"Artifact exceeded the "
-                            f"{max_bytes / (1024**3):.1f} GB limit and was aborted."
-                        )
-            finally:
-                # Closing the generator runs its cleanup — for BigQuery that
-                # cancels the still-running (still-billing) job. Without this,
-                # aborting on a cap would leave the source working for nobody.
-                batches.close()
+            row_count, columns = _stream_into(
+                con, src, sql, f'"{safe_rel}"', tmp_path,
+                max_rows=max_rows, max_bytes=max_bytes, guard=_elapsed_guard,
+            )
         else:
             # --- fallback for clients we cannot stream ----------------------
             # Bounded by an injected row limit so a non-streaming client still
@@ -302,6 +291,10 @@ def extract_to_artifact(
                 for f in tbl.schema
             ]
 
+        mark = (
+            _high_water_mark(con, safe_rel, watermark_column, required=False)
+            if watermark_column else None
+        )
         con.close()
         con = None
         tmp_path.replace(final_path)
@@ -313,6 +306,282 @@ def extract_to_artifact(
             artifact_key=key,
             artifact_bytes=artifacts.artifact_size(str(final_path)),
             elapsed_ms=int((time.monotonic() - started) * 1000),
+            watermark=mark,
+        )
+    except BaseException:
+        if con is not None:
+            try:
+                con.close()
+            except Exception:
+                pass
+        artifacts.delete_artifact(str(tmp_path))
+        raise
+
+
+def _stream_into(con, src, sql: str, target: str, tmp_path, *, max_rows: int,
+                 max_bytes: int, guard, temporary: bool = False) -> tuple[int, list]:
+    """Append every batch of `sql` into `target`, creating it from the first.
+
+    Returns (rows, columns). Enforces the row, byte and wall-clock caps as it
+    goes; `target` is already-quoted SQL so a temp staging table and the
+    relation itself go through the same loop. `temporary` creates `target` as
+    a TEMP table (DuckDB rejects `CREATE TABLE temp.x`; the name then
+    resolves to the temp catalog first).
+    """
+    row_count = 0
+    columns: list = []
+    first = True
+    batches = src.stream_batches(sql, BATCH_ROWS)
+    try:
+        for tbl in batches:
+            guard()
+            row_count += tbl.num_rows
+            if row_count > max_rows:
+                raise ExtractionAborted(
+                    f"Query returned more than the {max_rows:,}-row limit "
+                    f"for a custom query and was aborted."
+                )
+            con.register("bow_batch", tbl)
+            if first:
+                kind = "TEMP TABLE" if temporary else "TABLE"
+                con.execute(f"CREATE {kind} {target} AS SELECT * FROM bow_batch")
+                columns = [
+                    {"name": f.name, "dtype": _arrow_type_name(f.type)}
+                    for f in tbl.schema
+                ]
+                first = False
+            elif tbl.num_rows:
+                con.execute(f"INSERT INTO {target} SELECT * FROM bow_batch")
+            con.unregister("bow_batch")
+
+            if artifacts.artifact_size(str(tmp_path)) > max_bytes:
+                raise ExtractionAborted(
+                    f"Artifact exceeded the "
+                    f"{max_bytes / (1024**3):.1f} GB limit and was aborted."
+                )
+    finally:
+        # Closing the generator runs its cleanup — for BigQuery that
+        # cancels the still-running (still-billing) job. Without this,
+        # aborting on a cap would leave the source working for nobody.
+        batches.close()
+    return row_count, columns
+
+
+# --------------------------------------------------------------------------
+# Incremental refresh
+# --------------------------------------------------------------------------
+
+def encode_watermark(value) -> Optional[dict]:
+    """A high-water mark as JSON the next refresh can render back into SQL.
+
+    The type travels with the value because the literal differs by type and by
+    dialect (`sql_dialect.watermark_literal`). A zoned timestamp is normalised
+    to UTC so the stored mark means the same instant whatever zone the
+    extraction ran in.
+    """
+    import datetime as _dt
+    import decimal
+
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return {"type": "number", "value": str(int(value))}
+    if isinstance(value, (int, float, decimal.Decimal)):
+        return {"type": "number", "value": str(value)}
+    if isinstance(value, _dt.datetime):
+        if value.tzinfo is not None:
+            utc = value.astimezone(_dt.timezone.utc)
+            return {"type": "timestamptz", "value": utc.isoformat(sep=" ")}
+        return {"type": "timestamp", "value": value.isoformat(sep=" ")}
+    if isinstance(value, _dt.date):
+        return {"type": "date", "value": value.isoformat()}
+    return {"type": "string", "value": str(value)}
+
+
+def delta_query(client, sql: str, watermark_column: str, watermark: dict) -> str:
+    """`sql` restricted to rows past `watermark`, in `client`'s dialect.
+
+    Exposed so the caller can `estimate` the delta — the budget checks apply to
+    what one refresh actually pulls, not to the relation it accumulates into.
+    """
+    try:
+        return sql_dialect.delta_sql(
+            sql, watermark_column, watermark, sql_dialect.dialect_of(client)
+        )
+    except (ValueError, TypeError) as e:
+        raise IncrementalUnavailable(f"cannot express the watermark predicate: {e}") from e
+
+
+def _high_water_mark(con, safe_rel: str, column: str,
+                     required: bool = True) -> Optional[dict]:
+    """MAX(`column`) of the relation, encoded; matched case-insensitively.
+
+    Sources disagree on the case of an unquoted column (Snowflake and Oracle
+    upper-case it), and the admin typed whichever they had in mind.
+    """
+    names = {
+        r[0].lower(): r[0]
+        for r in con.execute(f'DESCRIBE "{safe_rel}"').fetchall()
+    }
+    actual = names.get((column or "").lower())
+    if actual is None:
+        if not required:
+            logger.warning(
+                "extraction.watermark_missing",
+                extra={"relation": safe_rel, "column": column},
+            )
+            return None
+        raise IncrementalUnavailable(
+            f"Watermark column '{column}' is not in the query's result."
+        )
+    safe_col = actual.replace('"', '""')
+    row = con.execute(f'SELECT MAX("{safe_col}") FROM "{safe_rel}"').fetchone()
+    return encode_watermark(row[0] if row else None)
+
+
+def extract_incremental(
+    client,
+    sql: str,
+    relation_name: str,
+    connection_id: str,
+    *,
+    previous_path: str,
+    previous_key: str,
+    watermark_column: str,
+    watermark: dict,
+    merge_key: Optional[str] = None,
+    max_rows: int = DEFAULT_MAX_ROWS,
+    max_bytes: int = DEFAULT_MAX_BYTES,
+    max_seconds: int = DEFAULT_MAX_SECONDS,
+) -> ExtractResult:
+    """Apply only the rows past `watermark` to a copy of the previous artifact.
+
+    The source runs `sql` wrapped in a watermark predicate
+    (`sql_dialect.delta_sql`), so a refresh reads what changed rather than the
+    whole relation. The previous artifact is copied into a fresh one under a
+    new key — never modified in place, since it is serving while this runs —
+    and the delta is then either appended, or, with `merge_key`, replaces the
+    rows sharing a key (the latest version per key winning inside the delta).
+
+    The row cap applies to the delta, not the total: bounding what one refresh
+    pulls from the source is its job, and an incremental relation is expected
+    to outgrow a single full extraction. The byte cap still applies to the
+    finished artifact. Deletes at the source are invisible to a delta; the
+    caller schedules periodic full rebuilds to pick them up.
+
+    Same `.tmp`-and-rename discipline as `extract_to_artifact`. Anything that
+    makes the delta inapplicable raises `IncrementalUnavailable`.
+    """
+    started = time.monotonic()
+    src = _source(client)
+    if src is None:
+        raise IncrementalUnavailable("this connection cannot stream a delta")
+    delta = delta_query(client, sql, watermark_column, watermark)
+
+    key = artifacts.new_artifact_key()
+    final_path = artifacts.new_artifact_path(connection_id)
+    tmp_path = final_path.with_suffix(".tmp")
+    safe_rel = relation_name.replace('"', '""')
+    con = None
+
+    def _elapsed_guard():
+        if time.monotonic() - started > max_seconds:
+            raise ExtractionAborted(
+                f"Refresh exceeded the {max_seconds}s limit and was aborted; "
+                f"the previous data is still being served."
+            )
+
+    try:
+        con = artifacts.connect_encrypted(tmp_path, key)
+        try:
+            con.execute(
+                f"ATTACH '{previous_path}' AS bow_prev "
+                f"(ENCRYPTION_KEY '{previous_key}', READ_ONLY)"
+            )
+            con.execute(
+                f'CREATE TABLE "{safe_rel}" AS SELECT * FROM bow_prev."{safe_rel}"'
+            )
+            con.execute("DETACH bow_prev")
+        except Exception as e:
+            raise IncrementalUnavailable(f"previous artifact unreadable: {e}") from e
+        # The delta predicate wraps the query, so a watermark column the query
+        # does not return would fail at the source; say why before asking it.
+        _high_water_mark(con, safe_rel, watermark_column)
+
+        # That only sees the previous relation. A query edited since then to
+        # drop the column fails on the predicate; a full rebuild — which
+        # reports a genuinely broken source itself — is the way forward.
+        try:
+            delta_rows, delta_cols = _stream_into(
+                con, src, delta, "bow_delta", tmp_path,
+                max_rows=max_rows, max_bytes=max_bytes, guard=_elapsed_guard,
+                temporary=True,
+            )
+        except ExtractionAborted:
+            raise
+        except Exception as e:
+            raise IncrementalUnavailable(f"the delta query failed: {e}") from e
+        existing = [r[0] for r in con.execute(f'DESCRIBE "{safe_rel}"').fetchall()]
+        if [c["name"] for c in delta_cols] != existing:
+            raise IncrementalUnavailable(
+                "the query's columns changed since the last full refresh"
+            )
+
+        if delta_rows:
+            if merge_key:
+                by_key = {c.lower(): c for c in existing}
+                k = by_key.get(merge_key.lower())
+                w = by_key.get(watermark_column.lower())
+                if k is None:
+                    raise IncrementalUnavailable(
+                        f"Merge key '{merge_key}' is not in the query's result."
+                    )
+                k = k.replace('"', '""')
+                w = (w or k).replace('"', '""')
+                con.execute(
+                    f'DELETE FROM "{safe_rel}" WHERE "{k}" IN '
+                    f'(SELECT "{k}" FROM temp.bow_delta)'
+                )
+                con.execute(
+                    f'INSERT INTO "{safe_rel}" SELECT * EXCLUDE (bow_rn) FROM ('
+                    f'SELECT *, row_number() OVER (PARTITION BY "{k}" '
+                    f'ORDER BY "{w}" DESC) AS bow_rn FROM temp.bow_delta'
+                    f') WHERE bow_rn = 1'
+                )
+            else:
+                con.execute(f'INSERT INTO "{safe_rel}" SELECT * FROM temp.bow_delta')
+        con.execute("DROP TABLE temp.bow_delta")
+
+        row_count = con.execute(f'SELECT COUNT(*) FROM "{safe_rel}"').fetchone()[0]
+        mark = _high_water_mark(con, safe_rel, watermark_column) or watermark
+        # Typed from the merged relation: the delta alone may be empty or
+        # all-NULL in a column, which Arrow types as `null`.
+        columns = [
+            {"name": f.name, "dtype": _arrow_type_name(f.type)}
+            for f in con.execute(
+                f'SELECT * FROM "{safe_rel}" LIMIT 0'
+            ).to_arrow_reader().schema
+        ]
+        con.close()
+        con = None
+
+        if artifacts.artifact_size(str(tmp_path)) > max_bytes:
+            raise ExtractionAborted(
+                f"Artifact exceeded the "
+                f"{max_bytes / (1024**3):.1f} GB limit and was aborted."
+            )
+        tmp_path.replace(final_path)
+
+        return ExtractResult(
+            row_count=int(row_count),
+            columns=columns,
+            artifact_path=str(final_path),
+            artifact_key=key,
+            artifact_bytes=artifacts.artifact_size(str(final_path)),
+            elapsed_ms=int((time.monotonic() - started) * 1000),
+            mode="incremental",
+            delta_rows=delta_rows,
+            watermark=mark,
         )
     except BaseException:
         if con is not None:
@@ -3,7 +3,9 @@
 Built per request from the custom queries a given agent has **activated**. Each
 call to `connect()` creates a throwaway in-memory DuckDB, attaches the relevant
 encrypted artifacts read-only, registers one view per relation, and then locks
-the session down before any agent-generated SQL runs.
+the session down before any agent-generated SQL runs. `execute_query` reuses
+finished sessions through `session_pool` for read-only SQL, so a burst of
+queries against the same catalog pays that setup once.
 
 The lockdown matters. With pandas denied filesystem access by the encrypted
 artifacts, DuckDB SQL becomes the remaining surface: without it, generated SQL
@@ -18,6 +20,7 @@ never put in its catalog.
 import logging
 import time
 from contextlib import contextmanager
+from datetime import datetime
 from typing import Generator, List, Optional
 
 import duckdb
@@ -25,6 +28,7 @@ import pandas as pd
 
 from app.ai.prompt_formatters import Table, TableColumn, TableFormatter
 from app.data_sources.clients.base import Capability, DataSourceClient
+from app.data_sources.fast import session_pool
 from app.data_sources.fast.rls import Filter
 
 logger = logging.getLogger(__name__)
@@ -43,6 +47,9 @@ class FastRelation:
         row_count: int = 0,
         description: Optional[str] = None,
         rls_filter: Optional["Filter"] = None,
+        definition_sql: Optional[str] = None,
+        refreshed_at: Optional[datetime] = None,
+        incremental: bool = False,
     ):
         self.name = name
         self.artifact_path = artifact_path
@@ -54,6 +61,11 @@ class FastRelation:
         # Compiled once per request against the asking identity. None means the
         # relation carries no policy; a Filter may still be unrestricted.
         self.rls_filter = rls_filter
+        # What the relation is a copy of, and as of when: read by
+        # `query_router` to decide whether a source query can be served here.
+        self.definition_sql = definition_sql
+        self.refreshed_at = refreshed_at
+        self.incremental = incremental
 
     @property
     def is_row_filtered(self) -> bool:
@@ -71,18 +83,38 @@ class FastQueryClient(DataSourceClient):
 
     capabilities = {Capability.QUERY}
 
-    def __init__(self, relations: List[FastRelation], connection_name: str = ""):
+    # Serving from a local artifact is already cheap, and a refresh must be
+    # visible on the very next query — never reuse results in
+    # query_result_cache.
+    RESULT_CACHE = False
+    # Queries here never touch the source, so they are not history for the
+    # acceleration advisor to propose materializing.
+    QUERY_HISTORY = False
+
+    def __init__(self, relations: List[FastRelation], connection_name: str = "",
+                 identity_key: Optional[str] = None):
         super().__init__()
         self.relations = relations or []
         self.connection_name = connection_name
+        # Who the RLS filters were compiled for. Pooled sessions are keyed by
+        # it, so a session built for one person never serves another; without
+        # it a row-filtered catalog is not pooled at all.
+        self.identity_key = identity_key
 
     # -- serving ----------------------------------------------------------
 
     @contextmanager
     def connect(self) -> Generator[duckdb.DuckDBPyConnection, None, None]:
-        con = None
+        con = self._open_session()
+        try:
+            yield con
+        finally:
+            con.close()
+
+    def _open_session(self) -> duckdb.DuckDBPyConnection:
+        """Build a registered, locked-down session. The caller owns closing it."""
+        con = duckdb.connect(database=":memory:")
         try:
-            con = duckdb.connect(database=":memory:")
             attached = 0
             for i, rel in enumerate(self.relations):
                 if not rel.artifact_path:
@@ -142,10 +174,10 @@ class FastQueryClient(DataSourceClient):
                 "fast.connect.ready",
                 extra={"relations": attached, "connection": self.connection_name},
             )
-            yield con
-        finally:
-            if con is not None:
-                con.close()
+            return con
+        except BaseException:
+            con.close()
+            raise
 
     def _register_relation(self, con, rel: "FastRelation", alias: str,
                            safe_name: str, index: int) -> None:
@@ -233,9 +265,24 @@ class FastQueryClient(DataSourceClient):
                 f"not be removed from the session catalog ({e})"
             )
 
-    def execute_query(self, sql: str) -> pd.DataFrame:
+    @contextmanager
+    def _session_for(self, sql: str) -> Generator[duckdb.DuckDBPyConnection, None, None]:
+        """A pooled session when `sql` cannot change the catalog, else a fresh one."""
+        key = None
+        if session_pool.enabled() and session_pool.is_read_only(sql):
+            key = session_pool.session_key(self.relations, self.identity_key)
+        if key is not None:
+            with session_pool.lease(key, self._open_session) as con:
+                yield con
+            return
         t0 = time.perf_counter()
         with self.connect() as con:
+            session_pool.record_unpooled((time.perf_counter() - t0) * 1000)
+            yield con
+
+    def execute_query(self, sql: str) -> pd.DataFrame:
+        t0 = time.perf_counter()
+        with self._session_for(sql) as con:
             df = con.execute(sql).df()
         logger.info(
             "fast.query.done",
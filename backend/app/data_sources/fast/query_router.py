@@ -0,0 +1,745 @@
+"""Transparent routing of agent SQL from a source to covering FAST relations.
+
+An admin who accelerates ``SELECT * FROM orders`` into a FAST relation has
+made every agent query over ``orders`` answerable locally — but only if the
+model picks the ``::fast`` client and rewrites the query for it. Usually it
+does not, and the query goes to the slow source anyway. The query wrapper asks
+`plan()` first: when every table a source query reads is served by an
+activated relation, the query is rewritten onto those relations and run in the
+FAST client's DuckDB session instead.
+
+This is only worth doing if nobody can tell. A routed query must return what
+the source would have returned, so every check below refuses rather than
+guesses, and the wrapper runs anything refused — or anything that fails
+locally — at the source exactly as before:
+
+  * **Same principal.** The sibling FAST client is only attached to source
+    clients on ``system_only`` connections, where the artifact was extracted
+    with the same credentials the source query would run under. A relation
+    that is row-filtered for the asking user is never a route: the source
+    client has no such filter, so the answers would differ.
+  * **Covering relations only.** A relation covers a source table when its
+    definition is a bare projection of it — ``SELECT *`` or a plain column
+    list, no WHERE/JOIN/GROUP BY/LIMIT. Every table the query reads must be
+    covered, every column it names must be one the relation materialized, and
+    ``SELECT *`` needs a relation that kept every column. Incremental
+    relations are excluded: deletes at the source stay invisible to them
+    until the next full rebuild.
+  * **Opted in, and fresh enough.** A routed answer can be as old as the
+    relation's last refresh, and it never reaches the source, so it does not
+    count against the source's data-query quota or rate limit either. That
+    is the data source owner's call: a connection routes only once its config
+    sets ``fast_route_max_staleness_seconds`` above 0, and the relation's last
+    refresh must then be within that many seconds. No connection can allow
+    more than ``BOW_FAST_ROUTE_MAX_STALENESS_SECONDS`` (900).
+    ``BOW_FAST_ROUTING=0`` turns routing off everywhere.
+  * **Same semantics.** The query is parsed with DuckDB's own parser
+    (``json_serialize_sql``), checked against an allowlist of node types,
+    functions and casts that mean the same thing in the source dialect, then
+    rewritten on the AST and printed back (``json_deserialize_sql``). The
+    rewrite handles what does differ for an allowed construct: Postgres
+    integer division (``/`` becomes DuckDB's ``//``), the default NULL
+    ordering of a descending sort, and the column names Postgres gives
+    unaliased expressions. Clock functions are refused — the two servers need
+    not share a time zone.
+  * **Same collation and time zone.** DuckDB compares text byte-wise and
+    evaluates ``timestamptz`` in its own ``TimeZone``; Postgres uses the
+    database's collation and the session's ``TimeZone``. Ordering text
+    (ORDER BY, ``min``/``max``, ``<``/``BETWEEN``) only routes when the source
+    collates ``C``/``POSIX``, and truncating, extracting, casting or comparing
+    a ``timestamptz`` only when both sides run in UTC. Operand types come from
+    the relations' column dtypes, and an operand of unknown type counts as
+    both. The source's settings are read once per connection per
+    ``_SETTINGS_TTL_SECONDS``, and only when a query needs them.
+
+Only Postgres sources route today: DuckDB's parser descends from Postgres's,
+so the allowlist above is the whole difference. Other dialects are a new
+`_DIALECTS` entry once their naming and comparison rules are pinned down.
+
+Counters (`stats()`) say how often queries were routed and why the rest were
+not; the wrapper also tags each query's timing entry and span with the path
+that served it.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from app.data_sources.fast import sql_dialect
+
+logger = logging.getLogger(__name__)
+
+# Ceiling on any connection's `fast_route_max_staleness_seconds`.
+DEFAULT_MAX_STALENESS_SECONDS = 900
+
+# Per source dialect: the schema an unqualified name resolves to, whether "/"
+# on two integers truncates, and a query for (collates byte-wise, runs in UTC).
+# A column with its own non-C collation anywhere in the database counts against
+# the first; ICU and builtin default collations are not byte-wise either.
+_PG_SETTINGS_SQL = """
+SELECT
+  (to_jsonb(d) ->> 'datcollate') IN ('C', 'POSIX', 'C.UTF-8', 'C.utf8')
+  AND coalesce(to_jsonb(d) ->> 'datlocprovider', 'c') = 'c'
+  AND NOT EXISTS (
+    SELECT 1 FROM pg_attribute a
+    JOIN pg_class r ON r.oid = a.attrelid
+    JOIN pg_namespace n ON n.oid = r.relnamespace
+    JOIN pg_collation c ON c.oid = a.attcollation
+    WHERE a.attnum > 0 AND NOT a.attisdropped
+      AND n.nspname NOT IN ('pg_catalog', 'information_schema')
+      AND c.collname NOT IN ('default', 'C', 'POSIX')
+  ),
+  current_setting('TimeZone') IN ({utc})
+FROM pg_database d
+WHERE d.datname = current_database()
+"""
+_UTC_NAMES = ("UTC", "Etc/UTC", "UCT", "Etc/UCT", "GMT", "Etc/GMT", "Zulu", "Etc/Zulu",
+              "Universal", "Etc/Universal")
+_DIALECTS = {
+    "postgresql": {
+        "default_schema": "public",
+        "integer_division": True,
+        "settings_sql": _PG_SETTINGS_SQL.format(utc=", ".join(f"'{n}'" for n in _UTC_NAMES)),
+    },
+}
+_SETTINGS_TTL_SECONDS = 3600
+
+# Functions whose result is the same in Postgres and DuckDB for the same input.
+_AGGREGATES = frozenset({"count", "count_star", "sum", "avg", "min", "max", "bool_and", "bool_or"})
+_FUNCTIONS = _AGGREGATES | frozenset({
+    "abs", "lower", "upper", "length", "char_length", "trim", "ltrim", "rtrim",
+    "nullif", "date_trunc", "date_part", "concat", "replace",
+    # operators
+    "+", "-", "*", "/", "%", "||", "~~", "!~~", "~~*", "!~~*",
+})
+_WINDOW_TYPES = frozenset({
+    "WINDOW_ROW_NUMBER", "WINDOW_RANK", "WINDOW_RANK_DENSE",
+    "WINDOW_LAG", "WINDOW_LEAD", "WINDOW_AGGREGATE",
+})
+_OPERATOR_TYPES = frozenset({
+    "OPERATOR_NOT", "OPERATOR_IS_NULL", "OPERATOR_IS_NOT_NULL",
+    "COMPARE_IN", "COMPARE_NOT_IN", "OPERATOR_COALESCE",
+})
+# FLOAT is single precision in DuckDB and double in Postgres; an unsized
+# DECIMAL is (18,3) in DuckDB and unbounded in Postgres.
+_CAST_TYPES = frozenset({
+    "INTEGER", "BIGINT", "SMALLINT", "DOUBLE", "DATE", "TIMESTAMP", "BOOLEAN", "INTERVAL",
+})
+_NODE_TYPES = frozenset({
+    "SELECT_NODE", "SET_OPERATION_NODE", "BASE_TABLE", "JOIN", "SUBQUERY", "EMPTY",
+    "LIMIT_MODIFIER", "ORDER_MODIFIER", "DISTINCT_MODIFIER",
+    "ASCENDING", "DESCENDING", "ORDER_DEFAULT",
+})
+# The column name Postgres gives an unaliased top-level function call.
+_PG_FUNCTION_NAMES = {"count_star": "count"}
+
+# What an expression may evaluate to, as far as collation and time zone go.
+_TEXT, _TZ = "text", "tz"
+_UNKNOWN = frozenset({_TEXT, _TZ})
+_TEXT_FUNCTIONS = frozenset({"lower", "upper", "trim", "ltrim", "rtrim", "concat", "replace", "||"})
+_ORDERING_COMPARISONS = frozenset({
+    "COMPARE_LESSTHAN", "COMPARE_GREATERTHAN",
+    "COMPARE_LESSTHANOREQUALTO", "COMPARE_GREATERTHANOREQUALTO",
+})
+
+_lock = threading.Lock()
+_local = threading.local()
+_metrics: Counter = Counter()
+# connection -> (read at, (collates byte-wise, runs in UTC) or None if unreadable)
+_source_settings_cache: Dict[str, Tuple[float, Optional[Tuple[bool, bool]]]] = {}
+
+
+class Unroutable(Exception):
+    """Why a query stays on the source. The message is the counter key."""
+
+
+class Route:
+    """A source query rewritten onto FAST relations."""
+
+    def __init__(self, client, sql: str, relations: List[str]):
+        self.client = client
+        self.sql = sql
+        self.relations = relations
+
+
+def _env_number(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return float(default)
+
+
+def enabled() -> bool:
+    """Global kill switch. On by default, but a connection still routes
+    nothing until it opts in (`max_staleness_seconds`): routed answers can be
+    up to that old and skip the source's quota and rate limit."""
+    return os.environ.get("BOW_FAST_ROUTING", "1").strip().lower() not in ("0", "false", "off", "no")
+
+
+def max_staleness_seconds(source_client) -> float:
+    """How old a relation may be and still answer `source_client`'s queries.
+
+    0 (no routing) unless the connection opted in, and never more than
+    ``BOW_FAST_ROUTE_MAX_STALENESS_SECONDS``.
+    """
+    opted = getattr(source_client, "_bow_connection_fast_route_staleness", None)
+    if not isinstance(opted, (int, float)) or isinstance(opted, bool) or opted <= 0:
+        return 0.0
+    ceiling = max(0.0, _env_number("BOW_FAST_ROUTE_MAX_STALENESS_SECONDS", DEFAULT_MAX_STALENESS_SECONDS))
+    return min(float(opted), ceiling)
+
+
+def _parser():
+    """A thread-local scratch connection used only to parse and print SQL."""
+    con = getattr(_local, "parser", None)
+    if con is None:
+        import duckdb
+
+        con = duckdb.connect(database=":memory:")
+        _local.parser = con
+    return con
+
+
+def _parse(sql: str) -> Optional[dict]:
+    """The single SELECT statement in `sql` as DuckDB's AST, or None."""
+    try:
+        raw = _parser().execute("SELECT json_serialize_sql(?)", [sql]).fetchone()[0]
+        doc = json.loads(raw)
+    except Exception:
+        return None
+    statements = doc.get("statements") or []
+    if doc.get("error") or len(statements) != 1:
+        return None
+    return statements[0]
+
+
+def _print(statement: dict) -> str:
+    doc = {"error": False, "statements": [statement]}
+    return _parser().execute("SELECT json_deserialize_sql(?)", [json.dumps(doc)]).fetchone()[0]
+
+
+def _norm(name) -> str:
+    return str(name or "").lower()
+
+
+# -- coverage ---------------------------------------------------------------
+
+@lru_cache(maxsize=512)
+def coverage(definition_sql: str) -> Optional[Tuple[str, str, Optional[FrozenSet[str]]]]:
+    """What a relation's definition materializes: (schema, table, columns).
+
+    ``columns`` is None when the definition kept every column (``SELECT *``).
+    None overall when the definition is anything but a bare projection of one
+    table, because then the relation is not a copy of any source table.
+    """
+    stmt = _parse(sql_dialect.strip_trailing_semicolon(definition_sql or ""))
+    node = (stmt or {}).get("node") or {}
+    if node.get("type") != "SELECT_NODE":
+        return None
+    if (node.get("cte_map") or {}).get("map") or node.get("where_clause") or node.get("having"):
+        return None
+    if node.get("group_expressions") or node.get("qualify") or node.get("sample"):
+        return None
+    if any(m.get("type") != "ORDER_MODIFIER" for m in node.get("modifiers") or []):
+        return None
+    table = node.get("from_table") or {}
+    if table.get("type") != "BASE_TABLE" or table.get("catalog_name") or table.get("at_clause"):
+        return None
+    select = node.get("select_list") or []
+    if len(select) == 1 and select[0].get("class") == "STAR":
+        star = select[0]
+        if star.get("exclude_list") or star.get("replace_list") or star.get("rename_list") \
+                or star.get("qualified_exclude_list") or star.get("columns") or star.get("expr"):
+            return None
+        return _norm(table.get("schema_name")), _norm(table.get("table_name")), None
+    columns = set()
+    for item in select:
+        if item.get("class") != "COLUMN_REF":
+            return None
+        name = _norm(item["column_names"][-1])
+        if item.get("alias") and _norm(item["alias"]) != name:
+            return None
+        columns.add(name)
+    return _norm(table.get("schema_name")), _norm(table.get("table_name")), frozenset(columns)
+
+
+def _candidates(fast_client, source_client, dialect: dict) -> Dict[Tuple[str, str], list]:
+    """Routable relations by the source table they cover."""
+    limit = max_staleness_seconds(source_client)
+    now = datetime.utcnow()
+    out: Dict[Tuple[str, str], list] = {}
+    for rel in getattr(fast_client, "relations", None) or []:
+        cov = coverage(rel.definition_sql) if rel.definition_sql else None
+        if cov is None or rel.incremental or rel.is_row_filtered:
+            continue
+        if rel.refreshed_at is None or (now - rel.refreshed_at).total_seconds() > limit:
+            continue
+        schema, table, columns = cov
+        out.setdefault((schema or dialect["default_schema"], table), []).append((rel, columns))
+    return out
+
+
+# -- planning ---------------------------------------------------------------
+
+class _Plan:
+    """State for one walk over a query's AST."""
+
+    def __init__(self, candidates, dialect: dict):
+        self.candidates = candidates
+        self.dialect = dialect
+        self.ctes = set()
+        self.qualifiers = set()
+        self.names = set()
+        self.column_refs: List[list] = []
+        self.stars: List[dict] = []
+        self.used: Dict[str, Optional[FrozenSet[str]]] = {}
+        # column name -> dtypes of the relations that have it
+        self.dtypes: Dict[str, set] = {}
+        # "collation" / "timezone": what the answer depends on
+        self.needs: set = set()
+
+
+def _collect_names(node, plan: _Plan) -> None:
+    """CTE names, aliases and output names anywhere in the query."""
+    if isinstance(node, list):
+        for v in node:
+            _collect_names(v, plan)
+        return
+    if not isinstance(node, dict):
+        return
+    for entry in (node.get("cte_map") or {}).get("map") or []:
+        plan.ctes.add(_norm(entry.get("key")))
+        plan.qualifiers.add(_norm(entry.get("key")))
+        plan.names.update(_norm(a) for a in (entry.get("value") or {}).get("aliases") or [])
+    if node.get("class") and node.get("alias"):
+        plan.names.add(_norm(node["alias"]))
+    if node.get("type") in ("BASE_TABLE", "SUBQUERY") and "query_location" in node and "class" not in node:
+        plan.qualifiers.add(_norm(node.get("alias") or node.get("table_name")))
+        plan.names.update(_norm(a) for a in node.get("column_name_alias") or [])
+    for key, value in node.items():
+        if key != "value":
+            _collect_names(value, plan)
+
+
+def _check(node, plan: _Plan) -> None:
+    """Refuse anything outside the allowlist; rewrite table refs and dialect."""
+    if isinstance(node, list):
+        for v in node:
+            _check(v, plan)
+        return
+    if not isinstance(node, dict):
+        return
+    cls = node.get("class")
+    if cls is not None:
+        _check_expression(node, plan)
+        return
+    kind = node.get("type")
+    if isinstance(kind, str):
+        if kind not in _NODE_TYPES:
+            raise Unroutable(f"unsupported:{str(kind).lower()}")
+        if kind == "SELECT_NODE":
+            if node.get("sample") or node.get("qualify"):
+                raise Unroutable("unsupported:sample")
+            if node.get("aggregate_handling") != "STANDARD_HANDLING":
+                raise Unroutable("unsupported:group_by_all")
+        elif kind == "BASE_TABLE":
+            _route_table(node, plan)
+        elif kind == "JOIN":
+            if node.get("ref_type") not in ("REGULAR", "CROSS"):
+                raise Unroutable("unsupported:join")
+            plan.column_refs.extend([c] for c in node.get("using_columns") or [])
+        elif kind in ("ASCENDING", "DESCENDING", "ORDER_DEFAULT") and node.get("null_order") == "ORDER_DEFAULT":
+            # Postgres sorts NULL as the largest value; DuckDB puts NULLs
+            # last either way unless told.
+            node["null_order"] = "NULLS FIRST" if kind == "DESCENDING" else "NULLS LAST"
+    for value in node.values():
+        _check(value, plan)
+
+
+def _check_expression(node: dict, plan: _Plan) -> None:
+    cls = node["class"]
+    if cls == "CONSTANT":
+        return
+    if cls == "COLUMN_REF":
+        names = node.get("column_names") or []
+        if len(names) > 2:
+            raise Unroutable("unsupported:column_ref")
+        plan.column_refs.append(names)
+    elif cls == "STAR":
+        if node.get("exclude_list") or node.get("replace_list") or node.get("rename_list") \
+                or node.get("qualified_exclude_list") or node.get("columns") or node.get("expr"):
+            raise Unroutable("unsupported:star")
+        plan.stars.append(node)
+    elif cls == "FUNCTION":
+        name = _norm(node.get("function_name"))
+        if name not in _FUNCTIONS or node.get("schema") not in ("", "main") or node.get("catalog") \
+                or node.get("filter") or node.get("export_state"):
+            raise Unroutable(f"function:{name}")
+        if name == "/" and plan.dialect["integer_division"]:
+            # DuckDB's "//" truncates integers and divides anything else,
+            # which is exactly what Postgres's "/" does.
+            node["function_name"] = "//"
+    elif cls == "WINDOW":
+        if node.get("type") not in _WINDOW_TYPES or node.get("ignore_nulls") or node.get("filter_expr"):
+            raise Unroutable("unsupported:window")
+        if node.get("type") == "WINDOW_AGGREGATE" and _norm(node.get("function_name")) not in _AGGREGATES:
+            raise Unroutable(f"function:{_norm(node.get('function_name'))}")
+    elif cls == "CAST":
+        type_id = (node.get("cast_type") or {}).get("id")
+        child = node.get("child") or {}
+        if type_id not in _CAST_TYPES and not (type_id == "VARCHAR" and child.get("class") == "CONSTANT"):
+            raise Unroutable(f"cast:{str(type_id).lower()}")
+        _check(child, plan)
+        return
+    elif cls == "OPERATOR":
+        if node.get("type") not in _OPERATOR_TYPES:
+            raise Unroutable(f"unsupported:{_norm(node.get('type'))}")
+    elif cls not in ("COMPARISON", "CONJUNCTION", "CASE", "BETWEEN", "SUBQUERY"):
+        raise Unroutable(f"unsupported:{_norm(cls)}")
+    for value in node.values():
+        _check(value, plan)
+
+
+def _route_table(node: dict, plan: _Plan) -> None:
+    schema, table = _norm(node.get("schema_name")), _norm(node.get("table_name"))
+    if node.get("catalog_name") or node.get("at_clause") or node.get("sample"):
+        raise Unroutable("unsupported:table_ref")
+    if not schema and table in plan.ctes:
+        return
+    choices = plan.candidates.get((schema or plan.dialect["default_schema"], table))
+    if not choices:
+        raise Unroutable("table_not_covered")
+    if table in plan.ctes:
+        raise Unroutable("unsupported:cte_shadows_table")
+    # A relation that kept every column wins; else the widest projection.
+    rel, columns = max(choices, key=lambda c: (c[1] is None, len(c[1] or ()), c[0].refreshed_at))
+    plan.used.setdefault(rel.name, columns)
+    for col in rel.columns or []:
+        if isinstance(col, dict) and col.get("name"):
+            plan.dtypes.setdefault(_norm(col["name"]), set()).add(col.get("dtype"))
+    if not node.get("alias"):
+        # Keep `orders.id` binding after the rename.
+        node["alias"] = node.get("table_name")
+    node["table_name"] = rel.name
+    node["schema_name"] = ""
+    node["catalog_name"] = ""
+
+
+def _check_columns(plan: _Plan) -> None:
+    partial = [cols for cols in plan.used.values() if cols is not None]
+    if plan.stars and partial:
+        raise Unroutable("column_not_covered")
+    if len(partial) < len(plan.used):
+        # Some relation kept every column; the binder rejects names it lacks.
+        allowed = None
+    else:
+        allowed = set().union(*partial) | plan.names
+    for names in plan.column_refs:
+        if len(names) == 2 and _norm(names[0]) not in plan.qualifiers:
+            raise Unroutable("unsupported:column_ref")
+        if len(names) == 1 and _norm(names[0]) in ("current_date", "current_timestamp", "current_time",
+                                                   "localtime", "localtimestamp"):
+            raise Unroutable("function:clock")
+        if allowed is not None and _norm(names[-1]) not in allowed:
+            raise Unroutable("column_not_covered")
+
+
+# -- collation and time zone ------------------------------------------------
+
+def _dtype_kinds(dtype) -> FrozenSet[str]:
+    d = str(dtype or "").lower()
+    if not d:
+        return _UNKNOWN
+    if "tz=" in d or "time zone" in d or "timestamptz" in d or ("datetime64" in d and "," in d):
+        return frozenset({_TZ})
+    if any(t in d for t in ("int", "float", "double", "decimal", "numeric", "real",
+                            "bool", "date", "time", "interval")):
+        return frozenset()
+    if any(t in d for t in ("str", "utf8", "char", "text")):
+        return frozenset({_TEXT})
+    return _UNKNOWN
+
+
+def _kinds(node, plan: _Plan) -> FrozenSet[str]:
+    """Whether `node` may be text and/or a timestamptz; unknown is both."""
+    if not isinstance(node, dict):
+        return _UNKNOWN
+    cls = node.get("class")
+    if cls == "CONSTANT":
+        value = node.get("value") or {}
+        is_text = (value.get("type") or {}).get("id") == "VARCHAR" and not value.get("is_null")
+        return frozenset({_TEXT}) if is_text else frozenset()
+    if cls == "COLUMN_REF":
+        dtypes = plan.dtypes.get(_norm((node.get("column_names") or [""])[-1]))
+        if not dtypes:
+            return _UNKNOWN
+        return frozenset().union(*(_dtype_kinds(d) for d in dtypes))
+    if cls == "CAST":
+        return frozenset({_TEXT}) if (node.get("cast_type") or {}).get("id") == "VARCHAR" else frozenset()
+    if cls in ("FUNCTION", "WINDOW"):
+        name = _norm(node.get("function_name"))
+        if name in _TEXT_FUNCTIONS:
+            return frozenset({_TEXT})
+        if name in ("min", "max", "nullif"):
+            return _union(node.get("children"), plan)
+        if name in ("+", "-", "date_trunc"):
+            return _union(node.get("children"), plan) & {_TZ}
+        return frozenset()
+    if cls == "CASE":
+        branches = [c.get("then_expr") for c in node.get("case_checks") or []]
+        return _union(branches + [node.get("else_expr")], plan)
+    if cls == "OPERATOR":
+        return _union(node.get("children"), plan) if node.get("type") == "OPERATOR_COALESCE" else frozenset()
+    if cls in ("COMPARISON", "CONJUNCTION", "BETWEEN"):
+        return frozenset()
+    return _UNKNOWN
+
+
+def _union(nodes, plan: _Plan) -> FrozenSet[str]:
+    return frozenset().union(*(_kinds(n, plan) for n in nodes or [] if n))
+
+
+def _order_target(expression: dict, select_node: Optional[dict]) -> dict:
+    """What an ORDER BY entry sorts by: a position or an output alias resolves
+    to its select item."""
+    items = (select_node or {}).get("select_list") or []
+    if expression.get("class") == "CONSTANT":
+        value = (expression.get("value") or {}).get("value")
+        if isinstance(value, int) and 0 < value <= len(items):
+            return items[value - 1]
+    if expression.get("class") == "COLUMN_REF" and len(expression.get("column_names") or []) == 1:
+        name = _norm(expression["column_names"][0])
+        for item in items:
+            if item.get("alias") and _norm(item["alias"]) == name:
+                return item
+    return expression
+
+
+def _compares_tz(left: FrozenSet[str], right: FrozenSet[str]) -> bool:
+    # A timestamptz against anything but another timestamptz is converted in
+    # the session's time zone (a date, a timestamp, a string literal).
+    return (_TZ in left or _TZ in right) and not (left == right == {_TZ})
+
+
+def _check_dependencies(node, plan: _Plan, select_node: Optional[dict] = None) -> None:
+    """Record in `plan.needs` what of the query's answer depends on the
+    source's collation or time zone."""
+    if isinstance(node, list):
+        for v in node:
+            _check_dependencies(v, plan, select_node)
+        return
+    if not isinstance(node, dict):
+        return
+    if node.get("type") == "SELECT_NODE":
+        select_node = node
+    cls = node.get("class")
+    orders = []
+    if node.get("type") == "ORDER_MODIFIER":
+        orders = [_order_target(o.get("expression") or {}, select_node) for o in node.get("orders") or []]
+    elif cls == "WINDOW":
+        orders = [o.get("expression") for o in node.get("orders") or []]
+    if any(_TEXT in _kinds(o, plan) for o in orders):
+        plan.needs.add("collation")
+    if cls in ("FUNCTION", "WINDOW"):
+        name = _norm(node.get("function_name"))
+        args = node.get("children") or []
+        if name in ("min", "max") and any(_TEXT in _kinds(a, plan) for a in args):
+            plan.needs.add("collation")
+        if name in ("date_trunc", "date_part") and any(_TZ in _kinds(a, plan) for a in args):
+            plan.needs.add("timezone")
+    elif cls == "CAST":
+        if (node.get("cast_type") or {}).get("id") in ("DATE", "TIMESTAMP") \
+                and _TZ in _kinds(node.get("child"), plan):
+            plan.needs.add("timezone")
+    elif cls == "OPERATOR" and node.get("type") in ("COMPARE_IN", "COMPARE_NOT_IN"):
+        value, *members = node.get("children") or [None]
+        kinds = _kinds(value, plan)
+        if any(_compares_tz(kinds, _kinds(m, plan)) for m in members):
+            plan.needs.add("timezone")
+    elif cls == "COMPARISON":
+        left, right = _kinds(node.get("left"), plan), _kinds(node.get("right"), plan)
+        if node.get("type") in _ORDERING_COMPARISONS and _TEXT in left and _TEXT in right:
+            plan.needs.add("collation")
+        if _compares_tz(left, right):
+            plan.needs.add("timezone")
+    elif cls == "BETWEEN":
+        value = _kinds(node.get("input"), plan)
+        for bound in (node.get("lower"), node.get("upper")):
+            kinds = _kinds(bound, plan)
+            if _TEXT in value and _TEXT in kinds:
+                plan.needs.add("collation")
+            if _compares_tz(value, kinds):
+                plan.needs.add("timezone")
+    for value in node.values():
+        _check_dependencies(value, plan, select_node)
+
+
+def _source_settings(source_client, dialect: dict) -> Optional[Tuple[bool, bool]]:
+    """(collates byte-wise, runs in UTC) for the source, or None if unreadable.
+
+    Read with the source client's own credentials, so the session settings are
+    the ones its queries run under; cached per connection for
+    `_SETTINGS_TTL_SECONDS`, failures included.
+    """
+    key = str(getattr(source_client, "_bow_connection_id", None) or id(source_client))
+    now = time.monotonic()
+    with _lock:
+        cached = _source_settings_cache.get(key)
+    if cached is not None and now - cached[0] < _SETTINGS_TTL_SECONDS:
+        return cached[1]
+    try:
+        import sqlalchemy
+
+        with source_client.connect() as conn:
+            # Outside the query's slot and timeout, so bound it here.
+            conn.execute(sqlalchemy.text("SET LOCAL statement_timeout = 5000"))
+            row = conn.execute(sqlalchemy.text(dialect["settings_sql"])).fetchone()
+        settings = (bool(row[0]), bool(row[1])) if row else None
+    except Exception as e:
+        logger.debug("fast routing: source settings unreadable: %s", e)
+        settings = None
+    with _lock:
+        _source_settings_cache[key] = (now, settings)
+    return settings
+
+
+def _local_utc() -> bool:
+    """Whether DuckDB evaluates timestamptz in UTC in this process."""
+    try:
+        tz = _parser().execute("SELECT current_setting('TimeZone')").fetchone()[0]
+    except Exception:
+        return True  # without ICU, DuckDB has no time zone but UTC
+    return tz in _UTC_NAMES
+
+
+def _check_settings(plan: _Plan, source_client) -> None:
+    if not plan.needs:
+        return
+    collates_c, utc = _source_settings(source_client, plan.dialect) or (False, False)
+    if "collation" in plan.needs and not collates_c:
+        raise Unroutable("collation")
+    if "timezone" in plan.needs and not (utc and _local_utc()):
+        raise Unroutable("timezone")
+
+
+def _name_outputs(node: dict, sql: str) -> None:
+    """Give unaliased select items the column names Postgres would."""
+    while node.get("type") == "SET_OPERATION_NODE":
+        node = node["left"]
+    seen = set()
+    for item in node.get("select_list") or []:
+        cls = item.get("class")
+        alias = item.get("alias")
+        if alias:
+            # Postgres folds an unquoted alias to lower case; DuckDB keeps it.
+            if alias != alias.lower() and f'"{alias}"' not in sql:
+                item["alias"] = alias = alias.lower()
+        elif cls == "COLUMN_REF":
+            alias = item["column_names"][-1]
+        elif cls == "STAR":
+            continue
+        else:
+            alias = _pg_name(item)
+            item["alias"] = alias
+        if _norm(alias) in seen:
+            raise Unroutable("unsupported:duplicate_column_names")
+        seen.add(_norm(alias))
+
+
+def _pg_name(item: dict) -> str:
+    cls = item.get("class")
+    if cls == "CAST":
+        child = item.get("child") or {}
+        if child.get("class") == "COLUMN_REF":
+            return child["column_names"][-1]
+        if child.get("class") in ("FUNCTION", "WINDOW"):
+            return _pg_name(child)
+        raise Unroutable("unsupported:output_name")
+    if cls in ("FUNCTION", "WINDOW") and not item.get("is_operator"):
+        name = _norm(item.get("function_name"))
+        if name == "date_part":
+            # EXTRACT(...) and date_part(...) parse the same but are named
+            # differently by Postgres.
+            raise Unroutable("unsupported:output_name")
+        return _PG_FUNCTION_NAMES.get(name, name)
+    if cls == "CASE":
+        return "case"
+    if cls == "OPERATOR" and item.get("type") == "OPERATOR_COALESCE":
+        return "coalesce"
+    return "?column?"
+
+
+def plan(sql: str, source_client, fast_client) -> Tuple[Optional[Route], str]:
+    """Route `sql` to `fast_client` if it is a faithful stand-in for the source.
+
+    Returns ``(route, "")`` or ``(None, reason)``. Never raises.
+    """
+    try:
+        route = _plan(sql, source_client, fast_client)
+    except Unroutable as e:
+        _count(str(e))
+        return None, str(e)
+    except Exception as e:  # pragma: no cover - defensive
+        logger.debug("fast routing skipped: %s", e)
+        _count("error")
+        return None, "error"
+    return route, ""
+
+
+def _plan(sql: str, source_client, fast_client) -> Route:
+    if not enabled():
+        raise Unroutable("disabled")
+    dialect = _DIALECTS.get(sql_dialect.dialect_of(source_client))
+    if dialect is None:
+        raise Unroutable("dialect")
+    if max_staleness_seconds(source_client) <= 0:
+        raise Unroutable("disabled")
+    candidates = _candidates(fast_client, source_client, dialect)
+    if not candidates:
+        raise Unroutable("no_candidates")
+    stmt = _parse(sql)
+    if stmt is None or stmt.get("named_param_map"):
+        raise Unroutable("parse")
+    p = _Plan(candidates, dialect)
+    _collect_names(stmt["node"], p)
+    _check(stmt["node"], p)
+    if not p.used:
+        raise Unroutable("table_not_covered")
+    _check_columns(p)
+    _check_dependencies(stmt["node"], p)
+    _check_settings(p, source_client)
+    _name_outputs(stmt["node"], sql)
+    return Route(fast_client, _print(stmt), sorted(p.used))
+
+
+# -- metrics ----------------------------------------------------------------
+
+def _count(outcome: str) -> None:
+    with _lock:
+        _metrics[outcome] += 1
+
+
+def record_routed() -> None:
+    _count("routed")
+
+
+def record_fallback(reason: str) -> None:
+    _count(reason)
+
+
+def stats() -> dict:
+    with _lock:
+        return dict(_metrics)
+
+
+def reset() -> None:
+    with _lock:
+        _metrics.clear()
+        _source_settings_cache.clear()
+    coverage.cache_clear()
@@ -0,0 +1,370 @@
+"""Reusable, already-locked-down DuckDB sessions for FastQueryClient.
+
+`FastQueryClient.connect()` builds a serving session from scratch: a fresh
+in-memory DuckDB, an ATTACH per encrypted artifact, a view per relation, a full
+`CREATE TABLE ... AS SELECT` copy for every row-filtered relation, then the
+lockdown pragmas. For a large artifact behind a policy the copy dominates, and
+an agent's exploratory burst — six queries against the same two relations —
+paid it six times over.
+
+This pool keeps finished sessions and hands them back out. A session is only
+ever reused for the exact catalog it was built for:
+
+  * **Key** — (relation name, artifact path, artifact mtime/size) for every
+    relation, plus a fingerprint of each relation's compiled RLS filter, plus
+    the asking identity when any relation carries a policy. A refresh writes a
+    new artifact path and a policy edit changes the fingerprint, so a stale
+    session can never be looked up again; `invalidate_artifact` just frees its
+    memory sooner than the idle TTL would.
+  * **One identity per session.** Whenever a relation has a policy, the key
+    includes the identity, even if two people's filters happen to compile to
+    the same values. A filtered client that cannot name its identity is never
+    pooled — it gets a throwaway session exactly as before.
+  * **Read-only reuse.** Only sessions that ran nothing but SELECT statements
+    go back into the pool. Agent SQL can still `CREATE TABLE`, `INSERT` into a
+    filtered copy or `DROP` a view — the lockdown pragmas do not stop catalog
+    writes inside the in-memory database — and a session that might carry one
+    user's edits must not serve the next query. The caller decides with
+    `is_read_only(sql)` and routes everything else to an unpooled session.
+  * **Exclusive checkout.** A DuckDB connection is not safe to share across
+    threads mid-query, so a leased session is removed from the idle list until
+    it is returned. Concurrent queries on the same key build extra sessions.
+
+Memory is bounded by `BOW_FAST_SESSION_POOL_BYTES` across idle sessions, sized
+from `duckdb_memory()` at build time (the row-filtered copies are what count;
+attached artifacts are read from disk). Least-recently-used idle sessions are
+closed first. Sessions idle past `BOW_FAST_SESSION_IDLE_TTL` are closed lazily
+on the next lease. Setting the byte budget to 0 disables pooling.
+
+**Scope: per process.** Like the engine pool, each worker keeps its own
+sessions. Another worker's refresh is picked up through the key (the path
+changes in the DB), not through invalidation.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POOL_BYTES = 256 * 1024 * 1024
+DEFAULT_MAX_IDLE_SESSIONS = 16
+DEFAULT_IDLE_TTL_S = 300
+# Idle sessions kept per key. A burst on one catalog builds up to this many
+# sessions; beyond it, returned sessions are closed rather than hoarded.
+MAX_IDLE_PER_KEY = 4
+
+_lock = threading.Lock()
+_local = threading.local()
+# key -> list of idle entries, LRU order across keys kept in `_idle_order`.
+_idle: Dict[Tuple, List["_Entry"]] = {}
+_idle_order: "OrderedDict[int, _Entry]" = OrderedDict()
+_idle_bytes = 0
+_metrics = {
+    "hits": 0,
+    "misses": 0,
+    "unpooled": 0,
+    "evictions": 0,
+    "discarded": 0,
+    "setup_ms_total": 0.0,
+    "setup_ms_last": 0.0,
+}
+
+
+class _Entry:
+    __slots__ = ("key", "con", "bytes", "returned_at", "paths")
+
+    def __init__(self, key: Tuple, con, nbytes: int, paths: Tuple[str, ...]):
+        self.key = key
+        self.con = con
+        self.bytes = nbytes
+        self.returned_at = time.monotonic()
+        self.paths = paths
+
+
+def _env_number(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return float(default)
+
+
+def pool_bytes() -> int:
+    """Byte budget across idle sessions; <= 0 disables pooling."""
+    return int(_env_number("BOW_FAST_SESSION_POOL_BYTES", DEFAULT_POOL_BYTES))
+
+
+def max_idle_sessions() -> int:
+    return int(_env_number("BOW_FAST_SESSION_POOL_SIZE", DEFAULT_MAX_IDLE_SESSIONS))
+
+
+def idle_ttl_s() -> float:
+    return _env_number("BOW_FAST_SESSION_IDLE_TTL", DEFAULT_IDLE_TTL_S)
+
+
+def enabled() -> bool:
+    return pool_bytes() > 0 and max_idle_sessions() > 0
+
+
+# -- keys -----------------------------------------------------------------
+
+def _artifact_version(path: str) -> Tuple[int, int]:
+    try:
+        st = os.stat(path)
+        return (st.st_mtime_ns, st.st_size)
+    except OSError:
+        return (0, 0)
+
+
+def filter_fingerprint(f) -> str:
+    """A stable digest of a compiled `rls.Filter`; "" for no policy."""
+    if f is None:
+        return ""
+    values = sorted(str(v) for v in (f.allowed_values or []))
+    raw = "\x1f".join([
+        "deny" if f.deny_all else ("all" if f.allowed_values is None else "in"),
+        str(f.column or ""),
+        *values,
+    ])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]
+
+
+def session_key(relations, identity_key: Optional[str]) -> Optional[Tuple]:
+    """The pool key for a catalog of `relations`, or None if it must not pool.
+
+    Relation order is part of the key on purpose: `connect()` derives attach
+    aliases and values-table names from the index, and a session is only
+    interchangeable with one built in the same shape.
+    """
+    parts = []
+    has_policy = False
+    for rel in relations:
+        if rel.rls_filter is not None:
+            has_policy = True
+        parts.append((
+            rel.name,
+            rel.artifact_path or "",
+            _artifact_version(rel.artifact_path) if rel.artifact_path else (0, 0),
+            filter_fingerprint(rel.rls_filter),
+        ))
+    if has_policy and not identity_key:
+        return None
+    return (tuple(parts), str(identity_key) if has_policy else "")
+
+
+def _parser():
+    """A thread-local scratch connection used only to parse SQL."""
+    con = getattr(_local, "parser", None)
+    if con is None:
+        import duckdb
+
+        con = duckdb.connect(database=":memory:")
+        _local.parser = con
+    return con
+
+
+def is_read_only(sql: str) -> bool:
+    """True when every statement in `sql` is a plain SELECT.
+
+    Parsed by DuckDB itself, so a trailing `; DROP VIEW x` or a CTE wrapping a
+    write is seen for what it is. Anything that fails to parse is treated as a
+    write — it will fail on the unpooled session with the same error.
+    """
+    try:
+        import duckdb
+
+        statements = _parser().extract_statements(sql)
+        return bool(statements) and all(
+            s.type == duckdb.StatementType.SELECT for s in statements
+        )
+    except Exception:
+        return False
+
+
+def _session_bytes(con) -> int:
+    try:
+        row = con.execute(
+            "SELECT COALESCE(SUM(memory_usage_bytes), 0) FROM duckdb_memory()"
+        ).fetchone()
+        return int(row[0] or 0)
+    except Exception:
+        return 0
+
+
+# -- leasing --------------------------------------------------------------
+
+def _close(con) -> None:
+    try:
+        con.close()
+    except Exception:
+        pass
+
+
+def _drop_entry(entry: "_Entry") -> None:
+    """Remove `entry` from the idle structures. Caller holds `_lock`."""
+    global _idle_bytes
+    bucket = _idle.get(entry.key)
+    if bucket is not None:
+        try:
+            bucket.remove(entry)
+        except ValueError:
+            pass
+        if not bucket:
+            _idle.pop(entry.key, None)
+    if _idle_order.pop(id(entry), None) is not None:
+        _idle_bytes -= entry.bytes
+
+
+def _prune_expired(now: float) -> List["_Entry"]:
+    """Detach idle entries past the TTL. Caller holds `_lock`."""
+    ttl = idle_ttl_s()
+    if ttl <= 0:
+        return []
+    expired = [e for e in _idle_order.values() if now - e.returned_at >= ttl]
+    for e in expired:
+        _drop_entry(e)
+    return expired
+
+
+def _checkout(key: Tuple) -> Optional["_Entry"]:
+    now = time.monotonic()
+    with _lock:
+        expired = _prune_expired(now)
+        bucket = _idle.get(key)
+        entry = bucket[-1] if bucket else None
+        if entry is not None:
+            _drop_entry(entry)
+    for e in expired:
+        _close(e.con)
+    return entry
+
+
+def _checkin(entry: "_Entry") -> None:
+    global _idle_bytes
+    budget = pool_bytes()
+    limit = max_idle_sessions()
+    evicted: List[_Entry] = []
+    with _lock:
+        bucket = _idle.setdefault(entry.key, [])
+        if entry.bytes > budget or len(bucket) >= MAX_IDLE_PER_KEY:
+            if not bucket:
+                _idle.pop(entry.key, None)
+            evicted.append(entry)
+            _metrics["discarded"] += 1
+        else:
+            entry.returned_at = time.monotonic()
+            bucket.append(entry)
+            _idle_order[id(entry)] = entry
+            _idle_bytes += entry.bytes
+            while _idle_order and (_idle_bytes > budget or len(_idle_order) > limit):
+                _, oldest = next(iter(_idle_order.items()))
+                _drop_entry(oldest)
+                evicted.append(oldest)
+                _metrics["evictions"] += 1
+    for e in evicted:
+        _close(e.con)
+
+
+@contextmanager
+def lease(key: Tuple, build: Callable[[], object]) -> Iterator[object]:
+    """Yield a locked-down session for `key`, building one on a miss.
+
+    `build` must return a fully registered and locked-down connection; the pool
+    never touches the catalog itself. The session returns to the pool when the
+    block exits, including when the query in it raised — a failed SELECT leaves
+    a DuckDB session exactly as it was.
+    """
+    entry = _checkout(key)
+    if entry is not None:
+        with _lock:
+            _metrics["hits"] += 1
+    else:
+        t0 = time.perf_counter()
+        con = build()
+        setup_ms = (time.perf_counter() - t0) * 1000
+        paths = tuple(p[1] for p in key[0] if p[1])
+        entry = _Entry(key, con, _session_bytes(con), paths)
+        with _lock:
+            _metrics["misses"] += 1
+            _metrics["setup_ms_total"] += setup_ms
+            _metrics["setup_ms_last"] = setup_ms
+        logger.info(
+            "fast.session_pool.built",
+            extra={"setup_ms": round(setup_ms, 1), "bytes": entry.bytes},
+        )
+    try:
+        yield entry.con
+    finally:
+        _checkin(entry)
+
+
+def record_unpooled(setup_ms: float) -> None:
+    """Count a session built outside the pool (writes, unkeyable catalogs)."""
+    with _lock:
+        _metrics["unpooled"] += 1
+        _metrics["setup_ms_total"] += setup_ms
+        _metrics["setup_ms_last"] = setup_ms
+
+
+# -- invalidation ---------------------------------------------------------
+
+def invalidate_artifact(path: Optional[str]) -> int:
+    """Close every idle session that attached `path`.
+
+    Called when a custom query is refreshed, deleted or has its policy edited.
+    Correctness does not depend on it — the key already moved on — but a
+    superseded session otherwise holds its filtered copies until the TTL.
+    Sessions leased at the time are returned under a key nothing will ask for
+    again and age out.
+    """
+    if not path:
+        return 0
+    with _lock:
+        stale = [e for e in _idle_order.values() if path in e.paths]
+        for e in stale:
+            _drop_entry(e)
+    for e in stale:
+        _close(e.con)
+    if stale:
+        logger.info(
+            "fast.session_pool.invalidated",
+            extra={"sessions": len(stale)},
+        )
+    return len(stale)
+
+
+def clear() -> None:
+    """Test/shutdown helper — close every idle session and reset metrics."""
+    global _idle_bytes
+    with _lock:
+        entries = list(_idle_order.values())
+        _idle.clear()
+        _idle_order.clear()
+        _idle_bytes = 0
+        for k in _metrics:
+            _metrics[k] = 0.0 if k.startswith("setup_ms") else 0
+    for e in entries:
+        _close(e.con)
+
+
+def stats() -> dict:
+    with _lock:
+        lookups = _metrics["hits"] + _metrics["misses"]
+        return {
+            "idle_sessions": len(_idle_order),
+            "idle_bytes": _idle_bytes,
+            "budget_bytes": pool_bytes(),
+            "hits": _metrics["hits"],
+            "misses": _metrics["misses"],
+            "unpooled": _metrics["unpooled"],
+            "evictions": _metrics["evictions"],
+            "discarded": _metrics["discarded"],
+            "hit_ratio": round(_metrics["hits"] / lookups, 3) if lookups else 0.0,
+            "setup_ms_total": round(_metrics["setup_ms_total"], 1),
+            "setup_ms_last": round(_metrics["setup_ms_last"], 1),
+        }
@@ -24,6 +24,7 @@ asserting "it didn't crash".
 """
 
 import logging
+import math
 import re
 import uuid
 from typing import TYPE_CHECKING, Tuple
@@ -99,6 +100,64 @@ def bounded_sql(sql: str, limit: int, dialect: str) -> Tuple[str, bool]:
     return inner, False
 
 
+# --------------------------------------------------------------------------
+# Incremental refresh
+# --------------------------------------------------------------------------
+
+# A watermark column is interpolated unquoted (there is no portable quoting:
+# backticks, brackets and double quotes each break somewhere), so it must be a
+# plain identifier. Unquoted also folds case the way the source already does for
+# the column the admin's SELECT produced.
+WATERMARK_COLUMN_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]{0,127}$")
+
+
+def watermark_literal(mark: dict, dialect: str) -> str:
+    """Render a stored high-water mark as a SQL literal for `dialect`.
+
+    `mark` is what `extractor.encode_watermark` stored: ``{"type", "value"}``.
+    Numbers go in bare, and only finite ones. A zoned timestamp is stored in
+    UTC with its offset.
+
+    Temporal values go in as ISO strings, which every source here coerces
+    against a date/timestamp column — except Oracle, whose string coercion
+    follows the session's NLS format, so it gets ANSI typed literals; and SQL
+    Server, where a plain string against a legacy DATETIME column is rejected
+    past three fractional digits, so it is cast to DATETIME2 explicitly.
+    """
+    kind = mark.get("type")
+    value = str(mark.get("value"))
+    if kind == "number":
+        # Re-parsed rather than trusted: this string becomes SQL text, and
+        # "nan" or "inf" parse as floats but are column names there.
+        if not math.isfinite(float(value)):
+            raise ValueError(f"watermark {value!r} is not a finite number")
+        return value
+    quoted = "'" + value.replace("'", "''") + "'"
+    if kind in ("timestamp", "timestamptz", "date"):
+        if dialect == "oracle":
+            return f"{'DATE' if kind == 'date' else 'TIMESTAMP'} {quoted}"
+        if dialect == "mssql" and kind != "date":
+            target = "DATETIMEOFFSET" if kind == "timestamptz" else "DATETIME2"
+            return f"CAST({quoted} AS {target})"
+    return quoted
+
+
+def delta_sql(sql: str, column: str, mark: dict, dialect: str) -> str:
+    """Wrap `sql` so it returns only rows past the high-water mark.
+
+    Same derived-table shape as `bounded_sql`, with the same caveat that an
+    `ORDER BY` in the admin's query is meaningless inside it (and rejected by
+    SQL Server) — an incremental query has no use for one anyway.
+    """
+    if not WATERMARK_COLUMN_RE.match(column or ""):
+        raise ValueError(f"'{column}' is not a plain column name")
+    inner = strip_trailing_semicolon(sql)
+    return (
+        f"SELECT * FROM ({inner}) bow_src "
+        f"WHERE {column} > {watermark_literal(mark, dialect)}"
+    )
+
+
 # --------------------------------------------------------------------------
 # Cost estimation
 # --------------------------------------------------------------------------
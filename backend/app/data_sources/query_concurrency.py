@@ -15,18 +15,38 @@ agent retry and add load. Only when a query cannot get a slot within the same
 wall-clock budget it would have been given to run does it fail — at that point
 waiting longer buys nothing.
 
-**Scope: per replica.** Like the SQLAlchemy pool sizes it sits in front of,
-this is process-local; N replicas admit N × cap. Making it global would need
-DB-backed leases with expiry (the counters that back rate limiting cannot
-express "in flight"), and a per-replica cap already turns an unbounded burst
-into a bounded one, which is the property that matters. The org-level default
-should be read as "per replica" — `effective_limit` documents that at the point
-of use.
+**Scope: per replica by default.** Like the SQLAlchemy pool sizes it sits in
+front of, the semaphore is process-local; N replicas admit N × cap, which
+already turns an unbounded burst into a bounded one. For a source that cannot
+take even that (a fragile Oracle box behind 4 replicas × 2 workers), set
+``BOW_QUERY_CONCURRENCY_SCOPE=global``: after the local semaphore, each query
+also takes a lease row in the app DB (`app.services.query_lease_service`), so
+the cap is enforced cluster-wide. Every query path takes one — the agent, a
+step rerun, a widget, an export — because the lease reaches the app DB
+through its own event loop and session factory (`_LeaseLoop`), not through
+whatever the caller happened to pass in. The semaphore stays in front as the fast
+path — it keeps at most `cap` queries per replica polling the lease table, and
+when the cluster is not contended the claim is a single round trip. Leases
+queue fairly (first come, first served across replicas), expire if their
+worker dies (`BOW_QUERY_LEASE_TTL_SECONDS`, renewed by a background thread
+while the query runs), and fail open to the per-replica cap if the app DB
+cannot be reached — the lease table protects the source, it must not become a
+second thing that can take queries down.
+
+Queue depth — local waiters, and the cluster-wide waiters this replica last
+observed — is exported via `stats()` and the `datasource.slot_*` span
+attributes.
 """
 
+import asyncio
 import logging
+import os
+import socket
 import threading
+import time
+import uuid
 from contextlib import contextmanager
+from datetime import datetime
 from typing import Dict, Optional, Tuple
 
 logger = logging.getLogger(__name__)
@@ -41,6 +61,23 @@ _lock = threading.Lock()
 # connection_id -> (limit the semaphore was built for, semaphore)
 _semaphores: Dict[str, Tuple[int, threading.BoundedSemaphore]] = {}
 _in_flight: Dict[str, int] = {}
+# Queries currently waiting for a slot (semaphore or lease) in this process.
+_waiting: Dict[str, int] = {}
+# Cluster-wide waiters on each connection as last observed by a lease claim.
+_cluster_waiting: Dict[str, int] = {}
+# Held leases this process must keep renewing: lease_id -> (context, connection_id)
+_held_leases: Dict[str, tuple] = {}
+_renewer: Optional[threading.Thread] = None
+_lease_loop: Optional["_LeaseLoop"] = None
+# When building the lease loop last failed (monotonic); None if it has not.
+_lease_loop_failed_at: Optional[float] = None
+
+SCOPE_REPLICA = "replica"
+SCOPE_GLOBAL = "global"
+DEFAULT_LEASE_TTL_SECONDS = 30.0
+DEFAULT_LEASE_POLL_SECONDS = 0.25
+DEFAULT_LEASE_LOOP_RETRY_SECONDS = 60.0
+_HOLDER = f"{socket.gethostname()}:{os.getpid()}"[:128]
 
 
 class ConnectionBusyError(Exception):
@@ -64,8 +101,37 @@ class ConnectionBusyError(Exception):
         self.waited = waited
 
 
+def scope() -> str:
+    """``global`` when BOW_QUERY_CONCURRENCY_SCOPE asks for DB leases, else ``replica``."""
+    value = (os.environ.get("BOW_QUERY_CONCURRENCY_SCOPE") or "").strip().lower()
+    return SCOPE_GLOBAL if value == SCOPE_GLOBAL else SCOPE_REPLICA
+
+
+def _env_seconds(name: str, default: float) -> float:
+    try:
+        value = float(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+    return value if value > 0 else default
+
+
+def lease_ttl_seconds() -> float:
+    return _env_seconds("BOW_QUERY_LEASE_TTL_SECONDS", DEFAULT_LEASE_TTL_SECONDS)
+
+
+def lease_poll_seconds() -> float:
+    return _env_seconds("BOW_QUERY_LEASE_POLL_SECONDS", DEFAULT_LEASE_POLL_SECONDS)
+
+
+def lease_loop_retry_seconds() -> float:
+    return _env_seconds("BOW_QUERY_LEASE_RETRY_SECONDS", DEFAULT_LEASE_LOOP_RETRY_SECONDS)
+
+
 def effective_limit(client, organization_settings) -> int:
-    """Resolve the per-replica concurrency cap for `client`'s connection.
+    """Resolve the concurrency cap for `client`'s connection.
+
+    Per replica in the default scope, cluster-wide with
+    ``BOW_QUERY_CONCURRENCY_SCOPE=global`` — the same number either way.
 
     Same precedence as the query timeout: the connection's own config wins,
     then the org default, then the built-in. A connection setting can only be a
@@ -100,48 +166,257 @@ def _semaphore_for(connection_id: str, limit: int) -> threading.BoundedSemaphore
         return sem
 
 
+def _adjust(counts: Dict[str, int], connection_id: str, delta: int) -> None:
+    with _lock:
+        value = counts.get(connection_id, 0) + delta
+        if value > 0:
+            counts[connection_id] = value
+        else:
+            counts.pop(connection_id, None)
+
+
+def _release_semaphore(sem: threading.BoundedSemaphore) -> None:
+    try:
+        sem.release()
+    except ValueError:
+        # BoundedSemaphore guards against over-release, which can happen
+        # once if the cap was changed mid-query and the semaphore swapped.
+        logger.debug("Concurrency slot released after a cap change")
+
+
+class _LeaseLoop:
+    """The app DB as seen from a query thread: a session maker and `run_blocking`.
+
+    Queries run on code-exec pool threads with no event loop of their own, and
+    most callers (step reruns, widgets, exports) have no usage context to lend
+    one. A daemon thread runs a private loop for the lease calls, and the
+    sessions come from a NullPool engine so no pooled connection is ever
+    shared with another loop (see `create_async_database_engine_for_indexing`).
+    """
+
+    def __init__(self):
+        from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+        from app.settings.database import create_async_database_engine_for_indexing
+
+        self.session_maker = async_sessionmaker(
+            create_async_database_engine_for_indexing(),
+            expire_on_commit=False, class_=AsyncSession,
+        )
+        self.loop = asyncio.new_event_loop()
+        threading.Thread(
+            target=self.loop.run_forever, name="bow-query-lease-loop", daemon=True,
+        ).start()
+
+    def run_blocking(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+
+
+def _default_lease_context() -> Optional[_LeaseLoop]:
+    """The process-wide `_LeaseLoop`, built on first use; None if it cannot be.
+
+    A failed build is remembered for `BOW_QUERY_LEASE_RETRY_SECONDS`: until
+    then queries go straight to the per-replica cap, rather than each one
+    paying for another engine and thread and logging the same warning.
+    """
+    global _lease_loop, _lease_loop_failed_at
+    with _lock:
+        if _lease_loop is None:
+            now = time.monotonic()
+            if (_lease_loop_failed_at is not None
+                    and now - _lease_loop_failed_at < lease_loop_retry_seconds()):
+                return None
+            try:
+                _lease_loop = _LeaseLoop()
+            except Exception as e:
+                _lease_loop_failed_at = now
+                logger.warning(
+                    "Cluster-wide query slots unavailable; falling back to the "
+                    "per-replica cap for %.0fs: %s", lease_loop_retry_seconds(), e,
+                )
+                return None
+            _lease_loop_failed_at = None
+        return _lease_loop
+
+
+def _acquire_lease(context, connection_id: str, limit: int, deadline: float,
+                   started: float, connection_name: Optional[str]) -> Optional[str]:
+    """Queue for and claim a cluster-wide lease; returns its id.
+
+    Returns None — and the query proceeds under the per-replica cap alone —
+    if the lease table cannot be reached. Raises `ConnectionBusyError` when
+    the queue does not reach this query before `deadline`.
+    """
+    from app.services import query_lease_service as leases
+
+    ttl = lease_ttl_seconds()
+    poll = min(lease_poll_seconds(), ttl / 3)
+    lease_id = str(uuid.uuid4())
+    common = dict(
+        lease_id=lease_id,
+        connection_id=connection_id,
+        holder=_HOLDER,
+        enqueued_at=datetime.utcnow(),
+    )
+    try:
+        context.run_blocking(
+            leases.with_session(context, leases.enqueue, ttl_seconds=ttl, **common)
+        )
+    except Exception as e:
+        logger.warning(
+            "Cluster-wide query slot unavailable for connection %s; "
+            "falling back to the per-replica cap: %s", connection_id, e,
+        )
+        return None
+
+    _adjust(_waiting, connection_id, 1)
+    try:
+        while True:
+            try:
+                claimed, waiting = context.run_blocking(
+                    leases.with_session(
+                        context, leases.try_claim, limit=limit, ttl_seconds=ttl, **common
+                    )
+                )
+            except Exception as e:
+                logger.warning(
+                    "Cluster-wide query slot unavailable for connection %s; "
+                    "falling back to the per-replica cap: %s", connection_id, e,
+                )
+                _release_lease(context, lease_id)
+                return None
+            with _lock:
+                _cluster_waiting[connection_id] = waiting
+            if claimed:
+                _track_lease(lease_id, context, connection_id)
+                return lease_id
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                _release_lease(context, lease_id)
+                raise ConnectionBusyError(connection_name, limit, time.monotonic() - started)
+            time.sleep(min(poll, remaining))
+    finally:
+        _adjust(_waiting, connection_id, -1)
+
+
+def _release_lease(context, lease_id: str) -> None:
+    """Delete a lease row. Best effort: a row left behind expires on its own."""
+    from app.services import query_lease_service as leases
+
+    with _lock:
+        _held_leases.pop(lease_id, None)
+    try:
+        context.run_blocking(leases.with_session(context, leases.release, lease_id=lease_id))
+    except Exception as e:
+        logger.debug("Query lease %s not released, it will expire: %s", lease_id, e)
+
+
+def _track_lease(lease_id: str, context, connection_id: str) -> None:
+    """Keep a held lease alive until it is released (see `_renew_leases`)."""
+    global _renewer
+    with _lock:
+        _held_leases[lease_id] = (context, connection_id)
+        if _renewer is None or not _renewer.is_alive():
+            _renewer = threading.Thread(
+                target=_renew_leases, name="bow-query-lease-renewer", daemon=True,
+            )
+            _renewer.start()
+
+
+def _renew_leases() -> None:
+    """Background heartbeat for this process's held leases.
+
+    A query holds its lease for as long as it runs, which can be far longer
+    than the TTL, and the thread running it is blocked inside the driver. This
+    thread pushes every held lease's expiry forward at a third of the TTL; if
+    the process dies the heartbeat stops with it and the rows expire. Exits
+    when nothing is held; `_track_lease` starts a new one on demand.
+    """
+    global _renewer
+    from app.services import query_lease_service as leases
+
+    me = threading.current_thread()
+    while True:
+        ttl = lease_ttl_seconds()
+        time.sleep(ttl / 3)
+        with _lock:
+            if _renewer is not me:
+                return  # superseded (reset())
+            if not _held_leases:
+                _renewer = None
+                return
+            batches: Dict[int, tuple] = {}
+            for lease_id, (context, _connection_id) in _held_leases.items():
+                batches.setdefault(id(context), (context, []))[1].append(lease_id)
+        for context, lease_ids in batches.values():
+            try:
+                context.run_blocking(
+                    leases.with_session(
+                        context, leases.renew, lease_ids=lease_ids, ttl_seconds=ttl,
+                    )
+                )
+            except Exception as e:
+                logger.debug("Could not renew %d query lease(s): %s", len(lease_ids), e)
+
+
 @contextmanager
 def slot(connection_id: Optional[str], limit: int, wait_seconds: float,
-         connection_name: Optional[str] = None):
+         connection_name: Optional[str] = None, lease_context=None):
     """Hold a concurrency slot for `connection_id` for the duration of a query.
 
     A missing `connection_id` (indexing, connection tests, anything built
     outside the agent path) is a no-op — those paths are not the burst source
     and gating them would let a slow agent query block a health check.
+
+    In the global scope the query also takes a cluster-wide lease, through
+    the process's `_LeaseLoop` unless `lease_context` supplies another session
+    maker and `run_blocking`. The wait budget covers both stages.
     """
     if not connection_id:
         yield False
         return
 
-    sem = _semaphore_for(str(connection_id), limit)
-    import time
+    cid = str(connection_id)
+    sem = _semaphore_for(cid, limit)
+    budget = max(1.0, float(wait_seconds))
     t0 = time.monotonic()
-    acquired = sem.acquire(timeout=max(1.0, float(wait_seconds)))
-    waited = time.monotonic() - t0
+    _adjust(_waiting, cid, 1)
+    try:
+        acquired = sem.acquire(timeout=budget)
+    finally:
+        _adjust(_waiting, cid, -1)
     if not acquired:
-        raise ConnectionBusyError(connection_name, limit, waited)
+        raise ConnectionBusyError(connection_name, limit, time.monotonic() - t0)
+
+    lease_id = None
+    if scope() == SCOPE_GLOBAL:
+        lease_context = lease_context or _default_lease_context()
+    else:
+        lease_context = None
+    if lease_context is not None:
+        try:
+            lease_id = _acquire_lease(
+                lease_context, cid, limit, deadline=t0 + budget,
+                started=t0, connection_name=connection_name,
+            )
+        except BaseException:
+            _release_semaphore(sem)
+            raise
+
+    waited = time.monotonic() - t0
     if waited > 0.5:
         logger.info(
-            "Query queued %.1fs for a slot on connection %s (limit %d)",
-            waited, connection_id, limit,
+            "Query queued %.1fs for a slot on connection %s (limit %d, %s)",
+            waited, connection_id, limit, "cluster" if lease_id else "replica",
         )
-    with _lock:
-        _in_flight[str(connection_id)] = _in_flight.get(str(connection_id), 0) + 1
+    _adjust(_in_flight, cid, 1)
     try:
         yield True
     finally:
-        with _lock:
-            remaining = _in_flight.get(str(connection_id), 1) - 1
-            if remaining > 0:
-                _in_flight[str(connection_id)] = remaining
-            else:
-                _in_flight.pop(str(connection_id), None)
-        try:
-            sem.release()
-        except ValueError:
-            # BoundedSemaphore guards against over-release, which can happen
-            # once if the cap was changed mid-query and the semaphore swapped.
-            logger.debug("Concurrency slot released after a cap change")
+        _adjust(_in_flight, cid, -1)
+        if lease_id is not None:
+            _release_lease(lease_context, lease_id)
+        _release_semaphore(sem)
 
 
 def in_flight(connection_id: str) -> int:
@@ -150,8 +425,42 @@ def in_flight(connection_id: str) -> int:
         return _in_flight.get(str(connection_id), 0)
 
 
+def queue_depth(connection_id: str) -> int:
+    """Queries in this process waiting for a slot on `connection_id`."""
+    with _lock:
+        return _waiting.get(str(connection_id), 0)
+
+
+def stats() -> dict:
+    """Per-connection in-flight and queued queries, for metrics/diagnostics.
+
+    ``cluster_waiting`` is the cluster-wide queue this replica saw on its last
+    lease claim (global scope only); it is a sample, not a live count.
+    """
+    with _lock:
+        ids = set(_in_flight) | set(_waiting) | set(_cluster_waiting)
+        return {
+            "scope": scope(),
+            "held_leases": len(_held_leases),
+            "connections": {
+                cid: {
+                    "in_flight": _in_flight.get(cid, 0),
+                    "waiting": _waiting.get(cid, 0),
+                    "cluster_waiting": _cluster_waiting.get(cid),
+                }
+                for cid in ids
+            },
+        }
+
+
 def reset() -> None:
-    """Test helper — drop all semaphores."""
+    """Test helper — drop all semaphores and counters; orphan the renewer."""
+    global _renewer, _lease_loop_failed_at
     with _lock:
         _semaphores.clear()
         _in_flight.clear()
+        _waiting.clear()
+        _cluster_waiting.clear()
+        _held_leases.clear()
+        _renewer = None
+        _lease_loop_failed_at = None
@@ -0,0 +1,560 @@
+"""Short-lived cache of source query results for agent-generated code.
+
+Every `execute_query` that generated code makes goes to the source, and a lot
+of them are the same statement: the coder's retry re-runs the queries that
+already worked before the one that failed, `rerun_report_steps` replays a
+report's steps one after another, and three people asking the same question
+about the same warehouse produce three identical scans. The source does the
+work each time and BOW pays the rate-limit and quota cost each time.
+
+This cache sits in `QueryCapturingClientWrapper`, in front of the concurrency
+slot, and answers a repeated statement from memory for a short, per-connection
+TTL. It is off until someone opts in: with no TTL on the connection and none
+on the org, every statement goes to the source, because a reused answer can
+be up to a TTL old and nobody should see that without having asked for it.
+
+  * **Key** — (connection id, credential fingerprint, normalized SQL, extra
+    call arguments). The credential fingerprint is a digest of the parameters
+    the client was built with, stashed on the client when it is constructed,
+    so a `user_required` connection caches per user credential and a
+    `system_only` connection is shared by everyone allowed to build its client
+    (access is decided before a client exists). A client that carries no
+    fingerprint is never cached — there is no safe identity to share under.
+    Editing the connection or rotating a password changes the fingerprint, so
+    stale entries are never looked up again.
+  * **Only plain reads** — a single SELECT/WITH statement. Normalization
+    strips comments and collapses whitespace outside quoted text, nothing
+    else; two statements that differ in anything but layout are two entries.
+  * **Volatile SQL bypasses** — NOW(), CURRENT_DATE, RANDOM(), NEWID(),
+    TABLESAMPLE and friends mean "run it again"; those statements always go to
+    the source.
+  * **Bytes, not entries** — the in-memory tier is an LRU bounded by
+    `BOW_RESULT_CACHE_BYTES`. A frame larger than `BOW_RESULT_CACHE_SPILL_BYTES`
+    is written to an Arrow IPC file instead, bounded by
+    `BOW_RESULT_CACHE_DISK_BYTES`. Spilled files are sealed with AES-GCM under
+    a key that only ever lives in this process's memory: rows fetched with one
+    person's credentials are not left readable on disk, and a file outliving
+    its process is just noise.
+  * **Copies out** — generated code mutates the frames it gets back
+    (`df["x"] = ...`), so a hit always returns a fresh copy.
+
+A hit is recorded in `captured_timings` with `"cache": "hit"` and skips the
+rate limit, the data-query quota, the data-bytes quota and the concurrency
+slot: the source was not touched, so none of those budgets were spent.
+
+**Scope: per process.** Like the engine pool, each worker keeps its own
+entries; with N workers the same statement can reach the source up to N times
+per TTL, which is still a bound where there was none.
+"""
+
+import atexit
+import copy
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Used when neither the connection nor the org configures a TTL. Zero means
+# off: reuse trades freshness for source load, and that is the org's call (or
+# the connection's), not something every org gets without asking.
+DEFAULT_TTL_SECONDS = 0
+
+DEFAULT_MEMORY_BYTES = 256 * 1024 * 1024
+DEFAULT_SPILL_BYTES = 16 * 1024 * 1024
+DEFAULT_DISK_BYTES = 2 * 1024 * 1024 * 1024
+# AES-GCM in `cryptography` seals at most 2**31 - 1 bytes in one call; a
+# result bigger than this is not worth keeping anyway.
+MAX_SPILL_ENTRY_BYTES = 1024 * 1024 * 1024
+# Upper bound on entries regardless of size, so a storm of tiny results cannot
+# grow the index without limit.
+MAX_ENTRIES = 4096
+
+_lock = threading.Lock()
+_entries: "OrderedDict[Tuple, _Entry]" = OrderedDict()
+_memory_bytes = 0
+_disk_bytes = 0
+_spill_dir: Optional[str] = None
+_spill_key: Optional[bytes] = None
+_metrics = {
+    "hits": 0,
+    "misses": 0,
+    "bypassed": 0,
+    "stores": 0,
+    "spills": 0,
+    "evictions": 0,
+    "expired": 0,
+}
+
+
+class _Entry:
+    __slots__ = ("value", "path", "nbytes", "result_bytes", "rows", "stored_at", "expires_at")
+
+    def __init__(self, value, path, nbytes, result_bytes, rows, ttl):
+        now = time.monotonic()
+        self.value = value
+        self.path = path
+        self.nbytes = nbytes
+        self.result_bytes = result_bytes
+        self.rows = rows
+        self.stored_at = now
+        self.expires_at = now + ttl
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(float(os.environ.get(name, default)))
+    except (TypeError, ValueError):
+        return int(default)
+
+
+def memory_budget() -> int:
+    return _env_int("BOW_RESULT_CACHE_BYTES", DEFAULT_MEMORY_BYTES)
+
+
+def spill_threshold() -> int:
+    return _env_int("BOW_RESULT_CACHE_SPILL_BYTES", DEFAULT_SPILL_BYTES)
+
+
+def disk_budget() -> int:
+    return _env_int("BOW_RESULT_CACHE_DISK_BYTES", DEFAULT_DISK_BYTES)
+
+
+# -- TTL ------------------------------------------------------------------
+
+def effective_ttl(client, organization_settings) -> int:
+    """Resolve how long `client`'s results may be reused, in seconds.
+
+    Same precedence as the query timeout and the concurrency cap: the
+    connection's own config, then the org default, then the built-in. Unlike
+    those, 0 is meaningful at every layer — it is how an admin says "this
+    source is live, never reuse its answers" — so only negative or non-numeric
+    values are ignored.
+    """
+    conn_value = getattr(client, "_bow_connection_result_cache_ttl", None)
+    if isinstance(conn_value, (int, float)) and not isinstance(conn_value, bool) and conn_value >= 0:
+        return int(conn_value)
+    if organization_settings is not None:
+        try:
+            cfg = organization_settings.get_config("query_result_cache_ttl_seconds")
+            value = cfg.value if hasattr(cfg, "value") else cfg
+            if isinstance(value, (int, float)) and not isinstance(value, bool) and value >= 0:
+                return int(value)
+        except Exception:
+            pass
+    return DEFAULT_TTL_SECONDS
+
+
+# -- keys -----------------------------------------------------------------
+
+def credential_fingerprint(params: dict) -> str:
+    """A digest of the parameters a client was constructed with.
+
+    Stored on the client instead of the parameters themselves; the cache only
+    ever needs to know whether two clients authenticate identically.
+    """
+    try:
+        raw = json.dumps(params or {}, sort_keys=True, default=str)
+    except Exception:
+        raw = repr(sorted((params or {}).items(), key=lambda kv: str(kv[0])))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]
+
+
+# Quoted text (kept verbatim), comments (dropped) and whitespace (collapsed).
+_SQL_TOKEN_RE = re.compile(
+    r"""('(?:[^']|'')*'|"(?:[^"]|"")*"|`[^`]*`)|(--[^\n]*|/\*.*?\*/)|(\s+)""",
+    re.DOTALL,
+)
+_QUOTED_RE = re.compile(r"""'(?:[^']|'')*'|"(?:[^"]|"")*"|`[^`]*`""")
+_READ_START_RE = re.compile(r"^\(*\s*(select|with)\b", re.IGNORECASE)
+_VOLATILE_RE = re.compile(
+    r"\b("
+    r"now|current_timestamp|current_date|current_time|localtimestamp|localtime|"
+    r"sysdate|systimestamp|sysdatetime|sysutcdatetime|getdate|getutcdate|"
+    r"utc_timestamp|utc_date|unix_timestamp|clock_timestamp|statement_timestamp|"
+    r"transaction_timestamp|timeofday|today|"
+    r"random|rand|newid|uuid|gen_random_uuid|uuid_generate_v4|dbms_random|"
+    r"tablesample|nextval|currval|last_insert_id"
+    r")\b",
+    re.IGNORECASE,
+)
+
+
+def normalize_sql(sql: str) -> str:
+    """Strip comments and collapse whitespace outside quoted text."""
+    def _sub(m):
+        return m.group(1) if m.group(1) else " "
+
+    out = _SQL_TOKEN_RE.sub(_sub, sql)
+    # Dropping a comment can leave two runs of whitespace side by side.
+    out = _SQL_TOKEN_RE.sub(_sub, out).strip()
+    while out.endswith(";"):
+        out = out[:-1].rstrip()
+    return out
+
+
+def cacheable_sql(sql: str) -> Optional[str]:
+    """The normalized statement if it may be cached, else None.
+
+    Checks run on the statement with quoted text blanked, so a literal that
+    happens to say 'now' does not bypass and a `;` inside a string does not
+    look like a second statement.
+    """
+    if not isinstance(sql, str) or not sql.strip():
+        return None
+    normalized = normalize_sql(sql)
+    skeleton = _QUOTED_RE.sub("''", normalized)
+    if not _READ_START_RE.match(skeleton):
+        return None
+    if ";" in skeleton or _VOLATILE_RE.search(skeleton):
+        return None
+    return normalized
+
+
+def cache_key(client, query: Any, args: tuple, kwargs: dict) -> Optional[Tuple]:
+    """The cache key for this call, or None when it must go to the source."""
+    connection_id = getattr(client, "_bow_connection_id", None)
+    identity = getattr(client, "_bow_credential_identity", None)
+    if not connection_id or not identity:
+        return None
+    if not getattr(client, "RESULT_CACHE", True):
+        return None
+    normalized = cacheable_sql(query)
+    if normalized is None:
+        return None
+    if args or kwargs:
+        try:
+            extra = json.dumps([list(args), kwargs], sort_keys=True)
+        except (TypeError, ValueError):
+            return None
+    else:
+        extra = ""
+    return (str(connection_id), str(identity), normalized, extra)
+
+
+def memo_key(client, query: Any, args: tuple, kwargs: dict) -> Optional[Tuple]:
+    """The `RunMemo` key for this call, or None when it must run on its own.
+
+    Scoped to one client object rather than to a credential: a memo lives for
+    one batch run whose steps share the same client instances, so identity
+    is given.
+    """
+    normalized = cacheable_sql(query)
+    if normalized is None:
+        return None
+    if args or kwargs:
+        try:
+            extra = json.dumps([list(args), kwargs], sort_keys=True)
+        except (TypeError, ValueError):
+            return None
+    else:
+        extra = ""
+    return (id(client), normalized, extra)
+
+
+# -- storage --------------------------------------------------------------
+
+def _frame_bytes(value) -> int:
+    import pandas as pd
+
+    if isinstance(value, pd.DataFrame):
+        try:
+            return int(value.memory_usage(deep=True, index=True).sum())
+        except Exception:
+            return 0
+    try:
+        return len(json.dumps(value, default=str).encode("utf-8"))
+    except Exception:
+        return 0
+
+
+def _copy_out(value):
+    import pandas as pd
+
+    if isinstance(value, pd.DataFrame):
+        return value.copy(deep=True)
+    return copy.deepcopy(value)
+
+
+def _spill_paths() -> Tuple[str, bytes]:
+    """This process's spill directory and sealing key, created on first use."""
+    global _spill_dir, _spill_key
+    if _spill_dir is None:
+        base = os.environ.get("BOW_RESULT_CACHE_DIR") or os.path.join(
+            tempfile.gettempdir(), "bow-result-cache"
+        )
+        path = os.path.join(base, f"{os.getpid()}-{uuid.uuid4().hex[:8]}")
+        os.makedirs(path, mode=0o700, exist_ok=True)
+        from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+        _spill_key = AESGCM.generate_key(bit_length=256)
+        _spill_dir = path
+        atexit.register(shutil.rmtree, path, True)
+    return _spill_dir, _spill_key
+
+
+def _spill(frame) -> Optional[Tuple[str, int]]:
+    """Write `frame` to a sealed Arrow IPC file; None if it cannot be."""
+    import pyarrow as pa
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+    try:
+        table = pa.Table.from_pandas(frame, preserve_index=True)
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        payload = sink.getvalue().to_pybytes()
+        if len(payload) > MAX_SPILL_ENTRY_BYTES:
+            return None
+        with _lock:
+            directory, key = _spill_paths()
+        nonce = os.urandom(12)
+        sealed = nonce + AESGCM(key).encrypt(nonce, payload, None)
+        path = os.path.join(directory, f"{uuid.uuid4().hex}.arrow")
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(sealed)
+        return path, len(sealed)
+    except Exception as e:
+        logger.debug("Result not spilled: %s", e)
+        return None
+
+
+def _load_spilled(path: str):
+    import pyarrow as pa
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+    with open(path, "rb") as fh:
+        sealed = fh.read()
+    payload = AESGCM(_spill_key).decrypt(sealed[:12], sealed[12:], None)
+    return pa.ipc.open_file(pa.BufferReader(payload)).read_all().to_pandas()
+
+
+def _remove_file(path: Optional[str]) -> None:
+    if not path:
+        return
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _drop(key: Tuple) -> Optional["_Entry"]:
+    """Remove `key` from the index. Caller holds `_lock`."""
+    global _memory_bytes, _disk_bytes
+    entry = _entries.pop(key, None)
+    if entry is None:
+        return None
+    if entry.path:
+        _disk_bytes -= entry.nbytes
+    else:
+        _memory_bytes -= entry.nbytes
+    return entry
+
+
+def _evict_over_budget() -> list:
+    """Drop least-recently-used entries until both tiers fit. Caller holds `_lock`."""
+    mem_cap, disk_cap = memory_budget(), disk_budget()
+    dropped = []
+    for key in list(_entries.keys()):
+        if _memory_bytes <= mem_cap and _disk_bytes <= disk_cap and len(_entries) <= MAX_ENTRIES:
+            break
+        entry = _entries[key]
+        over_mem = _memory_bytes > mem_cap and not entry.path
+        over_disk = _disk_bytes > disk_cap and entry.path
+        if over_mem or over_disk or len(_entries) > MAX_ENTRIES:
+            dropped.append(_drop(key))
+            _metrics["evictions"] += 1
+    return dropped
+
+
+# -- public API -----------------------------------------------------------
+
+def get(key: Tuple) -> Optional[Tuple[Any, dict]]:
+    """A fresh copy of the cached result and its bookkeeping, or None."""
+    now = time.monotonic()
+    with _lock:
+        entry = _entries.get(key)
+        if entry is not None and now >= entry.expires_at:
+            _drop(key)
+            _metrics["expired"] += 1
+            expired, entry = entry, None
+        else:
+            expired = None
+            if entry is not None:
+                _entries.move_to_end(key)
+        if entry is None:
+            _metrics["misses"] += 1
+    if expired is not None:
+        _remove_file(expired.path)
+    if entry is None:
+        return None
+    try:
+        value = _load_spilled(entry.path) if entry.path else _copy_out(entry.value)
+    except Exception as e:
+        # A spill file that cannot be read back is a miss, not an error.
+        logger.debug("Cached result unreadable: %s", e)
+        with _lock:
+            if _entries.get(key) is entry:
+                _drop(key)
+            _metrics["misses"] += 1
+        _remove_file(entry.path)
+        return None
+    with _lock:
+        _metrics["hits"] += 1
+    return value, {
+        "rows": entry.rows,
+        "result_bytes": entry.result_bytes,
+        "age_s": round(now - entry.stored_at, 1),
+        "spilled": bool(entry.path),
+    }
+
+
+def put(key: Tuple, value: Any, ttl: int, *, result_bytes: int = 0,
+        rows: Optional[int] = None) -> bool:
+    """Store a copy of `value` under `key` for `ttl` seconds.
+
+    Returns whether it was kept. Results over the spill threshold that cannot
+    be written as Arrow (non-frames, mixed-type object columns) are skipped.
+    """
+    global _memory_bytes, _disk_bytes
+    import pandas as pd
+
+    if ttl <= 0 or value is None:
+        return False
+    nbytes = _frame_bytes(value)
+    path = None
+    if nbytes > spill_threshold():
+        if not isinstance(value, pd.DataFrame):
+            return False
+        spilled = _spill(value)
+        if spilled is None:
+            return False
+        path, nbytes = spilled
+        if nbytes > disk_budget():
+            _remove_file(path)
+            return False
+    else:
+        if nbytes > memory_budget():
+            return False
+        value = _copy_out(value)
+    entry = _Entry(None if path else value, path, nbytes, result_bytes, rows, ttl)
+    with _lock:
+        replaced = _drop(key)
+        _entries[key] = entry
+        if path:
+            _disk_bytes += nbytes
+            _metrics["spills"] += 1
+        else:
+            _memory_bytes += nbytes
+        _metrics["stores"] += 1
+        dropped = _evict_over_budget()
+    for e in [replaced, *dropped]:
+        if e is not None:
+            _remove_file(e.path)
+    return True
+
+
+def record_bypass() -> None:
+    with _lock:
+        _metrics["bypassed"] += 1
+
+
+def clear() -> None:
+    """Test/shutdown helper — drop every entry, delete spill files, reset metrics."""
+    global _memory_bytes, _disk_bytes
+    with _lock:
+        paths = [e.path for e in _entries.values() if e.path]
+        _entries.clear()
+        _memory_bytes = 0
+        _disk_bytes = 0
+        for k in _metrics:
+            _metrics[k] = 0
+    for p in paths:
+        _remove_file(p)
+
+
+def stats() -> dict:
+    with _lock:
+        lookups = _metrics["hits"] + _metrics["misses"]
+        return {
+            "entries": len(_entries),
+            "memory_bytes": _memory_bytes,
+            "disk_bytes": _disk_bytes,
+            "memory_budget_bytes": memory_budget(),
+            "disk_budget_bytes": disk_budget(),
+            **_metrics,
+            "hit_ratio": round(_metrics["hits"] / lookups, 3) if lookups else 0.0,
+        }
+
+
+# -- run-scoped single flight --------------------------------------------
+
+class _Flight:
+    __slots__ = ("done", "value", "error", "meta")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error: Optional[BaseException] = None
+        self.meta: dict = {}
+
+    def set_result(self, value, *, rows=None, result_bytes=0) -> None:
+        self.value = _copy_out(value)
+        self.meta = {"rows": rows, "result_bytes": result_bytes}
+        self.done.set()
+
+    def set_error(self, exc: BaseException) -> None:
+        self.error = exc
+        self.done.set()
+
+    def finish(self) -> None:
+        if not self.done.is_set():
+            self.set_error(RuntimeError("The shared query did not complete"))
+
+    def wait(self):
+        self.done.wait()
+        if self.error is not None:
+            raise self.error
+        return _copy_out(self.value), self.meta
+
+
+class RunMemo:
+    """Identical queries within one batch run execute once.
+
+    A report rerun executes many steps against the same clients at the same
+    time, and dashboards repeat themselves: a KPI tile and the chart beside it
+    often issue the same statement. The first step to issue a query runs it;
+    any other step issuing the same normalized statement on the same client
+    while it runs, or after, waits for and receives a copy of that result.
+    Failures are shared too — the statement would have failed the same way.
+
+    Unlike the TTL cache this needs no credential fingerprint and no expiry:
+    it lives exactly as long as the run and is dropped with it.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights: dict = {}
+        self.shared = 0
+
+    def join(self, key: Tuple) -> Tuple["_Flight", bool]:
+        """(flight, True) for the caller that must run the query; (flight,
+        False) for one that should wait on it."""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                self.shared += 1
+                return flight, False
+            flight = _Flight()
+            self._flights[key] = flight
+            return flight, True
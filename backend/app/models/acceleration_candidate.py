@@ -0,0 +1,50 @@
+from sqlalchemy import (
+    Column, String, Integer, Float, DateTime, Text, JSON,
+    ForeignKey, UniqueConstraint,
+)
+
+from app.models.base import BaseSchema
+
+
+CANDIDATE_OPEN = "open"
+CANDIDATE_ACCEPTED = "accepted"
+CANDIDATE_DISMISSED = "dismissed"
+
+
+class AccelerationCandidate(BaseSchema):
+    """A custom query the acceleration advisor proposes for a connection.
+
+    One row per cluster of captured queries over the same set of tables
+    (`cluster_key`), recomputed by the advisor job. `status` is the admin's
+    decision and survives recomputation: a dismissed proposal stays dismissed
+    and an accepted one points at the custom query it became, instead of being
+    proposed again the next hour.
+    """
+    __tablename__ = "acceleration_candidates"
+    __table_args__ = (
+        UniqueConstraint("connection_id", "cluster_key", name="uq_accel_candidate_cluster"),
+    )
+
+    organization_id = Column(
+        String(36), ForeignKey("organizations.id", ondelete="CASCADE"), nullable=False,
+    )
+    connection_id = Column(
+        String(36), ForeignKey("connections.id", ondelete="CASCADE"), nullable=False, index=True,
+    )
+    cluster_key = Column(String(64), nullable=False)
+    tables = Column(JSON, nullable=False, default=list)
+    definition_sql = Column(Text, nullable=False)
+    suggested_name = Column(String(63), nullable=False)
+    # Member fingerprints and what they cost the source over the lookback.
+    fingerprints = Column(JSON, nullable=False, default=list)
+    query_shapes = Column(Integer, nullable=False, default=0)
+    executions = Column(Integer, nullable=False, default=0)
+    total_ms = Column(Float, nullable=False, default=0.0)
+    score = Column(Float, nullable=False, default=0.0)
+    # `extractor.estimate` for `definition_sql`, plus the budget verdict:
+    # {supported, rows, total_bytes, scan_bytes, note, budget_error}.
+    estimate = Column(JSON, nullable=True)
+    estimated_at = Column(DateTime, nullable=True)
+    status = Column(String(16), nullable=False, default=CANDIDATE_OPEN)
+    custom_query_id = Column(String(36), nullable=True)
+    computed_at = Column(DateTime, nullable=False)
@@ -0,0 +1,40 @@
+from sqlalchemy import JSON, Column, DateTime, ForeignKey, Index, Integer, String, Text
+
+from app.models.base import BaseSchema
+
+
+class AgentRun(BaseSchema):
+    """One agent run waiting for, or held by, a ``bow-agent-worker`` process
+    (``BOW_AGENT_EXECUTION=queue``, see `app.services.agent_run_queue`).
+
+    Web workers insert a row per system completion instead of running the
+    agent themselves. A worker claims a ``queued`` row with a conditional
+    UPDATE (only one claimant's UPDATE matches), which also stamps it as
+    ``holder`` and sets ``lease_expires_at``; the holder pushes that forward
+    while the run is alive. A row still ``running`` past its lease belongs to
+    a dead or wedged worker and is recovered by whichever process sweeps
+    first: re-queued if the run had not produced anything yet, failed
+    otherwise.
+    """
+    __tablename__ = "agent_runs"
+    __table_args__ = (
+        Index("ix_agent_runs_status_enqueued", "status", "enqueued_at"),
+    )
+
+    system_completion_id = Column(
+        String(36),
+        ForeignKey("completions.id", ondelete="CASCADE"),
+        nullable=False,
+        unique=True,
+    )
+    report_id = Column(String(36), nullable=False)
+    head_completion_id = Column(String(36), nullable=False)
+    status = Column(String(16), nullable=False, default="queued")  # queued | running | done | failed
+    options = Column(JSON, nullable=True)           # run parameters the head prompt does not carry
+    attempts = Column(Integer, nullable=False, default=0)
+    holder = Column(String(128), nullable=True)     # "<host>:<pid>" of the claiming worker
+    enqueued_at = Column(DateTime, nullable=False)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
+    error = Column(Text, nullable=True)
@@ -0,0 +1,22 @@
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Integer, String, Text
+
+from app.models.base import Base
+
+
+class CompletionEventRecord(Base):
+    """One SSE event of a completion's stream, in emission order
+    (see `app.streaming.completion_event_log`).
+
+    Keyed by (completion_id, seq) so a Last-Event-ID resume is a single range
+    read. Written in batches by the worker running the completion and pruned
+    by a scheduler job once the completion has finished and aged out.
+    """
+    __tablename__ = "completion_events"
+
+    completion_id = Column(String(36), primary_key=True)
+    seq = Column(Integer, primary_key=True, autoincrement=False)
+    event = Column(String(64), nullable=False)
+    payload = Column(Text, nullable=False)  # the SSEEvent JSON as sent
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow, index=True)
@@ -63,6 +63,22 @@ class ConnectionTable(BaseSchema):
     artifact_key_enc = Column(Text, nullable=True)
     artifact_bytes = Column(BigInteger, nullable=True)
 
+    # --- incremental refresh (kind='bow' only) -----------------------------
+    # 'full' (default) rebuilds the artifact from the whole query every time.
+    # 'incremental' fetches only rows past the stored high-water mark of
+    # `watermark_column` and appends them to a copy of the previous artifact —
+    # or, with `merge_key`, replaces rows sharing that key. Deletes at the
+    # source are invisible to a delta, so every `full_refresh_every`-th refresh
+    # is a full rebuild. See extractor.extract_incremental.
+    refresh_mode = Column(String, nullable=True)               # 'full' | 'incremental'
+    watermark_column = Column(String, nullable=True)
+    merge_key = Column(String, nullable=True)
+    full_refresh_every = Column(Integer, nullable=True)
+    # {"type", "value"} as written by extractor.encode_watermark; None until the
+    # first refresh that names a watermark column, and after any SQL change.
+    watermark_value = Column(JSON, nullable=True)
+    refreshes_since_full = Column(Integer, nullable=False, default=0, server_default="0")
+
     # --- row-level security (kind='bow' only) -------------------------------
     # A materialized relation holds every row the shared credential could see,
     # so RLS filters at read time against who is asking. Enforcement builds a
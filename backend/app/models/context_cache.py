@@ -0,0 +1,227 @@
+import logging
+import uuid
+from datetime import datetime
+
+from sqlalchemy import Column, String, Integer, DateTime, LargeBinary, UniqueConstraint, Index, event, text, bindparam, select
+from sqlalchemy.orm import Session
+
+from app.models.base import BaseSchema
+
+logger = logging.getLogger(__name__)
+
+
+class ContextCacheVersion(BaseSchema):
+    """Monotonic version stamp of an organization's schema or instruction context.
+
+    Cached context sections (`app.ai.context.context_cache`) are keyed by the
+    stamp, so bumping it makes every replica's cached section for that org
+    unreachable at once — no message to fan out, no TTL to wait out. Stamps
+    are bumped right after the writer commits, in a short transaction of
+    their own (see the hooks below), so an entry keyed by the new stamp was
+    always built from the committed rows.
+    """
+    __tablename__ = "context_cache_versions"
+    __table_args__ = (
+        UniqueConstraint("organization_id", "kind", name="uq_context_cache_version_org_kind"),
+    )
+
+    organization_id = Column(String(36), nullable=False)
+    kind = Column(String(16), nullable=False)      # "schema" | "instructions"
+    version = Column(Integer, nullable=False, default=0)
+
+
+class ContextCacheEntry(BaseSchema):
+    """A serialized context section shared by every worker.
+
+    `cache_key` is a digest of the full cache key, version stamps included;
+    `payload` is the section's zlib-compressed JSON. Entries past
+    `expires_at` are never served and are deleted by the next write for the
+    same organization.
+    """
+    __tablename__ = "context_cache_entries"
+    __table_args__ = (
+        Index("ix_context_cache_entries_org_expires", "organization_id", "expires_at"),
+    )
+
+    cache_key = Column(String(64), nullable=False, unique=True)
+    organization_id = Column(String(36), nullable=False)
+    kind = Column(String(16), nullable=False)
+    payload = Column(LargeBinary, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+
+
+# ---------------------------------------------------------------------------
+# Version bumps
+#
+# Which rows feed which cached section. A flush (or bulk statement) that
+# inserts, changes or deletes one of these records the owning organization's
+# stamp on the session; the stamps are bumped once the session commits, and
+# forgotten if it rolls back. Bumping inside the writer's transaction held the
+# stamp's row lock until that transaction ended, so two long writers touching
+# the same org (and its stamp row in different orders relative to their own
+# rows) could deadlock. A crash between commit and bump costs freshness up to
+# the cache TTL, nothing else. TableStats is deliberately absent: usage stats
+# roll up constantly and only nudge the ranking, so they ride on the cache
+# TTL.
+# ---------------------------------------------------------------------------
+
+SCHEMA_MODELS = {
+    "DataSource", "DataSourceTable", "Connection", "ConnectionTable",
+    "UserDataSourceTable", "UserDataSourceColumn",
+    "UserConnectionTable", "UserConnectionColumn",
+}
+INSTRUCTION_MODELS = {
+    "Instruction", "InstructionVersion", "InstructionBuild", "BuildContent",
+    "InstructionReference", "InstructionLabel", "InstructionDirectory",
+    "InstructionDirectoryPlacement",
+}
+
+# model -> (column holding a parent id, SQL resolving parent ids to orgs)
+_ORG_VIA = {
+    "DataSourceTable": ("datasource_id", "SELECT organization_id FROM data_sources WHERE id IN :ids"),
+    "UserDataSourceTable": ("data_source_id", "SELECT organization_id FROM data_sources WHERE id IN :ids"),
+    "ConnectionTable": ("connection_id", "SELECT organization_id FROM connections WHERE id IN :ids"),
+    "UserDataSourceColumn": (
+        "user_data_source_table_id",
+        "SELECT d.organization_id FROM user_data_source_tables t "
+        "JOIN data_sources d ON d.id = t.data_source_id WHERE t.id IN :ids",
+    ),
+    "UserConnectionTable": ("connection_id", "SELECT organization_id FROM connections WHERE id IN :ids"),
+    "UserConnectionColumn": (
+        "user_connection_table_id",
+        "SELECT c.organization_id FROM user_connection_tables t "
+        "JOIN connections c ON c.id = t.connection_id WHERE t.id IN :ids",
+    ),
+    "InstructionVersion": ("instruction_id", "SELECT organization_id FROM instructions WHERE id IN :ids"),
+    "BuildContent": ("build_id", "SELECT organization_id FROM instruction_builds WHERE id IN :ids"),
+    "InstructionReference": ("instruction_id", "SELECT organization_id FROM instructions WHERE id IN :ids"),
+    "InstructionDirectoryPlacement": ("instruction_id", "SELECT organization_id FROM instructions WHERE id IN :ids"),
+}
+
+_BUMP_SQL = text(
+    "INSERT INTO context_cache_versions (id, organization_id, kind, version, created_at, updated_at) "
+    "VALUES (:id, :org, :kind, 1, :now, :now) "
+    "ON CONFLICT (organization_id, kind) DO UPDATE SET "
+    "version = context_cache_versions.version + 1, updated_at = :now"
+)
+
+
+def _kind_of(name: str):
+    if name in SCHEMA_MODELS:
+        return "schema"
+    if name in INSTRUCTION_MODELS:
+        return "instructions"
+    return None
+
+
+_PENDING = "context_cache_bumps"
+
+
+def bump_versions(connection, org_kinds) -> None:
+    """Bump (organization_id, kind) stamps on `connection`, in its transaction.
+
+    Stamps are taken in sorted order, so two bumps over overlapping sets of
+    orgs lock their rows in the same order.
+    """
+    if not org_kinds:
+        return
+    now = datetime.utcnow()
+    for org_id, kind in sorted(org_kinds):
+        connection.execute(_BUMP_SQL, {"id": str(uuid.uuid4()), "org": str(org_id), "kind": kind, "now": now})
+
+
+def _record(session, org_kinds) -> None:
+    if org_kinds:
+        session.info.setdefault(_PENDING, set()).update(org_kinds)
+
+
+def _bump_after_commit(session) -> None:
+    pending = session.info.pop(_PENDING, None)
+    if not pending:
+        return
+    try:
+        # The session's own transaction is over and it cannot emit SQL here;
+        # the bump gets a connection and a transaction of its own.
+        with session.get_bind().begin() as connection:
+            bump_versions(connection, pending)
+    except Exception:
+        # A missed bump costs freshness up to the cache TTL; the write itself
+        # is already committed.
+        logger.warning("context cache version bump failed", exc_info=True)
+
+
+def _forget_after_rollback(session) -> None:
+    session.info.pop(_PENDING, None)
+
+
+def _bump_after_flush(session, flush_context) -> None:
+    try:
+        direct = set()
+        via = {}
+        for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+            name = type(obj).__name__
+            kind = _kind_of(name)
+            if kind is None:
+                continue
+            if obj in session.dirty and not session.is_modified(obj, include_collections=False):
+                continue
+            org_id = getattr(obj, "organization_id", None)
+            if org_id:
+                direct.add((str(org_id), kind))
+            elif name in _ORG_VIA:
+                parent = getattr(obj, _ORG_VIA[name][0], None)
+                if parent:
+                    via.setdefault((name, kind), set()).add(str(parent))
+        if not direct and not via:
+            return
+        connection = session.connection()
+        for (name, kind), ids in via.items():
+            direct |= {(org_id, kind) for org_id in _orgs_via(connection, name, ids)}
+        _record(session, direct)
+    except Exception:
+        # A missed bump costs freshness up to the cache TTL; failing the
+        # caller's write would cost the write.
+        logger.warning("context cache version bump failed", exc_info=True)
+
+
+def _orgs_via(connection, name: str, parent_ids) -> set:
+    sql = text(_ORG_VIA[name][1]).bindparams(bindparam("ids", expanding=True))
+    return {str(org_id) for (org_id,) in connection.execute(sql, {"ids": sorted(parent_ids)}) if org_id}
+
+
+def _bump_on_bulk_write(orm_execute_state) -> None:
+    """Bulk ``update()``/``delete()`` bypass the flush, so their rows are not
+    known to the session. The organizations they touch are read with the
+    statement's own WHERE clause before it runs, and only those stamps are
+    bumped on commit."""
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    name = mapper.class_.__name__ if mapper is not None else None
+    kind = _kind_of(name) if name else None
+    if kind is None:
+        return
+    try:
+        model = mapper.class_
+        column = getattr(model, "organization_id", None)
+        if column is None and name in _ORG_VIA:
+            column = getattr(model, _ORG_VIA[name][0])
+        if column is None:
+            return
+        query = select(column).distinct()
+        whereclause = orm_execute_state.statement.whereclause
+        if whereclause is not None:
+            query = query.where(whereclause)
+        connection = orm_execute_state.session.connection()
+        ids = {str(value) for (value,) in connection.execute(query) if value}
+        if ids and column.key != "organization_id":
+            ids = _orgs_via(connection, name, ids)
+        _record(orm_execute_state.session, {(org_id, kind) for org_id in ids})
+    except Exception:
+        logger.warning("context cache version bump failed", exc_info=True)
+
+
+event.listen(Session, "after_flush", _bump_after_flush)
+event.listen(Session, "do_orm_execute", _bump_on_bulk_write)
+event.listen(Session, "after_commit", _bump_after_commit)
+event.listen(Session, "after_rollback", _forget_after_rollback)
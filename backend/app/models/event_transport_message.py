@@ -0,0 +1,25 @@
+from datetime import datetime
+
+from sqlalchemy import BigInteger, Column, DateTime, Integer, String, Text
+
+from app.models.base import Base
+
+
+class EventTransportMessage(Base):
+    """One cross-worker event that did not travel inline
+    (see `app.streaming.event_transport`).
+
+    On Postgres, only events too large for a NOTIFY payload land here: the
+    notification carries the row id and listeners read the body back. On
+    SQLite, where there is no LISTEN/NOTIFY, every published event is a row
+    and each worker polls for ids past the last one it saw — which is why the
+    key is a monotonic integer rather than the usual uuid. Rows are only
+    needed for seconds and are pruned by a scheduler job.
+    """
+    __tablename__ = "event_transport_messages"
+
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    channel = Column(String, nullable=False)
+    origin = Column(String(128), nullable=False)   # "<host>:<pid>:<nonce>" of the publishing worker
+    payload = Column(Text, nullable=False)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow, index=True)
@@ -0,0 +1,30 @@
+from sqlalchemy import Column, DateTime, Index, Integer, String, Text
+
+from app.models.base import BaseSchema
+
+
+class LLMResponseCacheEntry(BaseSchema):
+    """A stored response of an auxiliary LLM call (judge, titles, follow-ups).
+
+    `cache_key` is a digest of everything that determines the response: the
+    organization, the model row and model id, the sampling temperature, the
+    prompt as sent (after PII redaction) and the tool schemas. `scope` is the
+    call site's usage scope, kept for purging and for the console. The token
+    counts are the original call's, i.e. what each hit saves. Written and read
+    through `app.ai.llm.response_cache`.
+    """
+    __tablename__ = "llm_response_cache_entries"
+    __table_args__ = (
+        Index("ix_llm_response_cache_org_scope", "organization_id", "scope"),
+        Index("ix_llm_response_cache_expires", "expires_at"),
+    )
+
+    cache_key = Column(String(64), nullable=False, unique=True)
+    organization_id = Column(String(36), nullable=True)
+    scope = Column(String, nullable=False)
+    llm_model_id = Column(String(36), nullable=True)
+    response = Column(Text, nullable=False)
+    prompt_tokens = Column(Integer, nullable=False, default=0)
+    completion_tokens = Column(Integer, nullable=False, default=0)
+    hits = Column(Integer, nullable=False, default=0)
+    expires_at = Column(DateTime, nullable=False)
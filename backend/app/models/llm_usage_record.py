@@ -48,3 +48,7 @@ class LLMUsageRecord(BaseSchema):
     routed = Column(Boolean, nullable=False, default=False, index=True)
     baseline_model_id = Column(String, nullable=True)
 
+    # Response cache (app.ai.llm.response_cache): a call answered from the
+    # cache records a row with cache_hit=True and zero tokens and cost, so
+    # call counts per scope stay complete while spend reflects what was paid.
+    cache_hit = Column(Boolean, nullable=False, default=False)
@@ -0,0 +1,39 @@
+from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, UniqueConstraint, Index
+
+from app.models.base import BaseSchema
+
+
+class QueryConcurrencyLease(BaseSchema):
+    """One query's claim on a connection's cluster-wide concurrency cap
+    (`BOW_QUERY_CONCURRENCY_SCOPE=global`, see `app.data_sources.query_concurrency`).
+
+    A row starts as a *waiter* (`slot_no` NULL) when a query asks for a slot and
+    becomes a *holder* when it claims a free slot number in `0..limit-1`. The
+    unique (connection, slot_no) constraint is what makes the claim atomic
+    across replicas: two workers racing for slot 2 both try to write it and
+    exactly one insert survives — no advisory lock or row lock is needed, so
+    the same code runs on Postgres and SQLite. NULL slot numbers never collide,
+    so any number of waiters can queue.
+
+    `enqueued_at` orders the queue (first come, first served across replicas)
+    and `expires_at` is pushed forward by the owning process while the query
+    is alive. A worker that dies stops renewing, and every other worker
+    deletes its rows once they expire — a crashed replica cannot hold a slot
+    for longer than one lease TTL.
+    """
+    __tablename__ = "query_concurrency_leases"
+    __table_args__ = (
+        UniqueConstraint("connection_id", "slot_no", name="uq_query_lease_connection_slot"),
+        Index("ix_query_lease_queue", "connection_id", "enqueued_at"),
+    )
+
+    connection_id = Column(
+        String(36),
+        ForeignKey("connections.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    slot_no = Column(Integer, nullable=True)        # NULL while queued
+    holder = Column(String(128), nullable=False)    # "<host>:<pid>" of the owning process
+    enqueued_at = Column(DateTime, nullable=False)
+    acquired_at = Column(DateTime, nullable=True)
+    expires_at = Column(DateTime, nullable=False)
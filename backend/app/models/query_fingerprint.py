@@ -0,0 +1,72 @@
+from sqlalchemy import (
+    Column, String, Integer, Float, BigInteger, Date, DateTime, Text, JSON,
+    ForeignKey, UniqueConstraint, Index,
+)
+
+from app.models.base import BaseSchema
+
+
+class QueryFingerprint(BaseSchema):
+    """Aggregated history of one query *shape* run against a connection.
+
+    The code-execution wrapper already measures every agent query (SQL,
+    `query_ms`, rows, result bytes) for the step's timings; those samples are
+    buffered on the run's `UsageLimitContext` and folded in here at end of run,
+    one row per (connection, fingerprint). The fingerprint is the statement
+    with comments, whitespace and literal values normalized away, so "revenue
+    for March" and "revenue for April" accumulate on the same row.
+
+    Input to the acceleration advisor (`app.services.acceleration_advisor`),
+    which ranks which custom queries would take the most load off the source.
+    The counters here are lifetime totals; the ranking reads the per-day
+    buckets in `QueryFingerprintDay` so it only weighs recent load.
+    """
+    __tablename__ = "query_fingerprints"
+    __table_args__ = (
+        UniqueConstraint("connection_id", "fingerprint", name="uq_query_fingerprint_connection"),
+        Index("ix_query_fingerprint_recent", "connection_id", "last_seen_at"),
+    )
+
+    organization_id = Column(
+        String(36), ForeignKey("organizations.id", ondelete="CASCADE"), nullable=False,
+    )
+    connection_id = Column(
+        String(36), ForeignKey("connections.id", ondelete="CASCADE"), nullable=False,
+    )
+    fingerprint = Column(String(64), nullable=False)
+    # The most recent statement with this shape, literals intact — what a
+    # proposal materializes.
+    sample_sql = Column(Text, nullable=False)
+    # Relations the statement reads, as written (first spelling seen).
+    tables = Column(JSON, nullable=False, default=list)
+    executions = Column(Integer, nullable=False, default=0)
+    total_ms = Column(Float, nullable=False, default=0.0)
+    max_ms = Column(Float, nullable=False, default=0.0)
+    total_rows = Column(BigInteger, nullable=False, default=0)
+    total_bytes = Column(BigInteger, nullable=False, default=0)
+    first_seen_at = Column(DateTime, nullable=False)
+    last_seen_at = Column(DateTime, nullable=False)
+
+
+class QueryFingerprintDay(BaseSchema):
+    """One day of a query shape's load on a connection.
+
+    `QueryFingerprint` never resets its counters, so ranking on them would let
+    a shape that was hammered months ago outrank what runs today. The advisor
+    adds each flush to the bucket of the day the samples ran on, sums the
+    buckets inside `BOW_ADVISOR_LOOKBACK_DAYS` to rank, and prunes buckets
+    that fell out of the window.
+    """
+    __tablename__ = "query_fingerprint_days"
+    __table_args__ = (
+        UniqueConstraint("connection_id", "fingerprint", "day", name="uq_query_fingerprint_day"),
+        Index("ix_query_fingerprint_day_window", "connection_id", "day"),
+    )
+
+    connection_id = Column(
+        String(36), ForeignKey("connections.id", ondelete="CASCADE"), nullable=False,
+    )
+    fingerprint = Column(String(64), nullable=False)
+    day = Column(Date, nullable=False)
+    executions = Column(Integer, nullable=False, default=0)
+    total_ms = Column(Float, nullable=False, default=0.0)
@@ -3,8 +3,8 @@
 import json
 import logging
 
-from sqlalchemy import JSON, Column, ForeignKey, String, Text, event, inspect, select
-from sqlalchemy.orm import relationship
+from sqlalchemy import JSON, Column, ForeignKey, Integer, String, Text, event, inspect, select
+from sqlalchemy.orm import Session, object_session, relationship
 
 from app.core.fire_and_forget import spawn
 from app.models.widget import Widget
@@ -41,6 +41,15 @@ class Step(BaseSchema):
     # from ``data`` so prompt construction never has to parse the full snapshot.
     # It remains internal (not part of StepSchema/API serialization).
     context_summary_json = Column(JSON(none_as_null=True), nullable=True, default=None)
+    # Rows of large results (over BOW_STEP_PREVIEW_ROWS): an encrypted
+    # DuckDB file written by app.services.step_result_store, with ``data``
+    # then holding only a ``truncated`` preview. Serves full reads,
+    # paged/sorted reads and exports. Internal like
+    # context_summary_json; read through the store, still gated by
+    # resolve_step_data.
+    result_path = Column(String, nullable=True, default=None)
+    result_key_enc = Column(Text, nullable=True, default=None)
+    result_rows = Column(Integer, nullable=True, default=None)
     description = Column(Text, nullable=False, default="")
     type = Column(String, nullable=False, default="table")
     data_model = Column(JSON, nullable=True, default=dict)
@@ -176,8 +185,37 @@ def after_insert_step(mapper, connection, target):
     except Exception as e:
         logger.warning("Error in after_insert_step: %s", e)
 
+_STORE_FILES_TO_DELETE = "step_result_store.files_to_delete"
+
+
+def after_delete_step(mapper, connection, target):
+    """Drop the row-store file with its step — once the delete commits.
+
+    Removing it at flush time would leave a rolled-back step pointing at a
+    file that no longer exists.
+    """
+    if target.result_path:
+        session = object_session(target)
+        if session is not None:
+            session.info.setdefault(_STORE_FILES_TO_DELETE, []).append(target.result_path)
+
+
+def _delete_store_files_after_commit(session):
+    paths = session.info.pop(_STORE_FILES_TO_DELETE, None)
+    if paths:
+        from app.services.step_result_store import delete_file
+        for path in paths:
+            delete_file(path)
+
+
+def _keep_store_files_after_rollback(session):
+    session.info.pop(_STORE_FILES_TO_DELETE, None)
+
 # Register the event listener
 event.listen(Step, 'before_insert', before_write_step_context_summary)
 event.listen(Step, 'before_update', before_write_step_context_summary)
 event.listen(Step, 'after_update', after_update_step)
 event.listen(Step, 'after_insert', after_insert_step)
+event.listen(Step, 'after_delete', after_delete_step)
+event.listen(Session, 'after_commit', _delete_store_files_after_commit)
+event.listen(Session, 'after_rollback', _keep_store_files_after_rollback)
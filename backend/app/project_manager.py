@@ -33,6 +33,7 @@ from app.schemas.dashboard_layout_version_schema import (
 )
 from app.services.visualization_service import VisualizationService
 from app.services.query_service import QueryService
+from app.services import step_result_store
 from app.schemas.visualization_schema import VisualizationCreate
 from app.schemas.view_schema import ViewSchema
 
@@ -464,17 +465,23 @@ class ProjectManager:
     
     async def update_step_with_data(self, db, step, data):
         safe_data = _to_json_safe(data)
+        written = None
         try:
-            step.data = safe_data
+            stale = await step_result_store.persist(step, safe_data)
+            written = step_result_store.ref(step)
             db.add(step)
             await db.commit()
+            step_result_store.delete_file(stale)
         except Exception as exc:
             await db.rollback()
             logging.getLogger(__name__).exception(
                 "update_step_with_data failed for step %s; persisting error payload",
                 getattr(step, "id", None),
             )
+            if written:
+                step_result_store.delete_file(written[0])
             step.data = {"error": f"failed to persist data: {type(exc).__name__}: {exc}"}
+            step.result_path = step.result_key_enc = step.result_rows = None
             db.add(step)
             try:
                 await db.commit()
@@ -5,6 +5,7 @@ from app.dependencies import get_db
 from app.services.completion_service import CompletionService
 from app.schemas.completion_v2_schema import CompletionCreate, CompletionContextEstimateSchema
 from app.schemas.sse_schema import SSEEvent, format_sse_event
+from app.core.serialization import FastJSONResponse
 from app.streaming.completion_stream import CompletionEventQueue
 from app.streaming.completion_event_bus import websocket_manager
 from app.models.user import User
@@ -153,6 +154,8 @@ async def create_completion(
 async def watch_completion_stream(
     report_id: str,
     completion_id: str,
+    request: Request,
+    last_event_id: Optional[str] = None,
     current_user: User = Depends(current_user),
     organization: Organization = Depends(get_current_organization),
     db: AsyncSession = Depends(get_async_db)
@@ -161,10 +164,13 @@ async def watch_completion_stream(
 
     Lets a client that lost its kickoff stream (page refresh, network drop,
     second tab) resume live progress. Idempotent and side-effect free, so it
-    is safe to retry with backoff.
+    is safe to retry with backoff. A client that sends the id of the last
+    event it saw (Last-Event-ID header, or ``last_event_id`` for clients that
+    cannot set headers) gets only the events it missed.
     """
     return await completion_service.watch_completion_stream(
-        db, report_id, completion_id, current_user, organization
+        db, report_id, completion_id, current_user, organization,
+        last_event_id=request.headers.get("last-event-id") or last_event_id,
     )
 
 
@@ -199,7 +205,10 @@ async def get_completions_v2(
     - limit: last N completions (user+system), default 10
     - before: ISO datetime cursor to fetch items strictly before it
     """
-    return await completion_service.get_completions_v2(db, report_id, organization, current_user, limit=limit, before=before)
+    result = await completion_service.get_completions_v2(db, report_id, organization, current_user, limit=limit, before=before)
+    # Large block/step payload: render it in one serializer pass rather
+    # than through jsonable_encoder.
+    return FastJSONResponse(result)
 
 @requires_permission('create_reports')
 @router.post("/api/completions/{completion_id}/sigkill")
@@ -51,8 +51,11 @@ from app.schemas.custom_query_schema import (
     CustomQueryRlsUpdate,
     CustomQuerySchema,
     RlsPrincipal,
+    AccelerationCandidateAccept,
+    AccelerationCandidateSchema,
 )
 from app.services.custom_query_service import custom_query_service, is_accelerable_type
+from app.services.acceleration_advisor_service import acceleration_advisor_service
 
 
 router = APIRouter(prefix="/connections", tags=["connections"])
@@ -1123,6 +1126,10 @@ async def create_custom_query(
         refresh_schedule_mode=payload.refresh_schedule_mode,
         refresh_interval_minutes=payload.refresh_interval_minutes,
         refresh_at_time=payload.refresh_at_time,
+        refresh_mode=payload.refresh_mode,
+        watermark_column=payload.watermark_column,
+        merge_key=payload.merge_key,
+        full_refresh_every=payload.full_refresh_every,
         current_user=current_user,
         organization=organization,
         activate_for_datasource_id=payload.activate_for_datasource_id,
@@ -1163,6 +1170,10 @@ async def update_custom_query(
         refresh_schedule_mode=payload.refresh_schedule_mode,
         refresh_interval_minutes=payload.refresh_interval_minutes,
         refresh_at_time=payload.refresh_at_time,
+        refresh_mode=payload.refresh_mode,
+        watermark_column=payload.watermark_column,
+        merge_key=payload.merge_key,
+        full_refresh_every=payload.full_refresh_every,
         current_user=current_user,
         organization_timezone=await custom_query_service._org_timezone(db, organization),
     )
@@ -1186,6 +1197,7 @@ async def update_custom_query(
 async def refresh_custom_query(
     connection_id: str,
     cq_id: str,
+    full: bool = False,
     current_user: User = Depends(current_user),
     db: AsyncSession = Depends(get_async_db),
     organization: Organization = Depends(get_current_organization)
@@ -1193,7 +1205,11 @@ async def refresh_custom_query(
     await custom_query_service.ensure_enabled(db, organization)
     connection = await connection_service.get_connection(db, connection_id, organization)
     cq = await custom_query_service.get_custom_query(db, str(connection.id), cq_id)
-    cq = await custom_query_service.refresh(db, connection, cq, current_user=current_user)
+    # `?full=true` forces a full rebuild of an incremental relation, e.g. after
+    # a backfill or known deletes at the source.
+    cq = await custom_query_service.refresh(
+        db, connection, cq, current_user=current_user, force_full=full
+    )
     return CustomQuerySchema.from_model(
         cq, await _active_agent_count(db, cq.id),
         next_run_at=custom_query_service.next_run_at(str(cq.id)),
@@ -1226,6 +1242,94 @@ async def delete_custom_query(
     return res
 
 
+# ==================== Custom Query Suggestions (acceleration advisor) ====================
+#
+# Ranked custom-query proposals mined from the connection's captured agent
+# queries (app.services.acceleration_advisor_service). Computed by a background
+# job; `?recompute=true` recomputes this connection now. Accepting creates the
+# custom query through the normal create path.
+
+@router.get("/{connection_id}/custom-queries/suggestions", response_model=List[AccelerationCandidateSchema])
+@requires_resource_permission('connection', 'manage_connection')
+async def list_custom_query_suggestions(
+    connection_id: str,
+    recompute: bool = False,
+    include_closed: bool = False,
+    current_user: User = Depends(current_user),
+    db: AsyncSession = Depends(get_async_db),
+    organization: Organization = Depends(get_current_organization)
+):
+    await custom_query_service.ensure_enabled(db, organization)
+    connection = await connection_service.get_connection(db, connection_id, organization)
+    if recompute:
+        custom_query_service.ensure_accelerable(connection)
+        client = await custom_query_service.connection_service.construct_client(db, connection, current_user)
+        await acceleration_advisor_service.refresh_candidates(db, connection, client=client)
+    rows = await acceleration_advisor_service.list_candidates(
+        db, str(connection.id), include_closed=include_closed
+    )
+    return [AccelerationCandidateSchema.from_model(r) for r in rows]
+
+
+@router.post("/{connection_id}/custom-queries/suggestions/{suggestion_id}/accept", response_model=CustomQuerySchema)
+@requires_resource_permission('connection', 'manage_connection')
+async def accept_custom_query_suggestion(
+    connection_id: str,
+    suggestion_id: str,
+    payload: AccelerationCandidateAccept,
+    current_user: User = Depends(current_user),
+    db: AsyncSession = Depends(get_async_db),
+    organization: Organization = Depends(get_current_organization)
+):
+    await custom_query_service.ensure_enabled(db, organization)
+    connection = await connection_service.get_connection(db, connection_id, organization)
+    candidate = await acceleration_advisor_service.get_candidate(db, str(connection.id), suggestion_id)
+    cq = await acceleration_advisor_service.accept(
+        db, connection, candidate,
+        name=payload.name,
+        description=payload.description,
+        refresh_schedule_mode=payload.refresh_schedule_mode,
+        refresh_interval_minutes=payload.refresh_interval_minutes,
+        refresh_at_time=payload.refresh_at_time,
+        activate_for_datasource_id=payload.activate_for_datasource_id,
+        current_user=current_user,
+        organization=organization,
+    )
+    try:
+        await audit_service.log(
+            db, organization_id=str(organization.id), user_id=str(current_user.id),
+            action="connection.custom_query.created",
+            resource_type="connection", resource_id=str(connection.id),
+            details={
+                "connection": connection.name, "name": cq.name, "rows": cq.no_rows,
+                "suggestion_id": str(candidate.id),
+            },
+        )
+    except Exception:
+        pass
+    return CustomQuerySchema.from_model(
+        cq, await _active_agent_count(db, cq.id),
+        next_run_at=custom_query_service.next_run_at(str(cq.id)),
+    )
+
+
+@router.post("/{connection_id}/custom-queries/suggestions/{suggestion_id}/dismiss", response_model=AccelerationCandidateSchema)
+@requires_resource_permission('connection', 'manage_connection')
+async def dismiss_custom_query_suggestion(
+    connection_id: str,
+    suggestion_id: str,
+    current_user: User = Depends(current_user),
+    db: AsyncSession = Depends(get_async_db),
+    organization: Organization = Depends(get_current_organization)
+):
+    await custom_query_service.ensure_enabled(db, organization)
+    connection = await connection_service.get_connection(db, connection_id, organization)
+    candidate = await acceleration_advisor_service.get_candidate(db, str(connection.id), suggestion_id)
+    return AccelerationCandidateSchema.from_model(
+        await acceleration_advisor_service.dismiss(db, candidate)
+    )
+
+
 # ==================== Custom Query RLS ====================
 
 @router.get("/{connection_id}/custom-queries/rls-options", response_model=CustomQueryRlsOptions)
@@ -256,6 +256,27 @@ async def set_model_context_window(
     """Manually size a model's context window (tokens). Omit tokens to reset to the catalog default."""
     return await llm_service.set_context_window(db, organization, current_user, model_id, tokens)
 
+@router.delete("/llm/response_cache")
+@requires_permission('manage_llm')
+async def purge_response_cache(
+    request: Request,
+    scope: Optional[str] = None,
+    current_user: User = Depends(current_user),
+    db: AsyncSession = Depends(get_async_db),
+    organization: Organization = Depends(get_current_organization)
+):
+    """Drop the organization's cached LLM responses, optionally for one usage scope (e.g. judge.test_case)."""
+    result = await llm_service.purge_response_cache(db, organization, scope=scope)
+    try:
+        await audit_service.log(
+            db=db, organization_id=organization.id, action="llm_response_cache.purged",
+            user_id=current_user.id, resource_type="llm_response_cache", resource_id=scope,
+            details={"deleted": result["deleted"]}, request=request,
+        )
+    except Exception:
+        pass
+    return result
+
 @router.post("/llm/models/{model_id}/set_default")
 @requires_permission('manage_llm')
 async def set_default_model(
@@ -21,6 +21,7 @@ from app.schemas.dashboard_layout_version_schema import (
 from app.models.user import User
 
 from app.core.auth import current_user, current_user_optional
+from app.core.serialization import FastJSONResponse
 from app.models.organization import Organization
 from app.core.permissions_decorator import requires_permission
 from app.models.report import Report
@@ -456,7 +457,7 @@ async def get_public_report(
     if report_obj:
         eligibility = await fork_service.check_eligibility(db, report_obj, user)
         result["fork_eligibility"] = eligibility.to_dict()
-    return result
+    return FastJSONResponse(result)
 
 @router.get("/c/{token}")
 async def get_public_conversation(
@@ -488,7 +489,7 @@ async def get_public_conversation(
         if report_obj:
             eligibility = await fork_service.check_eligibility(db, report_obj, user)
             result["fork_eligibility"] = eligibility.to_dict()
-    return result
+    return FastJSONResponse(result)
 
 
 @router.get("/r/{report_id}/files/{file_id}/embed_token")
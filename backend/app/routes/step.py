@@ -1,4 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, Response, Request, Query
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.dependencies import get_async_db, get_current_organization
 from app.services.step_service import StepService
@@ -8,10 +10,12 @@ from app.core.auth import current_user
 from app.core.permissions_decorator import requires_permission
 from app.ee.audit.service import audit_service
 from app.errors import AppError
-import io
+import asyncio
 import logging
 from urllib.parse import quote
-from app.schemas.step_schema import StepSchema
+from app.schemas.step_schema import StepSchema, StepRowsRequest, StepRowsPageSchema
+from app.services import step_export, step_result_store
+from app.services.step_result_store import StepRowsQueryError
 
 router = APIRouter(tags=["steps"])
 step_service = StepService()
@@ -28,6 +32,7 @@ async def export_step(
     step_id: str,
     request: Request,
     format: str = Query("csv", description="Export format: 'csv' or 'xlsx'"),
+    live: bool = Query(False, description="Re-run the step's query with your own credentials and export every row, instead of the saved result"),
     current_user: User = Depends(current_user),
     organization: Organization = Depends(get_current_organization),
     db: AsyncSession = Depends(get_async_db)
@@ -38,36 +43,50 @@ async def export_step(
 
     logging.info(f"{fmt.upper()} export request received for step {step_id}")
     try:
-        df, step = await step_service.export_step_authorized(db, step_id, current_user, organization)
+        batches, step, source = await step_service.export_step_stream(
+            db, step_id, current_user, organization, live=live
+        )
+        media_type, extension = _EXPORT_FORMATS[fmt]
+        counter = step_export.ExportCounter()
+        organization_id = organization.id
+        user_id = current_user.id
+
+        async def _audit():
+            # Runs once the body is written, so row_count is what was sent.
+            # The request's session may already be closed; use a fresh one.
+            from app.dependencies import async_session_maker
+            try:
+                async with async_session_maker() as audit_db:
+                    await audit_service.log(
+                        db=audit_db,
+                        organization_id=organization_id,
+                        action="data.exported",
+                        user_id=user_id,
+                        resource_type="step",
+                        resource_id=step_id,
+                        details={
+                            "format": fmt,
+                            "row_count": counter.rows,
+                            "complete": counter.complete,
+                            "source": source,
+                        },
+                        request=request,
+                    )
+            except Exception:
+                pass
 
         if fmt == "xlsx":
-            buffer = io.BytesIO()
-            # openpyxl is the default engine (declared in pyproject); Excel reads
-            # Unicode natively so no BOM/encoding handling is needed here.
-            df.to_excel(buffer, index=False)
-            content = buffer.getvalue()
+            # A zip can't be sent until it is finished: build it with the
+            # write-only workbook in a temp file (constant memory), then
+            # stream the file.
+            fileobj = await asyncio.to_thread(step_export.write_xlsx, batches, counter)
+            body = step_export.file_chunks(fileobj)
         else:
-            # utf-8-sig prepends a BOM so Excel auto-detects UTF-8 and renders
+            # utf-8 with a leading BOM so Excel auto-detects UTF-8 and renders
             # non-ASCII headers/values (e.g. Hebrew) correctly instead of ANSI mojibake.
-            content = df.to_csv(index=False).encode("utf-8-sig")
-
-        media_type, extension = _EXPORT_FORMATS[fmt]
+            body = step_export.csv_stream(batches, counter)
 
-        try:
-            await audit_service.log(
-                db=db,
-                organization_id=organization.id,
-                action="data.exported",
-                user_id=current_user.id,
-                resource_type="step",
-                resource_id=step_id,
-                details={"format": fmt, "row_count": len(df)},
-                request=request,
-            )
-        except Exception:
-            pass
-
-        response = Response(content=content, media_type=media_type)
+        response = StreamingResponse(body, media_type=media_type, background=BackgroundTask(_audit))
         widget_title = "".join(c for c in step.widget.title if c.isalnum() or c in (' ', '_')).rstrip()
         file_name = f"{widget_title}-{step.slug}.{extension}".replace(" ", "_")
         # HTTP headers are latin-1 only, so a Unicode (e.g. Hebrew) title would
@@ -79,10 +98,13 @@ async def export_step(
         )
         return response
 
-    except AppError:
+    except (AppError, HTTPException):
         # Typed auth/not-found errors (403/404) must reach the global handler,
-        # not be masked as a 500 by the catch-all below.
+        # not be masked as a 500 by the catch-all below — including the 403
+        # a live export gets when the user may not query the data source.
         raise
+    except step_export.ExportTooLargeError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except ValueError as e:
         logging.warning(f"Value error in export_step route for step {step_id}: {str(e)}")
         raise HTTPException(status_code=404, detail=str(e))
@@ -91,6 +113,32 @@ async def export_step(
         raise HTTPException(status_code=500, detail=f"Internal server error during export: {str(e)}")
 
 
+@router.post("/steps/{step_id}/rows", response_model=StepRowsPageSchema)
+@requires_permission('view_reports')
+async def get_step_rows(
+    step_id: str,
+    body: StepRowsRequest,
+    current_user: User = Depends(current_user),
+    organization: Organization = Depends(get_current_organization),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Serve one page of a step's rows with server-side sort/filter/projection,
+    so large results scroll without shipping the whole grid."""
+    try:
+        page = await step_service.page_step_rows(db, step_id, current_user, organization, body)
+    except StepRowsQueryError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    # Redact PII from the page for display, like the full-grid read below.
+    from app.ai.llm.pii.display import load_and_redact_grid
+    from app.dependencies import async_session_maker
+    redacted = await load_and_redact_grid(
+        {"rows": page["rows"], "columns": page["columns"]},
+        str(organization.id) if organization else None, async_session_maker,
+    )
+    page["rows"] = redacted.get("rows", page["rows"])
+    return page
+
+
 @router.get("/steps/{step_id}", response_model=StepSchema)
 @requires_permission('view_reports')
 async def get_step(
@@ -103,6 +151,10 @@ async def get_step(
     if not step:
         raise HTTPException(status_code=404, detail="Step not found")
     schema = StepSchema.from_orm(step)
+    # The UI asks here for every row once it sees a `truncated` preview.
+    full = await step_result_store.full_data(step)
+    if full is not schema.data:
+        schema = schema.model_copy(update={"data": full})
     # Redact PII from the full result grid for display (stored data untouched).
     from app.ai.llm.pii.display import load_and_redact_grid
     from app.dependencies import async_session_maker
@@ -222,6 +222,9 @@ class PlannerInput(BaseModel):
     # (tool-call / thinking signatures), which must never cross a mid-run
     # fallback to a different provider.
     provider_name: Optional[str] = None
+    # Model serving this iteration; with provider_name, selects the token
+    # calibration the transcript budget is measured in.
+    model_id: Optional[str] = None
     # Model context window, used to size the transcript decay budget.
     context_window_tokens: Optional[int] = None
 
@@ -13,6 +13,13 @@ class CustomQueryCreate(BaseModel):
     refresh_schedule_mode: str = "interval"   # 'interval' | 'time'
     refresh_interval_minutes: Optional[int] = 60
     refresh_at_time: Optional[str] = None      # "HH:MM"
+    # Opt-in incremental refresh: only rows past the high-water mark of
+    # `watermark_column` are fetched, merged on `merge_key` when given, with a
+    # full rebuild every `full_refresh_every` refreshes.
+    refresh_mode: str = "full"                 # 'full' | 'incremental'
+    watermark_column: Optional[str] = None
+    merge_key: Optional[str] = None
+    full_refresh_every: Optional[int] = None
 
 
 class CustomQueryUpdate(BaseModel):
@@ -22,6 +29,10 @@ class CustomQueryUpdate(BaseModel):
     refresh_schedule_mode: Optional[str] = None
     refresh_interval_minutes: Optional[int] = None
     refresh_at_time: Optional[str] = None
+    refresh_mode: Optional[str] = None
+    watermark_column: Optional[str] = None
+    merge_key: Optional[str] = None
+    full_refresh_every: Optional[int] = None
 
 
 class CustomQueryRlsUpdate(BaseModel):
@@ -126,6 +137,14 @@ class CustomQuerySchema(BaseModel):
     rls_mode: Optional[str] = None
     rls_policy: Optional[dict] = None
     rls_default_deny: bool = True
+    refresh_mode: str = "full"
+    watermark_column: Optional[str] = None
+    merge_key: Optional[str] = None
+    full_refresh_every: Optional[int] = None
+    # The stored high-water mark ({"type", "value"}) — what the next
+    # incremental refresh starts after.
+    watermark_value: Optional[dict] = None
+    refreshes_since_full: int = 0
 
     class Config:
         from_attributes = True
@@ -156,4 +175,64 @@ class CustomQuerySchema(BaseModel):
             rls_mode=getattr(cq, "rls_mode", None),
             rls_policy=getattr(cq, "rls_policy", None),
             rls_default_deny=bool(getattr(cq, "rls_default_deny", True)),
+            refresh_mode=getattr(cq, "refresh_mode", None) or "full",
+            watermark_column=getattr(cq, "watermark_column", None),
+            merge_key=getattr(cq, "merge_key", None),
+            full_refresh_every=getattr(cq, "full_refresh_every", None),
+            watermark_value=getattr(cq, "watermark_value", None),
+            refreshes_since_full=getattr(cq, "refreshes_since_full", None) or 0,
         )
+
+
+class AccelerationCandidateSchema(BaseModel):
+    """A custom query the acceleration advisor proposes, from captured history."""
+
+    id: str
+    connection_id: str
+    suggested_name: str
+    definition_sql: str
+    tables: List[str] = []
+    # Distinct query shapes in the cluster, their total runs, and the source
+    # time they took over the lookback window — the ranking.
+    query_shapes: int = 0
+    executions: int = 0
+    total_ms: float = 0.0
+    score: float = 0.0
+    # `extractor.estimate` pre-flight, same fields as the preview response:
+    # {supported, rows, total_bytes, scan_bytes, note, budget_error}.
+    estimate: Optional[dict] = None
+    estimated_at: Optional[str] = None
+    status: str = "open"
+    custom_query_id: Optional[str] = None
+    computed_at: Optional[str] = None
+
+    @classmethod
+    def from_model(cls, c) -> "AccelerationCandidateSchema":
+        return cls(
+            id=str(c.id),
+            connection_id=str(c.connection_id),
+            suggested_name=c.suggested_name,
+            definition_sql=c.definition_sql,
+            tables=list(c.tables or []),
+            query_shapes=c.query_shapes or 0,
+            executions=c.executions or 0,
+            total_ms=c.total_ms or 0.0,
+            score=c.score or 0.0,
+            estimate=c.estimate,
+            estimated_at=c.estimated_at.isoformat() if c.estimated_at else None,
+            status=c.status,
+            custom_query_id=c.custom_query_id,
+            computed_at=c.computed_at.isoformat() if c.computed_at else None,
+        )
+
+
+class AccelerationCandidateAccept(BaseModel):
+    """Accept a suggestion as a custom query. Omitted fields take the
+    suggestion's values or `CustomQueryCreate`'s defaults."""
+
+    name: Optional[str] = None
+    description: Optional[str] = None
+    activate_for_datasource_id: Optional[str] = None
+    refresh_schedule_mode: str = "interval"
+    refresh_interval_minutes: Optional[int] = 60
+    refresh_at_time: Optional[str] = None
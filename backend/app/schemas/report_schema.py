@@ -173,6 +173,9 @@ class ReportRerunResultSchema(BaseModel):
     # fresh, or another refresh already in flight). Always False for an
     # explicit user-triggered rerun, which never gets rate limited.
     skipped: bool = False
+    # Per-step execution timings (StepService.rerun_steps), in target order:
+    # the slowest step is the dashboard's critical path.
+    step_timings: List[dict] = []
 
 
 VISIBILITY_LITERAL = Literal["none", "shared", "internal", "public"]
@@ -1,7 +1,9 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 from typing import Optional, Dict, Any
 from datetime import datetime
 
+from app.core.serialization import encode_sse_event
+
 
 class SSEEvent(BaseModel):
     """Single flexible schema for all SSE events."""
@@ -11,21 +13,43 @@ class SSEEvent(BaseModel):
     completion_id: Optional[str] = None
     agent_execution_id: Optional[str] = None
     seq: Optional[int] = None
-    
+    # Position in the completion's event log (see
+    # app.streaming.completion_event_log); sent as the SSE id, not in data.
+    _log_seq: Optional[int] = PrivateAttr(default=None)
+    # Serialized once (see event_json) and shared by every subscriber, the
+    # event log and the cross-worker relay. Events are not mutated once put.
+    _json: Optional[str] = PrivateAttr(default=None)
+
     class Config:
         # Allow extra fields for future extensibility
         extra = "allow"
 
 
+def event_json(event: SSEEvent) -> str:
+    """The event's JSON, encoded on first use by the fast encoder."""
+    # Private attrs read straight from their dict: pydantic's __getattr__
+    # (slow with extra="allow") would cost more than the encoding.
+    private = event.__pydantic_private__
+    encoded = private.get("_json")
+    if encoded is None:
+        encoded = private["_json"] = encode_sse_event(event)
+    return encoded
+
+
 def format_sse_event(event: SSEEvent, event_id: Optional[str] = None) -> str:
-    """Format Pydantic event as SSE string."""
-    lines = []
-    
-    if event_id:
-        lines.append(f"id: {event_id}")
-    
-    lines.append(f"event: {event.event}")
-    lines.append(f"data: {event.model_dump_json()}")
-    lines.append("")  # Empty line to end event
-    
-    return "\n".join(lines) + "\n"
\ No newline at end of file
+    """Format Pydantic event as SSE string.
+
+    Events numbered by the completion event log carry that number as their
+    id unless one is passed, so clients can resume with Last-Event-ID.
+    """
+    if event_id is None:
+        log_seq = event.__pydantic_private__.get("_log_seq")
+        if log_seq is not None:
+            event_id = str(log_seq)
+    return format_sse_frame(event.event, event_json(event), event_id)
+
+
+def format_sse_frame(event_name: str, data_json: str, event_id: Optional[str] = None) -> str:
+    """Format an already-serialized event (e.g. a replayed log row)."""
+    head = f"id: {event_id}\n" if event_id else ""
+    return f"{head}event: {event_name}\ndata: {data_json}\n\n"
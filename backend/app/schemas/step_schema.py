@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, model_validator, field_validator, field_serializer
-from typing import List, Optional
+from typing import Any, List, Optional
 from datetime import datetime
 from app.schemas.view_schema import ViewSchema
 
@@ -96,3 +96,37 @@ class PublicStepSchema(BaseModel):
     def _none_to_dict(cls, v):
         return v if v is not None else {}
 
+
+
+class StepRowsSort(BaseModel):
+    column: str
+    desc: bool = False
+
+
+class StepRowsFilter(BaseModel):
+    column: str
+    # eq, ne, lt, lte, gt, gte, contains, starts_with, in, is_null, not_null
+    op: str = "eq"
+    value: Optional[Any] = None
+
+
+class StepRowsRequest(BaseModel):
+    """A page of a step's rows: projection, sort and filter run server-side."""
+    offset: int = Field(default=0, ge=0)
+    limit: int = Field(default=100, ge=1)
+    columns: Optional[List[str]] = None
+    sort: List[StepRowsSort] = Field(default_factory=list)
+    filters: List[StepRowsFilter] = Field(default_factory=list)
+
+
+class StepRowsPageSchema(BaseModel):
+    rows: List[dict] = Field(default_factory=list)
+    columns: List[dict] = Field(default_factory=list)
+    offset: int = 0
+    limit: int = 0
+    # Rows matching the filters, across all pages.
+    total_rows: int = 0
+    # "store" when paged from the step's row store, "inline" from JSON.
+    source: str = "inline"
+    viewer_result: Optional[dict] = None
+    snapshot_withheld: bool = False
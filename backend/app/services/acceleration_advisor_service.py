@@ -0,0 +1,681 @@
+"""Acceleration advisor — propose custom queries from captured agent queries.
+
+`QueryCapturingClientWrapper` measures every agent query (SQL, `query_ms`,
+rows, result bytes) for the step's timings, and until now that was the end
+of it: an admin deciding which custom queries to materialize had to guess
+which queries actually cost the source. This module keeps the measurement
+and turns it into ranked proposals.
+
+Pipeline:
+
+  1. **Capture** (request path, no IO). The wrapper buffers one sample per
+     source query on the run's `UsageLimitContext`; the end-of-run `flush()`
+     that already persists token and data-plane usage calls `record_samples`.
+     Cache hits, shared (deduplicated) results and queries served from FAST
+     relations are not recorded — they cost the source nothing.
+  2. **Fingerprint.** Comments, whitespace and literal values are normalized
+     away, so the month-by-month variants of one report are one shape. Rows
+     in `query_fingerprints` keep the shape's sample and lifetime totals per
+     (connection, shape); `query_fingerprint_days` adds the same executions
+     and source time to a bucket per day. Only single read statements are
+     fingerprinted.
+  3. **Cluster and rank** (`rank_candidates`, pure). Shapes reading the same
+     set of tables form a cluster; clusters rank by the source time summed
+     over the day buckets inside the lookback window, which is the load a
+     materialization would take off the source now. A shape that was heavy
+     months ago and quiet since falls out of the ranking with its buckets. A single-table cluster with several shapes proposes the table
+     itself (every variant can then be answered locally); otherwise the
+     cluster's most expensive statement is proposed verbatim.
+  4. **Pre-flight.** The background job attaches `extractor.estimate` and the
+     budget verdict to the top proposals, so the admin sees what accepting
+     would cost before clicking, exactly as in the custom-query modal.
+  5. **Accept / dismiss.** Accepting goes straight through
+     `CustomQueryService.create`; both decisions stick across recomputation.
+
+Fingerprinting is regex-based — the same normalizer the query result cache
+uses — not a SQL parser. Table extraction reads `FROM`/`JOIN` targets and
+skips CTE names and function-call `FROM`s (`EXTRACT(YEAR FROM d)`); a
+statement it cannot read still counts toward its own shape, it just does not
+cluster.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import time
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.data_sources.query_result_cache import normalize_sql
+from app.models.acceleration_candidate import (
+    AccelerationCandidate,
+    CANDIDATE_ACCEPTED,
+    CANDIDATE_DISMISSED,
+    CANDIDATE_OPEN,
+)
+from app.models.query_fingerprint import QueryFingerprint, QueryFingerprintDay
+
+logger = logging.getLogger(__name__)
+
+ADVISOR_JOB_ID = "acceleration_advisor"
+
+# Only history this recent is ranked (and older shapes and day buckets are
+# pruned).
+DEFAULT_LOOKBACK_DAYS = 30
+# A shape run fewer times than this is a one-off, not a workload.
+DEFAULT_MIN_EXECUTIONS = 3
+# Proposals kept (and estimated) per connection.
+DEFAULT_MAX_CANDIDATES = 10
+# Re-run the pre-flight estimate at most this often for an unchanged proposal:
+# an EXPLAIN is cheap, but it is still a call to the source we are protecting.
+DEFAULT_ESTIMATE_TTL_HOURS = 24
+# Upper bound on stored sample text; a generated 200 KB IN-list is not worth
+# keeping verbatim.
+_MAX_SAMPLE_CHARS = 20_000
+
+
+def _env_int(name: str, default: int, minimum: int = 1) -> int:
+    try:
+        return max(minimum, int(os.environ.get(name, default)))
+    except (TypeError, ValueError):
+        return default
+
+
+def lookback_days() -> int:
+    return _env_int("BOW_ADVISOR_LOOKBACK_DAYS", DEFAULT_LOOKBACK_DAYS)
+
+
+def min_executions() -> int:
+    return _env_int("BOW_ADVISOR_MIN_EXECUTIONS", DEFAULT_MIN_EXECUTIONS)
+
+
+def max_candidates() -> int:
+    return _env_int("BOW_ADVISOR_MAX_CANDIDATES", DEFAULT_MAX_CANDIDATES)
+
+
+# -- fingerprints -----------------------------------------------------------
+
+_IDENT = r'(?:"(?:[^"]|"")+"|`[^`]+`|\[[^\]]+\]|[A-Za-z_][\w$#@]*)'
+_QUALIFIED = rf"{_IDENT}(?:\s*\.\s*{_IDENT})*"
+_QUOTED_IDENT_RE = re.compile(r'"(?:[^"]|"")*"|`[^`]*`|\[[^\]]*\]')
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"(?<![\w.$])[-+]?\d+(?:\.\d+)?(?:e[-+]?\d+)?(?![\w.])", re.IGNORECASE)
+_IN_LIST_RE = re.compile(r"\bin\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_READ_RE = re.compile(r"^\(*\s*(select|with)\b", re.IGNORECASE)
+_CTE_RE = re.compile(
+    rf"(?:\bwith\b(?:\s+recursive)?|,)\s*({_IDENT})\s*(?:\([^)]*\)\s*)?as\s*(?:not\s+)?(?:materialized\s*)?\(",
+    re.IGNORECASE,
+)
+_FROM_JOIN_RE = re.compile(r"\b(from|join)\s+", re.IGNORECASE)
+_TABLE_AT_RE = re.compile(rf"({_QUALIFIED})\s*(\()?")
+_ALIAS_RE = re.compile(rf"\s*(?:as\s+)?{_IDENT}", re.IGNORECASE)
+_SELECT_RE = re.compile(r"\bselect\b", re.IGNORECASE)
+_NOT_ALIASES = {
+    "where", "join", "inner", "left", "right", "full", "cross", "on", "group",
+    "order", "limit", "having", "union", "except", "intersect", "window",
+    "qualify", "natural", "using", "offset", "fetch", "for", "lateral",
+}
+
+
+def _shape(normalized: str) -> str:
+    """Literal values replaced by `?`, keywords and bare names lowercased.
+
+    Quoted identifiers are kept exactly: ``"Orders"`` and ``orders`` are
+    different tables on a case-sensitive source.
+    """
+    out, pos = [], 0
+    for m in _QUOTED_IDENT_RE.finditer(normalized):
+        out.append(_shape_plain(normalized[pos:m.start()]))
+        out.append(m.group(0))
+        pos = m.end()
+    out.append(_shape_plain(normalized[pos:]))
+    return _IN_LIST_RE.sub("in (?)", "".join(out))
+
+
+def _shape_plain(text: str) -> str:
+    text = _STRING_RE.sub("?", text)
+    return _NUMBER_RE.sub("?", text).lower()
+
+
+def fingerprint(sql) -> Optional[Tuple[str, str]]:
+    """``(digest, shape)`` for a single read statement, else None."""
+    if not isinstance(sql, str) or not sql.strip():
+        return None
+    normalized = normalize_sql(sql)
+    skeleton = _STRING_RE.sub("''", normalized)
+    if not _READ_RE.match(skeleton) or ";" in skeleton:
+        return None
+    shape = _shape(normalized)
+    return hashlib.sha256(shape.encode("utf-8")).hexdigest(), shape
+
+
+def _canonical(identifier: str) -> str:
+    """Cluster key for a table name: unquoted, lowercased, no spaces."""
+    parts = re.split(r"\s*\.\s*", identifier.strip())
+    return ".".join(p.strip('"`[]').replace('""', '"').lower() for p in parts)
+
+
+def _enclosing_group(text: str, pos: int) -> int:
+    """Offset just after the innermost unclosed `(` before `pos` (0 if none)."""
+    depth_starts: List[int] = []
+    for i, ch in enumerate(text[:pos]):
+        if ch == "(":
+            depth_starts.append(i + 1)
+        elif ch == ")" and depth_starts:
+            depth_starts.pop()
+    return depth_starts[-1] if depth_starts else 0
+
+
+def extract_tables(sql) -> List[str]:
+    """Relations a read statement names in FROM/JOIN, as written, de-duplicated."""
+    if not isinstance(sql, str):
+        return []
+    text = _STRING_RE.sub("''", normalize_sql(sql))
+    ctes = {_canonical(m.group(1)) for m in _CTE_RE.finditer(text)}
+    found: Dict[str, str] = {}
+    for m in _FROM_JOIN_RE.finditer(text):
+        if m.group(1).lower() == "from":
+            # `EXTRACT(YEAR FROM d)`, `TRIM(BOTH FROM s)`: a FROM whose
+            # enclosing group has no SELECT belongs to a function call.
+            start = _enclosing_group(text, m.start())
+            if not _SELECT_RE.search(text, start, m.start()):
+                continue
+        pos = m.end()
+        while True:
+            t = _TABLE_AT_RE.match(text, pos)
+            if not t:
+                break
+            name = t.group(1)
+            if t.group(2) is None:  # not a table function
+                key = _canonical(name)
+                if key not in ctes and key.split(".")[-1] not in _NOT_ALIASES:
+                    found.setdefault(key, name.strip())
+            pos = t.end() if t.group(2) is None else t.start(2)
+            if m.group(1).lower() != "from" or t.group(2) is not None:
+                break
+            # Comma-joined FROM list: skip an alias, continue after a comma.
+            alias = _ALIAS_RE.match(text, pos)
+            if alias and alias.group(0).strip().split()[-1].lower() not in _NOT_ALIASES:
+                pos = alias.end()
+            comma = re.match(r"\s*,\s*", text[pos:])
+            if not comma:
+                break
+            pos += comma.end()
+    return list(found.values())
+
+
+# -- ranking ----------------------------------------------------------------
+
+def suggested_name(tables: Iterable[str]) -> str:
+    """A valid custom-query name derived from the cluster's tables."""
+    bases = sorted({_canonical(t).split(".")[-1] for t in tables})
+    stem = re.sub(r"[^A-Za-z0-9_]+", "_", "_".join(bases)).strip("_") or "query"
+    return f"accel_{stem}"[:63].rstrip("_")
+
+
+def rank_candidates(
+    rows: Iterable,
+    *,
+    existing_fingerprints: Iterable[str] = (),
+    min_execs: Optional[int] = None,
+    limit: Optional[int] = None,
+) -> List[dict]:
+    """Cluster fingerprint aggregates by table set and rank the clusters.
+
+    `rows` need `fingerprint`, `sample_sql`, `tables`, `executions` and
+    `total_ms`, the last two over the window being ranked (see
+    `_windowed`). Returns proposal dicts, best first. A proposal whose
+    definition is already a custom query on the connection is dropped.
+    """
+    min_execs = min_executions() if min_execs is None else min_execs
+    limit = max_candidates() if limit is None else limit
+    existing = set(existing_fingerprints)
+
+    clusters: Dict[Tuple[str, ...], List] = {}
+    for row in rows:
+        tables = list(row.tables or [])
+        if not tables:
+            continue
+        key = tuple(sorted({_canonical(t) for t in tables}))
+        clusters.setdefault(key, []).append(row)
+
+    proposals = []
+    for key, members in clusters.items():
+        executions = sum(int(r.executions or 0) for r in members)
+        if executions < min_execs:
+            continue
+        total_ms = sum(float(r.total_ms or 0.0) for r in members)
+        members = sorted(members, key=lambda r: float(r.total_ms or 0.0), reverse=True)
+        tables = list(members[0].tables)
+        if len(key) == 1 and len(members) > 1:
+            # Several shapes over one table: materializing the table answers
+            # all of them; materializing one shape answers one.
+            definition = f"SELECT * FROM {tables[0]}"
+        else:
+            definition = members[0].sample_sql
+        fp = fingerprint(definition)
+        if fp is not None and fp[0] in existing:
+            continue
+        proposals.append({
+            "cluster_key": hashlib.sha256("\x00".join(key).encode("utf-8")).hexdigest(),
+            "tables": tables,
+            "definition_sql": definition,
+            "suggested_name": suggested_name(tables),
+            "fingerprints": [r.fingerprint for r in members],
+            "query_shapes": len(members),
+            "executions": executions,
+            "total_ms": round(total_ms, 1),
+            # Source seconds a materialization would have absorbed.
+            "score": round(total_ms / 1000.0, 3),
+        })
+    proposals.sort(key=lambda p: (p["score"], p["executions"]), reverse=True)
+    return proposals[:limit]
+
+
+def _windowed(rows: Iterable, totals: Dict[str, Tuple[int, float]]) -> List[SimpleNamespace]:
+    """`rows` with their counters replaced by the windowed `totals`.
+
+    A shape with no bucket inside the window ran before it and is left out.
+    """
+    out = []
+    for row in rows:
+        window = totals.get(row.fingerprint)
+        if window is None:
+            continue
+        out.append(SimpleNamespace(
+            fingerprint=row.fingerprint, sample_sql=row.sample_sql, tables=row.tables,
+            executions=window[0], total_ms=window[1],
+        ))
+    return out
+
+
+def _estimate_payload(est) -> dict:
+    from app.data_sources.fast import extractor
+
+    budget_error = None
+    try:
+        extractor.check_budget(est)
+    except extractor.ExtractionRefused as e:
+        budget_error = str(e)
+    return {
+        "supported": est.supported,
+        "rows": est.rows,
+        "total_bytes": est.total_bytes,
+        "scan_bytes": est.scan_bytes,
+        "note": est.note,
+        "budget_error": budget_error,
+    }
+
+
+class AccelerationAdvisorService:
+    # -- capture -------------------------------------------------------------
+
+    async def record_samples(self, db: AsyncSession, organization_id: str, samples: List[dict]) -> int:
+        """Fold buffered query samples into `query_fingerprints`.
+
+        Each sample: {connection_id, sql, query_ms, rows, result_bytes, at}.
+        Aggregated in memory first so a run that fired the same shape twenty
+        times costs one UPDATE (plus one per day bucket it touched). Returns
+        the number of shapes touched.
+        """
+        agg: Dict[Tuple[str, str], dict] = {}
+        days: Dict[Tuple[str, str, date], List] = {}
+        for s in samples:
+            fp = fingerprint(s.get("sql"))
+            if fp is None or not s.get("connection_id"):
+                continue
+            k = (str(s["connection_id"]), fp[0])
+            entry = agg.get(k)
+            if entry is None:
+                entry = agg[k] = {
+                    "sql": s["sql"][:_MAX_SAMPLE_CHARS],
+                    "tables": None,
+                    "executions": 0, "total_ms": 0.0, "max_ms": 0.0,
+                    "rows": 0, "bytes": 0,
+                    "first": s.get("at") or datetime.utcnow(),
+                    "last": s.get("at") or datetime.utcnow(),
+                }
+            ms = float(s.get("query_ms") or 0.0)
+            entry["executions"] += 1
+            entry["total_ms"] += ms
+            entry["max_ms"] = max(entry["max_ms"], ms)
+            entry["rows"] += int(s.get("rows") or 0)
+            entry["bytes"] += int(s.get("result_bytes") or 0)
+            at = s.get("at") or datetime.utcnow()
+            bucket = days.setdefault((k[0], k[1], at.date()), [0, 0.0])
+            bucket[0] += 1
+            bucket[1] += ms
+            if at >= entry["last"]:
+                entry["last"], entry["sql"] = at, s["sql"][:_MAX_SAMPLE_CHARS]
+            entry["first"] = min(entry["first"], at)
+
+        for (connection_id, digest), e in agg.items():
+            stmt = (
+                update(QueryFingerprint)
+                .where(
+                    QueryFingerprint.connection_id == connection_id,
+                    QueryFingerprint.fingerprint == digest,
+                )
+                .values(
+                    executions=QueryFingerprint.executions + e["executions"],
+                    total_ms=QueryFingerprint.total_ms + e["total_ms"],
+                    total_rows=QueryFingerprint.total_rows + e["rows"],
+                    total_bytes=QueryFingerprint.total_bytes + e["bytes"],
+                    sample_sql=e["sql"],
+                    last_seen_at=e["last"],
+                )
+            )
+            result = await db.execute(stmt)
+            if result.rowcount == 0:
+                try:
+                    async with db.begin_nested():
+                        db.add(QueryFingerprint(
+                            organization_id=str(organization_id),
+                            connection_id=connection_id,
+                            fingerprint=digest,
+                            sample_sql=e["sql"],
+                            tables=extract_tables(e["sql"]),
+                            executions=e["executions"],
+                            total_ms=e["total_ms"],
+                            max_ms=e["max_ms"],
+                            total_rows=e["rows"],
+                            total_bytes=e["bytes"],
+                            first_seen_at=e["first"],
+                            last_seen_at=e["last"],
+                        ))
+                except IntegrityError:
+                    # Another run inserted the same shape first.
+                    await db.execute(stmt)
+            else:
+                await db.execute(
+                    update(QueryFingerprint)
+                    .where(
+                        QueryFingerprint.connection_id == connection_id,
+                        QueryFingerprint.fingerprint == digest,
+                        QueryFingerprint.max_ms < e["max_ms"],
+                    )
+                    .values(max_ms=e["max_ms"])
+                )
+        for (connection_id, digest, day), (executions, total_ms) in days.items():
+            await self._add_to_day(db, connection_id, digest, day, executions, total_ms)
+        await db.commit()
+        return len(agg)
+
+    @staticmethod
+    async def _add_to_day(
+        db: AsyncSession, connection_id: str, digest: str, day: date, executions: int, total_ms: float,
+    ) -> None:
+        stmt = (
+            update(QueryFingerprintDay)
+            .where(
+                QueryFingerprintDay.connection_id == connection_id,
+                QueryFingerprintDay.fingerprint == digest,
+                QueryFingerprintDay.day == day,
+            )
+            .values(
+                executions=QueryFingerprintDay.executions + executions,
+                total_ms=QueryFingerprintDay.total_ms + total_ms,
+            )
+        )
+        if (await db.execute(stmt)).rowcount:
+            return
+        try:
+            async with db.begin_nested():
+                db.add(QueryFingerprintDay(
+                    connection_id=connection_id, fingerprint=digest, day=day,
+                    executions=executions, total_ms=total_ms,
+                ))
+        except IntegrityError:
+            await db.execute(stmt)
+
+    async def record_samples_with_context(self, context, samples: List[dict]) -> None:
+        """`record_samples` in its own session from a `UsageLimitContext`."""
+        if context is None or context.session_maker is None or not samples:
+            return
+        async with context.session_maker() as db:
+            await self.record_samples(db, context.organization_id, samples)
+
+    # -- proposals -----------------------------------------------------------
+
+    async def _existing_definition_fingerprints(self, db: AsyncSession, connection_id: str) -> set:
+        from app.models.connection_table import KIND_BOW, ConnectionTable
+
+        defs = (await db.execute(
+            select(ConnectionTable.definition_sql).where(
+                ConnectionTable.connection_id == connection_id,
+                ConnectionTable.kind == KIND_BOW,
+                ConnectionTable.deleted_at.is_(None),
+            )
+        )).scalars().all()
+        out = set()
+        for sql in defs:
+            fp = fingerprint(sql)
+            if fp is not None:
+                out.add(fp[0])
+        return out
+
+    async def refresh_candidates(self, db: AsyncSession, connection, client=None) -> List[AccelerationCandidate]:
+        """Recompute one connection's proposals; estimate the open ones.
+
+        `client` is a source client for the pre-flight estimate; without one
+        the proposals are stored unestimated. Decisions (accepted, dismissed)
+        are kept; open proposals that dropped out of the ranking are removed.
+        """
+        connection_id = str(connection.id)
+        now = datetime.utcnow()
+        since = now - timedelta(days=lookback_days())
+        rows = (await db.execute(
+            select(QueryFingerprint).where(
+                QueryFingerprint.connection_id == connection_id,
+                QueryFingerprint.last_seen_at >= since,
+            )
+        )).scalars().all()
+        totals = {
+            digest: (int(executions or 0), float(total_ms or 0.0))
+            for digest, executions, total_ms in (await db.execute(
+                select(
+                    QueryFingerprintDay.fingerprint,
+                    func.sum(QueryFingerprintDay.executions),
+                    func.sum(QueryFingerprintDay.total_ms),
+                )
+                .where(
+                    QueryFingerprintDay.connection_id == connection_id,
+                    QueryFingerprintDay.day >= since.date(),
+                )
+                .group_by(QueryFingerprintDay.fingerprint)
+            )).all()
+        }
+        proposals = rank_candidates(
+            _windowed(rows, totals),
+            existing_fingerprints=await self._existing_definition_fingerprints(db, connection_id),
+        )
+
+        current = {
+            c.cluster_key: c
+            for c in (await db.execute(
+                select(AccelerationCandidate).where(
+                    AccelerationCandidate.connection_id == connection_id,
+                )
+            )).scalars().all()
+        }
+        keep = set()
+        for p in proposals:
+            keep.add(p["cluster_key"])
+            cand = current.get(p["cluster_key"])
+            if cand is None:
+                cand = AccelerationCandidate(
+                    organization_id=str(connection.organization_id),
+                    connection_id=connection_id,
+                    cluster_key=p["cluster_key"],
+                    status=CANDIDATE_OPEN,
+                )
+                db.add(cand)
+                current[p["cluster_key"]] = cand
+            elif cand.definition_sql != p["definition_sql"]:
+                cand.estimate, cand.estimated_at = None, None
+            for field in ("tables", "definition_sql", "suggested_name", "fingerprints",
+                          "query_shapes", "executions", "total_ms", "score"):
+                setattr(cand, field, p[field])
+            cand.computed_at = now
+        for key, cand in current.items():
+            if key not in keep and cand.status == CANDIDATE_OPEN:
+                await db.delete(cand)
+        await db.commit()
+
+        open_ = sorted(
+            (c for k, c in current.items() if k in keep and c.status == CANDIDATE_OPEN),
+            key=lambda c: c.score, reverse=True,
+        )
+        if client is not None:
+            stale_before = now - timedelta(hours=DEFAULT_ESTIMATE_TTL_HOURS)
+            for cand in open_:
+                if cand.estimated_at is not None and cand.estimated_at >= stale_before:
+                    continue
+                cand.estimate = await asyncio.to_thread(self._preflight, client, cand.definition_sql)
+                cand.estimated_at = datetime.utcnow()
+            await db.commit()
+        return open_
+
+    @staticmethod
+    def _preflight(client, sql: str) -> dict:
+        from app.data_sources.fast import extractor
+
+        return _estimate_payload(extractor.estimate(client, sql))
+
+    async def list_candidates(self, db: AsyncSession, connection_id: str, include_closed: bool = False):
+        stmt = select(AccelerationCandidate).where(
+            AccelerationCandidate.connection_id == str(connection_id),
+        )
+        if not include_closed:
+            stmt = stmt.where(AccelerationCandidate.status == CANDIDATE_OPEN)
+        rows = (await db.execute(stmt.order_by(AccelerationCandidate.score.desc()))).scalars().all()
+        return list(rows)
+
+    async def get_candidate(self, db: AsyncSession, connection_id: str, candidate_id: str) -> AccelerationCandidate:
+        row = (await db.execute(
+            select(AccelerationCandidate).where(
+                AccelerationCandidate.id == str(candidate_id),
+                AccelerationCandidate.connection_id == str(connection_id),
+            )
+        )).scalar_one_or_none()
+        if not row:
+            raise HTTPException(status_code=404, detail="Suggestion not found")
+        return row
+
+    async def accept(
+        self,
+        db: AsyncSession,
+        connection,
+        candidate: AccelerationCandidate,
+        *,
+        name: Optional[str] = None,
+        current_user=None,
+        organization=None,
+        **create_kwargs,
+    ):
+        """Create the proposed custom query through the normal path.
+
+        Everything `CustomQueryService.create` enforces (name, budget on the
+        first refresh, scheduling, activation) applies unchanged; the advisor
+        only supplies the SQL and a default name.
+        """
+        from app.services.custom_query_service import custom_query_service
+
+        if candidate.status != CANDIDATE_OPEN:
+            raise HTTPException(status_code=409, detail=f"Suggestion is already {candidate.status}")
+        cq = await custom_query_service.create(
+            db, connection,
+            name=name or candidate.suggested_name,
+            definition_sql=candidate.definition_sql,
+            current_user=current_user,
+            organization=organization,
+            **create_kwargs,
+        )
+        candidate.status = CANDIDATE_ACCEPTED
+        candidate.custom_query_id = str(cq.id)
+        await db.commit()
+        return cq
+
+    async def dismiss(self, db: AsyncSession, candidate: AccelerationCandidate) -> AccelerationCandidate:
+        candidate.status = CANDIDATE_DISMISSED
+        await db.commit()
+        return candidate
+
+    async def prune(self, db: AsyncSession) -> None:
+        """Drop shapes not seen, and day buckets that ended, before the
+        lookback window."""
+        cutoff = datetime.utcnow() - timedelta(days=lookback_days())
+        await db.execute(delete(QueryFingerprint).where(QueryFingerprint.last_seen_at < cutoff))
+        await db.execute(delete(QueryFingerprintDay).where(QueryFingerprintDay.day < cutoff.date()))
+        await db.commit()
+
+
+acceleration_advisor_service = AccelerationAdvisorService()
+
+
+async def run_acceleration_advisor() -> None:
+    """Scheduled entrypoint: recompute proposals for every connection with
+    recent history, in orgs that have custom queries enabled. One worker per
+    fire (`claim_scheduled_run`); each connection on its own session so one
+    unreachable source does not stall the rest."""
+    from app.core.scheduler import claim_scheduled_run
+
+    if not await asyncio.to_thread(claim_scheduled_run, ADVISOR_JOB_ID):
+        return
+
+    from app.dependencies import async_session_maker
+    from app.models.connection import Connection
+    from app.models.organization import Organization
+    from app.services.custom_query_service import CustomQueryService, custom_query_service
+
+    t0 = time.perf_counter()
+    since = datetime.utcnow() - timedelta(days=lookback_days())
+    async with async_session_maker() as db:
+        await acceleration_advisor_service.prune(db)
+        ids = (await db.execute(
+            select(QueryFingerprint.connection_id)
+            .where(QueryFingerprint.last_seen_at >= since)
+            .distinct()
+        )).scalars().all()
+
+    done = skipped = 0
+    for connection_id in ids:
+        async with async_session_maker() as db:
+            try:
+                connection = await db.get(Connection, connection_id)
+                if connection is None or connection.deleted_at is not None:
+                    continue
+                organization = await db.get(Organization, connection.organization_id)
+                try:
+                    await CustomQueryService.ensure_enabled(db, organization)
+                    CustomQueryService.ensure_accelerable(connection)
+                except HTTPException:
+                    skipped += 1
+                    continue
+                client = None
+                try:
+                    client = await custom_query_service.connection_service.construct_client(db, connection, None)
+                except Exception as e:
+                    logger.info(
+                        "acceleration_advisor.no_client",
+                        extra={"connection_id": connection_id, "error": str(e)},
+                    )
+                await acceleration_advisor_service.refresh_candidates(db, connection, client=client)
+                done += 1
+            except Exception as e:
+                logger.warning(
+                    "acceleration_advisor.failed",
+                    extra={"connection_id": connection_id, "error": str(e)},
+                )
+    logger.info(
+        "acceleration_advisor.done",
+        extra={"connections": done, "skipped": skipped, "elapsed_s": round(time.perf_counter() - t0, 3)},
+    )
@@ -0,0 +1,229 @@
+"""DB-backed queue of agent runs for dedicated worker processes.
+
+By default an agent run is an ``asyncio`` task in the web worker that took
+the POST, bounded only by that worker's ``BOW_MAX_CONCURRENT_AGENTS``
+semaphore: long runs share the event loop and DB pool with page loads, and
+restarting the web tier kills every run in flight. With
+``BOW_AGENT_EXECUTION=queue`` web workers only enqueue here, and
+``bow-agent-worker`` processes (`app.agent_worker`) claim and execute the
+runs — so web and agent capacity scale independently, and a web deploy
+leaves runs alone.
+
+Design notes:
+  * Like the query concurrency leases, the queue is rows (``AgentRun``) —
+    Postgres is the only shared store in the stack. A claim is a conditional
+    UPDATE of a ``queued`` row, so two workers racing for the same run
+    cannot both get it, on Postgres and SQLite alike.
+  * A claimed row carries its holder and ``lease_expires_at``, renewed by
+    the holder every third of ``BOW_AGENT_RUN_LEASE_SECONDS`` (60s). A holder
+    whose renewal no longer matches has lost the run and stops it.
+  * ``recover_expired`` handles runs whose holder died. AgentV2 keeps no
+    checkpoint to continue from, so only a run that had not produced a block
+    yet is re-queued (up to ``BOW_AGENT_RUN_MAX_ATTEMPTS``, 2, attempts);
+    anything further along is failed and its completion marked as errored,
+    exactly like an agent crash in the web worker.
+  * Events reach clients through the normal SSE endpoints: the worker
+    registers the run's stream, and the kickoff/watch streams on the web
+    tier read it through the cross-worker event transport and the
+    completion event log.
+"""
+
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.agent_run import AgentRun
+from app.models.completion import Completion
+from app.models.completion_block import CompletionBlock
+
+logger = logging.getLogger(__name__)
+
+# Channel the web tier pings after enqueueing so idle workers claim at once
+# instead of on their next poll.
+ENQUEUED_CHANNEL = "agent_runs.enqueued"
+
+
+def _env_number(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def enabled() -> bool:
+    """Whether web workers hand agent runs to ``bow-agent-worker`` processes."""
+    return os.environ.get("BOW_AGENT_EXECUTION", "inline").strip().lower() == "queue"
+
+
+def lease_seconds() -> float:
+    return max(5.0, _env_number("BOW_AGENT_RUN_LEASE_SECONDS", 60.0))
+
+
+def max_attempts() -> int:
+    return max(1, int(_env_number("BOW_AGENT_RUN_MAX_ATTEMPTS", 2)))
+
+
+def _now() -> datetime:
+    return datetime.utcnow()
+
+
+async def enqueue(
+    db: AsyncSession,
+    *,
+    report_id: str,
+    head_completion_id: str,
+    system_completion_id: str,
+    options: Optional[dict] = None,
+) -> AgentRun:
+    """Queue a run for its (already committed, in_progress) system completion."""
+    run = AgentRun(
+        report_id=str(report_id),
+        head_completion_id=str(head_completion_id),
+        system_completion_id=str(system_completion_id),
+        status="queued",
+        options=options or None,
+        attempts=0,
+        enqueued_at=_now(),
+    )
+    db.add(run)
+    await db.commit()
+    try:
+        from app.streaming import event_transport
+        event_transport.get_transport().publish(ENQUEUED_CHANNEL, {"run_id": str(run.id)})
+    except Exception as e:
+        logger.debug(f"[agent_runs] enqueue ping failed: {e}")
+    return run
+
+
+async def claim(db: AsyncSession, *, holder: str, limit: int) -> List[AgentRun]:
+    """Claim up to ``limit`` queued runs, oldest first."""
+    if limit <= 0:
+        return []
+    now = _now()
+    candidates = (await db.execute(
+        select(AgentRun.id)
+        .where(AgentRun.status == "queued")
+        .order_by(AgentRun.enqueued_at.asc(), AgentRun.id.asc())
+        .limit(limit * 2)
+    )).scalars().all()
+    claimed: List[str] = []
+    for run_id in candidates:
+        result = await db.execute(
+            update(AgentRun)
+            .where(AgentRun.id == run_id, AgentRun.status == "queued")
+            .values(
+                status="running",
+                holder=holder,
+                attempts=AgentRun.attempts + 1,
+                started_at=now,
+                lease_expires_at=now + timedelta(seconds=lease_seconds()),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        if getattr(result, "rowcount", 0) == 1:
+            claimed.append(run_id)
+            if len(claimed) >= limit:
+                break
+    await db.commit()
+    if not claimed:
+        return []
+    return list((await db.execute(
+        select(AgentRun).where(AgentRun.id.in_(claimed)).order_by(AgentRun.enqueued_at.asc())
+    )).scalars().all())
+
+
+async def renew(db: AsyncSession, *, holder: str, run_ids: Iterable[str]) -> Set[str]:
+    """Extend the leases of runs this holder still owns; returns their ids."""
+    ids = list(run_ids)
+    if not ids:
+        return set()
+    owned = (AgentRun.id.in_(ids), AgentRun.holder == holder, AgentRun.status == "running")
+    await db.execute(
+        update(AgentRun)
+        .where(*owned)
+        .values(lease_expires_at=_now() + timedelta(seconds=lease_seconds()))
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    return set((await db.execute(select(AgentRun.id).where(*owned))).scalars().all())
+
+
+async def finish(
+    db: AsyncSession, *, run_id: str, holder: str, status: str = "done", error: Optional[str] = None,
+) -> bool:
+    """Record the end of a held run. False if the lease was lost meanwhile."""
+    result = await db.execute(
+        update(AgentRun)
+        .where(AgentRun.id == run_id, AgentRun.holder == holder, AgentRun.status == "running")
+        .values(status=status, finished_at=_now(), lease_expires_at=None, error=error)
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    return getattr(result, "rowcount", 0) == 1
+
+
+async def abandon(db: AsyncSession, *, run_id: str, holder: str) -> None:
+    """Give a run up without finishing it (worker shutting down): its lease
+    expires now, so the next recovery sweep re-queues or fails it."""
+    await db.execute(
+        update(AgentRun)
+        .where(AgentRun.id == run_id, AgentRun.holder == holder, AgentRun.status == "running")
+        .values(lease_expires_at=_now())
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+
+
+async def recover_expired(db: AsyncSession) -> Tuple[int, int]:
+    """Re-queue or fail runs whose holder stopped renewing.
+
+    Returns ``(requeued, failed)``. Safe to run from any number of processes:
+    every transition is conditional on the row still being expired.
+    """
+    now = _now()
+    expired = (await db.execute(
+        select(AgentRun).where(AgentRun.status == "running", AgentRun.lease_expires_at < now)
+    )).scalars().all()
+    requeued = failed = 0
+    for run in expired:
+        completion_status = (await db.execute(
+            select(Completion.status).where(Completion.id == run.system_completion_id)
+        )).scalar_one_or_none()
+        started = (await db.execute(
+            select(CompletionBlock.id).where(CompletionBlock.completion_id == run.system_completion_id).limit(1)
+        )).first() is not None
+        if completion_status != "in_progress":
+            values = {"status": "done", "finished_at": now}
+        elif not started and (run.attempts or 0) < max_attempts():
+            values = {"status": "queued", "holder": None}
+        else:
+            values = {"status": "failed", "finished_at": now, "error": f"lease expired (holder {run.holder})"}
+        result = await db.execute(
+            update(AgentRun)
+            .where(AgentRun.id == run.id, AgentRun.status == "running", AgentRun.lease_expires_at < now)
+            .values(lease_expires_at=None, **values)
+            .execution_options(synchronize_session=False)
+        )
+        if getattr(result, "rowcount", 0) != 1:
+            continue
+        if values["status"] == "queued":
+            requeued += 1
+            logger.warning(f"[agent_runs] re-queued run {run.id} after its worker {run.holder} stopped renewing")
+        elif values["status"] == "failed":
+            failed += 1
+            logger.warning(f"[agent_runs] failed run {run.id}: worker {run.holder} stopped renewing mid-run")
+            await db.execute(
+                update(Completion)
+                .where(Completion.id == run.system_completion_id, Completion.status == "in_progress")
+                .values(
+                    status="error",
+                    completion={"content": "Agent failed: the worker running it stopped responding", "error": True},
+                )
+                .execution_options(synchronize_session=False)
+            )
+    await db.commit()
+    return requeued, failed
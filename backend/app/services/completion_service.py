@@ -2,11 +2,13 @@ import asyncio
 import os
 from app.ai.llm.pii.display import redact_prompt_display as _redact_prompt_display
 from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask as StarletteBackgroundTask
 import json
 import logging
 import time
 from datetime import datetime
 from types import SimpleNamespace
+from typing import Optional
 from uuid import uuid4
 from app.models.plan import Plan
 from app.models.completion import Completion
@@ -36,11 +38,14 @@ from app.services.llm_service import LLMService
 from app.serializers.completion_v2 import PREVIEW_ROWS, serialize_block_v2, serialize_block_v2_sync
 from app.models.visualization import Visualization
 from app.schemas.agent_execution_schema import PlanDecisionSchema
-from app.schemas.sse_schema import SSEEvent, format_sse_event
+from app.schemas.sse_schema import SSEEvent, format_sse_event, format_sse_frame
+from app.streaming import completion_event_log
+from app.services import agent_run_queue
 from app.streaming.completion_stream import (
     CompletionEventQueue,
     HEARTBEAT,
     STREAM_DONE,
+    RemoteStreamSubscription,
     register_stream,
     unregister_stream,
     get_active_stream,
@@ -70,10 +75,23 @@ _AGENT_RUN_SEMAPHORE = asyncio.Semaphore(int(os.getenv("BOW_MAX_CONCURRENT_AGENT
 # proxies from reaping idle connections and lets clients detect dead ones.
 _SSE_HEARTBEAT_SECONDS = float(os.getenv("BOW_SSE_HEARTBEAT_SECONDS", "15"))
 
-# DB re-read cadence for the watch endpoint's fallback tail (when the live
-# in-process queue is not available, e.g. another uvicorn worker owns the run).
+# DB re-read cadence for the watch endpoint's fallback tail (when another
+# uvicorn worker owns the run and no cross-worker event transport is set up).
 _WATCH_TAIL_INTERVAL_SECONDS = float(os.getenv("BOW_WATCH_TAIL_INTERVAL_SECONDS", "0.7"))
 
+# With a cross-worker transport, the watch endpoint reconciles against the DB
+# only after this long without a relayed event.
+_WATCH_SAFETY_INTERVAL_SECONDS = float(os.getenv("BOW_WATCH_SAFETY_INTERVAL_SECONDS", "5"))
+
+
+def _parse_last_event_id(value: Optional[str]) -> Optional[int]:
+    """A client's Last-Event-ID as an event log position, if it is one."""
+    try:
+        seq = int(str(value).strip())
+    except (TypeError, ValueError):
+        return None
+    return seq if seq >= 0 else None
+
 from sqlalchemy import select, update, func, delete
 from sqlalchemy.orm import defer, lazyload, selectinload
 
@@ -2291,15 +2309,37 @@ class CompletionService:
             resolved_build_id = await self._resolve_build_id(db, organization, build_id)
             _log("build_id_resolved")
 
+            queued_watch = None
+            if agent_run_queue.enabled():
+                # Split deployment: a bow-agent-worker process runs this turn.
+                # The response relays its events like a watcher attached
+                # before the first one (and the queue's own watch stream
+                # releases the request session).
+                await agent_run_queue.enqueue(
+                    db,
+                    report_id=str(report.id),
+                    head_completion_id=str(completion.id),
+                    system_completion_id=str(system_completion.id),
+                    options={
+                        "build_id": resolved_build_id,
+                        "platform": external_platform or (completion_data.prompt.platform if completion_data.prompt else None),
+                    },
+                )
+                queued_watch = await self.watch_completion_stream(
+                    db, str(report.id), str(system_completion.id), current_user, organization, from_start=True,
+                )
+                _log("run_enqueued")
+
             # Create event queue for streaming. Registered by system completion
             # id so a reconnecting client (refresh, dropped connection) can
             # re-attach to the live stream via the watch endpoint.
             event_queue = CompletionEventQueue()
-            register_stream(str(system_completion.id), event_queue)
-            # Clock starts when the request is accepted, not when the agent
-            # gets a slot — the gap between the two is exactly the queueing
-            # cost a user experiences as "it just sits there".
-            phase_trace.start(str(system_completion.id))
+            if queued_watch is None:
+                register_stream(str(system_completion.id), event_queue)
+                # Clock starts when the request is accepted, not when the
+                # agent gets a slot — the gap between the two is exactly the
+                # queueing cost a user experiences as "it just sits there".
+                phase_trace.start(str(system_completion.id))
 
             async def run_agent_with_streaming():
                 """Run agent in background and stream events."""
@@ -2556,8 +2596,9 @@ class CompletionService:
                                 pass
 
             # Start agent execution in background
-            asyncio.create_task(run_agent_with_streaming())
-            _log("task_spawned")
+            if queued_watch is None:
+                asyncio.create_task(run_agent_with_streaming())
+                _log("task_spawned")
 
             # Release the request-scoped DB connection before we hand the
             # client a StreamingResponse. FastAPI normally only tears down
@@ -2615,6 +2656,11 @@ class CompletionService:
                 )
                 yield _format_sse_event_traced(start_event)
 
+                if queued_watch is not None:
+                    async for chunk in queued_watch.body_iterator:
+                        yield chunk
+                    return
+
                 # Stream agent events, emitting an SSE comment heartbeat during
                 # quiet stretches (long tool runs) so intermediaries don't reap
                 # the idle connection and clients can detect a dead one.
@@ -2650,7 +2696,8 @@ class CompletionService:
                     "Transfer-Encoding": "chunked",
                     "X-Accel-Buffering": "no",  # Disable nginx/ingress buffering
                     "X-Content-Type-Options": "nosniff",
-                }
+                },
+                background=queued_watch.background if queued_watch is not None else None,
             )
 
         except HTTPException as he:
@@ -2672,6 +2719,8 @@ class CompletionService:
         completion_id: str,
         current_user: User,
         organization: Organization,
+        last_event_id: Optional[str] = None,
+        from_start: bool = False,
     ):
         """Re-attachable SSE stream for an existing (usually in-progress) completion.
 
@@ -2684,12 +2733,28 @@ class CompletionService:
           (token-level granularity). The subscription starts BEFORE the DB
           snapshot is read so no event can fall in between; overlap produces
           duplicate upserts, which are idempotent.
+        - If another worker owns it and a cross-worker event transport is
+          configured, attaches to the owner's stream through the transport
+          (same events, same granularity), re-reading the DB only during
+          quiet stretches of _WATCH_SAFETY_INTERVAL_SECONDS.
         - Otherwise tails the DB (blocks are persisted incrementally),
           emitting `block.upsert` for every block whose serialized state
           changed, at block-level granularity.
 
+        With `last_event_id` (the client's Last-Event-ID: the id of the last
+        event it received) and an event log that covers that position, the
+        snapshot is skipped: `completion.resumed` is followed by exactly the
+        events the client missed, read from the log, and then the live stream
+        as above minus anything already replayed. Gaps in the live stream
+        (dropped by a full queue, or relayed before the watcher attached) are
+        filled from the log; without a live source the log itself is tailed.
+
         Ends with `completion.finished` and `[DONE]` once the completion
         leaves in_progress (or was sigkilled).
+
+        `from_start` is the kickoff of a queued run (see agent_run_queue):
+        nothing has happened yet, so the stream is the whole log from the
+        first event, relayed from whichever agent worker picks the run up.
         """
         report = await self.report_service.get_report(db, report_id, current_user, organization)
         if not report:
@@ -2706,6 +2771,15 @@ class CompletionService:
         # reading the snapshot, so no event is lost between snapshot and attach.
         live_queue = get_active_stream(str(completion_id))
         subscription = live_queue.subscribe() if live_queue is not None else None
+        local_log = live_queue.log if live_queue is not None else None
+        # Everything up to here is covered by the snapshot read below.
+        snapshot_seq = local_log.last_seq if local_log is not None else None
+        remote = None
+        if subscription is None:
+            try:
+                remote = RemoteStreamSubscription.open(str(completion_id))
+            except Exception as e:
+                logger.warning(f"[watch:{completion_id}] remote attach failed: {e!r}")
 
         # Release the request-scoped DB connection before handing the client a
         # long-lived StreamingResponse (same pool-starvation concern as the
@@ -2718,6 +2792,9 @@ class CompletionService:
 
         session_factory = create_async_session_factory()
         cid = str(completion_id)
+        resume_after = _parse_last_event_id(last_event_id) if last_event_id is not None else None
+        if from_start:
+            resume_after = 0
 
         def _effective_status(c: Completion) -> str:
             if c.sigkill is not None and c.status == "in_progress":
@@ -2744,23 +2821,142 @@ class CompletionService:
                         logger.warning(f"[watch:{cid}] block serialize failed: {e!r}")
                 return _effective_status(comp), serialized
 
+        async def _read_status() -> str:
+            async with session_factory() as session:
+                comp = await session.get(Completion, completion_id)
+                return _effective_status(comp) if comp is not None else "error"
+
+        async def _logged(after: int, until: Optional[int] = None):
+            """Logged events in (after, until): the owner's unflushed buffer
+            when it is this worker, then the DB."""
+            rows = {r[0]: r for r in (local_log.pending_after(after) if local_log is not None else [])}
+            try:
+                db_rows = await completion_event_log.read_after(
+                    cid, after, until - 1 if until is not None else None
+                )
+                rows.update({r[0]: r for r in db_rows})
+            except Exception as e:
+                logger.warning(f"[watch:{cid}] event log read failed: {e!r}")
+            return [rows[seq] for seq in sorted(rows) if until is None or seq < until]
+
+        async def resume_stream_generator(status: str, replay: list):
+            """Replay the log past the client's position, then go live."""
+            last = replay[-1][0] if replay else resume_after
+            lossy = False
+            yield format_sse_event(SSEEvent(
+                event="completion.resumed",
+                completion_id=cid,
+                data={"system_completion_id": cid, "status": status, "resumed_after": resume_after},
+            ))
+            for seq, name, payload in replay:
+                yield format_sse_frame(name, payload, str(seq))
+
+            source = subscription if subscription is not None else (remote.queue if remote is not None else None)
+            if source is not None and (subscription is not None or status == "in_progress"):
+                while True:
+                    item = await CompletionEventQueue.next_event(source, timeout=_SSE_HEARTBEAT_SECONDS)
+                    if item is STREAM_DONE:
+                        break
+                    if item is HEARTBEAT:
+                        yield ": ping\n\n"
+                        status = await _read_status()
+                        if status != "in_progress":
+                            break
+                        continue
+                    seq = item._log_seq
+                    if seq is not None:
+                        if seq <= last:
+                            continue  # already replayed
+                        if seq > last + 1:
+                            gap = await _logged(last, seq)
+                            if len(gap) < seq - last - 1 and remote is not None:
+                                # The owner's batch holding them has not landed yet.
+                                await asyncio.sleep(2 * completion_event_log.flush_interval_s())
+                                gap = await _logged(last, seq)
+                            lossy = lossy or len(gap) < seq - last - 1
+                            for gseq, name, payload in gap:
+                                yield format_sse_frame(name, payload, str(gseq))
+                        last = seq
+                    yield format_sse_event(item)
+            elif status == "in_progress":
+                # No live source here: tail the log itself.
+                last_emit = time.monotonic()
+                while status == "in_progress":
+                    await asyncio.sleep(_WATCH_TAIL_INTERVAL_SECONDS)
+                    status = await _read_status()
+                    rows = await _logged(last)
+                    for seq, name, payload in rows:
+                        lossy = lossy or seq != last + 1
+                        last = seq
+                        yield format_sse_frame(name, payload, str(seq))
+                    if rows:
+                        last_emit = time.monotonic()
+                    elif time.monotonic() - last_emit >= _SSE_HEARTBEAT_SECONDS:
+                        yield ": ping\n\n"
+                        last_emit = time.monotonic()
+
+            if subscription is None:
+                # The owner writes its last batch as it finishes.
+                await asyncio.sleep(2 * completion_event_log.flush_interval_s())
+                for seq, name, payload in await _logged(last):
+                    lossy = lossy or seq != last + 1
+                    last = seq
+                    yield format_sse_frame(name, payload, str(seq))
+            status = await _read_status()
+            if lossy or (from_start and last == 0):
+                # Part of the tail is gone from the log: converge on persisted
+                # state, as the snapshot path does.
+                _, final_blocks = await _read_state()
+                for block_json in final_blocks.values():
+                    yield format_sse_event(SSEEvent(
+                        event="block.upsert",
+                        completion_id=cid,
+                        data={"block": json.loads(block_json)},
+                    ))
+            yield format_sse_event(SSEEvent(
+                event="completion.finished",
+                completion_id=cid,
+                data={"system_completion_id": cid, "status": status},
+            ))
+            yield "data: [DONE]\n\n"
+
         async def watch_stream_generator():
             try:
+                replay = None
+                if resume_after is not None and (live_queue is None or local_log is not None):
+                    replay = await completion_event_log.replay_after(cid, resume_after, local_log)
+                if replay is None and from_start:
+                    replay = []
+                if replay is not None:
+                    status = await _read_status()
+                    if not replay and live_queue is None and status != "in_progress" and not from_start:
+                        # Nothing logged past the client and nobody left to
+                        # add to it: let a snapshot confirm the final state.
+                        replay = None
+                if replay is not None:
+                    async for frame in resume_stream_generator(status, replay):
+                        yield frame
+                    return
+
                 status, blocks = await _read_state()
 
                 yield format_sse_event(SSEEvent(
                     event="completion.resumed",
                     completion_id=cid,
                     data={"system_completion_id": cid, "status": status},
-                ))
-
-                # Idempotent snapshot replay: full current block state.
-                for block_json in blocks.values():
+                ), event_id=str(snapshot_seq) if snapshot_seq and not blocks else None)
+
+                # Idempotent snapshot replay: full current block state. With a
+                # live queue the snapshot stands for the log up to
+                # snapshot_seq; its last frame carries that id, so a client
+                # cut off mid-snapshot does not resume past it.
+                last_block = len(blocks) - 1
+                for i, block_json in enumerate(blocks.values()):
                     yield format_sse_event(SSEEvent(
                         event="block.upsert",
                         completion_id=cid,
                         data={"block": json.loads(block_json)},
-                    ))
+                    ), event_id=str(snapshot_seq) if snapshot_seq and i == last_block else None)
 
                 if status == "in_progress":
                     if subscription is not None:
@@ -2790,6 +2986,50 @@ class CompletionService:
                                 completion_id=cid,
                                 data={"block": json.loads(block_json)},
                             ))
+                    elif remote is not None:
+                        # Relayed attach: another worker owns the run and
+                        # publishes its events to us while we announce
+                        # ourselves. A quiet stretch (long tool run, or an
+                        # owner that is gone) falls back to one DB
+                        # reconciliation per safety interval.
+                        last_emit = time.monotonic()
+                        while True:
+                            item = await CompletionEventQueue.next_event(
+                                remote.queue, timeout=_WATCH_SAFETY_INTERVAL_SECONDS
+                            )
+                            if item is STREAM_DONE:
+                                break
+                            if item is not HEARTBEAT:
+                                last_emit = time.monotonic()
+                                yield format_sse_event(item)
+                                continue
+                            status, current = await _read_state()
+                            changed = [
+                                bj for bid, bj in current.items()
+                                if blocks.get(bid) != bj
+                            ]
+                            blocks = current
+                            for block_json in changed:
+                                yield format_sse_event(SSEEvent(
+                                    event="block.upsert",
+                                    completion_id=cid,
+                                    data={"block": json.loads(block_json)},
+                                ))
+                            if status != "in_progress":
+                                break
+                            if changed:
+                                last_emit = time.monotonic()
+                            elif time.monotonic() - last_emit >= _SSE_HEARTBEAT_SECONDS:
+                                yield ": ping\n\n"
+                                last_emit = time.monotonic()
+                        # Converge on persisted state, as the live attach does.
+                        status, final_blocks = await _read_state()
+                        for block_json in final_blocks.values():
+                            yield format_sse_event(SSEEvent(
+                                event="block.upsert",
+                                completion_id=cid,
+                                data={"block": json.loads(block_json)},
+                            ))
                     else:
                         # DB tail: another worker owns the run (or it already
                         # detached). Emit block upserts as persisted state
@@ -2826,6 +3066,8 @@ class CompletionService:
             finally:
                 if live_queue is not None and subscription is not None:
                     live_queue.unsubscribe(subscription)
+                if remote is not None:
+                    remote.close()
 
         return StreamingResponse(
             watch_stream_generator(),
@@ -2837,6 +3079,9 @@ class CompletionService:
                 "X-Accel-Buffering": "no",  # Disable nginx/ingress buffering
                 "X-Content-Type-Options": "nosniff",
             },
+            # A client gone before the generator started never runs its
+            # finally; the relayed subscription must not outlive it.
+            background=StarletteBackgroundTask(remote.close) if remote is not None else None,
         )
 
     async def _get_response_completions(self, db: AsyncSession, head_completion: Completion, current_user: User, organization: Organization):
@@ -3375,23 +3620,38 @@ class CompletionService:
                 await db.refresh(system_completion)
 
                 logger.info(f"[queue] dispatching queued completion {next_id} on report {report_id}")
-                asyncio.create_task(self._run_dispatched_agent(
-                    str(report_id), str(head.id), str(system_completion.id)
-                ))
+                if agent_run_queue.enabled():
+                    await agent_run_queue.enqueue(
+                        db,
+                        report_id=str(report_id),
+                        head_completion_id=str(head.id),
+                        system_completion_id=str(system_completion.id),
+                    )
+                else:
+                    asyncio.create_task(self._run_dispatched_agent(
+                        str(report_id), str(head.id), str(system_completion.id)
+                    ))
             except Exception:
                 logger.exception(f"[queue] dispatcher failed for report {report_id}")
 
-    async def _run_dispatched_agent(self, report_id: str, head_id: str, system_id: str):
+    async def _run_dispatched_agent(
+        self, report_id: str, head_id: str, system_id: str,
+        build_id: str = None, platform: str = None,
+    ):
         """Run the agent for a dispatcher-started (queued) turn.
 
         Mirrors run_agent_with_streaming but with no HTTP client attached: the
         event queue is registered so any client can attach via the watch
         endpoint (the frontend does, on the system row's insert broadcast).
         Chains the dispatcher again in ``finally`` to drain the rest of the
-        queue.
+        queue. Also how a bow-agent-worker runs every queued run, with the
+        kickoff's resolved build and platform.
         """
         event_queue = CompletionEventQueue()
         register_stream(system_id, event_queue)
+        if event_queue.log is not None:
+            # A re-queued run already logged events under its first attempt.
+            await event_queue.log.continue_numbering()
         session_factory = create_async_session_factory()
         _agent_slot = False
         try:
@@ -3436,7 +3696,7 @@ class CompletionService:
                         model=model,
                         small_model=small_model,
                         mode=prompt.get('mode') or getattr(report, "mode", "chat"),
-                        platform=prompt.get('platform'),
+                        platform=platform or prompt.get('platform'),
                         platform_context=prompt.get('platform_context'),
                         report=report,
                         messages=[],
@@ -3449,6 +3709,7 @@ class CompletionService:
                         data_sources=run_agents,
                         session_maker=session_factory,
                         routing_meta=routing_meta,
+                        build_id=build_id,
                     )
                     await agent.main_execution()
                     await event_queue.put(SSEEvent(
@@ -25,7 +25,8 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.scheduler import scheduler
 from app.core.telemetry import telemetry
-from app.data_sources.fast import artifacts, extractor, rls
+from app.data_sources.fast import artifacts, extractor, rls, session_pool
+from app.data_sources.fast.sql_dialect import WATERMARK_COLUMN_RE
 from app.ee.license import has_feature
 from app.data_sources.fast.fast_client import FastQueryClient, FastRelation
 from app.models.connection import Connection
@@ -88,6 +89,12 @@ def is_accelerable_type(conn_type) -> bool:
 
 _NAME_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]{0,62}$")
 
+REFRESH_MODES = ("full", "incremental")
+# How many incremental refreshes run between full rebuilds. A delta never sees
+# a deleted row, so an incremental relation drifts from its source until the
+# next rebuild; daily at the default hourly interval.
+DEFAULT_FULL_REFRESH_EVERY = 24
+
 # One refresh at a time per connection: a refresh is a full scan against the
 # source, and the whole point is to be gentle with it.
 _refresh_locks: dict[str, asyncio.Lock] = {}
@@ -220,6 +227,45 @@ class CustomQueryService:
             )
         return name
 
+    @staticmethod
+    def validate_incremental(
+        refresh_mode: Optional[str],
+        watermark_column: Optional[str],
+        merge_key: Optional[str],
+        full_refresh_every: Optional[int],
+    ) -> None:
+        """Reject an incremental configuration that could not run.
+
+        Whether the columns exist is only known once the query has run, so a
+        column missing from the result is caught at refresh time (and falls
+        back to a full rebuild) rather than here.
+        """
+        mode = refresh_mode or "full"
+        if mode not in REFRESH_MODES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Refresh mode must be one of: {', '.join(REFRESH_MODES)}.",
+            )
+        if mode == "incremental" and not (watermark_column or "").strip():
+            raise HTTPException(
+                status_code=400,
+                detail=(
+                    "Incremental refresh needs a watermark column — a timestamp or "
+                    "increasing id that grows whenever a row is added or changed."
+                ),
+            )
+        for label, col in (("Watermark column", watermark_column), ("Merge key", merge_key)):
+            if col and not WATERMARK_COLUMN_RE.match(col.strip()):
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"{label} must be a plain column name (letters, numbers, underscores).",
+                )
+        if full_refresh_every is not None and int(full_refresh_every) < 1:
+            raise HTTPException(
+                status_code=400,
+                detail="Full rebuild interval must be at least 1 refresh.",
+            )
+
     async def _ensure_name_free(
         self, db: AsyncSession, connection_id: str, name: str, exclude_id: str = None
     ) -> None:
@@ -351,12 +397,17 @@ class CustomQueryService:
         refresh_schedule_mode: str = "interval",
         refresh_interval_minutes: int = 60,
         refresh_at_time: str = None,
+        refresh_mode: str = "full",
+        watermark_column: str = None,
+        merge_key: str = None,
+        full_refresh_every: int = None,
         current_user: User = None,
         organization=None,
         activate_for_datasource_id: str = None,
     ) -> ConnectionTable:
         self.ensure_accelerable(connection)
         name = self.validate_name(name)
+        self.validate_incremental(refresh_mode, watermark_column, merge_key, full_refresh_every)
         await self._ensure_name_free(db, connection.id, name)
 
         if not (definition_sql or "").strip():
@@ -371,6 +422,10 @@ class CustomQueryService:
             refresh_schedule_mode=refresh_schedule_mode,
             refresh_interval_minutes=refresh_interval_minutes,
             refresh_at_time=refresh_at_time,
+            refresh_mode=refresh_mode or "full",
+            watermark_column=(watermark_column or "").strip() or None,
+            merge_key=(merge_key or "").strip() or None,
+            full_refresh_every=full_refresh_every,
             columns=[],
             pks=[],
             fks=[],
@@ -459,10 +514,33 @@ class CustomQueryService:
         refresh_schedule_mode: str = None,
         refresh_interval_minutes: int = None,
         refresh_at_time: str = None,
+        refresh_mode: str = None,
+        watermark_column: str = None,
+        merge_key: str = None,
+        full_refresh_every: int = None,
         current_user: User = None,
         organization_timezone: str = "UTC",
     ) -> ConnectionTable:
         sql_changed = False
+        incremental_changed = False
+        if any(v is not None for v in (refresh_mode, watermark_column, merge_key, full_refresh_every)):
+            self.validate_incremental(
+                refresh_mode if refresh_mode is not None else cq.refresh_mode,
+                watermark_column if watermark_column is not None else cq.watermark_column,
+                merge_key if merge_key is not None else cq.merge_key,
+                full_refresh_every if full_refresh_every is not None else cq.full_refresh_every,
+            )
+        if refresh_mode is not None and refresh_mode != (cq.refresh_mode or "full"):
+            cq.refresh_mode = refresh_mode
+            incremental_changed = True
+        if watermark_column is not None and (watermark_column.strip() or None) != cq.watermark_column:
+            cq.watermark_column = watermark_column.strip() or None
+            incremental_changed = True
+        if merge_key is not None and (merge_key.strip() or None) != cq.merge_key:
+            cq.merge_key = merge_key.strip() or None
+            incremental_changed = True
+        if full_refresh_every is not None:
+            cq.full_refresh_every = full_refresh_every
         if name is not None and name != cq.name:
             name = self.validate_name(name)
             await self._ensure_name_free(db, connection.id, name, exclude_id=cq.id)
@@ -479,6 +557,11 @@ class CustomQueryService:
             cq.refresh_interval_minutes = refresh_interval_minutes
         if refresh_at_time is not None:
             cq.refresh_at_time = refresh_at_time
+        if sql_changed or incremental_changed:
+            # The stored mark belonged to the old query or column. Dropping it
+            # makes the next refresh a full rebuild, which re-establishes one.
+            cq.watermark_value = None
+            cq.refreshes_since_full = 0
 
         await db.commit()
         await db.refresh(cq)
@@ -506,6 +589,7 @@ class CustomQueryService:
             await db.delete(r)
 
         artifacts.delete_artifact(cq.artifact_path)
+        session_pool.invalidate_artifact(cq.artifact_path)
         name = cq.name
         cq.deleted_at = datetime.utcnow()
         cq.artifact_path = None
@@ -521,8 +605,18 @@ class CustomQueryService:
         connection: Connection,
         cq: ConnectionTable,
         current_user: User = None,
+        force_full: bool = False,
     ) -> ConnectionTable:
-        """Rebuild the artifact. A failure keeps the previous one serving."""
+        """Rebuild the artifact. A failure keeps the previous one serving.
+
+        An incremental relation applies only the rows past its high-water mark
+        to a copy of the previous artifact, and every `full_refresh_every`-th
+        time rebuilds from scratch so deletes at the source catch up. Anything
+        that makes a delta inapplicable (no previous artifact, a changed
+        result shape) falls back to a full rebuild in the same run. A due full
+        rebuild refused by the budget falls back the other way: a relation
+        that has outgrown one full extraction keeps advancing by deltas.
+        """
         async with _lock_for(connection.id):
             cq.last_refresh_status = "running"
             await db.commit()
@@ -531,12 +625,54 @@ class CustomQueryService:
                 db, connection, current_user
             )
             old_path = cq.artifact_path
+            plan = self._refresh_plan(cq, force_full)
+            watermark_column = (
+                cq.watermark_column if (cq.refresh_mode or "full") == "incremental" else None
+            )
+            previous_key = None
+            if plan != "full":
+                try:
+                    previous_key = artifacts.decrypt_key(cq.artifact_key_enc)
+                except Exception:
+                    plan = "full"
+
+            def _incremental():
+                delta = extractor.delta_query(
+                    client, cq.definition_sql, watermark_column, cq.watermark_value
+                )
+                extractor.check_budget(extractor.estimate(client, delta))
+                return extractor.extract_incremental(
+                    client, cq.definition_sql, cq.name, connection.id,
+                    previous_path=old_path,
+                    previous_key=previous_key,
+                    watermark_column=watermark_column,
+                    watermark=cq.watermark_value,
+                    merge_key=cq.merge_key,
+                )
 
             def _run():
-                est = extractor.estimate(client, cq.definition_sql)
-                extractor.check_budget(est)
+                if plan == "incremental":
+                    try:
+                        return _incremental()
+                    except extractor.IncrementalUnavailable as e:
+                        logger.info(
+                            "custom_query.refresh.incremental_fallback",
+                            extra={"custom_query": cq.name, "reason": str(e)},
+                        )
+                try:
+                    est = extractor.estimate(client, cq.definition_sql)
+                    extractor.check_budget(est)
+                except extractor.ExtractionRefused as e:
+                    if plan != "full_due":
+                        raise
+                    logger.warning(
+                        "custom_query.refresh.full_rebuild_refused",
+                        extra={"custom_query": cq.name, "reason": str(e)},
+                    )
+                    return _incremental()
                 return extractor.extract_to_artifact(
-                    client, cq.definition_sql, cq.name, connection.id
+                    client, cq.definition_sql, cq.name, connection.id,
+                    watermark_column=watermark_column,
                 )
 
             try:
@@ -560,6 +696,10 @@ class CustomQueryService:
             cq.last_refresh_status = "ok"
             cq.last_refresh_error = None
             cq.last_refresh_ms = res.elapsed_ms
+            cq.watermark_value = res.watermark if watermark_column else None
+            cq.refreshes_since_full = (
+                (cq.refreshes_since_full or 0) + 1 if res.mode == "incremental" else 0
+            )
             await db.commit()
             await db.refresh(cq)
 
@@ -571,17 +711,34 @@ class CustomQueryService:
             # Only once the swap is committed is the old file safe to remove.
             if old_path and old_path != res.artifact_path:
                 artifacts.delete_artifact(old_path)
+                session_pool.invalidate_artifact(old_path)
 
             logger.info(
                 "custom_query.refresh.ok",
                 extra={
                     "custom_query": cq.name,
                     "rows": res.row_count,
+                    "mode": res.mode,
+                    "delta_rows": res.delta_rows,
                     "ms": res.elapsed_ms,
                 },
             )
             return cq
 
+    @staticmethod
+    def _refresh_plan(cq: ConnectionTable, force_full: bool = False) -> str:
+        """'full', 'incremental', or 'full_due' (a scheduled rebuild of an
+        incremental relation, which may still fall back to a delta)."""
+        if force_full or (cq.refresh_mode or "full") != "incremental":
+            return "full"
+        if not (cq.watermark_column and cq.watermark_value and cq.artifact_path
+                and cq.artifact_key_enc):
+            return "full"
+        every = cq.full_refresh_every or DEFAULT_FULL_REFRESH_EVERY
+        if (cq.refreshes_since_full or 0) >= every:
+            return "full_due"
+        return "incremental"
+
     async def _sync_activations(self, db: AsyncSession, cq: ConnectionTable) -> None:
         rows = (
             await db.execute(
@@ -720,11 +877,16 @@ class CustomQueryService:
                     row_count=r.no_rows or 0,
                     description=r.description,
                     rls_filter=CustomQueryService.compile_rls(r, who),
+                    definition_sql=r.definition_sql,
+                    refreshed_at=r.last_refreshed_at,
+                    incremental=(r.refresh_mode == "incremental"),
                 )
             )
         if not relations:
             return None
-        return FastQueryClient(relations, connection_name=connection_name)
+        return FastQueryClient(
+            relations, connection_name=connection_name, identity_key=who.user_id
+        )
 
     # -- row-level security ----------------------------------------------
 
@@ -763,6 +925,9 @@ class CustomQueryService:
         cq.rls_default_deny = bool(rls_default_deny)
         await db.commit()
         await db.refresh(cq)
+        # Pooled sessions hold copies filtered under the old policy. The new
+        # fingerprint already keys around them; this just frees them now.
+        session_pool.invalidate_artifact(cq.artifact_path)
         return cq
 
     async def preview_as_user(
@@ -2557,6 +2557,13 @@ class DataSourceService:
 
             client = ClientClass(**allowed)
             self._attach_client_quota_metadata(client, data_source, conn, key)
+            # Who the client authenticates as, as a digest: the query result
+            # cache shares entries only between identically credentialed clients.
+            try:
+                from app.data_sources.query_result_cache import credential_fingerprint
+                client._bow_credential_identity = credential_fingerprint(allowed)
+            except Exception:
+                pass
             await self._attach_stored_table_metadata(db, client, data_source, conn)
             clients[key] = client
 
@@ -2572,6 +2579,14 @@ class DataSourceService:
                 fast_key = f"{key}::fast"
                 self._attach_client_quota_metadata(fast_client, data_source, conn, fast_key)
                 clients[fast_key] = fast_client
+                # The query wrapper may serve the source client's own queries
+                # from these relations (`fast.query_router`), but only where
+                # the artifact and the source query answer as the same
+                # principal: on a system_only connection both run under the
+                # connection's credentials, while a user_required source
+                # answers as the asking user and the artifact does not.
+                if getattr(conn, "auth_policy", "system_only") == "system_only":
+                    client._bow_fast_sibling = fast_client
 
         # Backward compatibility: add legacy key aliases for single-connection domains
         if len(active_connections) == 1:
@@ -2703,6 +2718,17 @@ class DataSourceService:
                 conn_conc = conn_config.get("max_concurrent_queries") if isinstance(conn_config, dict) else None
                 if isinstance(conn_conc, (int, float)) and conn_conc > 0:
                     setattr(client, "_bow_connection_max_concurrent_queries", int(conn_conc))
+                # Result-cache TTL for a live source can be shortened or set
+                # to 0 (never reuse) per connection.
+                conn_ttl = conn_config.get("result_cache_ttl_seconds") if isinstance(conn_config, dict) else None
+                if isinstance(conn_ttl, (int, float)) and not isinstance(conn_ttl, bool) and conn_ttl >= 0:
+                    client._bow_connection_result_cache_ttl = int(conn_ttl)
+                # Opt-in: how stale a FAST relation may be and still answer
+                # this source's queries in its place. Absent or 0, nothing is
+                # routed (see query_router.max_staleness_seconds).
+                conn_staleness = conn_config.get("fast_route_max_staleness_seconds") if isinstance(conn_config, dict) else None
+                if isinstance(conn_staleness, (int, float)) and not isinstance(conn_staleness, bool) and conn_staleness >= 0:
+                    client._bow_connection_fast_route_staleness = int(conn_staleness)
             except Exception:
                 pass
         except Exception:
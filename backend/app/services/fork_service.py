@@ -23,6 +23,7 @@ from app.models.artifact import Artifact
 from app.models.data_source import DataSource
 from app.models.user import User
 from app.services.artifact_service import ArtifactService
+from app.services import step_result_store
 from app.settings.logging_config import get_logger
 
 logger = get_logger(__name__)
@@ -290,11 +291,7 @@ class ForkService:
                     status_reason=old_step.status_reason,
                     prompt=old_step.prompt,
                     code=old_step.code,
-                    # Strict-mode (user-scoped) data is credential-differentiated
-                    # to the source owner — never copy it into the fork; the
-                    # forker runs it under their own credentials. System-only
-                    # data is shared by definition, so copy it as-is.
-                    data={} if strict_source else old_step.data,
+                    data={},
                     description=old_step.description,
                     type=old_step.type,
                     data_model=old_step.data_model,
@@ -302,6 +299,14 @@ class ForkService:
                     widget_id=new_widget_id,
                     query_id=str(new_query.id),
                 )
+                # Strict-mode (user-scoped) data is credential-differentiated
+                # to the source owner — never copy it into the fork; the
+                # forker runs it under their own credentials. System-only
+                # data is shared by definition, so copy every row (into the
+                # fork's own store when large; the source's file goes with
+                # the source's step).
+                if not strict_source:
+                    await step_result_store.persist(new_step, await step_result_store.full_data(old_step))
                 db.add(new_step)
                 await db.flush()
                 new_query.default_step_id = str(new_step.id)
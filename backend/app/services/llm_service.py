@@ -12,6 +12,7 @@ from app.models.llm_provider import LLM_PROVIDER_DETAILS
 from app.models.llm_model import LLM_MODEL_DETAILS, DEFAULT_CUSTOM_MODEL_CONTEXT_WINDOW
 from app.schemas.llm_schema import AnthropicCredentials, OpenAICredentials, GoogleCredentials, LLMModelSchema, LLMProviderCreate, LLMProviderTestConnection
 from app.ai.llm.llm import LLM
+from app.ai.llm import response_cache
 from app.dependencies import async_session_maker
 from datetime import datetime
 from app.core.telemetry import telemetry
@@ -874,6 +875,17 @@ class LLMService:
 
         return {"success": True}
 
+    async def purge_response_cache(
+        self,
+        db: AsyncSession,
+        organization: Organization,
+        scope: str | None = None,
+    ):
+        """Drop the organization's cached auxiliary LLM responses."""
+        deleted = await response_cache.purge(db, organization.id, scope=scope)
+        await db.commit()
+        return {"deleted": deleted, "scope": scope}
+
     async def toggle_model(
         self,
         db: AsyncSession,
@@ -7,6 +7,21 @@ from app.models.llm_usage_record import LLMUsageRecord
 class LLMUsageRecorderService:
     """Persist per-call LLM token/cost usage."""
 
+    # Prompt-cache billing per provider type: (cache reads are included in
+    # prompt_tokens, read rate, write rate), rates as multiples of the input
+    # rate. Cache writes are never part of prompt_tokens: Anthropic and
+    # Bedrock report them beside it, Gemini bills them on cache creation.
+    # OpenAI/Azure include cached tokens in prompt_tokens at full rate but
+    # charge 0.5x for them; Anthropic and Bedrock (Claude) bill reads at 0.1x
+    # and writes at 1.25x; Gemini bills cached tokens at 0.25x.
+    CACHE_PRICING = {
+        "anthropic": (False, 0.1, 1.25),
+        "bedrock": (False, 0.1, 1.25),
+        "openai": (True, 0.5, 0.0),
+        "azure": (True, 0.5, 0.0),
+        "google": (True, 0.25, 1.0),
+    }
+
     def __init__(self, db: AsyncSession):
         self.db = db
 
@@ -26,6 +41,7 @@ class LLMUsageRecorderService:
         data_source_id: str | None = None,
         routed: bool = False,
         baseline_model_id: str | None = None,
+        cache_hit: bool = False,
     ) -> LLMUsageRecord:
 
         provider_type = llm_model.provider.provider_type if llm_model.provider else ""
@@ -60,6 +76,7 @@ class LLMUsageRecorderService:
             total_cost_usd=input_cost + output_cost,
             routed=bool(routed),
             baseline_model_id=baseline_model_id,
+            cache_hit=bool(cache_hit),
         )
         self.db.add(record)
         await self.db.flush()
@@ -78,23 +95,29 @@ class LLMUsageRecorderService:
         if rate is None:
             return 0.0
         rate_f = float(rate)
-        # Non-cached input tokens at full rate (Anthropic excludes cached tokens
-        # from input_tokens; OpenAI includes them, so we handle both below).
+        # prompt_tokens at full rate, then the cache adjustments (see CACHE_PRICING).
         cost = (tokens / 1_000_000) * rate_f if tokens else 0.0
-        if provider_type == "anthropic":
-            # Cache reads: billed at 0.1× input rate.
-            # Cache writes: billed at 1.25× input rate.
+        pricing = LLMUsageRecorderService.CACHE_PRICING.get(provider_type)
+        if pricing is not None:
+            reads_in_prompt, read_rate, write_rate = pricing
             if cache_read_tokens:
-                cost += (cache_read_tokens / 1_000_000) * rate_f * 0.1
+                if reads_in_prompt:
+                    # Already counted at full rate above; take off the discount.
+                    cost -= (cache_read_tokens / 1_000_000) * rate_f * (1.0 - read_rate)
+                else:
+                    cost += (cache_read_tokens / 1_000_000) * rate_f * read_rate
             if cache_creation_tokens:
-                cost += (cache_creation_tokens / 1_000_000) * rate_f * 1.25
-        elif provider_type in ("openai", "azure"):
-            # OpenAI/Azure include cached tokens in prompt_tokens at full rate,
-            # but actually charge 0.5× for those tokens. Apply the 50% discount.
-            if cache_read_tokens:
-                cost -= (cache_read_tokens / 1_000_000) * rate_f * 0.5
+                cost += (cache_creation_tokens / 1_000_000) * rate_f * write_rate
         return max(cost, 0.0)
 
+    @staticmethod
+    def uncached_prompt_tokens(provider_type: str, prompt_tokens: int, cache_read_tokens: int) -> int:
+        """Input tokens that were not served from a prompt cache."""
+        pricing = LLMUsageRecorderService.CACHE_PRICING.get(provider_type)
+        if pricing is not None and not pricing[0]:
+            return max(int(prompt_tokens or 0), 0)
+        return max(int(prompt_tokens or 0) - int(cache_read_tokens or 0), 0)
+
     @staticmethod
     def _calc_output_cost(llm_model: LLMModel, tokens: int) -> float:
         rate = llm_model.get_output_cost_rate()
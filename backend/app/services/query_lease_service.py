@@ -0,0 +1,163 @@
+"""DB-backed leases for the cluster-wide query concurrency cap.
+
+`app.data_sources.query_concurrency` caps concurrent queries per connection
+with an in-process semaphore, which on N replicas admits N × cap. With
+``BOW_QUERY_CONCURRENCY_SCOPE=global`` it additionally takes a lease here, so
+the cap holds across every replica and worker.
+
+Design notes:
+  * Postgres is the only shared store in the stack (no Redis), so — like the
+    rate-limit counters — leases are rows (``QueryConcurrencyLease``).
+  * A slot is claimed by writing its number onto the caller's row; the unique
+    (connection, slot_no) constraint lets exactly one of two racing writers
+    win. This is what advisory locks or ``SELECT … FOR UPDATE SKIP LOCKED``
+    would give on Postgres, but it also holds on SQLite and needs no session
+    to stay open for the length of the query — a lease is held by a row, not
+    by a connection.
+  * Fair queuing: every request enqueues first, and a waiter may only claim
+    when fewer waiters are ahead of it than there are free slots. Order is
+    ``enqueued_at`` (then id), i.e. first come, first served across replicas,
+    to within the replicas' clock skew.
+  * Expiry: rows carry ``expires_at``, pushed forward while their owner is
+    alive. Every claim attempt first deletes the connection's expired rows,
+    so a dead worker's slot is reclaimed by the next live one instead of
+    needing a sweeper.
+"""
+
+import logging
+from datetime import datetime, timedelta
+from typing import Iterable, Tuple
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.query_concurrency_lease import QueryConcurrencyLease as Lease
+
+logger = logging.getLogger(__name__)
+
+
+def _now() -> datetime:
+    return datetime.utcnow()
+
+
+async def enqueue(
+    db: AsyncSession,
+    *,
+    lease_id: str,
+    connection_id: str,
+    holder: str,
+    enqueued_at: datetime,
+    ttl_seconds: float,
+) -> None:
+    """Join the connection's queue (a row with no slot yet)."""
+    db.add(Lease(
+        id=lease_id,
+        connection_id=connection_id,
+        holder=holder,
+        enqueued_at=enqueued_at,
+        expires_at=_now() + timedelta(seconds=ttl_seconds),
+    ))
+    await db.commit()
+
+
+async def try_claim(
+    db: AsyncSession,
+    *,
+    lease_id: str,
+    connection_id: str,
+    holder: str,
+    enqueued_at: datetime,
+    limit: int,
+    ttl_seconds: float,
+) -> Tuple[bool, int]:
+    """One claim attempt. Returns ``(claimed, waiting)``.
+
+    ``waiting`` is the number of live waiters on the connection cluster-wide
+    (including the caller if it did not get a slot) — the queue depth the
+    caller observed. Refreshes the caller's own expiry either way, and
+    re-enqueues it with its original position if its row was purged (e.g. its
+    process was too busy to poll within one TTL).
+    """
+    now = _now()
+    expires = now + timedelta(seconds=ttl_seconds)
+    await db.execute(
+        delete(Lease).where(Lease.connection_id == connection_id, Lease.expires_at < now)
+    )
+    rows = (await db.execute(
+        select(Lease.id, Lease.slot_no, Lease.enqueued_at)
+        .where(Lease.connection_id == connection_id)
+    )).all()
+    if not any(r.id == lease_id for r in rows):
+        db.add(Lease(
+            id=lease_id, connection_id=connection_id, holder=holder,
+            enqueued_at=enqueued_at, expires_at=expires,
+        ))
+        await db.flush()
+    taken = {r.slot_no for r in rows if r.slot_no is not None}
+    waiters = [r for r in rows if r.slot_no is None and r.id != lease_id]
+    ahead = sum(1 for r in waiters if (r.enqueued_at, r.id) < (enqueued_at, lease_id))
+
+    if ahead < limit - len(taken):
+        for slot_no in range(limit):
+            if slot_no in taken:
+                continue
+            try:
+                async with db.begin_nested():
+                    await db.execute(
+                        update(Lease)
+                        .where(Lease.id == lease_id)
+                        .values(slot_no=slot_no, acquired_at=now, expires_at=expires)
+                    )
+            except IntegrityError:
+                # Another replica claimed this number since we looked.
+                continue
+            await db.commit()
+            return True, len(waiters)
+
+    await db.execute(update(Lease).where(Lease.id == lease_id).values(expires_at=expires))
+    await db.commit()
+    return False, len(waiters) + 1
+
+
+async def renew(db: AsyncSession, lease_ids: Iterable[str], ttl_seconds: float) -> int:
+    """Push the expiry of held leases forward; returns how many still exist."""
+    ids = list(lease_ids)
+    if not ids:
+        return 0
+    result = await db.execute(
+        update(Lease)
+        .where(Lease.id.in_(ids))
+        .values(expires_at=_now() + timedelta(seconds=ttl_seconds))
+    )
+    await db.commit()
+    return int(result.rowcount or 0)
+
+
+async def release(db: AsyncSession, lease_id: str) -> None:
+    """Give the slot (or the place in the queue) back."""
+    await db.execute(delete(Lease).where(Lease.id == lease_id))
+    await db.commit()
+
+
+async def queue_depth(db: AsyncSession, connection_id: str) -> dict:
+    """Live holders and waiters on a connection, across all replicas."""
+    now = _now()
+    rows = (await db.execute(
+        select(Lease.slot_no).where(
+            Lease.connection_id == connection_id, Lease.expires_at >= now,
+        )
+    )).all()
+    held = sum(1 for r in rows if r.slot_no is not None)
+    return {"held": held, "waiting": len(rows) - held}
+
+
+async def with_session(context, fn, **kwargs):
+    """Run one lease operation in its own session from `context`.
+
+    `context` is anything with a ``session_maker`` — in practice the process's
+    `query_concurrency._LeaseLoop`, whose NullPool sessions belong to the loop
+    the operation runs on.
+    """
+    async with context.session_maker() as db:
+        return await fn(db, **kwargs)
@@ -15,6 +15,7 @@ from app.schemas.step_schema import StepSchema
 from app.ai.code_execution.code_execution import StreamingCodeExecutor
 from app.dependencies import async_session_maker
 from app.services.usage_policy_service import UsageLimitContext
+from app.services import step_result_store
 
 def _enrich_step_schema(step_orm, step_schema: StepSchema) -> StepSchema:
     """Enrich StepSchema with relationship data from ORM"""
@@ -23,6 +24,18 @@ def _enrich_step_schema(step_orm, step_schema: StepSchema) -> StepSchema:
     return step_schema
 
 
+async def _with_stored_rows(step_orm, step_schema: StepSchema) -> StepSchema:
+    """Swap a `truncated` snapshot preview for every stored row.
+
+    Dashboards render and aggregate the whole result, so they never get the
+    inline preview (see app.services.step_result_store).
+    """
+    data = step_schema.data
+    if isinstance(data, dict) and data.get("truncated"):
+        step_schema.data = await step_result_store.full_data(step_orm)
+    return step_schema
+
+
 class QueryService:
 
     def __init__(self) -> None:
@@ -296,8 +309,9 @@ class QueryService:
                 loadables=loadables,
             )
             df = executor.format_df_for_widget(exec_df)
-            # Persist results on the new step
-            step.data = df
+            # Persist results on the new step (a fresh step: no previous
+            # row-store file to clean up).
+            await step_result_store.persist(step, df)
             step.status = "success"
         except Exception as e:
             # Mark step as error and surface message to client
@@ -448,13 +462,13 @@ class QueryService:
         """Overlay a non-owner viewer's own step result over the shared
         snapshot, via the single resolve_step_data authority."""
         if not viewer_user_id or not getattr(q, 'report_id', None):
-            return schema
+            return await _with_stored_rows(step, schema)
 
         owner_row = (await db.execute(
             select(Report.user_id, Report.shared_run_identity).where(Report.id == str(q.report_id))
         )).first()
         if not owner_row or str(owner_row[0]) == str(viewer_user_id):
-            return schema
+            return await _with_stored_rows(step, schema)
 
         # Minimal report context for the accessor (avoids re-loading the row).
         report_ctx = SimpleNamespace(
@@ -465,7 +479,7 @@ class QueryService:
         resolution = await resolve_step_data(db, step, report_ctx, viewer)
 
         schema.viewer_result = resolution.viewer_result
-        schema.data = resolution.data
+        schema.data = await step_result_store.full_data(step, resolution)
         schema.snapshot_withheld = resolution.withheld
         if resolution.withheld:
             # No code either — SQL leaks schema/table/filter details.
@@ -7,6 +7,7 @@ from app.schemas.report_schema import ReportCreate, ReportSchema, ReportUpdate
 from app.schemas.project_schema import ProjectMiniSchema
 from app.schemas.data_source_schema import DataSourceReportSchema
 from app.services.widget_service import WidgetService
+from app.services import step_result_store
 from app.core.telemetry import telemetry
 from app.schemas.widget_schema import WidgetSchema
 from app.schemas.step_schema import StepSchema
@@ -26,6 +27,7 @@ from apscheduler.triggers.cron import CronTrigger
 from apscheduler.jobstores.base import JobLookupError
 from logging import getLogger
 import asyncio
+import time
 
 from app.core.scheduler import scheduler, cron_dow_to_apscheduler, claim_scheduled_run
 from app.models.dashboard_layout_version import DashboardLayoutVersion
@@ -1230,6 +1232,7 @@ class ReportService:
         steps_total = 0
         steps_succeeded = 0
         steps_failed = 0
+        step_timings: list[dict] = []
 
         if query_ids:
             # Build data-source clients once for the whole run instead of per
@@ -1260,27 +1263,48 @@ class ReportService:
             # charts cannot refresh, and a green "refreshed" over stale data
             # is the bug this rerun rewrite exists to fix.
             targets, unrunnable = await self._rerun_target_steps(db, query_ids)
+            runnable = []
             for step_id, code in targets:
+                steps_total += 1
                 if not code or not str(code).strip():
                     logger.warning(f"Step code is empty for step {step_id}; counting as failed")
-                    steps_total += 1
                     steps_failed += 1
                     continue
-                steps_total += 1
-                try:
-                    logger.info(f"Rerunning step {step_id} (report {report_id})")
-                    # Run as the report run's user (interactive caller, or the
-                    # schedule creator for scheduled runs) so user_required
-                    # connections resolve their creds / owner-admin fallback.
-                    await self.widget_service.step_service.rerun_step(
-                        db, step_id, current_user=current_user,
-                        report=report, db_clients=db_clients,
-                        organization=organization, organization_settings=org_settings,
-                    )
-                    steps_succeeded += 1
-                except Exception as e:
-                    steps_failed += 1
-                    logger.warning(f"Failed to rerun step {step_id}: {e}; continuing")
+                runnable.append(step_id)
+            if runnable:
+                # Run as the report run's user (interactive caller, or the
+                # schedule creator for scheduled runs) so user_required
+                # connections resolve their creds / owner-admin fallback.
+                # Steps run concurrently within each connection's cap; see
+                # StepService.rerun_steps.
+                run_started = time.monotonic()
+                step_timings = await self.widget_service.step_service.rerun_steps(
+                    db, runnable, current_user=current_user,
+                    report=report, db_clients=db_clients,
+                    organization=organization, organization_settings=org_settings,
+                )
+                wall_ms = round((time.monotonic() - run_started) * 1000.0, 1)
+                for rec in step_timings:
+                    if rec["status"] == "success":
+                        steps_succeeded += 1
+                    else:
+                        steps_failed += 1
+                        logger.warning(f"Failed to rerun step {rec['step_id']}: {rec['error']}; continuing")
+                slowest = max(step_timings, key=lambda r: r["ms"], default=None)
+                logger.info(
+                    "report.rerun.steps",
+                    extra={
+                        "report_id": str(report_id),
+                        "steps": len(step_timings),
+                        "wall_ms": wall_ms,
+                        "sum_step_ms": round(sum(r["ms"] for r in step_timings), 1),
+                        "slowest_step_id": slowest["step_id"] if slowest else None,
+                        "slowest_step_ms": slowest["ms"] if slowest else None,
+                        "deduped_steps": sum(1 for r in step_timings if r["deduped_from"]),
+                        "shared_queries": sum(r["shared_queries"] for r in step_timings),
+                        "step_timings": step_timings,
+                    },
+                )
             if unrunnable > 0:
                 steps_total += unrunnable
                 steps_failed += unrunnable
@@ -1370,6 +1394,7 @@ class ReportService:
             "steps_succeeded": steps_succeeded,
             "steps_failed": steps_failed,
             "last_run_at": report.last_run_at,
+            "step_timings": step_timings,
         }
 
     async def viewer_rerun_report_steps(
@@ -2148,7 +2173,8 @@ class ReportService:
             type=step.type,
             code="" if resolution.withheld else step.code,
             data_model=step.data_model or {},
-            data=resolution.data,
+            # Every row the reader may see, not the inline preview.
+            data=await step_result_store.full_data(step, resolution),
             view=view_dict,
             viewer_result=resolution.viewer_result,
             snapshot_withheld=resolution.withheld,
@@ -14,6 +14,7 @@ from app.models.widget import Widget
 from app.models.completion import Completion
 from app.models.external_platform import ExternalPlatform
 from app.settings.database import create_async_session_factory
+from app.services import step_result_store
 from app.services.platform_adapters.adapter_factory import PlatformAdapterFactory
 
 # This service runs as a fire-and-forget asyncio.create_task() spawned
@@ -36,8 +37,7 @@ MIN_ROWS_TO_SEND = 10
 def _step_row_count(step: 'Step') -> int:
     """Return the number of data rows on a step, or 0 if unavailable."""
     try:
-        rows = (step.data or {}).get('rows')
-        return len(rows) if rows else 0
+        return step_result_store.row_count(step.data)
     except Exception:
         return 0
 
@@ -169,7 +169,7 @@ async def _handle_table_step_dm(adapter, external_user_id: str, step: 'Step', th
     """Handles sending table data as a CSV file, optionally in a thread."""
     title = step.title or "Table Data"
 
-    file_path = df_to_csv(step.data)
+    file_path = df_to_csv(await step_result_store.full_data(step))
     if not file_path:
         return False
 
@@ -192,7 +192,7 @@ async def _handle_chart_step_dm(adapter, external_user_id: str, step: 'Step', th
         msg = f"{bold}\n_Chart visualization is available in the web report._"
         return await adapter.send_dm_in_thread(external_user_id, msg, thread_ts, channel_id=channel_id)
 
-    file_path = create_plot(step.data_model, step.data, title)
+    file_path = create_plot(step.data_model, await step_result_store.full_data(step), title)
 
     if not file_path:
         return False
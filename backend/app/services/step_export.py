@@ -0,0 +1,152 @@
+"""Streaming CSV/XLSX writers for step exports.
+
+`export_step` used to build the whole DataFrame, then the whole file in a
+`BytesIO`, then one `Response` — a multi-million-row export sat in a web
+worker's memory three times over before the first byte left. These writers
+take an iterator of DataFrame batches instead (from the step's row store,
+its inline JSON, or a live re-run of its code) and never hold more than one
+batch:
+
+  * **CSV** is produced batch by batch and handed to a `StreamingResponse`,
+    so the download starts with the first batch. The UTF-8 BOM is written
+    once, up front, exactly as `to_csv(...).encode("utf-8-sig")` did, so
+    Excel still detects the encoding.
+  * **XLSX** cannot be streamed over the wire — it is a zip whose directory
+    is written last — so it is built with openpyxl's write-only workbook
+    (rows go straight to a temp file, constant memory) into an anonymous
+    temp file, which is then streamed and deleted.
+
+Both count rows into an `ExportCounter` as they go, so the audit entry records
+what was actually written rather than what was planned.
+"""
+
+import math
+import os
+import tempfile
+from datetime import datetime, timezone
+from typing import Iterable, Iterator
+
+import pandas as pd
+
+DEFAULT_BATCH_ROWS = 50_000
+# Excel's sheet limit, minus the header row.
+XLSX_MAX_ROWS = 1_048_575
+_FILE_CHUNK_BYTES = 1024 * 1024
+
+
+class ExportTooLargeError(ValueError):
+    """The export does not fit the requested format."""
+
+
+class ExportCounter:
+    """Rows written so far, and whether the writer reached the end."""
+
+    def __init__(self):
+        self.rows = 0
+        self.complete = False
+
+
+def batch_rows() -> int:
+    try:
+        return max(1, int(os.environ.get("BOW_EXPORT_BATCH_ROWS", DEFAULT_BATCH_ROWS)))
+    except (TypeError, ValueError):
+        return DEFAULT_BATCH_ROWS
+
+
+def frame_batches(df: pd.DataFrame, size: int) -> Iterator[pd.DataFrame]:
+    """Slice an in-memory frame into export batches (views, not copies)."""
+    if df.empty:
+        yield df
+        return
+    for start in range(0, len(df), size):
+        yield df.iloc[start:start + size]
+
+
+def csv_stream(frames: Iterable[pd.DataFrame], counter: ExportCounter) -> Iterator[bytes]:
+    """CSV bytes for a sequence of batches: BOM, header once, then rows."""
+    yield "\ufeff".encode("utf-8")
+    header = True
+    try:
+        for frame in frames:
+            if header or len(frame):
+                yield frame.to_csv(index=False, header=header).encode("utf-8")
+            header = False
+            counter.rows += len(frame)
+        counter.complete = True
+    finally:
+        close = getattr(frames, "close", None)
+        if close is not None:
+            close()
+
+
+def _cell(value):
+    """A value openpyxl accepts: no NaN, no timezone-aware datetimes."""
+    if value is None:
+        return None
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    if value is pd.NaT:
+        return None
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    if isinstance(value, (dict, list)):
+        return str(value)
+    return value
+
+
+def write_xlsx(frames: Iterable[pd.DataFrame], counter: ExportCounter):
+    """Build the workbook in a temp file; return it positioned at 0.
+
+    Blocking. Raises `ExportTooLargeError` past Excel's row limit — the same
+    export as CSV has no such limit.
+    """
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    header = True
+    try:
+        for frame in frames:
+            if header:
+                ws.append([str(c) for c in frame.columns])
+                header = False
+            if counter.rows + len(frame) > XLSX_MAX_ROWS:
+                raise ExportTooLargeError(
+                    f"This result has more than {XLSX_MAX_ROWS:,} rows, Excel's sheet limit. "
+                    f"Export it as CSV instead."
+                )
+            for row in frame.itertuples(index=False, name=None):
+                ws.append([_cell(v) for v in row])
+            counter.rows += len(frame)
+    except BaseException:
+        # Finish the sheet's temp-file writer so it is released, not leaked.
+        try:
+            ws.close()
+        except Exception:
+            pass
+        raise
+    finally:
+        close = getattr(frames, "close", None)
+        if close is not None:
+            close()
+    out = tempfile.TemporaryFile()
+    try:
+        wb.save(out)
+    except Exception:
+        out.close()
+        raise
+    out.seek(0)
+    counter.complete = True
+    return out
+
+
+def file_chunks(fileobj) -> Iterator[bytes]:
+    """Stream a temp file and close (delete) it when done."""
+    try:
+        while True:
+            chunk = fileobj.read(_FILE_CHUNK_BYTES)
+            if not chunk:
+                return
+            yield chunk
+    finally:
+        fileobj.close()
@@ -0,0 +1,482 @@
+"""Row store for large step results.
+
+`Step.data` used to hold every row a step returned as one JSON document.
+Every read of a step — the report page, the websocket broadcast, the context
+summary, a rerun that only needs the title — parsed and shipped all of it, and
+on orgs that raise or disable `limit_row_count` the steps table grew to be
+most of the database. `persisted_summary` / `report_payload_projection` exist
+largely to avoid touching that column.
+
+When a result has more rows than `BOW_STEP_PREVIEW_ROWS` (default 1000 — the
+default `limit_row_count`, so a default org never takes this path), `persist`
+writes the rows to a per-step DuckDB file and keeps only the first
+`BOW_STEP_PREVIEW_ROWS` of them in `Step.data`, flagged `truncated` and
+`paged` with the `total_rows`. Readers ask for just what they need:
+
+  * `read_page` — one page of rows with server-side sort, filter and
+    projection, executed by DuckDB against the columnar file, so a 100k-row
+    table scrolls without the JSON ever being loaded.
+  * `full_data` — the complete grid, for readers that need every row
+    (`GET /steps/{id}`, `load_step`, renders, notifications, forks).
+  * `iter_frames` — every row in DataFrame batches, for the streamed export.
+
+The preview is what the report page, the websocket broadcast and the agent's
+context see; the UI already fetches the full grid through `GET /steps/{id}`
+when it finds `truncated`. When the file is gone, every reader falls back to
+the preview.
+
+The file is an **encrypted DuckDB database**, not a bare Parquet file, for the
+reason spelled out in `app/data_sources/fast/artifacts.py`: generated code has
+`pd` in scope and a readable Parquet file under `uploads/` is one
+`pd.read_parquet` away from bypassing every access check. Each step file gets
+its own key, stored Fernet-encrypted on the step row.
+
+Access is unchanged: callers resolve what a reader may see through
+`viewer_data_policy.resolve_step_data` first. The store only serves rows when
+that resolution is the shared snapshot; a viewer's own result
+(`step_user_results`) is paged from its JSON with the same engine.
+
+Values are stored as they appear in the JSON grid (already JSON-safe: ISO
+date strings, numbers, text), so pages read back exactly what the inline rows
+held. A column Arrow cannot type — mixed scalars, objects, arrays — is stored
+as JSON text and decoded on the way out; it still sorts and filters, as text.
+"""
+
+import asyncio
+import json
+import logging
+import math
+import os
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PREVIEW_ROWS = 1000
+DEFAULT_MAX_PAGE_ROWS = 5000
+
+# Stores live beside the FAST artifacts and the other on-disk caches.
+_STORE_ROOT = Path(__file__).resolve().parent.parent.parent / "uploads" / "step_results"
+
+# Insertion ordinal: the default order and the tie-breaker that keeps paging
+# stable under a sort on non-unique values.
+_ROW_COL = "__bow_row"
+_META_TABLE = "__bow_meta"
+
+_COMPARISONS = {"eq": "=", "ne": "<>", "lt": "<", "lte": "<=", "gt": ">", "gte": ">="}
+
+# (path, Fernet-encrypted key) of a step's store.
+StoreRef = Tuple[str, str]
+
+
+class StepRowsQueryError(ValueError):
+    """A page request names an unknown column or an unsupported filter."""
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def preview_rows() -> int:
+    """Row count above which a result gets a store; <=0 disables the store."""
+    return _env_int("BOW_STEP_PREVIEW_ROWS", DEFAULT_PREVIEW_ROWS)
+
+
+def max_page_rows() -> int:
+    return max(1, _env_int("BOW_STEP_PAGE_MAX_ROWS", DEFAULT_MAX_PAGE_ROWS))
+
+
+def delete_file(path: Optional[str]) -> None:
+    """Best-effort removal of a store file."""
+    from app.data_sources.fast.artifacts import delete_artifact
+
+    delete_artifact(path)
+
+
+def row_count(data: Any) -> int:
+    """Rows in a result, counting the stored ones behind a preview."""
+    if not isinstance(data, dict):
+        return 0
+    rows = data.get("rows")
+    shown = len(rows) if isinstance(rows, list) else 0
+    if data.get("truncated") and isinstance(data.get("total_rows"), int):
+        return max(shown, data["total_rows"])
+    return shown
+
+
+def ref(step) -> Optional[StoreRef]:
+    """The step's store, read from already-loaded state only.
+
+    Never triggers a lazy load (an expired attribute on an AsyncSession would
+    otherwise raise), and the result is safe to hand to a worker thread.
+    """
+    try:
+        from sqlalchemy import inspect as sa_inspect
+
+        state = sa_inspect(step).dict
+        path, key = state.get("result_path"), state.get("result_key_enc")
+    except Exception:
+        path, key = getattr(step, "result_path", None), getattr(step, "result_key_enc", None)
+    return (path, key) if path and key else None
+
+
+# -- writing ----------------------------------------------------------------
+
+def _fields(data: dict) -> List[str]:
+    fields: List[str] = []
+    for col in data.get("columns") or []:
+        f = col.get("field") if isinstance(col, dict) else None
+        if f is not None and str(f) not in fields:
+            fields.append(str(f))
+    if not fields:
+        rows = data.get("rows") or []
+        if rows and isinstance(rows[0], dict):
+            fields = [str(k) for k in rows[0].keys()]
+    return fields
+
+
+def _arrow_table(rows: list, fields: List[str]):
+    """Arrow table for a JSON grid plus the columns stored as JSON text."""
+    import pyarrow as pa
+
+    arrays = [pa.array(range(len(rows)), pa.int64())]
+    json_cols: List[str] = []
+    for f in fields:
+        values = [r.get(f) if isinstance(r, dict) else None for r in rows]
+        try:
+            arr = pa.array(values)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, OverflowError):
+            arr = None
+        if arr is None or pa.types.is_nested(arr.type):
+            arr = pa.array(
+                [None if v is None else json.dumps(v, default=str) for v in values], pa.string()
+            )
+            json_cols.append(f)
+        elif pa.types.is_null(arr.type):
+            arr = arr.cast(pa.string())
+        arrays.append(arr)
+    return pa.Table.from_arrays(arrays, names=[_ROW_COL] + fields), json_cols
+
+
+def offload(data: dict) -> Optional[Tuple[dict, str, str, int]]:
+    """Write a large grid's rows to a new store file.
+
+    Returns (the preview flagged `truncated`/`paged`, path, encrypted key,
+    row count), or None when the grid is small enough not to need a store or
+    could not be stored.
+    """
+    from app.data_sources.fast.artifacts import connect_encrypted, encrypt_key, new_artifact_key
+
+    limit = preview_rows()
+    rows = data.get("rows") if isinstance(data, dict) else None
+    if limit <= 0 or not isinstance(rows, list) or len(rows) <= limit:
+        return None
+    fields = _fields(data)
+    if not fields or _ROW_COL in fields:
+        return None
+
+    _STORE_ROOT.mkdir(parents=True, exist_ok=True)
+    # Opaque name: nothing about it can be derived from inside the sandbox.
+    path = _STORE_ROOT / f"{uuid.uuid4().hex}.db"
+    key = new_artifact_key()
+    try:
+        table, json_cols = _arrow_table(rows, fields)
+        con = connect_encrypted(path, key)
+        try:
+            con.register("src", table)
+            con.execute("CREATE TABLE result AS SELECT * FROM src")
+            con.unregister("src")
+            con.execute(f"CREATE TABLE {_META_TABLE} (meta VARCHAR)")
+            con.execute(
+                f"INSERT INTO {_META_TABLE} VALUES (?)",
+                [json.dumps({"fields": fields, "json_columns": json_cols})],
+            )
+            con.execute("CHECKPOINT")
+        finally:
+            con.close()
+    except Exception as e:
+        logger.warning("step_store.write_failed", extra={"rows": len(rows), "error": str(e)})
+        delete_file(str(path))
+        return None
+
+    preview = dict(data)
+    preview["rows"] = rows[:limit]
+    preview["truncated"] = True
+    preview["paged"] = True
+    preview["total_rows"] = len(rows)
+    return preview, str(path), encrypt_key(key), len(rows)
+
+
+async def persist(step, data: Any) -> Optional[str]:
+    """Assign a result to `step`, moving its rows to the store when large.
+
+    Use instead of `step.data = data` wherever a step's shared snapshot is
+    written. Returns the path of the step's previous store file, if any: the
+    caller deletes it with `delete_file` *after* committing, so a failed
+    commit leaves the row pointing at a file that still exists.
+    """
+    previous = ref(step)
+    stored = None
+    if isinstance(data, dict) and len(data.get("rows") or []) > preview_rows() > 0:
+        stored = await asyncio.to_thread(offload, data)
+    if stored is not None:
+        step.data, step.result_path, step.result_key_enc, step.result_rows = stored
+    else:
+        step.data = data
+        step.result_path = step.result_key_enc = step.result_rows = None
+    if previous and previous[0] != step.result_path:
+        return previous[0]
+    return None
+
+
+# -- reading ----------------------------------------------------------------
+
+class _Source:
+    """A DuckDB connection exposing a `result` table for one read."""
+
+    def __init__(self, store: Optional[StoreRef], data: dict):
+        self.con = None
+        self.fields: List[str] = []
+        self.json_cols: List[str] = []
+        self.from_store = False
+        if store is not None:
+            try:
+                self._open_store(store)
+                return
+            except Exception as e:
+                # Missing/unreadable file: serve the preview Step.data still holds.
+                logger.warning("step_store.read_failed", extra={"path": store[0], "error": str(e)})
+        self._open_inline(data or {})
+
+    def _open_store(self, store: StoreRef) -> None:
+        from app.data_sources.fast.artifacts import connect_encrypted, decrypt_key
+
+        path, key_enc = store
+        if not os.path.exists(path):
+            raise FileNotFoundError(path)
+        con = connect_encrypted(path, decrypt_key(key_enc), read_only=True)
+        try:
+            meta = json.loads(con.execute(f"SELECT meta FROM {_META_TABLE}").fetchone()[0])
+        except Exception:
+            con.close()
+            raise
+        self.con = con
+        self.fields = list(meta.get("fields") or [])
+        self.json_cols = list(meta.get("json_columns") or [])
+        self.from_store = True
+
+    def _open_inline(self, data: dict) -> None:
+        import duckdb
+
+        self.fields = _fields(data)
+        self.con = duckdb.connect(database=":memory:")
+        rows = data.get("rows") if isinstance(data.get("rows"), list) else []
+        table, self.json_cols = _arrow_table(rows, self.fields)
+        self.con.register("result", table)
+
+    def close(self) -> None:
+        if self.con is not None:
+            self.con.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _ident(name: str, known: set) -> str:
+    if name not in known:
+        raise StepRowsQueryError(f"Unknown column '{name}'")
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _like_escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _where(filters: Sequence[dict], known: set) -> Tuple[str, list]:
+    clauses: List[str] = []
+    params: list = []
+    for f in filters or []:
+        col = _ident(str(f.get("column")), known)
+        op = str(f.get("op") or "eq").lower()
+        value = f.get("value")
+        if op in _COMPARISONS:
+            if value is None:
+                raise StepRowsQueryError(f"Filter '{op}' on {col} needs a value")
+            clauses.append(f"{col} {_COMPARISONS[op]} ?")
+            params.append(value)
+        elif op in ("contains", "starts_with"):
+            pattern = _like_escape(value if value is not None else "")
+            clauses.append(f"CAST({col} AS VARCHAR) ILIKE ? ESCAPE '\\'")
+            params.append(f"%{pattern}%" if op == "contains" else f"{pattern}%")
+        elif op == "in":
+            values = value if isinstance(value, list) else [value]
+            if not values:
+                clauses.append("FALSE")
+                continue
+            clauses.append(f"{col} IN ({', '.join('?' for _ in values)})")
+            params.extend(values)
+        elif op == "is_null":
+            clauses.append(f"{col} IS NULL")
+        elif op == "not_null":
+            clauses.append(f"{col} IS NOT NULL")
+        else:
+            raise StepRowsQueryError(f"Unsupported filter operator '{op}'")
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+
+def _jsonable(value: Any, decode: bool) -> Any:
+    if value is None:
+        return None
+    if decode:
+        try:
+            return json.loads(value)
+        except (TypeError, ValueError):
+            return value
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+def read_page(
+    store: Optional[StoreRef],
+    data: dict,
+    *,
+    offset: int = 0,
+    limit: int = 100,
+    columns: Optional[List[str]] = None,
+    sort: Optional[List[dict]] = None,
+    filters: Optional[List[dict]] = None,
+) -> Dict[str, Any]:
+    """One page of a step's rows, sorted/filtered/projected by DuckDB.
+
+    `store` is the step's `ref()` when the reader was resolved to the shared
+    snapshot, else None (`data` — a viewer's own result, or a step small
+    enough to be inline — is paged instead). Sort entries are
+    `{"column", "desc"}`; filter entries `{"column", "op", "value"}` with op
+    one of eq/ne/lt/lte/gt/gte/contains/starts_with/in/is_null/not_null.
+    Blocking; call from a worker thread.
+    """
+    offset = max(0, int(offset or 0))
+    limit = max(1, min(int(limit or 1), max_page_rows()))
+    with _Source(store, data) as src:
+        known = set(src.fields)
+        projection = list(columns) if columns else list(src.fields)
+        select_list = ", ".join(_ident(c, known) for c in projection) if projection else "*"
+        where, params = _where(filters or [], known)
+        order = [
+            f"{_ident(str(s.get('column')), known)} {'DESC' if s.get('desc') else 'ASC'} NULLS LAST"
+            for s in (sort or [])
+        ] + [_ROW_COL]
+        try:
+            total = src.con.execute(f"SELECT COUNT(*) FROM result{where}", params).fetchone()[0]
+            cursor = src.con.execute(
+                f"SELECT {select_list} FROM result{where} ORDER BY {', '.join(order)} "
+                f"LIMIT ? OFFSET ?",
+                params + [limit, offset],
+            )
+            fetched = cursor.fetchall()
+        except StepRowsQueryError:
+            raise
+        except Exception as e:
+            # Type mismatches between a filter value and a column land here.
+            raise StepRowsQueryError(f"Invalid row query: {e}") from e
+        decode = [c in src.json_cols for c in projection]
+        rows = [
+            {c: _jsonable(v, d) for c, v, d in zip(projection, row, decode, strict=True)}
+            for row in fetched
+        ]
+        from_store = src.from_store
+
+    by_field = {
+        str(c.get("field")): c for c in (data.get("columns") or []) if isinstance(c, dict)
+    }
+    return {
+        "rows": rows,
+        "columns": [by_field.get(c, {"headerName": c, "field": c}) for c in projection],
+        "offset": offset,
+        "limit": limit,
+        "total_rows": int(total),
+        "source": "store" if from_store else "inline",
+    }
+
+
+def read_all(store: StoreRef, data: dict) -> dict:
+    """`data` with its rows replaced by every stored row. Blocking."""
+    with _Source(store, data) as src:
+        if not src.from_store:
+            return data
+        fields = src.fields
+        cols = ", ".join(_ident(c, set(fields)) for c in fields)
+        fetched = src.con.execute(f"SELECT {cols} FROM result ORDER BY {_ROW_COL}").fetchall()
+        decode = [c in src.json_cols for c in fields]
+        rows = [
+            {c: _jsonable(v, d) for c, v, d in zip(fields, row, decode, strict=True)}
+            for row in fetched
+        ]
+    full = {k: v for k, v in data.items() if k not in ("truncated", "paged", "total_rows")}
+    full["rows"] = rows
+    return full
+
+
+def iter_frames(store: Optional[StoreRef], data: dict, batch_rows: int) -> Iterator[Any]:
+    """Every row as DataFrame batches headed by `headerName`, in stored order.
+
+    The export shape (`StepService._df_from_step_data`) without ever holding
+    the whole result: DuckDB hands back Arrow record batches of `batch_rows`
+    from the store, or from the inline JSON when there is no store. Blocking;
+    a generator, so the file stays open until it is exhausted or closed.
+    """
+    import pandas as pd
+
+    headers = {
+        str(c["field"]): c.get("headerName", c["field"])
+        for c in (data.get("columns") or [])
+        if isinstance(c, dict) and "field" in c
+    }
+    with _Source(store, data) as src:
+        fields = [f for f in src.fields if not headers or f in headers]
+        names = [headers.get(f, f) for f in fields]
+        if not fields:
+            yield pd.DataFrame()
+            return
+        known = set(src.fields)
+        cols = ", ".join(_ident(f, known) for f in fields)
+        reader = src.con.execute(
+            f"SELECT {cols} FROM result ORDER BY {_ROW_COL}"
+        ).to_arrow_reader(batch_rows)
+        emitted = False
+        for batch in reader:
+            values = batch.to_pydict()
+            frame = pd.DataFrame({
+                i: [_jsonable(v, f in src.json_cols) for v in values[f]]
+                for i, f in enumerate(fields)
+            })
+            frame.columns = names
+            emitted = True
+            yield frame
+        if not emitted:
+            yield pd.DataFrame(columns=names)
+
+
+async def full_data(step, resolution=None) -> dict:
+    """The complete grid a reader may see.
+
+    With no `resolution` the shared snapshot is meant (internal callers such
+    as `load_step` that already decided access). A resolution that is not the
+    snapshot — a viewer's own result, or withheld — is returned untouched.
+    """
+    if resolution is not None:
+        data, snapshot = resolution.data, resolution.snapshot
+    else:
+        data, snapshot = (step.data or {}), True
+    store = ref(step) if snapshot else None
+    if store is None or not (isinstance(data, dict) and data.get("truncated")):
+        return data
+    return await asyncio.to_thread(read_all, store, data)
@@ -17,8 +17,14 @@ from sqlalchemy import select
 from typing import Optional
 from app.models.report import Report
 from app.models.user import User
+from app.services import step_result_store
+import os
 
 
+# How many steps of one report rerun execute at once. Each query still takes a
+# slot of its connection's `query_concurrency` cap, so this bounds code-exec
+# threads and in-flight frames, not per-source pressure.
+RERUN_STEP_CONCURRENCY = int(os.environ.get("BOW_RERUN_STEP_CONCURRENCY", "4") or 4)
 
 
 class StepService:
@@ -40,10 +46,16 @@ class StepService:
         step = result.scalar_one_or_none()
         return step
 
-    async def export_step_authorized(
-        self, db: AsyncSession, step_id: str, current_user: User, organization
-    ) -> tuple[pd.DataFrame, Step]:
-        """Authorize and resolve a step export for a specific user.
+    async def export_step_stream(
+        self, db: AsyncSession, step_id: str, current_user: User, organization,
+        *, live: bool = False,
+    ):
+        """Authorize a step export and return its rows as DataFrame batches.
+
+        Returns (batches, step, source). `batches` is a blocking iterator for
+        a worker thread / StreamingResponse, yielding at most
+        `step_export.batch_rows()` rows at a time — the export never holds
+        the whole result as one frame.
 
         The raw export route historically had NO object-level check — any
         authenticated user could pull any step's rows by id (IDOR). Gate it
@@ -51,8 +63,71 @@ class StepService:
         and visible to them (owner / org-admin / artifact visibility), and the
         rows they get are what resolve_step_data grants — their own run, the
         shared snapshot, or (withheld) a 403. Never the raw creator snapshot
-        for a strict-mode viewer.
+        for a strict-mode viewer. The shared snapshot is read from the step's
+        row store when it has one. `live=True` instead
+        re-runs the step's code under the caller's OWN credentials — never the
+        creator's, so it is allowed even where the snapshot is withheld — and
+        exports every row it returns, unbounded by the preview or the
+        widget row limit.
+        """
+        from app.errors import AppError, ErrorCode
+        from app.services import step_export
+
+        step, resolution = await self._resolve_step_for_reader(db, step_id, current_user, organization)
+        size = step_export.batch_rows()
+        if live:
+            report = step.widget.report
+            df = await self._execute_step_code(
+                db, step, report, current_user=current_user, organization=organization, raw=True,
+            )
+            return step_export.frame_batches(df, size), step, "live"
+        if resolution.withheld:
+            raise AppError.forbidden(
+                ErrorCode.ACCESS_DENIED,
+                "This dashboard shows data based on your access — run it to export your own data",
+            )
+        store = step_result_store.ref(step) if resolution.snapshot else None
+        batches = step_result_store.iter_frames(store, resolution.data or {}, size)
+        return batches, step, "store" if store else "saved"
+
+    async def page_step_rows(
+        self, db: AsyncSession, step_id: str, current_user: User, organization, request
+    ) -> dict:
+        """One page of a step's rows for `current_user`, sorted/filtered server-side.
+
+        Same gate as export: org + report visibility, then resolve_step_data
+        decides which rows this reader may see. The shared snapshot is paged
+        from the step's row store when it has one; a viewer's own result from
+        its JSON. A withheld reader gets an empty page flagged
+        `snapshot_withheld`, like the step read endpoint.
         """
+        import asyncio
+
+        step, resolution = await self._resolve_step_for_reader(db, step_id, current_user, organization)
+        if resolution.withheld:
+            return {
+                "rows": [], "columns": [], "offset": request.offset, "limit": request.limit,
+                "total_rows": 0, "source": "inline", "snapshot_withheld": True,
+            }
+        store = step_result_store.ref(step) if resolution.snapshot else None
+        page = await asyncio.to_thread(
+            step_result_store.read_page,
+            store,
+            resolution.data or {},
+            offset=request.offset,
+            limit=request.limit,
+            columns=request.columns,
+            sort=[s.model_dump() for s in request.sort],
+            filters=[f.model_dump() for f in request.filters],
+        )
+        page["viewer_result"] = resolution.viewer_result
+        return page
+
+    async def _resolve_step_for_reader(
+        self, db: AsyncSession, step_id: str, current_user: User, organization
+    ):
+        """Load a step and resolve what `current_user` may see of it, raising
+        not-found (cross-org / orphan) or forbidden (not visible)."""
         from app.errors import AppError, ErrorCode
         from app.services.viewer_data_policy import resolve_step_data
 
@@ -67,13 +142,7 @@ class StepService:
 
         await self._authorize_report_view(db, report, current_user, organization)
 
-        resolution = await resolve_step_data(db, step, report, current_user)
-        if resolution.withheld:
-            raise AppError.forbidden(
-                ErrorCode.ACCESS_DENIED,
-                "This dashboard shows data based on your access — run it to export your own data",
-            )
-        return self._df_from_step_data(resolution.data), step
+        return step, await resolve_step_data(db, step, report, current_user)
 
     async def _authorize_report_view(self, db: AsyncSession, report, current_user: User, organization) -> None:
         """Raise unless current_user may view `report` (owner / org full-admin /
@@ -199,36 +268,21 @@ class StepService:
             raise ValueError("Report not found")
         return step, report
 
-    async def _execute_step_code(
+    async def _prepare_step_execution(
         self,
         db: AsyncSession,
         step: Step,
         report: Report,
         current_user: Optional[User] = None,
-        db_clients: Optional[dict] = None,
         organization=None,
         organization_settings=None,
-    ) -> dict:
-        """Execute a step's saved code and return the formatted result frame.
+    ) -> tuple:
+        """The DB-bound half of a rerun: (org_settings, loadables) for `step`.
 
-        Pure execution — persists nothing. `current_user` decides whose
-        data-source credentials are used when `db_clients` isn't prebuilt.
+        Split from execution so a batch rerun can do every session read up
+        front and then run the code concurrently — an AsyncSession cannot be
+        shared across concurrently running tasks.
         """
-        if db_clients is None:
-            # Build db_clients using construct_clients for multi-connection support.
-            # Run as the user who triggered the rerun so user_required connections use
-            # their credentials (or owner/admin → system-cred fallback). Background
-            # callers that pass no user still get None here (handled in case B).
-            from app.services.data_source_service import DataSourceService
-            ds_service = DataSourceService()
-            db_clients = {}
-            for data_source in report.data_sources:
-                ds_clients = await ds_service.construct_clients(db, data_source, current_user=current_user)
-                db_clients.update(ds_clients)
-
-        excel_files = report.files
-        code = step.code
-
         # Pre-resolve any load_step()/load_entity() refs in the saved code.
         from app.ai.code_execution.loadables import resolve_loadables_for_code, load_step_settings
         from app.models.organization import Organization
@@ -244,10 +298,27 @@ class StepService:
             org_settings = await org.get_settings(db)
         _ls_enabled, _ = load_step_settings(org_settings)
         loadables = await resolve_loadables_for_code(
-            db, org, report, current_user, code, enable_load_step=_ls_enabled
+            db, org, report, current_user, step.code, enable_load_step=_ls_enabled
         )
+        return org_settings, loadables
+
+    async def _run_step_code(
+        self,
+        code: str,
+        report: Report,
+        db_clients: dict,
+        org_settings,
+        loadables,
+        query_memo=None,
+        captured_timings: Optional[list] = None,
+        raw: bool = False,
+    ):
+        """Execute saved step code and format the frame. Touches no session.
+
+        `raw=True` returns the DataFrame itself, unformatted and uncapped.
+        """
         from app.ai.code_execution.code_execution import StreamingCodeExecutor
-        executor = StreamingCodeExecutor(organization_settings=org_settings)
+        executor = StreamingCodeExecutor(organization_settings=org_settings, query_memo=query_memo)
 
         # Execution is fully synchronous (DB drivers + pandas):
         # execute_code_async runs it on the bounded code-exec pool (same cap
@@ -255,11 +326,205 @@ class StepService:
         # formatting — also pandas-heavy for large frames — goes off-loop too.
         import asyncio
         df, output_log, _ = await executor.execute_code_async(
-            code=code, ds_clients=db_clients, excel_files=excel_files, loadables=loadables,
+            code=code, ds_clients=db_clients, excel_files=report.files, loadables=loadables,
+            captured_timings=captured_timings,
         )
+        if raw:
+            return df
         df = await asyncio.to_thread(executor.format_df_for_widget, df)
         return df
 
+    async def _execute_step_code(
+        self,
+        db: AsyncSession,
+        step: Step,
+        report: Report,
+        current_user: Optional[User] = None,
+        db_clients: Optional[dict] = None,
+        organization=None,
+        organization_settings=None,
+        raw: bool = False,
+    ):
+        """Execute a step's saved code and return the formatted result frame
+        (the DataFrame itself with `raw=True`).
+
+        Pure execution — persists nothing. `current_user` decides whose
+        data-source credentials are used when `db_clients` isn't prebuilt.
+        """
+        if db_clients is None:
+            # Build db_clients using construct_clients for multi-connection support.
+            # Run as the user who triggered the rerun so user_required connections use
+            # their credentials (or owner/admin → system-cred fallback). Background
+            # callers that pass no user still get None here (handled in case B).
+            from app.services.data_source_service import DataSourceService
+            ds_service = DataSourceService()
+            db_clients = {}
+            for data_source in report.data_sources:
+                ds_clients = await ds_service.construct_clients(db, data_source, current_user=current_user)
+                db_clients.update(ds_clients)
+
+        org_settings, loadables = await self._prepare_step_execution(
+            db, step, report, current_user=current_user,
+            organization=organization, organization_settings=organization_settings,
+        )
+        return await self._run_step_code(step.code, report, db_clients, org_settings, loadables, raw=raw)
+
+    async def rerun_steps(
+        self,
+        db: AsyncSession,
+        step_ids: list[str],
+        current_user: Optional[User],
+        report: Report,
+        db_clients: dict,
+        organization=None,
+        organization_settings=None,
+        concurrency: Optional[int] = None,
+    ) -> list[dict]:
+        """Re-execute many steps of one report and persist them in place.
+
+        The batch form of `rerun_step`, for report reruns. A dashboard refresh
+        used to cost the sum of its steps' query latencies; here it costs
+        roughly its slowest step:
+
+          * Steps run concurrently, at most `concurrency` at a time. Per-source
+            pressure is still bounded by each connection's `query_concurrency`
+            cap, which every query acquires inside the code-exec wrapper.
+          * Steps with identical code execute once and share the frame, and
+            identical queries issued by different steps run once
+            (`query_result_cache.RunMemo`).
+          * Steps that `load_step()` another step run after the rest are
+            persisted, so they read this run's data as they did when reruns
+            were sequential.
+          * All session work — loading, loadable resolution, persistence —
+            stays sequential on `db`, and each wave commits once.
+
+        Returns one timing record per step id, in input order:
+        `{"step_id", "status", "ms", "wait_ms", "queries", "shared_queries",
+        "deduped_from", "error"}`. `ms` is the step's own execution time and
+        `wait_ms` its time queued behind the concurrency bound, so the run's
+        critical path is the slowest step of each wave.
+        """
+        import asyncio
+        import time
+        from sqlalchemy import delete as sa_delete
+        from sqlalchemy.orm import lazyload
+        from app.ai.code_execution.loadables import extract_loadable_refs
+        from app.data_sources.query_result_cache import RunMemo
+        from app.models.step_user_result import StepUserResult
+
+        limit = max(1, int(concurrency or RERUN_STEP_CONCURRENCY))
+        ids = [str(i) for i in step_ids]
+        loaded = (await db.execute(
+            select(Step).options(lazyload("*")).where(Step.id.in_(ids))
+        )).scalars().all()
+        steps_by_id = {str(st.id): st for st in loaded}
+        records = {
+            sid: {"step_id": sid, "status": "error", "ms": 0.0, "wait_ms": 0.0,
+                  "queries": 0, "shared_queries": 0, "deduped_from": None,
+                  "error": None if sid in steps_by_id else "Step not found"}
+            for sid in ids
+        }
+
+        def _code_key(code: str) -> str:
+            return "\n".join(line.rstrip() for line in (code or "").strip().splitlines())
+
+        independent: list[Step] = []
+        dependent: list[Step] = []
+        for sid in ids:
+            st = steps_by_id.get(sid)
+            if st is None:
+                continue
+            if not st.code or not str(st.code).strip():
+                records[sid]["error"] = "Step code is empty"
+                continue
+            step_refs, entity_refs = extract_loadable_refs(st.code)
+            (dependent if step_refs or entity_refs else independent).append(st)
+
+        memo = RunMemo()
+        gate = asyncio.Semaphore(limit)
+
+        # Store files replaced by this run, deleted once their wave commits.
+        stale_files: list[str] = []
+
+        async def _wave(wave: list[Step], parallel: bool) -> None:
+            # Group identical code; the first step of each group is its leader.
+            groups: dict[str, list[Step]] = {}
+            for st in wave:
+                groups.setdefault(_code_key(st.code), []).append(st)
+
+            async def _prepare(members):
+                try:
+                    org_settings, loadables = await self._prepare_step_execution(
+                        db, members[0], report, current_user=current_user,
+                        organization=organization, organization_settings=organization_settings,
+                    )
+                except Exception as e:
+                    for st in members:
+                        records[str(st.id)]["error"] = str(e)[:500] or e.__class__.__name__
+                    return None
+                return members, org_settings, loadables
+
+            async def _run(members, org_settings, loadables):
+                leader = members[0]
+                queued = time.monotonic()
+                async with gate:
+                    started = time.monotonic()
+                    timings: list = []
+                    try:
+                        df = await self._run_step_code(
+                            leader.code, report, db_clients, org_settings, loadables,
+                            query_memo=memo, captured_timings=timings,
+                        )
+                        error = None
+                    except Exception as e:
+                        df, error = None, (str(e)[:500] or e.__class__.__name__)
+                    finished = time.monotonic()
+                for st in members:
+                    rec = records[str(st.id)]
+                    rec["ms"] = round((finished - started) * 1000.0, 1)
+                    rec["wait_ms"] = round((started - queued) * 1000.0, 1)
+                    rec["queries"] = len(timings)
+                    rec["shared_queries"] = sum(1 for t in timings if t.get("cache") == "shared")
+                    if st is not leader:
+                        rec["deduped_from"] = str(leader.id)
+                    if error is None:
+                        stale = await step_result_store.persist(st, df)
+                        if stale:
+                            stale_files.append(stale)
+                        rec["status"] = "success"
+                    else:
+                        rec["error"] = error
+
+            if parallel:
+                prepared = [p for p in [await _prepare(m) for m in groups.values()] if p]
+                await asyncio.gather(*(_run(*p) for p in prepared))
+            else:
+                # Resolve each step's loadables only after the steps before it
+                # have run, so a chain of load_step() sees fresh data.
+                for members in groups.values():
+                    p = await _prepare(members)
+                    if p:
+                        await _run(*p)
+                        await db.flush()
+
+            succeeded = [str(st.id) for st in wave if records[str(st.id)]["status"] == "success"]
+            if succeeded:
+                # The shared snapshots changed — per-viewer cached results for
+                # these steps are now stale. They are a cache of derived data,
+                # so hard-delete.
+                await db.execute(sa_delete(StepUserResult).where(StepUserResult.step_id.in_(succeeded)))
+            await db.commit()
+            for path in stale_files:
+                step_result_store.delete_file(path)
+            stale_files.clear()
+
+        await _wave(independent, parallel=True)
+        if dependent:
+            # load_step() reads other steps' data; run these in order, after
+            # the first wave is committed, exactly as a sequential rerun would.
+            await _wave(dependent, parallel=False)
+        return [records[sid] for sid in ids]
+
     async def rerun_step(
         self,
         db: AsyncSession,
@@ -286,7 +551,7 @@ class StepService:
         )
 
         # Update existing step instead of creating new one
-        step.data = df
+        stale = await step_result_store.persist(step, df)
 
         # The shared snapshot changed — per-viewer cached results for this
         # step are now stale. They are a cache of derived data, so hard-delete.
@@ -295,6 +560,7 @@ class StepService:
         await db.execute(sa_delete(StepUserResult).where(StepUserResult.step_id == str(step_id)))
 
         await db.commit()
+        step_result_store.delete_file(stale)
         await db.refresh(step)
 
         return StepSchema.from_orm(step)
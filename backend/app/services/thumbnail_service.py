@@ -6,6 +6,7 @@ import logging
 from pathlib import Path
 from typing import Optional
 
+from app.services import step_result_store
 from app.services.artifact_libs import get_inline_scripts
 
 logger = logging.getLogger(__name__)
@@ -269,12 +270,14 @@ class ThumbnailService:
                         )
                         step = step_result.scalar_one_or_none()
 
+                    # Charts aggregate every row, not the inline preview.
+                    data = (await step_result_store.full_data(step) if step else None) or {}
                     viz_data.append({
                         "id": str(viz.id),
                         "title": viz.title or query.title or "Untitled",
                         "view": viz.view or {},
-                        "rows": step.data.get("rows", []) if step and step.data else [],
-                        "columns": step.data.get("columns", []) if step and step.data else [],
+                        "rows": data.get("rows", []),
+                        "columns": data.get("columns", []),
                         "dataModel": step.data_model or {} if step else {},
                     })
 
@@ -8,11 +8,14 @@ read and write.
 
 The in-process registry (``app.ai.tools.confirmation``) is still used alongside
 this, purely as a same-worker fast path so a local click wakes the run instantly
-instead of on the next poll.
+instead of on the next poll. Creating and resolving a row is announced on the
+completion event bus, so report activity badges on every worker update without
+waiting for their safety tick.
 """
 
 from __future__ import annotations
 
+import json
 import logging
 from datetime import datetime, timedelta
 from typing import Optional
@@ -68,6 +71,7 @@ class ToolConfirmationService:
             f"ToolConfirmation {confirmation_id}: persisted (tool={tool_name}, "
             f"completion={system_completion_id})"
         )
+        await self._announce(report_id, str(confirmation_id), ToolConfirmation.STATUS_PENDING)
         return row
 
     async def get(self, db: AsyncSession, confirmation_id: str) -> Optional[ToolConfirmation]:
@@ -127,7 +131,26 @@ class ToolConfirmationService:
             )
         )
         await db.commit()
-        return await self.get(db, confirmation_id)
+        row = await self.get(db, confirmation_id)
+        if row is not None:
+            await self._announce(row.report_id, str(confirmation_id), row.status)
+        return row
+
+    @staticmethod
+    async def _announce(report_id: Optional[str], confirmation_id: str, status: str) -> None:
+        if not report_id:
+            return
+        try:
+            from app.streaming.completion_event_bus import websocket_manager
+
+            await websocket_manager.broadcast_to_report(str(report_id), json.dumps({
+                "event": "tool_confirmation",
+                "report_id": str(report_id),
+                "confirmation_id": confirmation_id,
+                "status": status,
+            }))
+        except Exception as e:
+            logger.debug(f"ToolConfirmation {confirmation_id}: announce failed: {e!r}")
 
     async def expire(self, db: AsyncSession, confirmation_id: str) -> None:
         """Mark a still-pending row expired once the run stops waiting."""
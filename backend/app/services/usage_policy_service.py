@@ -1,4 +1,5 @@
 import asyncio
+import logging
 import threading
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
@@ -39,6 +40,8 @@ from app.schemas.usage_policy_schema import (
     UsageQuotaSummarySchema,
 )
 
+logger = logging.getLogger(__name__)
+
 
 METRIC_LLM_TOKENS = "llm_tokens"
 METRIC_DATA_QUERIES = "data_queries"
@@ -202,6 +205,11 @@ class UsageLimitContext:
     # Per-(metric, connection_id) enforcement cache: {"limit", "used", "loaded_at"}.
     # Same TTL/refresh-then-raise discipline as the token cache.
     _data_cache: Dict[tuple, dict] = field(default_factory=dict, init=False, repr=False)
+    # Source queries captured for the acceleration advisor (see
+    # acceleration_advisor_service): {connection_id, sql, query_ms, rows,
+    # result_bytes, at}. Appended from code-exec worker threads under
+    # `_data_lock`, like the data events; not gated on `usage_limits`.
+    _pending_query_samples: List[dict] = field(default_factory=list, init=False, repr=False)
     # Set on contexts created via for_source(): buffered amounts/events and
     # quota checks delegate to the root context so one end-of-run flush covers
     # everything added under any derived label.
@@ -392,6 +400,7 @@ class UsageLimitContext:
             return await self._root().flush()
         if self.session_maker is None:
             return
+        await self._flush_query_samples()
         await self._flush_tokens()
         await self._flush_cost()
         await self._flush_data_events()
@@ -547,6 +556,43 @@ class UsageLimitContext:
     async def check_data_bytes(self, connection_id: str, amount: int) -> None:
         await self._root()._check_data(METRIC_DATA_BYTES, connection_id, int(amount))
 
+    # Bound on buffered samples per run; a runaway loop of queries should not
+    # grow the context without limit for what is only advisory history.
+    _MAX_QUERY_SAMPLES = 1000
+
+    def add_query_sample(self, connection_id: str, sql: str, query_ms: float,
+                         rows: Optional[int], result_bytes: Optional[int]) -> None:
+        """Buffer one source query for the acceleration advisor. No IO, thread-safe."""
+        if not connection_id or not isinstance(sql, str):
+            return
+        root = self._root()
+        with root._data_lock:
+            if len(root._pending_query_samples) >= self._MAX_QUERY_SAMPLES:
+                return
+            root._pending_query_samples.append({
+                "connection_id": str(connection_id),
+                "sql": sql,
+                "query_ms": float(query_ms or 0.0),
+                "rows": rows,
+                "result_bytes": result_bytes,
+                "at": datetime.utcnow(),
+            })
+
+    async def _flush_query_samples(self) -> None:
+        """Best-effort, unlike the metering flushes: losing a run's history
+        only makes the advisor slightly less informed, so a failure is logged
+        and dropped rather than retried or raised."""
+        with self._data_lock:
+            if not self._pending_query_samples:
+                return
+            samples = self._pending_query_samples
+            self._pending_query_samples = []
+        try:
+            from app.services.acceleration_advisor_service import acceleration_advisor_service
+            await acceleration_advisor_service.record_samples_with_context(self, samples)
+        except Exception as e:
+            logger.debug("Query history not recorded: %s", e)
+
     async def _flush_data_events(self) -> None:
         with self._data_lock:
             if not self._pending_data_events:
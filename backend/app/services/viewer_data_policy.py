@@ -42,10 +42,15 @@ class StepDataResolution:
     renders, websocket broadcasts) must go through instead of reading
     Step.data directly. `data` is already the correct payload for the
     requesting user; readers must not fall back to step.data when withheld.
+
+    `snapshot` is True when `data` IS the shared Step.data snapshot — the only
+    case where the step's row store (app.services.step_result_store) holds the
+    same rows and may serve them in full.
     """
     data: dict = field(default_factory=dict)
     withheld: bool = False
     viewer_result: Optional[dict] = None
+    snapshot: bool = False
 
 
 async def resolve_step_data(
@@ -72,7 +77,7 @@ async def resolve_step_data(
 
     owner_id = str(report.user_id) if report is not None and getattr(report, "user_id", None) else None
     if requesting_user is not None and owner_id is not None and str(requesting_user.id) == owner_id:
-        return StepDataResolution(data=shared)
+        return StepDataResolution(data=shared, snapshot=True)
 
     viewer_result = None
     if requesting_user is not None:
@@ -114,7 +119,7 @@ async def resolve_step_data(
 
     if withheld:
         return StepDataResolution(data={}, withheld=True, viewer_result=viewer_result)
-    return StepDataResolution(data=shared, viewer_result=viewer_result)
+    return StepDataResolution(data=shared, viewer_result=viewer_result, snapshot=True)
 
 
 async def _report_data_source_ids(db: AsyncSession, report_id: str) -> list[str]:
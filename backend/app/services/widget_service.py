@@ -5,6 +5,7 @@ from app.schemas.step_schema import StepSchema
 from sqlalchemy.orm import Session
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.services.step_service import StepService
+from app.services import step_result_store
 from app.models.step import Step
 import uuid
 from fastapi import HTTPException
@@ -156,7 +157,7 @@ class WidgetService:
                 logging.error(f"Widget {widget_id} not found")
                 raise ValueError(f"Widget {widget_id} not found")
             
-            last_step = await self._get_last_step(db_session, widget.id)
+            last_step = await self._get_last_step(db_session, widget.id, full=True)
             logging.info(f"Got last step: {last_step}")
             
             # read the last_step.data[rows] and columns as df
@@ -186,16 +187,18 @@ class WidgetService:
     async def _set_widget_as_published(self, db: AsyncSession, widget: Widget):
         widget.status = 'published'
 
-    async def _get_last_step(self, db_session: AsyncSession, widget_id: str) -> StepSchema | None:
+    async def _get_last_step(self, db_session: AsyncSession, widget_id: str, full: bool = False) -> StepSchema | None:
         last_step = await db_session.execute(select(Step).filter(Step.widget_id == widget_id).order_by(Step.created_at.desc()).limit(1))
         last_step = last_step.scalar_one_or_none()
         if last_step:
+            # `full`: every stored row rather than the inline preview.
+            data = await step_result_store.full_data(last_step) if full else last_step.data
             # Ensure data and data_model are dictionaries, defaulting to empty dict if None
             # (maintenance service purges these fields for old steps)
             from app.ai.llm.pii.display import redact_grid_display
             step_dict = {
                 **last_step.__dict__,
-                'data': redact_grid_display(last_step.data or {}),
+                'data': redact_grid_display(data or {}),
                 'data_model': last_step.data_model or {}
             }
             return StepSchema.model_validate(step_dict)
@@ -1,4 +1,4 @@
-"""In-process completion event bus (same-worker fast path).
+"""Completion event bus: in-process handler fan-out plus cross-worker relay.
 
 Successor to the old ``websocket_manager``: the WebSocket layer it carried is
 gone (it was unauthenticated, and its per-worker connection dict silently
@@ -6,36 +6,73 @@ dropped events for clients connected to a different uvicorn worker — clients
 now get live updates from the DB-backed activity stream instead), but the
 in-process handler fan-out stays. ORM event hooks publish completion/step/
 widget updates here, and a same-worker agent run subscribes to catch steering
-messages instantly; the agent's per-iteration DB poll remains the
-cross-worker fallback, exactly as before.
+messages instantly.
+
+Every broadcast is also relayed through the event transport
+(`app.streaming.event_transport`), and messages relayed by other workers are
+fanned out to this worker's handlers — so a steering message posted to
+another worker reaches the run within milliseconds, and the report activity
+hub wakes on changes made anywhere. The agent's per-iteration DB poll
+remains the fallback when the relay drops a message.
 """
+import logging
 from typing import Callable, List
 
+from app.core.fire_and_forget import spawn
+from app.streaming import event_transport
+
+logger = logging.getLogger(__name__)
+
+REPORT_EVENTS_CHANNEL = "report.events"
+
 
 class CompletionEventBus:
     def __init__(self):
         self.message_handlers: List[Callable] = []
 
     async def broadcast_to_report(self, report_id: str, message: str):
-        """Fan a serialized event out to this worker's registered handlers.
+        """Fan a serialized event out to every worker's registered handlers.
 
         Signature kept from the WebSocket era so the ORM hooks and agent
         call sites didn't have to change; ``report_id`` is inside ``message``
         and handlers filter for themselves.
         """
+        try:
+            event_transport.get_transport().publish(
+                REPORT_EVENTS_CHANNEL, {"report_id": str(report_id), "message": message}
+            )
+        except Exception as e:
+            logger.debug(f"Error relaying report event: {e}")
+        await self._notify(message)
+
+    async def _notify(self, message: str):
         for handler in list(self.message_handlers):
             try:
                 await handler(message)
             except Exception as e:
                 print(f"Error notifying message handler: {e}")
 
+    def _on_relayed(self, payload: dict):
+        message = payload.get("message")
+        if message and self.message_handlers:
+            spawn(self._notify(message))
+
     def add_handler(self, handler: Callable):
         if handler not in self.message_handlers:
             self.message_handlers.append(handler)
+        try:
+            event_transport.get_transport().listen(REPORT_EVENTS_CHANNEL, self._on_relayed)
+        except Exception as e:
+            logger.debug(f"Error listening for relayed report events: {e}")
 
     def remove_handler(self, handler: Callable):
         if handler in self.message_handlers:
             self.message_handlers.remove(handler)
+        if not self.message_handlers:
+            try:
+                event_transport.get_transport().unlisten(REPORT_EVENTS_CHANNEL, self._on_relayed)
+            except Exception:
+                pass
 
 
 # Import-compatible instance name: existing call sites keep reading
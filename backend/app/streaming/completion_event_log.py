@@ -0,0 +1,282 @@
+"""Durable, sequence-numbered log of a completion's SSE events.
+
+A client that lost its stream used to rebuild state from scratch: the watch
+endpoint re-serialized every block of the completion from the DB and
+replayed running-tool markers, because the live `CompletionEventQueue` is
+in-memory, bounded, and only delivers what is put after a subscriber
+attaches. On a long run that is a full payload load per network blip.
+
+Every event a registered stream emits is now also appended here, numbered
+by its position in the completion's stream (1, 2, 3, …). The number goes
+out as the SSE ``id:`` of the event, so a client always knows exactly how
+far it got, and the watch endpoint honours ``Last-Event-ID``: when the log
+covers the client's position it replays only the missed tail — one range
+read on the (completion_id, seq) key — and then continues live.
+
+The per-execution ``seq`` the agent already stamps on some events is not
+used for this: it is only set on block-level events and restarts per agent
+execution, while the log has to order every token delta of the completion.
+
+  * **Writes** are batched: the owner buffers events and inserts them every
+    ``BOW_COMPLETION_EVENT_LOG_FLUSH_S`` (0.25s) or
+    ``BOW_COMPLETION_EVENT_LOG_BATCH`` (200) events, whichever comes first,
+    off the agent's event loop turn. Rows hold the event's JSON exactly as it
+    went out live, so a replay is byte-identical to what was missed.
+  * **Replay** merges the DB rows with the owner's not-yet-flushed buffer
+    when the watcher is on the owning worker; a watcher elsewhere fills any
+    gap left by the flush lag from the DB once the batch lands.
+  * **Retention** — a finished completion's rows are pruned
+    ``BOW_COMPLETION_EVENT_LOG_RETENTION_S`` (1h) after they were written;
+    a resume older than that falls back to the snapshot.
+  * **Re-queued runs** continue the numbering: a run recovered from a dead
+    worker (see `app.services.agent_run_queue`) gets a fresh log on its new
+    worker, which first reads the highest seq already logged for the
+    completion. Starting over at 1 would collide with the first attempt's
+    rows on the primary key and land behind a kickoff watch that had already
+    read past them.
+  * ``BOW_COMPLETION_EVENT_LOG=0`` turns logging (and resume) off.
+
+Best effort like the rest of streaming: a failed batch is dropped and
+counted, and a resume that finds a hole in the log falls back to the
+snapshot path rather than replaying an incomplete tail.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from sqlalchemy import text
+
+from app.schemas.sse_schema import SSEEvent, event_json
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FLUSH_S = 0.25
+DEFAULT_BATCH = 200
+DEFAULT_RETENTION_S = 3600.0
+# Events kept in memory when the DB keeps refusing batches.
+_MAX_PENDING = 10000
+
+# (seq, event name, JSON of the SSEEvent as sent)
+LogRow = Tuple[int, str, str]
+
+_lock = threading.Lock()
+_metrics = {"appended": 0, "written": 0, "flushes": 0, "dropped": 0, "errors": 0, "replayed": 0, "pruned": 0}
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _env_number(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def enabled() -> bool:
+    return os.environ.get("BOW_COMPLETION_EVENT_LOG", "1").strip().lower() not in ("0", "false", "no", "off")
+
+
+def flush_interval_s() -> float:
+    return max(0.01, _env_number("BOW_COMPLETION_EVENT_LOG_FLUSH_S", DEFAULT_FLUSH_S))
+
+
+def _engine():
+    from app.settings.database import create_async_database_engine
+    return create_async_database_engine()
+
+
+_INSERT = (
+    "INSERT INTO completion_events (completion_id, seq, event, payload, created_at) "
+    "VALUES (:c, :s, :e, :p, :now)"
+)
+
+
+class CompletionEventLog:
+    """The owning worker's writer for one completion's log."""
+
+    def __init__(self, completion_id: str):
+        self.completion_id = str(completion_id)
+        self.last_seq = 0
+        self._pending: List[LogRow] = []
+        self._task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._closed = False
+
+    async def continue_numbering(self) -> None:
+        """Number on from the highest seq already logged for this completion.
+
+        Call before the first `append`. A completion that logged nothing yet
+        keeps starting at 1; a failed read leaves the numbering as is and is
+        counted, since that is no worse than before the read.
+        """
+        try:
+            async with _engine().connect() as conn:
+                logged = (await conn.execute(
+                    text("SELECT MAX(seq) FROM completion_events WHERE completion_id = :c"),
+                    {"c": self.completion_id},
+                )).scalar()
+        except Exception as e:
+            _count("errors")
+            logger.warning(f"[event_log:{self.completion_id}] could not read the logged position: {e}")
+            return
+        self.last_seq = max(self.last_seq, int(logged or 0))
+
+    def append(self, event: SSEEvent) -> int:
+        """Number `event` and buffer it for the next batch. Returns its seq."""
+        self.last_seq += 1
+        if len(self._pending) >= _MAX_PENDING:
+            self._pending.pop(0)
+            _count("dropped")
+        self._pending.append((self.last_seq, event.event, event_json(event)))
+        _count("appended")
+        self._ensure_flusher()
+        if len(self._pending) >= max(1, _env_int("BOW_COMPLETION_EVENT_LOG_BATCH", DEFAULT_BATCH)):
+            self._wake.set()
+        return self.last_seq
+
+    def pending_after(self, seq: int) -> List[LogRow]:
+        """Buffered (not yet written) rows past `seq`."""
+        return [row for row in self._pending if row[0] > seq]
+
+    def _ensure_flusher(self) -> None:
+        if self._task is not None or self._closed:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._wake = asyncio.Event()
+        self._task = loop.create_task(self._flush_loop())
+
+    async def _flush_loop(self) -> None:
+        while not self._closed:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=flush_interval_s())
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Write the buffered rows. They leave the buffer only once
+        committed, so a replay reading buffer-then-DB never misses one."""
+        batch = list(self._pending)
+        if not batch:
+            return
+        now = datetime.utcnow()
+        try:
+            async with _engine().begin() as conn:
+                await conn.execute(text(_INSERT), [
+                    {"c": self.completion_id, "s": seq, "e": name, "p": payload, "now": now}
+                    for seq, name, payload in batch
+                ])
+        except Exception as e:
+            _count("errors")
+            _count("dropped", len(batch))
+            logger.warning(f"[event_log:{self.completion_id}] dropped {len(batch)} events: {e}")
+        else:
+            _count("flushes")
+            _count("written", len(batch))
+        last = batch[-1][0]
+        self._pending = [row for row in self._pending if row[0] > last]
+
+    async def close(self) -> None:
+        """Stop the flusher and write what is left."""
+        self._closed = True
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+        await self.flush()
+
+
+async def read_after(completion_id: str, after_seq: int, until_seq: Optional[int] = None) -> List[LogRow]:
+    """Logged rows past `after_seq` (up to `until_seq`), in order."""
+    sql = "SELECT seq, event, payload FROM completion_events WHERE completion_id = :c AND seq > :after"
+    params = {"c": str(completion_id), "after": int(after_seq)}
+    if until_seq is not None:
+        sql += " AND seq <= :until"
+        params["until"] = int(until_seq)
+    async with _engine().connect() as conn:
+        rows = (await conn.execute(text(sql + " ORDER BY seq"), params)).all()
+    return [(int(seq), name, payload) for seq, name, payload in rows]
+
+
+async def replay_after(
+    completion_id: str, after_seq: int, local_log: Optional[CompletionEventLog] = None
+) -> Optional[List[LogRow]]:
+    """The exact tail a client at `after_seq` missed, or None when the log
+    cannot say (pruned, disabled, written before logging existed) and the
+    caller must fall back to a snapshot."""
+    if not enabled() or after_seq < 0:
+        return None
+    # Buffer first, then the DB: a batch committed in between is in one of
+    # the two (see CompletionEventLog.flush).
+    pending = local_log.pending_after(after_seq) if local_log is not None else []
+    try:
+        rows = await read_after(completion_id, after_seq)
+    except Exception as e:
+        _count("errors")
+        logger.warning(f"[event_log:{completion_id}] replay read failed: {e}")
+        return None
+    merged = {row[0]: row for row in rows}
+    merged.update({row[0]: row for row in pending})
+    tail = [merged[seq] for seq in sorted(merged)]
+    if tail:
+        if tail[0][0] != after_seq + 1 or tail[-1][0] - tail[0][0] + 1 != len(tail):
+            return None  # a hole: pruned or a dropped batch
+    elif local_log is not None:
+        if local_log.last_seq != after_seq:
+            return None
+    elif after_seq == 0:
+        # Nothing logged at all for this completion.
+        return None
+    _count("replayed", len(tail))
+    return tail
+
+
+async def prune_expired() -> int:
+    """Delete rows of completions no longer running once past retention
+    (scheduler job)."""
+    cutoff = datetime.utcnow() - timedelta(
+        seconds=max(0.0, _env_number("BOW_COMPLETION_EVENT_LOG_RETENTION_S", DEFAULT_RETENTION_S))
+    )
+    async with _engine().begin() as conn:
+        result = await conn.execute(
+            text(
+                "DELETE FROM completion_events WHERE created_at < :cutoff AND completion_id NOT IN "
+                "(SELECT id FROM completions WHERE status = 'in_progress')"
+            ),
+            {"cutoff": cutoff},
+        )
+    n = int(result.rowcount or 0)
+    _count("pruned", n)
+    return n
+
+
+def _count(name: str, n: int = 1) -> None:
+    with _lock:
+        _metrics[name] += n
+
+
+def stats() -> dict:
+    with _lock:
+        return dict(_metrics)
+
+
+def reset() -> None:
+    with _lock:
+        for k in _metrics:
+            _metrics[k] = 0
@@ -1,7 +1,11 @@
 import asyncio
 import logging
+import os
+import time
 from typing import AsyncIterator, Optional
-from app.schemas.sse_schema import SSEEvent
+from app.core.fire_and_forget import spawn
+from app.schemas.sse_schema import SSEEvent, event_json
+from app.streaming import completion_event_log, event_transport
 
 _SENTINEL = object()
 
@@ -14,6 +18,20 @@ STREAM_DONE = object()
 _QUEUE_MAXSIZE = 512
 _logger = logging.getLogger(__name__)
 
+# Cross-worker watchers (see RemoteStreamSubscription): a watcher announces
+# itself on _WATCH_CHANNEL and re-announces every third of the TTL; the
+# owning worker publishes the run's events while an announcement is fresh.
+# An owner that registers a stream says so on _READY_CHANNEL, so a watcher
+# that attached before the run started (a queued run picked up by an agent
+# worker) announces itself again right away instead of a TTL third later.
+_WATCH_CHANNEL = "completion.watch"
+_READY_CHANNEL = "completion.ready"
+_INTEREST_TTL_SECONDS = float(os.getenv("BOW_STREAM_INTEREST_TTL_SECONDS", "30"))
+
+
+def _stream_channel(completion_id: str) -> str:
+    return f"completion.stream:{completion_id}"
+
 
 class CompletionEventQueue:
     """Fan-out broadcaster for streaming SSE events during a completion.
@@ -46,6 +64,13 @@ class CompletionEventQueue:
         # after a mid-tool reconnect instead of waiting for the next event.
         self._running_tools: dict[str, SSEEvent] = {}
         self._primary: asyncio.Queue = self._add_queue()
+        # Set by register_stream; events are also published to watchers on
+        # other workers until this monotonic deadline.
+        self.completion_id: Optional[str] = None
+        self._remote_until: float = 0.0
+        # Set by register_stream: numbers every event and persists it so a
+        # client can resume with Last-Event-ID (see completion_event_log).
+        self.log: Optional[completion_event_log.CompletionEventLog] = None
 
     def _add_queue(self) -> asyncio.Queue:
         q: asyncio.Queue = asyncio.Queue(maxsize=_QUEUE_MAXSIZE)
@@ -77,8 +102,11 @@ class CompletionEventQueue:
         """Broadcast a validated Pydantic event to every consumer queue.
 
         Non-blocking: drops the event for any full queue so the agent is never
-        stalled waiting for a slow consumer.
+        stalled waiting for a slow consumer. A dropped event is still in the
+        event log, where a resuming watcher finds it.
         """
+        if self.log is not None:
+            event._log_seq = self.log.append(event)
         self._track_running_tools(event)
         for q in list(self._queues):
             try:
@@ -89,6 +117,31 @@ class CompletionEventQueue:
                     f"[sse_queue] Queue full ({_QUEUE_MAXSIZE}), dropping event "
                     f"type={getattr(event, 'event', '?')} (total dropped: {self._dropped})"
                 )
+        if self.has_remote_watchers:
+            self._publish_remote(_remote_payload(event))
+
+    @property
+    def has_remote_watchers(self) -> bool:
+        return self._remote_until > time.monotonic()
+
+    def _publish_remote(self, payload: dict) -> None:
+        try:
+            event_transport.get_transport().publish(_stream_channel(self.completion_id), payload)
+        except Exception as e:
+            _logger.debug(f"[sse_queue] remote publish failed: {e}")
+
+    def add_remote_interest(self) -> None:
+        """A watcher on another worker (re-)announced itself."""
+        if self.completion_id is None:
+            return
+        fresh = not self.has_remote_watchers
+        self._remote_until = time.monotonic() + _INTEREST_TTL_SECONDS
+        if self._finished:
+            self._publish_remote({"done": True})
+        elif fresh:
+            # Same replay subscribe() gives a local watcher.
+            for ev in list(self._running_tools.values()):
+                self._publish_remote(_remote_payload(ev))
 
     def subscribe(self) -> asyncio.Queue:
         """Attach a new consumer; receives events from this moment on.
@@ -143,6 +196,10 @@ class CompletionEventQueue:
     def finish(self):
         """Signal that no more events will be added (to all consumers)."""
         self._finished = True
+        if self.log is not None:
+            spawn(self.log.close())
+        if self.has_remote_watchers:
+            self._publish_remote({"done": True})
         for q in list(self._queues):
             try:
                 q.put_nowait(_SENTINEL)
@@ -167,17 +224,36 @@ class CompletionEventQueue:
 # connection, second tab) re-attach to the live event stream with
 # GET /reports/{report_id}/completions/{completion_id}/stream.
 #
-# In-process only: under multiple uvicorn workers a reconnect may land on a
-# worker that doesn't own the run, in which case the watch endpoint falls back
-# to tailing the DB (blocks are persisted incrementally), degrading only the
-# token-level typing granularity.
+# In-process; a reconnect that lands on a worker that doesn't own the run
+# attaches through the event transport instead (RemoteStreamSubscription), or
+# — with the in-process transport — falls back to tailing the DB (blocks are
+# persisted incrementally), degrading only the token-level typing granularity.
 # ---------------------------------------------------------------------------
 
 _ACTIVE_STREAMS: dict[str, CompletionEventQueue] = {}
 
 
+def _remote_payload(event: SSEEvent) -> dict:
+    # The event's serialized JSON travels as-is, so the watcher's worker
+    # sends the same bytes without encoding the event again.
+    return {"json": event_json(event), "log_seq": event._log_seq}
+
+
+def _on_watch_interest(payload: dict) -> None:
+    queue = _ACTIVE_STREAMS.get(str(payload.get("completion_id")))
+    if queue is not None:
+        queue.add_remote_interest()
+
+
 def register_stream(completion_id: str, queue: CompletionEventQueue) -> None:
+    queue.completion_id = str(completion_id)
+    if queue.log is None and completion_event_log.enabled():
+        queue.log = completion_event_log.CompletionEventLog(completion_id)
     _ACTIVE_STREAMS[str(completion_id)] = queue
+    transport = event_transport.get_transport()
+    if transport.cross_worker:
+        transport.listen(_WATCH_CHANNEL, _on_watch_interest)  # idempotent
+        transport.publish(_READY_CHANNEL, {"completion_id": str(completion_id)})
 
 
 def unregister_stream(completion_id: str) -> None:
@@ -186,3 +262,79 @@ def unregister_stream(completion_id: str) -> None:
 
 def get_active_stream(completion_id: str) -> Optional[CompletionEventQueue]:
     return _ACTIVE_STREAMS.get(str(completion_id))
+
+
+class RemoteStreamSubscription:
+    """A watcher's attachment to a run owned by another worker.
+
+    Listens on the run's transport channel and announces itself on
+    _WATCH_CHANNEL so the owner starts publishing; the announcement is
+    repeated while the subscription is open. Events arrive on `queue` in
+    the same shape as a local subscription's, read with
+    CompletionEventQueue.next_event. Events the owner emitted before it saw
+    the announcement are covered by the watcher's DB snapshot, as with a
+    local subscription.
+    """
+
+    def __init__(self, completion_id: str):
+        self.completion_id = str(completion_id)
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=_QUEUE_MAXSIZE)
+        self._transport = event_transport.get_transport()
+        self._refresh_task: Optional[asyncio.Task] = None
+        self.dropped = 0
+
+    @classmethod
+    def open(cls, completion_id: str) -> Optional["RemoteStreamSubscription"]:
+        """Subscribe, or None when the transport does not cross workers."""
+        if not event_transport.get_transport().cross_worker:
+            return None
+        sub = cls(completion_id)
+        sub._transport.listen(_stream_channel(sub.completion_id), sub._on_message)
+        sub._transport.listen(_READY_CHANNEL, sub._on_ready)
+        sub._announce()
+        sub._refresh_task = asyncio.get_running_loop().create_task(sub._refresh())
+        return sub
+
+    def _announce(self) -> None:
+        self._transport.publish(_WATCH_CHANNEL, {"completion_id": self.completion_id})
+
+    async def _refresh(self) -> None:
+        while True:
+            await asyncio.sleep(max(_INTEREST_TTL_SECONDS / 3, 0.1))
+            self._announce()
+
+    def _on_ready(self, payload: dict) -> None:
+        if str(payload.get("completion_id")) == self.completion_id:
+            self._announce()
+
+    def _on_message(self, payload: dict) -> None:
+        try:
+            if payload.get("done"):
+                item = _SENTINEL
+            else:
+                if "json" in payload:
+                    item = SSEEvent.model_validate_json(payload["json"])
+                    item._json = payload["json"]
+                else:  # relayed by a worker still on the older format
+                    item = SSEEvent.model_validate(payload["event"])
+                item._log_seq = payload.get("log_seq")
+        except Exception as e:
+            _logger.debug(f"[sse_queue] bad remote event: {e}")
+            return
+        try:
+            self.queue.put_nowait(item)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            if item is _SENTINEL:
+                try:
+                    self.queue.get_nowait()
+                    self.queue.put_nowait(_SENTINEL)
+                except (asyncio.QueueEmpty, asyncio.QueueFull):
+                    pass
+
+    def close(self) -> None:
+        self._transport.unlisten(_stream_channel(self.completion_id), self._on_message)
+        self._transport.unlisten(_READY_CHANNEL, self._on_ready)
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            self._refresh_task = None
@@ -0,0 +1,493 @@
+"""Cross-worker event transport.
+
+Live events used to stop at the worker that produced them. The completion
+event bus fanned ORM updates out to that worker's handlers only, the
+completion stream registry held the run's event queue in that worker's
+memory, and everything on other workers or replicas polled the database to
+catch up: the watch endpoint re-read the completion's blocks every
+``BOW_WATCH_TAIL_INTERVAL_SECONDS`` per viewer, and the report activity hub
+re-ran its queries on a 2s tick per organization.
+
+This module carries events between workers. Producers keep their local
+fan-out exactly as before and additionally `publish` to a channel; every
+other worker's `listen` handlers for that channel receive the payload. A
+worker never receives its own events back.
+
+Transports (``BOW_EVENT_TRANSPORT``):
+
+  * ``postgres`` — LISTEN/NOTIFY on one channel. Each worker holds one
+    listening connection; published events are sent in batches, one
+    ``pg_notify`` round-trip per batch. Payloads above
+    ``BOW_EVENT_NOTIFY_MAX_BYTES`` (NOTIFY caps them at 8000 bytes) are
+    spilled to `event_transport_messages` and the notification carries the
+    row id. Delivery takes a few milliseconds.
+  * ``polling`` — for SQLite, which has no notifications: events are rows in
+    `event_transport_messages` and each worker runs one poller, every
+    ``BOW_EVENT_POLL_INTERVAL_S`` (0.1s), only while something listens.
+    One indexed query per worker, however many viewers there are — but every
+    published event is a row write, whether or not another worker listens,
+    so it is opt-in for multi-worker SQLite installs.
+  * ``inprocess`` — no cross-worker delivery; for single-worker installs.
+  * ``auto`` (default) — ``postgres`` on Postgres, ``inprocess`` otherwise.
+    SQLite installs are almost always a single worker, where polling would
+    only add a write per ORM update for nobody to read.
+
+Delivery is best effort. The database stays the source of truth, and every
+consumer keeps a slow safety re-read for the events a dropped connection or
+a full outbox loses. Published payloads are JSON-encoded dicts; handlers are
+plain callables run on the listening worker's event loop and must not block.
+Spilled rows are pruned by a scheduler job (`prune_messages`).
+"""
+
+import asyncio
+import json
+import logging
+import os
+import socket
+import threading
+import uuid
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+NOTIFY_CHANNEL = "bow_events"
+DEFAULT_NOTIFY_MAX_BYTES = 7000
+DEFAULT_POLL_INTERVAL_S = 0.1
+DEFAULT_OUTBOX_SIZE = 10000
+DEFAULT_MESSAGE_RETENTION_S = 600.0
+_BATCH = 256
+_RECONNECT_MAX_S = 30.0
+
+Handler = Callable[[dict], None]
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _env_number(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _engine():
+    from app.settings.database import create_async_database_engine
+    return create_async_database_engine()
+
+
+class EventTransport:
+    """In-process transport: listener registry only, nothing leaves the
+    worker. Base class of the cross-worker transports."""
+
+    name = "inprocess"
+    cross_worker = False
+
+    def __init__(self) -> None:
+        self.origin = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._handlers: Dict[str, List[Handler]] = {}
+        self._lock = threading.Lock()
+        self._metrics = {
+            "published": 0, "sent": 0, "received": 0, "delivered": 0,
+            "spilled": 0, "dropped": 0, "errors": 0, "reconnects": 0,
+        }
+
+    # -- listeners ------------------------------------------------------
+
+    def listen(self, channel: str, handler: Handler) -> None:
+        with self._lock:
+            handlers = self._handlers.setdefault(channel, [])
+            if handler not in handlers:
+                handlers.append(handler)
+        self._on_listen()
+
+    def unlisten(self, channel: str, handler: Handler) -> None:
+        with self._lock:
+            handlers = self._handlers.get(channel)
+            if handlers and handler in handlers:
+                handlers.remove(handler)
+            if handlers is not None and not handlers:
+                self._handlers.pop(channel, None)
+
+    @property
+    def listening(self) -> bool:
+        return bool(self._handlers)
+
+    def _on_listen(self) -> None:
+        pass
+
+    def _receive(self, envelope: dict) -> None:
+        """Deliver an envelope received from the wire to this worker's
+        handlers, unless this worker sent it."""
+        if envelope.get("o") == self.origin:
+            return
+        self._count("received")
+        channel = envelope.get("c")
+        with self._lock:
+            handlers = list(self._handlers.get(channel, ()))
+        for handler in handlers:
+            try:
+                handler(envelope.get("p") or {})
+                self._count("delivered")
+            except Exception as e:
+                self._count("errors")
+                logger.warning(f"[event_transport] handler for {channel} failed: {e}")
+
+    # -- publishing -----------------------------------------------------
+
+    def publish(self, channel: str, payload: dict) -> None:
+        """Send `payload` to `channel`'s listeners on other workers. Never
+        blocks; the in-process transport has none to send to."""
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    # -- metrics --------------------------------------------------------
+
+    def _count(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            self._metrics[name] += n
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                **self._metrics,
+                "transport": self.name,
+                "channels": len(self._handlers),
+            }
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            for k in self._metrics:
+                self._metrics[k] = 0
+
+
+class _OutboxTransport(EventTransport):
+    """Queues published events and sends them in batches from one task, so
+    `publish` stays synchronous and cheap on the producer's hot path."""
+
+    cross_worker = True
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._outbox: deque = deque()
+        self._wake: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._tasks: List[asyncio.Task] = []
+        self._stopping = False
+
+    def _envelope(self, channel: str, payload: dict) -> str:
+        return json.dumps({"o": self.origin, "c": channel, "p": payload}, separators=(",", ":"), default=str)
+
+    def publish(self, channel: str, payload: dict) -> None:
+        if self._stopping or not self._ensure_started():
+            self._count("dropped")
+            return
+        try:
+            body = self._envelope(channel, payload)
+        except Exception as e:
+            self._count("errors")
+            logger.warning(f"[event_transport] unserializable event on {channel}: {e}")
+            return
+        limit = max(1, _env_int("BOW_EVENT_OUTBOX_SIZE", DEFAULT_OUTBOX_SIZE))
+        if len(self._outbox) >= limit:
+            self._outbox.popleft()
+            self._count("dropped")
+        self._outbox.append((channel, body))
+        self._count("published")
+        self._wake.set()
+
+    def _ensure_started(self) -> bool:
+        """Start the background tasks on the running loop, once."""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return False
+        if self._loop is loop and self._tasks:
+            return True
+        if self._loop is not None and not self._loop.is_closed() and self._loop is not loop:
+            return False
+        self._loop = loop
+        self._wake = asyncio.Event()
+        self._tasks = [loop.create_task(self._send_loop())] + [loop.create_task(c) for c in self._receivers()]
+        return True
+
+    def _on_listen(self) -> None:
+        self._ensure_started()
+
+    async def start(self) -> None:
+        self._stopping = False
+        self._ensure_started()
+
+    async def stop(self) -> None:
+        self._stopping = True
+        if self._wake is not None:
+            self._wake.set()
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+        self._loop = None
+
+    async def _send_loop(self) -> None:
+        delay = 0.5
+        while True:
+            await self._wake.wait()
+            self._wake.clear()
+            while self._outbox:
+                batch = [self._outbox.popleft() for _ in range(min(_BATCH, len(self._outbox)))]
+                try:
+                    await self._send(batch)
+                    self._count("sent", len(batch))
+                    delay = 0.5
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    # Dropped, not retried: a late event is worth less than
+                    # the backlog behind it, and consumers re-read the DB.
+                    self._count("errors")
+                    self._count("dropped", len(batch))
+                    logger.warning(f"[event_transport] send of {len(batch)} events failed: {e}")
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, _RECONNECT_MAX_S)
+
+    def _receivers(self) -> list:
+        return []
+
+    async def _send(self, batch: list) -> None:
+        raise NotImplementedError
+
+    def _spill_row(self, channel: str, body: str) -> dict:
+        return {"c": channel, "o": self.origin, "p": body, "now": datetime.utcnow()}
+
+
+_INSERT_MESSAGE = (
+    "INSERT INTO event_transport_messages (channel, origin, payload, created_at) "
+    "VALUES (:c, :o, :p, :now)"
+)
+
+
+class PostgresNotifyTransport(_OutboxTransport):
+    name = "postgres"
+
+    def _receivers(self) -> list:
+        return [self._listen_loop()]
+
+    async def _send(self, batch: list) -> None:
+        max_bytes = max(256, _env_int("BOW_EVENT_NOTIFY_MAX_BYTES", DEFAULT_NOTIFY_MAX_BYTES))
+        async with _engine().connect() as conn:
+            notes = []
+            for channel, body in batch:
+                if len(body.encode("utf-8")) <= max_bytes:
+                    notes.append(body)
+                    continue
+                row = await conn.execute(text(_INSERT_MESSAGE + " RETURNING id"), self._spill_row(channel, body))
+                notes.append(json.dumps({"o": self.origin, "c": channel, "s": row.scalar_one()}))
+                self._count("spilled")
+            # One round-trip for the batch; notifications are delivered on
+            # commit, in order, after the spilled rows are visible.
+            await conn.execute(
+                text("SELECT pg_notify(:channel, n) FROM unnest(CAST(:notes AS text[])) AS n"),
+                {"channel": NOTIFY_CHANNEL, "notes": notes},
+            )
+            await conn.commit()
+
+    async def _listen_loop(self) -> None:
+        delay = 0.5
+        while True:
+            lost = asyncio.Event()
+            try:
+                async with _engine().connect() as conn:
+                    raw = await conn.get_raw_connection()
+                    driver = raw.driver_connection
+                    await driver.add_listener(NOTIFY_CHANNEL, self._on_notify)
+                    def on_lost(_c, _lost=lost):
+                        _lost.set()
+
+                    driver.add_termination_listener(on_lost)
+                    delay = 0.5
+                    try:
+                        await lost.wait()
+                    finally:
+                        try:
+                            driver.remove_termination_listener(on_lost)
+                            await driver.remove_listener(NOTIFY_CHANNEL, self._on_notify)
+                        except Exception:
+                            pass
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._count("errors")
+                logger.warning(f"[event_transport] LISTEN connection failed: {e}")
+            # Events sent while we were away are lost; consumers' safety
+            # re-reads cover them.
+            self._count("reconnects")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, _RECONNECT_MAX_S)
+
+    def _on_notify(self, _conn: Any, _pid: int, _channel: str, payload: str) -> None:
+        try:
+            envelope = json.loads(payload)
+        except Exception:
+            self._count("errors")
+            return
+        if envelope.get("o") == self.origin:
+            return
+        if "s" in envelope:
+            from app.core.fire_and_forget import spawn
+            spawn(self._fetch_spilled(int(envelope["s"])))
+            return
+        self._receive(envelope)
+
+    async def _fetch_spilled(self, message_id: int) -> None:
+        try:
+            async with _engine().connect() as conn:
+                row = await conn.execute(
+                    text("SELECT payload FROM event_transport_messages WHERE id = :id"), {"id": message_id},
+                )
+                body = row.scalar_one_or_none()
+        except Exception as e:
+            self._count("errors")
+            logger.warning(f"[event_transport] spilled event {message_id} unreadable: {e}")
+            return
+        if body is not None:
+            self._receive(json.loads(body))
+
+
+class PollingTransport(_OutboxTransport):
+    """Table-backed transport for databases without notifications."""
+
+    name = "polling"
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._last_id: Optional[int] = None
+
+    def _receivers(self) -> list:
+        return [self._poll_loop()]
+
+    async def _send(self, batch: list) -> None:
+        async with _engine().begin() as conn:
+            await conn.execute(text(_INSERT_MESSAGE), [self._spill_row(channel, body) for channel, body in batch])
+
+    async def _poll_loop(self) -> None:
+        while True:
+            interval = max(0.01, _env_number("BOW_EVENT_POLL_INTERVAL_S", DEFAULT_POLL_INTERVAL_S))
+            try:
+                await self._poll_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._count("errors")
+                logger.debug(f"[event_transport] poll failed: {e}")
+                interval = max(interval, 1.0)
+            await asyncio.sleep(interval)
+
+    async def _poll_once(self) -> None:
+        if not self.listening:
+            # Idle workers cost nothing; the next listener starts at the tail.
+            self._last_id = None
+            return
+        async with _engine().connect() as conn:
+            if self._last_id is None:
+                row = await conn.execute(text("SELECT MAX(id) FROM event_transport_messages"))
+                self._last_id = int(row.scalar() or 0)
+                return
+            rows = (await conn.execute(
+                text(
+                    "SELECT id, origin, payload FROM event_transport_messages "
+                    "WHERE id > :last ORDER BY id LIMIT :n"
+                ),
+                {"last": self._last_id, "n": _BATCH * 4},
+            )).all()
+        for message_id, origin, body in rows:
+            self._last_id = int(message_id)
+            if origin == self.origin:
+                continue
+            try:
+                self._receive(json.loads(body))
+            except Exception:
+                self._count("errors")
+
+
+# ---------------------------------------------------------------------------
+# Selection
+# ---------------------------------------------------------------------------
+
+_TRANSPORTS = {
+    "inprocess": EventTransport,
+    "postgres": PostgresNotifyTransport,
+    "polling": PollingTransport,
+}
+
+_transport: Optional[EventTransport] = None
+_select_lock = threading.Lock()
+
+
+def _database_dialect() -> str:
+    try:
+        return _engine().dialect.name
+    except Exception:
+        return ""
+
+
+def _select() -> EventTransport:
+    mode = os.environ.get("BOW_EVENT_TRANSPORT", "auto").strip().lower()
+    if mode == "auto":
+        dialect = _database_dialect()
+        mode = "postgres" if dialect == "postgresql" else "inprocess"
+    cls = _TRANSPORTS.get(mode)
+    if cls is None:
+        logger.warning(f"[event_transport] unknown BOW_EVENT_TRANSPORT={mode!r}; using in-process")
+        cls = EventTransport
+    return cls()
+
+
+def get_transport() -> EventTransport:
+    """This worker's transport, chosen on first use."""
+    global _transport
+    if _transport is None:
+        with _select_lock:
+            if _transport is None:
+                _transport = _select()
+                logger.info(f"[event_transport] using {_transport.name} transport")
+    return _transport
+
+
+def set_transport(transport: Optional[EventTransport]) -> None:
+    """Replace this worker's transport (tests); None re-selects on next use."""
+    global _transport
+    with _select_lock:
+        _transport = transport
+
+
+async def prune_messages() -> int:
+    """Delete spilled/polled events older than
+    ``BOW_EVENT_MESSAGE_RETENTION_S`` (scheduler job)."""
+    cutoff = datetime.utcnow() - timedelta(
+        seconds=max(1.0, _env_number("BOW_EVENT_MESSAGE_RETENTION_S", DEFAULT_MESSAGE_RETENTION_S))
+    )
+    async with _engine().begin() as conn:
+        result = await conn.execute(
+            text("DELETE FROM event_transport_messages WHERE created_at < :cutoff"), {"cutoff": cutoff},
+        )
+    return int(result.rowcount or 0)
+
+
+def stats() -> dict:
+    return get_transport().stats() if _transport is not None else {"transport": None}
@@ -6,11 +6,15 @@ derives the org-level activity facts for a bounded candidate set (reports
 with live completions now or recent last_activity_at churn), diffs against
 the previous tick, and fans the changes out to that worker's subscribers.
 
-The DB is the bus: every worker polls the same database, so a run executing
-on worker 2 is seen by a subscriber connected to worker 0 — the property the
-old report-scoped in-process WebSocket broadcast never had. Cost is a few
-cheap indexed queries per tick per active org, independent of how many
-clients are connected; zero when nobody is subscribed.
+Ticks are event-driven: the watcher listens on the completion event bus,
+which relays completion/step/confirmation changes from every worker (see
+`app.streaming.event_transport`), and ticks shortly after one arrives —
+bursts coalesce into one tick. A slow safety tick
+(``BOW_ACTIVITY_SAFETY_TICK_SECONDS``) catches anything the relay dropped.
+With the in-process transport nothing is relayed, so the watcher falls back
+to polling every TICK_SECONDS; the DB stays the source of truth either way.
+Cost is a few cheap indexed queries per tick per active org, independent of
+how many clients are connected; zero when nobody is subscribed.
 
 Events carry viewer-independent facts only. The client composes the per-user
 view: `unread` (an event for a report you're not currently reading), and
@@ -23,13 +27,25 @@ import asyncio
 import contextlib
 import json
 import logging
+import os
 from datetime import datetime, timedelta
 
 from sqlalchemy import select
 
+from app.streaming import event_transport
+from app.streaming.completion_event_bus import websocket_manager
+
 logger = logging.getLogger(__name__)
 
+# Polling cadence without a cross-worker transport.
 TICK_SECONDS = 2.0
+# With one: the backstop tick, and how long a wake-up waits for the rest of
+# its burst (and the minimum spacing of event-driven ticks).
+SAFETY_TICK_SECONDS = float(os.getenv("BOW_ACTIVITY_SAFETY_TICK_SECONDS", "15"))
+WAKE_COALESCE_SECONDS = 0.1
+# ORM hooks publish at flush, which can precede the commit a tick needs to
+# see; every event-driven tick is followed by one more this much later.
+SETTLE_SECONDS = 1.0
 # Look-back margin when picking up reports whose last_activity_at moved; wide
 # enough to absorb tick jitter and cross-worker clock skew on the DB writes.
 CHURN_MARGIN = timedelta(seconds=10)
@@ -62,6 +78,7 @@ class ReportActivityHub:
         self._prev_live: dict[str, set[str]] = {}
         self._watcher: asyncio.Task | None = None
         self._last_tick_at: datetime = datetime.utcnow()
+        self._wake: asyncio.Event | None = None
 
     # ── subscription ────────────────────────────────────────────────────────
     def subscribe(self, org_id: str, user_id: str) -> _Subscriber:
@@ -86,8 +103,18 @@ class ReportActivityHub:
         return any(self._subs.values())
 
     # ── watcher ─────────────────────────────────────────────────────────────
+    async def _on_bus_message(self, message: str) -> None:
+        if self._wake is not None:
+            self._wake.set()
+
+    def _tick_interval(self) -> float:
+        return SAFETY_TICK_SECONDS if event_transport.get_transport().cross_worker else TICK_SECONDS
+
     async def _run(self):
         logger.info("report-activity watcher started")
+        self._wake = asyncio.Event()
+        websocket_manager.add_handler(self._on_bus_message)
+        woken = False
         try:
             while self.has_subscribers:
                 started = datetime.utcnow()
@@ -97,8 +124,18 @@ class ReportActivityHub:
                     except Exception:
                         logger.exception("report-activity tick failed for org %s", org_id)
                 self._last_tick_at = started
-                await asyncio.sleep(TICK_SECONDS)
+                interval = self._tick_interval()
+                if woken:
+                    interval = min(interval, SETTLE_SECONDS)
+                woken = False
+                with contextlib.suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(self._wake.wait(), timeout=interval)
+                    woken = True
+                await asyncio.sleep(WAKE_COALESCE_SECONDS)
+                self._wake.clear()
         finally:
+            websocket_manager.remove_handler(self._on_bus_message)
+            self._wake = None
             logger.info("report-activity watcher stopped")
             self._watcher = None
 
@@ -1,5 +1,6 @@
 import asyncio
 import time
+import zlib
 from typing import Awaitable, Callable, Optional
 
 from app.schemas.sse_schema import SSEEvent
@@ -9,9 +10,26 @@ class PlanningTextStreamer:
     """Throttled hybrid text streamer for planning blocks.
 
     - Emits small token deltas for typing effect (block.delta.token)
-    - Periodically emits snapshots for robustness (block.delta.text)
+    - Periodically emits snapshots for robustness (block.delta.text.append)
     - Sends completion markers when finished (block.delta.text.complete)
 
+    Snapshots are delta-encoded against the last one sent for the field:
+    ``block.delta.text.append`` carries the text appended since, the
+    ``offset`` it starts at and its ``length`` (both in UTF-16 code units,
+    i.e. JS string indices) and ``checksum``, the CRC-32 of the UTF-8 bytes
+    of the text before ``offset``. A client whose text matches the checksum
+    sets ``text[:offset] + appended`` (repairing any dropped token); one that
+    doesn't resyncs by reconnecting, which starts it from the persisted
+    block. Re-sending the whole text every 1.2s made a long reasoning
+    block's snapshot bytes grow quadratically. A full ``block.delta.text``
+    is sent only when the text stopped extending the last snapshot (the
+    ``replace`` source switch, a rewritten prefix).
+
+    Persistence follows the same shape: with a ``persist_append`` hook each
+    snapshot appends just the new text to the stored field, guarded on the
+    stored length, and falls back to the full ``persist`` rewrite (a
+    compaction) when the guard fails or the text isn't an extension.
+
     Streaming is optimized for smoothness:
     - Low time threshold (16ms = ~60fps) for responsive feel
     - Character threshold (5 chars) to emit on small batches regardless of time
@@ -32,6 +50,7 @@ class PlanningTextStreamer:
         max_chunk_size: int = 100,  # Larger chunks when splitting is enabled
         split_delay_ms: int = 8,  # Delay between split emissions
         persist: Optional[Callable[[str, str], Awaitable[None]]] = None,
+        persist_append: Optional[Callable[[str, int, str], Awaitable[bool]]] = None,
     ):
         self.emit = emit
         self.seq_fn = seq_fn
@@ -41,6 +60,10 @@ class PlanningTextStreamer:
         # DB — page refresh, watch-endpoint fallback — sees partial text
         # instead of an empty block.
         self.persist = persist
+        # Optional (field, offset, appended) -> bool hook: append `appended` to
+        # the stored field iff it is exactly `offset` characters long. False
+        # (or an exception) makes this snapshot a full `persist` instead.
+        self.persist_append = persist_append
         self.completion_id = completion_id
         self.agent_execution_id = agent_execution_id
         self.block_id = block_id
@@ -49,6 +72,12 @@ class PlanningTextStreamer:
         self.prev_content = ""
         self.last_emit = {"reasoning": 0.0, "content": 0.0}
         self.last_snapshot = 0.0
+        # Per field: text covered by the last snapshot sent, its length in
+        # UTF-16 units and its running CRC-32; and the text last persisted.
+        self._acked = {"reasoning": "", "content": ""}
+        self._acked_units = {"reasoning": 0, "content": 0}
+        self._acked_crc = {"reasoning": 0, "content": 0}
+        self._persisted = {"reasoning": "", "content": ""}
         self.throttle_ms = throttle_ms
         self.snapshot_every_ms = snapshot_every_ms
         self.char_threshold = char_threshold
@@ -140,66 +169,58 @@ class PlanningTextStreamer:
                     }
                 ))
                 self.prev_content = content
+                self._ack("content", content, reset=True)
             else:
                 cdelta = self._delta(self.prev_content, content)
                 if cdelta:
                     await self._emit_field_delta("content", cdelta)
                     self.prev_content = content
 
-        # Periodic full snapshot for robustness
+        # Periodic snapshot for robustness
         if (now - self.last_snapshot) >= self.snapshot_every_ms:
             self.last_snapshot = now
-            if self.persist is not None and (self.prev_reasoning or self.prev_content):
-                try:
-                    await self.persist(self.prev_reasoning, self.prev_content)
-                except Exception:
-                    pass  # best-effort; never disrupt the token stream
-            if self.prev_reasoning:
-                seq = await self.seq_fn()
-                await self.emit(SSEEvent(
-                    event="block.delta.text",
-                    completion_id=self.completion_id,
-                    agent_execution_id=self.agent_execution_id,
-                    seq=seq,
-                    data={
-                        "block_id": self.block_id,
-                        "field": "reasoning",
-                        "text": self.prev_reasoning,
-                    }
-                ))
-            if self.prev_content:
-                seq = await self.seq_fn()
-                await self.emit(SSEEvent(
-                    event="block.delta.text",
-                    completion_id=self.completion_id,
-                    agent_execution_id=self.agent_execution_id,
-                    seq=seq,
-                    data={
-                        "block_id": self.block_id,
-                        "field": "content",
-                        "text": self.prev_content,
-                    }
-                ))
+            await self._persist()
+            await self._emit_snapshot("reasoning", self.prev_reasoning)
+            await self._emit_snapshot("content", self.prev_content)
 
-    async def complete(self):
-        if not self.block_id:
+    @staticmethod
+    def _utf16_units(text: str) -> int:
+        return len(text.encode("utf-16-le")) // 2
+
+    def _ack(self, field: str, text: str, reset: bool = False):
+        added = text if reset else text[len(self._acked[field]):]
+        base_units = 0 if reset else self._acked_units[field]
+        base_crc = 0 if reset else self._acked_crc[field]
+        self._acked[field] = text
+        self._acked_units[field] = base_units + self._utf16_units(added)
+        self._acked_crc[field] = zlib.crc32(added.encode("utf-8"), base_crc)
+
+    async def _emit_snapshot(self, field: str, text: str):
+        """Bring clients' `field` up to `text`: an append against the last
+        snapshot when `text` extends it, a full snapshot otherwise."""
+        acked = self._acked[field]
+        if not text or text == acked:
             return
-        # Final snapshots
-        if self.prev_reasoning:
-            seq = await self.seq_fn()
+        seq = await self.seq_fn()
+        if text.startswith(acked):
+            appended = text[len(acked):]
+            data = {
+                "block_id": self.block_id,
+                "field": field,
+                "offset": self._acked_units[field],
+                "length": self._utf16_units(appended),
+                "checksum": self._acked_crc[field],
+                "text": appended,
+            }
             await self.emit(SSEEvent(
-                event="block.delta.text",
+                event="block.delta.text.append",
                 completion_id=self.completion_id,
                 agent_execution_id=self.agent_execution_id,
                 seq=seq,
-                data={
-                    "block_id": self.block_id,
-                    "field": "reasoning",
-                    "text": self.prev_reasoning,
-                }
+                data=data,
             ))
-        if self.prev_content:
-            seq = await self.seq_fn()
+            self._ack(field, text)
+        else:
             await self.emit(SSEEvent(
                 event="block.delta.text",
                 completion_id=self.completion_id,
@@ -207,10 +228,45 @@ class PlanningTextStreamer:
                 seq=seq,
                 data={
                     "block_id": self.block_id,
-                    "field": "content",
-                    "text": self.prev_content,
+                    "field": field,
+                    "text": text,
                 }
             ))
+            self._ack(field, text, reset=True)
+
+    async def _persist(self):
+        if self.persist is None or not (self.prev_reasoning or self.prev_content):
+            return
+        current = {"reasoning": self.prev_reasoning, "content": self.prev_content}
+        if current == self._persisted:
+            return
+        try:
+            if self.persist_append is not None and await self._persist_appends(current):
+                return
+            await self.persist(self.prev_reasoning, self.prev_content)
+            self._persisted = current
+        except Exception:
+            pass  # best-effort; never disrupt the token stream
+
+    async def _persist_appends(self, current: dict) -> bool:
+        for field, text in current.items():
+            stored = self._persisted[field]
+            if text == stored:
+                continue
+            # Nothing stored yet (the row may not exist) or a rewrite: compact.
+            if not stored or not text.startswith(stored):
+                return False
+            if not await self.persist_append(field, len(stored), text[len(stored):]):
+                return False
+            self._persisted[field] = text
+        return True
+
+    async def complete(self):
+        if not self.block_id:
+            return
+        # Final snapshots
+        await self._emit_snapshot("reasoning", self.prev_reasoning)
+        await self._emit_snapshot("content", self.prev_content)
         # Completion markers
         for field in ("reasoning", "content"):
             seq = await self.seq_fn()
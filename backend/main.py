@@ -37,17 +37,25 @@ from app.schemas.user_schema import UserCreate, UserRead, UserUpdate
 from app.settings.config import settings
 from app.settings.logging_config import setup_logging, get_logger
 from app.core.cors import init_cors
+from app.core.compression import CompressionMiddleware
 from app.core.scheduler import scheduler, try_acquire_scheduler_leader
 from app.core.spa import mount_spa
 from app.models.user import User
+# Importing the model registers the flush hooks that version cached context.
+from app.models.context_cache import ContextCacheVersion  # noqa: F401
 from app.services.maintenance_service import purge_step_payloads_keep_latest_per_query
 from app.data_sources.clients.qvd_client import warm_all_qvd_caches
 from app.data_sources.clients.powerbi_report_server_client import warm_all_pbirs_caches
 from app.data_sources.clients.pbix_client import warm_all_pbix_file_caches
 from app.services.scheduled_reindex import sweep_due_reindexes
 from app.services.connection_status_sweep import sweep_stale_connection_status
+from app.services.acceleration_advisor_service import run_acceleration_advisor
 from app.core.otel import setup_telemetry, instrument_app
 from app.ee.audit.tool_audit import start_tool_audit_worker, stop_tool_audit_worker
+from app.ai.llm.clients import client_pool as llm_client_pool
+from app.ai.llm.response_cache import prune_expired as prune_expired_llm_responses
+from app.streaming import completion_event_log, event_transport
+from app.services import agent_run_queue
 
 from app.routes import (
     report,
@@ -151,6 +159,8 @@ app = FastAPI(
 # Instrument FastAPI with OpenTelemetry
 instrument_app(app, settings.bow_config.otel)
 init_cors(app)
+# gzip/br/zstd for large one-shot responses; streams (SSE) pass through.
+app.add_middleware(CompressionMiddleware)
 
 # Register typed-error handlers so AppError instances become localized responses.
 from app.errors import register_exception_handlers  # noqa: E402
@@ -396,6 +406,11 @@ async def check_db_connection():
         logger.error(f"❌ Database connection failed: {str(e)}")
         raise
 
+async def recover_expired_agent_runs():
+    async with async_session_maker() as session:
+        await agent_run_queue.recover_expired(session)
+
+
 @app.on_event("startup")
 async def startup_event():
     # Must run before any Oracle connection is opened; see the helper's docstring.
@@ -423,6 +438,14 @@ async def startup_event():
         logger.exception("Agent runtime warmup failed; continuing startup")
 
     await start_tool_audit_worker()
+
+    # Cross-worker relay of live events (LISTEN/NOTIFY on Postgres, a polled
+    # table on SQLite); each worker listens on its own connection.
+    try:
+        await event_transport.get_transport().start()
+    except Exception as e:
+        logger.error(f"Failed to start event transport: {e}")
+
     logger.info(
         "Application starting",
         extra={
@@ -461,6 +484,80 @@ async def startup_event():
         except Exception as e:
             logger.error(f"Failed to schedule purge job: {e}")
 
+    # Expired LLM response-cache rows are never served; drop them nightly.
+    if is_scheduler_leader:
+        try:
+            scheduler.add_job(
+                prune_expired_llm_responses,
+                trigger="cron",
+                hour=3,
+                minute=30,
+                id="llm_response_cache_prune",
+                replace_existing=True,
+                coalesce=True,
+                max_instances=1,
+                misfire_grace_time=3600,
+            )
+            logger.info("Scheduled job: prune_expired_llm_responses @ 03:30 daily")
+        except Exception as e:
+            logger.error(f"Failed to schedule LLM response cache prune job: {e}")
+
+    # Spilled (Postgres) and polled (SQLite) transport events are read within
+    # seconds of being written; drop them once past their retention.
+    if is_scheduler_leader:
+        try:
+            scheduler.add_job(
+                event_transport.prune_messages,
+                trigger="interval",
+                minutes=5,
+                id="event_transport_prune",
+                replace_existing=True,
+                coalesce=True,
+                max_instances=1,
+                misfire_grace_time=300,
+            )
+            logger.info("Scheduled job: event_transport_prune every 5 minutes")
+        except Exception as e:
+            logger.error(f"Failed to schedule event transport prune job: {e}")
+
+    # Completion event logs only serve Last-Event-ID resumes of recent runs.
+    if is_scheduler_leader:
+        try:
+            scheduler.add_job(
+                completion_event_log.prune_expired,
+                trigger="interval",
+                minutes=15,
+                id="completion_event_log_prune",
+                replace_existing=True,
+                coalesce=True,
+                max_instances=1,
+                misfire_grace_time=900,
+            )
+            logger.info("Scheduled job: completion_event_log_prune every 15 minutes")
+        except Exception as e:
+            logger.error(f"Failed to schedule completion event log prune job: {e}")
+
+    # Split deployment (BOW_AGENT_EXECUTION=queue): agent workers sweep each
+    # other's expired leases, but with every worker down, runs orphaned by a
+    # dead worker would stay `running` (and their completions in_progress)
+    # forever. This re-queues or fails them; still-queued runs wait for the
+    # next worker to start. Safe alongside the workers' sweeps.
+    if is_scheduler_leader and agent_run_queue.enabled():
+        try:
+            scheduler.add_job(
+                recover_expired_agent_runs,
+                trigger="interval",
+                minutes=1,
+                id="agent_run_recover",
+                replace_existing=True,
+                coalesce=True,
+                max_instances=1,
+                misfire_grace_time=60,
+            )
+            logger.info("Scheduled job: agent_run_recover every minute")
+        except Exception as e:
+            logger.error(f"Failed to schedule agent run recovery job: {e}")
+
     # Background warmup of QVD Parquet caches so the first create_data/inspect_data
     # on a 1-5GB QVD doesn't block the UI for minutes.
     if is_scheduler_leader:
@@ -555,6 +652,25 @@ async def startup_event():
         except Exception as e:
             logger.error(f"Failed to schedule connection status sweep job: {e}")
 
+    # Acceleration advisor: rank custom-query proposals from captured agent
+    # query history and pre-flight the top ones against the source. Hourly is
+    # plenty — the ranking moves with days of history, not minutes.
+    if is_scheduler_leader:
+        try:
+            scheduler.add_job(
+                run_acceleration_advisor,
+                trigger="interval",
+                hours=1,
+                id="acceleration_advisor",
+                replace_existing=True,
+                coalesce=True,
+                max_instances=1,
+                misfire_grace_time=3600,
+            )
+            logger.info("Scheduled job: acceleration_advisor every 1 hour")
+        except Exception as e:
+            logger.error(f"Failed to schedule acceleration advisor job: {e}")
+
     # Register LDAP group sync job if configured AND licensed (sync is enterprise-only)
     if is_scheduler_leader and settings.bow_config.ldap.enabled and has_feature("ldap"):
         try:
@@ -723,6 +839,8 @@ async def shutdown_event():
             await license_refresher_task
         except Exception:
             pass
+    await event_transport.get_transport().stop()
+    await llm_client_pool.aclose_all()
     scheduler.shutdown()
 
 if __name__ == "__main__":
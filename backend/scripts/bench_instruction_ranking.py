@@ -0,0 +1,105 @@
+"""Micro-benchmark for intelligent-instruction ranking over a synthetic org.
+
+Compares the per-completion scoring loop `_load_from_build` used to run
+(`_score_instruction_version` on every in-scope version) with the per-build
+inverted index (`instruction_index`) on a synthetic org of N instructions
+shaped like a dbt/LookML sync: a model or explore name, a description, column
+names, a title and a couple of table references each.
+
+Reports the one-off cost of indexing the build, then per-query time for both
+paths, and fails if any query ranks differently (score desc, usage desc — the
+order the builder sorts by).
+
+Usage (from backend/):
+  uv run python scripts/bench_instruction_ranking.py [n_instructions] [n_queries]
+"""
+import random
+import statistics
+import sys
+import time
+from types import SimpleNamespace
+
+from app.ai.context.builders import instruction_index
+from app.ai.context.builders.instruction_context_builder import InstructionContextBuilder
+
+N = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+QUERIES = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+DOMAINS = ["finance", "sales", "marketing", "support", "product", "ops", "hr", "billing"]
+NOUNS = [
+    "revenue", "invoice", "customer", "order", "subscription", "refund", "churn",
+    "pipeline", "opportunity", "ticket", "campaign", "lead", "margin", "payment",
+    "shipment", "inventory", "employee", "contract", "renewal", "discount",
+]
+MEASURES = ["total", "count", "avg", "net", "gross", "monthly", "annual", "active", "daily"]
+WORDS = NOUNS + MEASURES + DOMAINS + [
+    "is", "computed", "from", "the", "excluding", "tax", "by", "region", "country",
+    "fiscal", "quarter", "calendar", "currency", "usd", "status", "cancelled", "paid",
+]
+
+
+def _version(rnd, i):
+    domain, noun = rnd.choice(DOMAINS), rnd.choice(NOUNS)
+    name = f"{rnd.choice(['fct', 'dim', 'stg'])}_{domain}_{noun}s_{i}"
+    columns = [f"{rnd.choice(MEASURES)}_{rnd.choice(NOUNS)}" for _ in range(rnd.randint(3, 25))]
+    text = " ".join(rnd.choice(WORDS) for _ in range(rnd.randint(20, 200)))
+    return SimpleNamespace(
+        id=f"ver-{i}",
+        text=f"{text}\nColumns: {', '.join(columns)}",
+        title=f"{rnd.choice(MEASURES).title()} {noun} ({domain})",
+        structured_data={"name": name, "description": " ".join(rnd.choice(WORDS) for _ in range(12))},
+    ), f"{name} {name}.{columns[0]}", rnd.randint(0, 500)
+
+
+def _query(rnd):
+    return " ".join(rnd.choice(WORDS + ["what", "was", "last", "show", "me"]) for _ in range(rnd.randint(2, 8)))
+
+
+def main():
+    rnd = random.Random(42)
+    builder = InstructionContextBuilder(None, SimpleNamespace(id="bench-org"))
+    corpus = [_version(rnd, i) for i in range(N)]
+    queries = [_query(rnd) for _ in range(QUERIES)]
+    docs = []
+    for version, extra, _ in corpus:
+        body, priority = builder._version_score_texts(version, extra_text=extra)
+        docs.append((version.id, body, priority))
+    usage = {version.id: u for version, _, u in corpus}
+
+    def rank(scores):
+        return sorted(usage, key=lambda vid: (scores.get(vid, 0.0), usage[vid]), reverse=True)
+
+    instruction_index.reset()
+    t0 = time.perf_counter()
+    index = instruction_index.for_build("bench-build", builder._extract_keywords, builder._stem)
+    index.score(set(), docs)
+    build_ms = (time.perf_counter() - t0) * 1000
+
+    scan_ms, index_ms = [], []
+    for q in queries:
+        keywords = builder._extract_keywords(q)
+
+        t0 = time.perf_counter()
+        scanned = {
+            version.id: builder._score_instruction_version(version, keywords, extra_text=extra)
+            for version, extra, _ in corpus
+        }
+        scan_ms.append((time.perf_counter() - t0) * 1000)
+
+        t0 = time.perf_counter()
+        indexed = index.score(keywords, docs)
+        index_ms.append((time.perf_counter() - t0) * 1000)
+
+        if rank(scanned) != rank(indexed):
+            print(f"RANKING MISMATCH for query {q!r}")
+            sys.exit(1)
+
+    print(f"instructions={N} queries={QUERIES}")
+    print(f"index build (once per build): {build_ms:9.1f} ms")
+    print(f"full scan   per query: median {statistics.median(scan_ms):8.1f} ms  p95 {sorted(scan_ms)[int(0.95 * len(scan_ms)) - 1]:8.1f} ms")
+    print(f"index       per query: median {statistics.median(index_ms):8.1f} ms  p95 {sorted(index_ms)[int(0.95 * len(index_ms)) - 1]:8.1f} ms")
+    print(f"rankings identical for all {QUERIES} queries; {instruction_index.stats()}")
+
+
+if __name__ == "__main__":
+    main()
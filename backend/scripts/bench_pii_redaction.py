@@ -0,0 +1,103 @@
+"""Micro-benchmark for PII redaction over a growing conversation.
+
+`_apply_pii_v2` redacts every string of the outgoing request on every LLM
+call, so an agent run of N iterations re-scans the whole transcript N times.
+This simulates that: each iteration appends a user/assistant turn (SQL, result
+tables, prose, a few emails and phone numbers) and scans every message again.
+
+Compares the per-rule path the redactor used to run (every pattern of every
+rule over the full text, one after another, no memo) with the current engine
+(one combined pass over the rules the literal prefilter keeps, content memo).
+Reports per-call time at a few transcript lengths — the memoized engine should
+stay flat while the per-rule path grows with the transcript — and fails if the
+two ever leave detectable PII behind.
+
+Usage (from backend/):
+  uv run python scripts/bench_pii_redaction.py [iterations]
+"""
+import random
+import statistics
+import sys
+import time
+
+from app.ai.llm.pii import redactor as pii
+
+ITERATIONS = int(sys.argv[1]) if len(sys.argv) > 1 else 60
+
+NAMES = ["jane.roe", "j.smith", "ops", "billing", "a.nguyen", "m.garcia"]
+DOMAINS = ["example.com", "acme.io", "corp.net"]
+WORDS = [
+    "revenue", "by", "region", "last", "quarter", "excluding", "refunds", "customers",
+    "churned", "orders", "total", "monthly", "the", "join", "on", "where", "grouped",
+]
+
+
+def _turn(rnd, i):
+    rows = "\n".join(
+        f"| {rnd.randint(1, 9999):>5} | {rnd.choice(WORDS):<10} | {rnd.uniform(0, 1e6):>12.2f} |"
+        for _ in range(rnd.randint(10, 60))
+    )
+    prose = " ".join(rnd.choice(WORDS) for _ in range(rnd.randint(40, 200)))
+    contact = f"{rnd.choice(NAMES)}@{rnd.choice(DOMAINS)}" if rnd.random() < 0.5 else ""
+    phone = f"415-555-{rnd.randint(1000, 9999)}" if rnd.random() < 0.3 else ""
+    user = f"step {i}: {prose} {contact}"
+    assistant = f"SELECT region, SUM(amount) FROM orders GROUP BY 1 -- {phone}\n{rows}\n{prose}"
+    return [user, assistant]
+
+
+def _per_rule(redactor, text):
+    """The redactor's previous hot path: each pattern in turn, full text."""
+    matches = []
+    for rule in redactor.rules:
+        if rule.action == "block":
+            n = sum(len(p.findall(text)) for p in rule.patterns)
+            if n:
+                matches.append({"id": rule.id, "count": n, "action": "block"})
+    for rule in redactor.rules:
+        if rule.action != "replace":
+            continue
+        n = 0
+        for pattern in rule.patterns:
+            text, k = pattern.subn(rule.replacement, text)
+            n += k
+        if n:
+            matches.append({"id": rule.id, "count": n, "action": "replace"})
+    return text, matches
+
+
+def main():
+    rnd = random.Random(42)
+    redactor = pii.build_redactor({"enabled": True, "mode": "replace"})
+    pii.reset()
+    transcript, rows = [], []
+    for i in range(ITERATIONS):
+        transcript.extend(_turn(rnd, i))
+
+        t0 = time.perf_counter()
+        old = [_per_rule(redactor, m)[0] for m in transcript]
+        old_ms = (time.perf_counter() - t0) * 1000
+
+        t0 = time.perf_counter()
+        new = [redactor.scan(m).text for m in transcript]
+        new_ms = (time.perf_counter() - t0) * 1000
+
+        for text in old + new:
+            if redactor.scan(text).matches:
+                print(f"RESIDUAL PII after iteration {i}: {text[:120]!r}")
+                sys.exit(1)
+        rows.append((len(transcript), sum(map(len, transcript)), old_ms, new_ms))
+
+    print(f"iterations={ITERATIONS}")
+    print(f"{'messages':>9} {'chars':>10} {'per-rule ms':>12} {'engine ms':>10}")
+    for n, chars, old_ms, new_ms in rows[:: max(1, len(rows) // 10)] + rows[-1:]:
+        print(f"{n:>9} {chars:>10} {old_ms:>12.2f} {new_ms:>10.2f}")
+    last = rows[len(rows) // 2:]
+    print(
+        f"second half, per new message: per-rule {statistics.mean(r[2] for r in last) / 2:.2f} ms"
+        f"  engine {statistics.mean(r[3] for r in last) / 2:.2f} ms"
+    )
+    print(pii.stats())
+
+
+if __name__ == "__main__":
+    main()
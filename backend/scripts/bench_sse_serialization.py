@@ -0,0 +1,150 @@
+"""Benchmark SSE event encoding and response compression over a run.
+
+Replays a run's events through the streaming path the way the server sends
+them to several open tabs, and compares:
+
+  * the previous path — ``model_dump_json()`` for every event, once per
+    subscriber plus once for the completion event log — with the current
+    one (`sse_schema.event_json`: encoded once with each available backend
+    of `app.core.serialization`, shared by all consumers). Reports events/s
+    and checks the SSE bytes are identical across paths;
+  * bytes on the wire for the run's final payload (a ``completions``-style
+    JSON of every block) uncompressed and in each encoding
+    `app.core.compression` can produce here, with the time to compress.
+
+The run is either a recording — JSONL of SSE event JSON, one per line, e.g.
+``\\copy (SELECT payload FROM completion_events WHERE completion_id = '…'
+ORDER BY seq) TO 'run.jsonl'`` — or, without one, a synthetic long run
+(planning tokens, tool calls with data previews, block upserts).
+
+Usage (from backend/):
+  uv run python scripts/bench_sse_serialization.py [run.jsonl] [--subscribers N] [--repeat N]
+"""
+import argparse
+import contextlib
+import json
+import os
+import random
+import statistics
+import time
+
+from app.core import compression, serialization
+from app.schemas.sse_schema import SSEEvent, format_sse_event
+
+WORDS = ["revenue", "by", "region", "last", "quarter", "orders", "churn", "the", "join", "monthly", "total"]
+
+
+def _synthetic_run(rnd, blocks=40):
+    events, final_blocks = [], []
+    for b in range(blocks):
+        block_id = f"blk-{b}"
+        text = ""
+        for _ in range(rnd.randint(60, 240)):  # token deltas of the planning text
+            token = rnd.choice(WORDS) + " "
+            text += token
+            events.append({"event": "block.delta.token", "data": {"block_id": block_id, "token": token}})
+        rows = [[rnd.randint(1, 9999), rnd.choice(WORDS), round(rnd.uniform(0, 1e6), 2)] for _ in range(rnd.randint(10, 50))]
+        tool = {"tool_execution_id": f"te-{b}", "tool_name": "create_data", "arguments": {"prompt": text[:200]}}
+        events.append({"event": "tool.started", "data": tool})
+        events.append({"event": "tool.finished", "data": {**tool, "status": "success", "result": {"columns": ["id", "name", "amount"], "rows": rows}}})
+        block = {"id": block_id, "block_index": b, "status": "completed", "content": text, "tool_execution": {**tool, "rows": rows}}
+        events.append({"event": "block.upsert", "data": {"block": block}})
+        final_blocks.append(block)
+    return events, {"completions": [{"id": "c1", "role": "system", "completion_blocks": final_blocks}]}
+
+
+def _load(path):
+    events, blocks = [], {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                doc = json.loads(line)
+                events.append(doc)
+                block = (doc.get("data") or {}).get("block")
+                if isinstance(block, dict) and block.get("id"):
+                    blocks[block["id"]] = block
+    return events, {"completions": [{"id": "recorded", "completion_blocks": list(blocks.values())}]}
+
+
+def _events(docs):
+    # A fixed timestamp keeps the frames of every path comparable.
+    return [SSEEvent.model_validate({"completion_id": "c1", "timestamp": "2026-01-01T00:00:00", **doc}) for doc in docs]
+
+
+def _old_path(events, subscribers):
+    out = []
+    for event in events:
+        event.model_dump_json()  # the event log's copy
+        for _ in range(subscribers):
+            out.append(f"event: {event.event}\ndata: {event.model_dump_json()}\n\n")
+    return out
+
+
+def _new_path(events, subscribers):
+    out = []
+    for event in events:
+        for _ in range(subscribers):
+            out.append(format_sse_event(event))
+    return out
+
+
+@contextlib.contextmanager
+def _backend(name):
+    old = os.environ.get("BOW_JSON_BACKEND")
+    os.environ["BOW_JSON_BACKEND"] = name
+    try:
+        yield
+    finally:
+        if old is None:
+            os.environ.pop("BOW_JSON_BACKEND", None)
+        else:
+            os.environ["BOW_JSON_BACKEND"] = old
+
+
+def _time(fn, repeat, setup=lambda: None):
+    """Median seconds of `fn(setup())` over `repeat` runs (setup untimed)."""
+    samples, result = [], None
+    for _ in range(repeat):
+        arg = setup()
+        t0 = time.perf_counter()
+        result = fn(arg)
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples), result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("recording", nargs="?")
+    parser.add_argument("--subscribers", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    docs, payload = _load(args.recording) if args.recording else _synthetic_run(random.Random(42))
+    n = len(docs)
+    print(f"events={n} subscribers={args.subscribers} ({args.recording or 'synthetic run'})")
+    print(f"{'path':<22} {'median s':>9} {'events/s':>11} {'SSE bytes':>11}")
+
+    fresh = lambda: _events(docs)  # noqa: E731 — new events each run: no cached JSON
+    base_s, base_frames = _time(lambda events: _old_path(events, args.subscribers), args.repeat, fresh)
+    base_bytes = sum(len(f.encode("utf-8")) for f in base_frames)
+    print(f"{'model_dump_json x N':<22} {base_s:>9.3f} {n / base_s:>11.0f} {base_bytes:>11}")
+    for name, available in serialization._BACKENDS.items():
+        if not available:
+            continue
+        with _backend(name):
+            s, frames = _time(lambda events: _new_path(events, args.subscribers), args.repeat, fresh)
+        same = "" if frames == base_frames else "  (DIFFERS)"
+        print(f"{'once, ' + name:<22} {s:>9.3f} {n / s:>11.0f} {sum(len(f.encode('utf-8')) for f in frames):>11}{same}")
+
+    body = serialization.dumps(payload)
+    print(f"\nfinal payload: {len(body)} bytes")
+    print(f"{'encoding':<10} {'bytes':>10} {'ratio':>7} {'ms':>8}")
+    for name, codec in compression.available_encodings().items():
+        s, compressed = _time(lambda _, codec=codec: codec(body), args.repeat)
+        print(f"{name:<10} {len(compressed):>10} {len(body) / len(compressed):>7.1f} {s * 1000:>8.2f}")
+    print(serialization.stats())
+
+
+if __name__ == "__main__":
+    main()
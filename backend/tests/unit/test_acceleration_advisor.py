@@ -0,0 +1,177 @@
+"""The advisor groups captured queries the way an admin would.
+
+Proposals are only useful if the grouping is right: month-by-month variants of
+one report are one shape, shapes over the same tables are one candidate, the
+candidate that cost the source the most ranks first, and something already
+materialized is not proposed again. Ranking weighs the load inside the
+lookback window, not the lifetime totals. Fingerprinting and table extraction are
+regex-based, so the awkward spellings (function-call FROMs, CTEs, comma joins,
+quoted names) are pinned here.
+"""
+
+# Mapper registration intentionally runs before the app-model imports below.
+# ruff: noqa: E402
+
+import importlib
+import pkgutil
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+import app.models
+
+# The day buckets are written through the ORM, which configures every mapped
+# relationship first (see test_agent_run_queue for the `application` skip).
+for _mod in pkgutil.iter_modules(app.models.__path__):
+    if _mod.name != "application":
+        importlib.import_module(f"app.models.{_mod.name}")
+
+from app.models.query_fingerprint import QueryFingerprint, QueryFingerprintDay
+from app.services.acceleration_advisor_service import (
+    _windowed,
+    acceleration_advisor_service,
+    extract_tables,
+    fingerprint,
+    rank_candidates,
+    suggested_name,
+)
+
+
+def _row(sql, executions, total_ms):
+    fp, _ = fingerprint(sql)
+    return SimpleNamespace(
+        fingerprint=fp, sample_sql=sql, tables=extract_tables(sql),
+        executions=executions, total_ms=total_ms,
+    )
+
+
+# --------------------------------------------------------------------------
+# Fingerprints
+# --------------------------------------------------------------------------
+
+def test_literal_values_do_not_split_a_shape():
+    a = fingerprint("SELECT sum(amount) FROM sales WHERE month = '2026-03' AND id IN (1, 2, 3) -- march")
+    b = fingerprint("select  sum(amount)\nfrom sales where month = '2026-04' and id in (7)")
+    assert a[0] == b[0]
+    assert a[1] == "select sum(amount) from sales where month = ? and id in (?)"
+
+
+def test_quoted_identifiers_keep_their_case():
+    assert fingerprint('SELECT * FROM "Orders"')[0] != fingerprint("SELECT * FROM orders")[0]
+
+
+def test_only_single_reads_are_fingerprinted():
+    assert fingerprint("DELETE FROM sales") is None
+    assert fingerprint("SELECT 1; DROP TABLE sales") is None
+    assert fingerprint("SELECT ';' AS semi FROM sales") is not None
+
+
+# --------------------------------------------------------------------------
+# Tables
+# --------------------------------------------------------------------------
+
+def test_tables_come_from_from_and_join_as_written():
+    sql = 'SELECT * FROM public.orders o JOIN "Customers" c ON c.id = o.customer_id'
+    assert extract_tables(sql) == ["public.orders", '"Customers"']
+
+
+def test_function_call_from_ctes_and_table_functions_are_not_tables():
+    sql = (
+        "WITH monthly AS (SELECT * FROM raw.events) "
+        "SELECT extract(year FROM m.day), trim(both FROM m.name) "
+        "FROM monthly m, regions r, generate_series(1, 3) g"
+    )
+    assert extract_tables(sql) == ["raw.events", "regions"]
+
+
+def test_a_from_inside_a_string_is_ignored():
+    assert extract_tables("SELECT * FROM t WHERE note = 'copied from archive'") == ["t"]
+
+
+# --------------------------------------------------------------------------
+# Ranking
+# --------------------------------------------------------------------------
+
+def test_shapes_over_one_table_propose_the_table():
+    rows = [
+        _row("SELECT region, sum(x) FROM sales GROUP BY region", 5, 40_000),
+        _row("SELECT day, count(*) FROM sales WHERE day > '2026-01-01' GROUP BY day", 4, 20_000),
+    ]
+    [p] = rank_candidates(rows, min_execs=3, limit=10)
+    assert p["definition_sql"] == "SELECT * FROM sales"
+    assert (p["query_shapes"], p["executions"], p["score"]) == (2, 9, 60.0)
+    assert p["suggested_name"] == "accel_sales"
+
+
+def test_a_join_proposes_its_most_expensive_statement():
+    cheap = "SELECT o.id FROM orders o JOIN customers c ON c.id = o.cid WHERE c.tier = 'gold'"
+    costly = "SELECT c.region, sum(o.total) FROM orders o JOIN customers c ON c.id = o.cid GROUP BY 1"
+    [p] = rank_candidates([_row(cheap, 10, 1_000), _row(costly, 3, 90_000)], min_execs=3, limit=10)
+    assert p["definition_sql"] == costly
+    assert p["suggested_name"] == "accel_customers_orders"
+
+
+def test_clusters_rank_by_source_time_and_one_offs_are_dropped():
+    rows = [
+        _row("SELECT * FROM small WHERE id = 1", 50, 5_000),
+        _row("SELECT * FROM big WHERE region = 'x'", 4, 400_000),
+        _row("SELECT * FROM once", 1, 900_000),
+    ]
+    ranked = rank_candidates(rows, min_execs=3, limit=10)
+    assert [p["tables"] for p in ranked] == [["big"], ["small"]]
+    assert len(rank_candidates(rows, min_execs=3, limit=1)) == 1
+
+
+def test_an_existing_custom_query_is_not_proposed_again():
+    rows = [_row("SELECT * FROM big WHERE region = 'x'", 4, 400_000)]
+    existing = {fingerprint("select * from big where region = 'y'")[0]}
+    assert rank_candidates(rows, existing_fingerprints=existing, min_execs=1, limit=10) == []
+
+
+def test_suggested_names_are_valid_custom_query_names():
+    name = suggested_name(['"Sales-2026"', "analytics.very_long_table_name_" + "x" * 80])
+    assert name.startswith("accel_") and len(name) <= 63
+    assert all(ch.isalnum() or ch == "_" for ch in name)
+
+
+# --------------------------------------------------------------------------
+# Windowed load
+# --------------------------------------------------------------------------
+
+@pytest_asyncio.fixture
+async def sessions(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'advisor.db'}")
+    async with engine.begin() as conn:
+        for table in (QueryFingerprint.__table__, QueryFingerprintDay.__table__):
+            await conn.run_sync(table.create)
+    yield async_sessionmaker(engine, expire_on_commit=False)
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_old_load_does_not_outrank_what_runs_now(sessions, monkeypatch):
+    monkeypatch.setenv("BOW_ADVISOR_LOOKBACK_DAYS", "7")
+    now = datetime.utcnow()
+    old, recent = now - timedelta(days=20), now - timedelta(hours=1)
+    samples = (
+        [{"connection_id": "c1", "sql": "SELECT * FROM legacy WHERE id = 1", "query_ms": 100_000, "at": old}] * 3
+        + [{"connection_id": "c1", "sql": "SELECT * FROM legacy WHERE id = 2", "query_ms": 10, "at": recent}]
+        + [{"connection_id": "c1", "sql": "SELECT * FROM orders WHERE id = 1", "query_ms": 1_000, "at": recent}] * 3
+    )
+    async with sessions() as db:
+        assert await acceleration_advisor_service.record_samples(db, "o1", samples) == 2
+        await acceleration_advisor_service.prune(db)
+        shapes = (await db.execute(select(QueryFingerprint))).scalars().all()
+        days = (await db.execute(select(QueryFingerprintDay))).scalars().all()
+
+    legacy = next(r for r in shapes if r.tables == ["legacy"])
+    # Lifetime totals keep everything; only the recent bucket survives pruning.
+    assert (legacy.executions, legacy.total_ms) == (4, 300_010)
+    totals = {d.fingerprint: (d.executions, d.total_ms) for d in days}
+    assert totals[legacy.fingerprint] == (1, 10)
+    ranked = rank_candidates(_windowed(shapes, totals), min_execs=1, limit=10)
+    assert [p["tables"] for p in ranked] == [["orders"], ["legacy"]]
@@ -0,0 +1,199 @@
+"""Agent run queue and the bow-agent-worker loop.
+
+Pinned here: claims going oldest-first to exactly one worker, lease renewal
+only for the holder, recovery re-queueing runs that never started and
+failing (with their completion) runs that did, and the worker executing,
+skipping, and giving up runs, and keeping leases alive while it drains.
+"""
+
+# Mapper registration intentionally runs before the app-model imports below.
+# ruff: noqa: E402
+
+import asyncio
+import importlib
+import pkgutil
+from datetime import datetime, timedelta
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import text, update
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+import app.models
+
+# Register the whole mapped model graph so the ORM can configure the
+# relationships of the models the queue touches. `application` is an unused
+# leftover whose relationship target no longer exists; nothing imports it.
+for _mod in pkgutil.iter_modules(app.models.__path__):
+    if _mod.name != "application":
+        importlib.import_module(f"app.models.{_mod.name}")
+
+from app import agent_worker
+from app.models.agent_run import AgentRun
+from app.models.completion import Completion
+from app.models.completion_block import CompletionBlock
+from app.services import agent_run_queue
+
+
+@pytest_asyncio.fixture
+async def sessions(tmp_path, monkeypatch):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'runs.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(AgentRun.__table__.create)
+        # Constraint-free stand-ins for the two tables the queue reads.
+        for table in (Completion.__table__, CompletionBlock.__table__):
+            await conn.execute(text(f"CREATE TABLE {table.name} ({', '.join(c.name for c in table.columns)})"))
+    factory = async_sessionmaker(engine, expire_on_commit=False)
+    monkeypatch.setattr(agent_worker, "create_async_session_factory", lambda: factory)
+    yield factory
+    await engine.dispose()
+
+
+async def _enqueue(factory, cid, status="in_progress"):
+    async with factory() as db:
+        await db.execute(text("INSERT INTO completions (id, status) VALUES (:id, :s)"), {"id": cid, "s": status})
+        await db.commit()
+        run = await agent_run_queue.enqueue(db, report_id="r1", head_completion_id=f"h-{cid}", system_completion_id=cid)
+    return str(run.id)
+
+
+async def _row(factory, run_id):
+    async with factory() as db:
+        return await db.get(AgentRun, run_id, populate_existing=True)
+
+
+async def _completion_status(factory, cid):
+    async with factory() as db:
+        return (await db.execute(text("SELECT status FROM completions WHERE id = :id"), {"id": cid})).scalar_one()
+
+
+@pytest.mark.asyncio
+async def test_claims_go_oldest_first_to_exactly_one_worker(sessions):
+    ids = [await _enqueue(sessions, f"c{i}") for i in range(3)]
+    async with sessions() as db:
+        first = await agent_run_queue.claim(db, holder="w1", limit=2)
+    async with sessions() as db:
+        second = await agent_run_queue.claim(db, holder="w2", limit=2)
+    async with sessions() as db:
+        third = await agent_run_queue.claim(db, holder="w3", limit=2)
+
+    assert [str(r.id) for r in first] == ids[:2] and [str(r.id) for r in second] == ids[2:]
+    assert third == []
+    run = await _row(sessions, ids[2])
+    assert (run.status, run.holder, run.attempts) == ("running", "w2", 1)
+    assert run.lease_expires_at > datetime.utcnow()
+
+
+@pytest.mark.asyncio
+async def test_only_the_holder_renews_and_finishes(sessions):
+    run_id = await _enqueue(sessions, "c1")
+    async with sessions() as db:
+        await agent_run_queue.claim(db, holder="w1", limit=1)
+        assert await agent_run_queue.renew(db, holder="w1", run_ids=[run_id]) == {run_id}
+        assert await agent_run_queue.renew(db, holder="w2", run_ids=[run_id]) == set()
+        assert not await agent_run_queue.finish(db, run_id=run_id, holder="w2")
+        assert await agent_run_queue.finish(db, run_id=run_id, holder="w1")
+    run = await _row(sessions, run_id)
+    assert run.status == "done" and run.lease_expires_at is None and run.finished_at is not None
+
+
+@pytest.mark.asyncio
+async def test_expired_leases_requeue_fresh_runs_and_fail_started_ones(sessions, monkeypatch):
+    monkeypatch.setenv("BOW_AGENT_RUN_MAX_ATTEMPTS", "2")
+    fresh, started, stopped, exhausted = [await _enqueue(sessions, c) for c in ("fresh", "started", "stopped", "exhausted")]
+    async with sessions() as db:
+        await agent_run_queue.claim(db, holder="dead", limit=4)
+        await db.execute(text("INSERT INTO completion_blocks (id, completion_id) VALUES ('b1', 'started')"))
+        await db.execute(text("UPDATE completions SET status = 'stopped' WHERE id = 'stopped'"))
+        await db.execute(update(AgentRun).where(AgentRun.id == exhausted).values(attempts=2))
+        await db.execute(update(AgentRun).values(lease_expires_at=datetime.utcnow() - timedelta(seconds=1)))
+        await db.commit()
+        assert await agent_run_queue.recover_expired(db) == (1, 2)
+        assert await agent_run_queue.recover_expired(db) == (0, 0)
+
+    assert (await _row(sessions, fresh)).status == "queued"
+    assert (await _row(sessions, stopped)).status == "done"
+    for run_id, cid in ((started, "started"), (exhausted, "exhausted")):
+        run = await _row(sessions, run_id)
+        assert run.status == "failed" and "dead" in run.error
+        assert await _completion_status(sessions, cid) == "error"
+    assert await _completion_status(sessions, "stopped") == "stopped"
+
+
+@pytest.mark.asyncio
+async def test_worker_runs_skips_and_records_failures(sessions):
+    ok, stopped, broken = await _enqueue(sessions, "ok"), await _enqueue(sessions, "x", "stopped"), await _enqueue(sessions, "bad")
+    ran = []
+
+    async def runner(run):
+        ran.append(run.system_completion_id)
+        if run.system_completion_id == "bad":
+            raise RuntimeError("boom")
+
+    worker = agent_worker.AgentWorker(concurrency=2, runner=runner)
+    # Same host and pid (a restarted container) must still be another holder.
+    assert agent_worker.AgentWorker(concurrency=2, runner=runner).holder != worker.holder
+    assert await worker.claim_and_start() == 2
+    assert await worker.claim_and_start() == 0  # no free slot
+    await asyncio.sleep(0.2)
+    assert await worker.claim_and_start() == 1
+    await asyncio.sleep(0.2)
+
+    assert sorted(ran) == ["bad", "ok"] and worker.running == 0
+    assert [(await _row(sessions, r)).status for r in (ok, stopped, broken)] == ["done", "done", "failed"]
+    assert "boom" in (await _row(sessions, broken)).error
+
+
+@pytest.mark.asyncio
+async def test_worker_stops_runs_it_lost_and_hands_back_runs_on_shutdown(sessions, monkeypatch):
+    monkeypatch.setenv("BOW_AGENT_WORKER_DRAIN_SECONDS", "0")
+    lost, drained = await _enqueue(sessions, "lost"), await _enqueue(sessions, "drained")
+    release = asyncio.Event()
+
+    async def runner(run):
+        await release.wait()
+
+    worker = agent_worker.AgentWorker(concurrency=2, runner=runner)
+    stop = asyncio.Event()
+    serving = asyncio.get_running_loop().create_task(worker.serve(stop))
+    await asyncio.sleep(0.2)
+    assert worker.running == 2
+
+    async with sessions() as db:  # another process took "lost" over
+        await db.execute(update(AgentRun).where(AgentRun.id == lost).values(holder="other"))
+        await db.commit()
+    await worker.renew_leases()
+    await asyncio.sleep(0.1)
+    assert worker.running == 1 and (await _row(sessions, lost)).holder == "other"
+
+    stop.set()
+    await asyncio.wait_for(serving, timeout=5)
+    run = await _row(sessions, drained)
+    assert run.status == "running" and run.lease_expires_at <= datetime.utcnow()  # recoverable at once
+
+
+@pytest.mark.asyncio
+async def test_leases_are_renewed_while_a_run_drains(sessions, monkeypatch):
+    monkeypatch.setattr(agent_run_queue, "lease_seconds", lambda: 0.3)
+    monkeypatch.setenv("BOW_AGENT_WORKER_DRAIN_SECONDS", "5")
+    run_id = await _enqueue(sessions, "slow")
+    release = asyncio.Event()
+
+    async def runner(run):
+        await release.wait()
+
+    worker = agent_worker.AgentWorker(concurrency=1, runner=runner)
+    stop = asyncio.Event()
+    serving = asyncio.get_running_loop().create_task(worker.serve(stop))
+    await asyncio.sleep(0.2)
+    stop.set()
+    await asyncio.sleep(1.0)  # the drain outlasts the lease several times over
+
+    async with sessions() as db:
+        assert await agent_run_queue.recover_expired(db) == (0, 0)
+    run = await _row(sessions, run_id)
+    assert run.status == "running" and run.lease_expires_at > datetime.utcnow()
+
+    release.set()
+    await asyncio.wait_for(serving, timeout=5)
+    assert (await _row(sessions, run_id)).status == "done"
@@ -0,0 +1,126 @@
+"""The Arrow result path must hand generated code the frame read_sql did.
+
+`read_sql_frame` replaced `pd.read_sql(text(sql), conn)` for the SQLAlchemy
+clients. Code written against the old output — saved steps, dashboards,
+prompts full of examples — keeps running unchanged only if the frame does: the
+same columns (duplicates included), the same dtypes for the common types, and
+Python objects where Arrow cannot represent a value. These run real SQLite
+through SQLAlchemy, batch sizes turned down so every result spans batches.
+"""
+
+import decimal
+
+import pandas as pd
+import pytest
+import sqlalchemy
+
+from app.data_sources.clients import _arrow_results as ar
+
+
+class _Client:
+    """Stand-in for a DataSourceClient: only the hooks read_frame consults."""
+
+    def __init__(self, native=None):
+        self._native = native
+
+    def native_arrow_batches(self, conn, sql):
+        return self._native(conn, sql) if self._native else None
+
+
+@pytest.fixture
+def conn(tmp_path, monkeypatch):
+    monkeypatch.setenv("BOW_QUERY_BATCH_ROWS", "2")
+    engine = sqlalchemy.create_engine(f"sqlite:///{tmp_path / 'src.sqlite'}")
+    with engine.begin() as c:
+        c.exec_driver_sql("CREATE TABLE t (id INTEGER, name TEXT, amount REAL, note TEXT)")
+        c.exec_driver_sql(
+            "INSERT INTO t VALUES (1, 'a', 1.5, NULL), (2, 'b', NULL, 'x'), "
+            "(3, NULL, 3.0, 'y'), (4, 'd', 4.25, 'z'), (5, 'e', 5.0, NULL)"
+        )
+    with engine.connect() as c:
+        yield c
+    engine.dispose()
+
+
+def _old(conn, sql):
+    return pd.read_sql(sqlalchemy.text(sql), conn)
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT * FROM t ORDER BY id",
+    "SELECT id, amount FROM t WHERE id > 100",
+    "SELECT a.id, b.id FROM t a JOIN t b ON a.id = b.id ORDER BY a.id",
+    "SELECT COUNT(*) AS n, SUM(amount) AS total FROM t",
+])
+def test_frames_match_read_sql(conn, sql):
+    new = ar.read_frame(_Client(), conn, sql)
+    pd.testing.assert_frame_equal(new, _old(conn, sql), check_column_type=False)
+
+
+def test_a_column_arrow_cannot_type_keeps_python_values(conn):
+    conn.exec_driver_sql("CREATE TABLE m (v)")
+    conn.exec_driver_sql("INSERT INTO m VALUES (1), ('two'), (3), (4.5)")
+    df = ar.read_frame(_Client(), conn, "SELECT v FROM m")
+    assert list(df["v"]) == [1, "two", 3, 4.5]
+
+
+def test_the_row_ceiling_stops_the_stream(conn, monkeypatch):
+    monkeypatch.setenv("BOW_QUERY_MAX_ROWS", "3")
+    with pytest.raises(ar.ResultTooLargeError, match="LIMIT"):
+        ar.read_frame(_Client(), conn, "SELECT * FROM t")
+
+
+def test_the_byte_ceiling_stops_the_stream(conn, monkeypatch):
+    monkeypatch.setenv("BOW_QUERY_MAX_RESULT_BYTES", "10")
+    with pytest.raises(ar.ResultTooLargeError):
+        ar.read_frame(_Client(), conn, "SELECT * FROM t")
+
+
+def test_native_arrow_batches_are_used_and_decimals_become_floats(conn):
+    import pyarrow as pa
+
+    def native(_conn, _sql):
+        tbl = pa.table({"amount": pa.array([decimal.Decimal("1.25")], pa.decimal128(10, 2))})
+        return ["amount"], iter([tbl])
+
+    df = ar.read_frame(_Client(native), conn, "SELECT 1")
+    assert df["amount"].dtype == "float64"
+    assert df["amount"].iloc[0] == 1.25
+
+
+def test_an_empty_result_keeps_its_columns(conn):
+    df = ar.read_frame(_Client(), conn, "SELECT id, name FROM t WHERE 0")
+    assert list(df.columns) == ["id", "name"]
+    assert df.empty
+
+
+def test_snowflake_native_batches_keep_read_sql_column_names(conn):
+    pytest.importorskip("snowflake.sqlalchemy")
+    import pyarrow as pa
+    from snowflake.sqlalchemy.snowdialect import SnowflakeDialect
+
+    from app.data_sources.clients.snowflake_client import SnowflakeClient
+
+    class _Cursor:
+        description = [("CUSTOMER_ID",), ("MixedCase",), ("TOTAL",)]
+
+        def execute(self, sql):
+            pass
+
+        def fetch_arrow_batches(self):
+            yield pa.table({"CUSTOMER_ID": [1, 2], "MixedCase": ["a", "b"], "TOTAL": [1.5, 2.5]})
+
+        def close(self):
+            pass
+
+    class _Conn:
+        dialect = SnowflakeDialect()
+
+        class connection:  # noqa: N801 - mirrors Connection.connection
+            class dbapi_connection:  # noqa: N801
+                cursor = staticmethod(_Cursor)
+
+    client = SnowflakeClient.__new__(SnowflakeClient)
+    df = ar.read_frame(client, _Conn(), "SELECT customer_id, \"MixedCase\", total FROM orders")
+    assert list(df.columns) == ["customer_id", "MixedCase", "total"]
+    assert list(df["customer_id"]) == [1, 2]
@@ -0,0 +1,169 @@
+"""describe_tables lookups served from the compiled catalog.
+
+The catalog replaces a full schema rebuild plus a regex scan with key lookups,
+so its one obligation is to match exactly the tables the regexes would have
+matched — and to render them exactly as the section renderer would.
+"""
+
+import random
+import re
+from types import SimpleNamespace
+
+import pytest
+
+from app.ai.context.builders import compiled_catalog
+from app.ai.context.sections.tables_schema_section import FileScopeItem, TablesSchemaContext
+from app.ai.prompt_formatters import Table, TableColumn
+from app.ai.tools.implementations.describe_tables import name_patterns_for
+from app.schemas.data_source_schema import DataSourceSummarySchema
+
+
+@pytest.fixture(autouse=True)
+def _clean():
+    compiled_catalog.reset()
+    yield
+    compiled_catalog.reset()
+
+
+def _table(name, cols=("id",), conn="c1", **kw):
+    return Table(name=name, columns=[TableColumn(name=c, dtype="int") for c in cols],
+                 pks=[], fks=[], connection_id=conn, **kw)
+
+
+def _catalog(tables, ds_id="ds1"):
+    ctx = TablesSchemaContext(data_sources=[TablesSchemaContext.DataSource(
+        info=DataSourceSummarySchema(id=ds_id, name="Warehouse", type="postgresql"),
+        tables=tables,
+    )])
+    return ctx, compiled_catalog.CompiledCatalog(ctx, index_key="test")
+
+
+def _names(ctx):
+    return [t.name for ds in ctx.data_sources for t in ds.tables]
+
+
+def _random_names(n, seed=11):
+    rnd = random.Random(seed)
+    parts = ["Sales", "orders", "web", "security", "app", "json_app", "x", "Order", "log"]
+    seps = [".", "/", ":", "::", "-", "_", "*", ""]
+    names = set()
+    while len(names) < n:
+        k = rnd.randint(1, 4)
+        name = rnd.choice(parts)
+        for _ in range(k - 1):
+            name += rnd.choice(seps) + rnd.choice(parts)
+        names.add(name)
+    return sorted(names)
+
+
+@pytest.mark.parametrize("query", [
+    "orders", "ORDERS", "sales.orders", "security", "json_app", "web", "x", "app::json_app",
+    "Order", "log-x", "^sales", "^Sales\\.ord.*", ".*app.*", "orders$", "(",
+])
+def test_lookup_matches_exactly_what_the_name_patterns_match(query):
+    names = _random_names(400)
+    ctx, catalog = _catalog([_table(n, cols=("zzz_col",)) for n in names])
+    patterns = [re.compile(p) for p in name_patterns_for([query])]
+    expected = [n for n in names if any(p.search(n) for p in patterns)]
+    assert _names(catalog.lookup([query])) == expected
+
+
+def test_a_query_naming_a_column_finds_its_tables():
+    ctx, catalog = _catalog([
+        _table("orders", cols=("id", "customer_id")),
+        _table("customers", cols=("id", "name")),
+        _table("payments", cols=("id", "customer_id")),
+    ])
+    assert _names(catalog.lookup(["customer_id"])) == ["orders", "payments"]
+    # A table name match wins; columns are only the fallback.
+    assert _names(catalog.lookup(["customers"])) == ["customers"]
+
+
+def test_sources_and_connections_filter_the_matches():
+    ctx, catalog = _catalog([_table("a.orders", conn="c1"), _table("b.orders", conn="c2")])
+    assert _names(catalog.lookup(["orders"], connection_ids=["c2"])) == ["b.orders"]
+    assert _names(catalog.lookup(["orders"], data_source_ids=["other"])) == []
+
+
+def test_fragments_render_identically_and_only_once():
+    tables = [_table(f"t{i}", cols=("a", "b"), score=float(i)) for i in range(5)]
+    ctx, catalog = _catalog(tables)
+    result = catalog.lookup(["t1", "t3"])
+    plain = result.render_combined(top_k_per_ds=10)
+    assert result.render_combined(top_k_per_ds=10, table_xml=catalog.table_xml) == plain
+    result.render_combined(top_k_per_ds=10, table_xml=catalog.table_xml)
+    assert compiled_catalog.stats()["fragments_rendered"] == 2
+
+    # describe_tables fills a thin table's columns on a copy: the copy
+    # renders fresh and the catalog's own table is left alone.
+    result = catalog.lookup(["t1"])
+    filled = tables[1].model_copy(update={"columns": tables[1].columns + [TableColumn(name="c", dtype="int")]})
+    result.data_sources[0].tables[0] = filled
+    assert 'name="c"' in result.render_combined(table_xml=catalog.table_xml)
+    assert 'name="c"' not in catalog.lookup(["t1"]).render_combined(table_xml=catalog.table_xml)
+    assert compiled_catalog.stats()["fragments_rendered"] == 2
+
+
+def test_file_scopes_are_narrowed_to_the_matched_files():
+    files = [
+        _table("reports/q1.pdf", cols=(), conn="f1", metadata_json={"s3": {"keywords": ["revenue"]}}),
+        _table("reports/q2.pdf", cols=(), conn="f1", metadata_json={"s3": {"keywords": ["churn"]}}),
+        _table("notes/todo.txt", cols=(), conn="f2"),
+    ]
+    ctx = TablesSchemaContext(data_sources=[TablesSchemaContext.DataSource(
+        info=DataSourceSummarySchema(id="ds1", name="Docs", type="s3"),
+        tables=[_table("orders")],
+        file_scopes=[
+            FileScopeItem(connection_id="f1", name="Reports", type="s3", **FileScopeItem.summarize(files[:2])),
+            FileScopeItem(connection_id="f2", name="Notes", type="s3", **FileScopeItem.summarize(files[2:])),
+        ],
+        file_tables=files,
+    )])
+    catalog = compiled_catalog.CompiledCatalog(ctx, index_key="test")
+
+    (section,) = catalog.lookup(["q2.pdf"]).data_sources
+    assert section.tables == [] and section.file_tables == []
+    reports, notes = section.file_scopes
+    assert (reports.file_count, reports.sample, reports.topics) == (1, ["reports/q2.pdf"], ["churn"])
+    assert (notes.file_count, notes.sample) == (0, [])
+    # The cached scopes are untouched.
+    assert ctx.data_sources[0].file_scopes[0].file_count == 2
+    assert [fs.name for fs in catalog.lookup(["orders"], connection_ids=["c1", "f2"]).data_sources[0].file_scopes] == ["Notes"]
+
+
+@pytest.mark.asyncio
+async def test_a_schema_write_keys_a_new_catalog(monkeypatch):
+    stamp = {"schema": 1, "instructions": 0}
+
+    async def _stamps(org_id):
+        return dict(stamp)
+
+    class _Builder:
+        builds = 0
+
+        async def build(self, **kwargs):
+            assert kwargs["keep_file_tables"] is True
+            _Builder.builds += 1
+            return _catalog([_table("orders")])[0]
+
+    hub = SimpleNamespace(
+        organization=SimpleNamespace(id="org1"), data_sources=[], build_id=None,
+        schema_builder=_Builder(), _schema_identity_key=lambda: "system",
+    )
+    monkeypatch.setattr(compiled_catalog.context_cache, "stamps", _stamps)
+    first = await compiled_catalog.for_hub(hub)
+    assert await compiled_catalog.for_hub(hub) is first
+    stamp["schema"] = 2
+    assert await compiled_catalog.for_hub(hub) is not first and _Builder.builds == 2
+
+
+def test_catalogs_expire_and_are_invalidated_per_org(monkeypatch):
+    _, catalog = _catalog([_table("orders")])
+    compiled_catalog.put(("org1", ("ds1",), None, "system"), catalog)
+    assert compiled_catalog.get(("org1", ("ds1",), None, "system")) is catalog
+    compiled_catalog.invalidate("org1")
+    assert compiled_catalog.get(("org1", ("ds1",), None, "system")) is None
+
+    monkeypatch.setenv("BOW_SCHEMA_CATALOG_TTL_S", "0")
+    compiled_catalog.put(("org2", (), None, "system"), catalog)
+    assert compiled_catalog.get(("org2", (), None, "system")) is None
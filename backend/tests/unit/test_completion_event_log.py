@@ -0,0 +1,179 @@
+"""Completion event log.
+
+Pinned here: batched writes numbered per completion, the replay a
+Last-Event-ID resume gets (owner buffer + DB, and None whenever the log has
+a hole), a re-queued run continuing its first attempt's numbering, the live stream stamping log positions onto events and their SSE
+ids (also across workers), failed batches being dropped rather than
+retried forever, and retention sparing running completions.
+"""
+import asyncio
+import json
+from datetime import datetime, timedelta
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.models.completion_event import CompletionEventRecord
+from app.schemas.sse_schema import SSEEvent, format_sse_event
+from app.streaming import completion_event_log, completion_stream, event_transport
+from app.streaming.completion_stream import (
+    CompletionEventQueue,
+    RemoteStreamSubscription,
+    register_stream,
+    unregister_stream,
+)
+
+
+@pytest_asyncio.fixture
+async def engine(tmp_path, monkeypatch):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'events.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(CompletionEventRecord.__table__.create)
+        await conn.execute(text("CREATE TABLE completions (id VARCHAR(36) PRIMARY KEY, status VARCHAR)"))
+    monkeypatch.setattr(completion_event_log, "_engine", lambda: engine)
+    completion_event_log.reset()
+    yield engine
+    await engine.dispose()
+
+
+def _ev(name="block.delta.token", **data):
+    return SSEEvent(event=name, completion_id="c1", data=data)
+
+
+@pytest.mark.asyncio
+async def test_events_are_numbered_and_written_in_batches(engine, monkeypatch):
+    monkeypatch.setenv("BOW_COMPLETION_EVENT_LOG_BATCH", "3")
+    log = completion_event_log.CompletionEventLog("c1")
+    seqs = [log.append(_ev(t=c)) for c in "abcd"]
+    assert seqs == [1, 2, 3, 4]
+
+    await asyncio.sleep(0.05)  # the batch size woke the flusher early
+    assert completion_event_log.stats()["flushes"] == 1
+    assert log.pending_after(0) == []
+    await log.close()
+
+    rows = await completion_event_log.read_after("c1", 1)
+    assert [seq for seq, _, _ in rows] == [2, 3, 4]
+    assert rows[0][1] == "block.delta.token" and json.loads(rows[0][2])["data"] == {"t": "b"}
+    assert [r[0] for r in await completion_event_log.read_after("c1", 0, until_seq=2)] == [1, 2]
+
+
+@pytest.mark.asyncio
+async def test_replay_merges_owner_buffer_and_refuses_holes(engine):
+    log = completion_event_log.CompletionEventLog("c1")
+    for c in "abc":
+        log.append(_ev(t=c))
+    await log.flush()
+    log.append(_ev(t="d"))  # still buffered
+
+    tail = await completion_event_log.replay_after("c1", 1, log)
+    assert [seq for seq, _, _ in tail] == [2, 3, 4]
+    assert await completion_event_log.replay_after("c1", 4, log) == []
+    # A watcher on another worker only sees the DB; its gap is filled later.
+    assert [r[0] for r in await completion_event_log.replay_after("c1", 1)] == [2, 3]
+
+    async with engine.begin() as conn:
+        await conn.execute(text("DELETE FROM completion_events WHERE seq = 2"))
+    assert await completion_event_log.replay_after("c1", 1, log) is None
+    assert await completion_event_log.replay_after("unknown", 0) is None
+    await log.close()
+
+
+@pytest.mark.asyncio
+async def test_a_requeued_run_numbers_on_from_its_first_attempt(engine):
+    first = completion_event_log.CompletionEventLog("c1")
+    for c in "ab":
+        first.append(_ev(t=c))
+    await first.close()  # the first worker died after flushing these
+
+    second = completion_event_log.CompletionEventLog("c1")
+    await second.continue_numbering()
+    assert second.append(_ev(t="c")) == 3
+    await second.close()
+    assert completion_event_log.stats()["dropped"] == 0
+    assert [r[0] for r in await completion_event_log.read_after("c1", 2)] == [3]
+
+    fresh = completion_event_log.CompletionEventLog("c9")
+    await fresh.continue_numbering()
+    assert fresh.append(_ev(t="a")) == 1
+    await fresh.close()
+
+
+@pytest.mark.asyncio
+async def test_live_events_carry_their_log_position(engine):
+    q = CompletionEventQueue()
+    register_stream("c1", q)
+    try:
+        sub = q.subscribe()
+        await q.put(_ev("tool.started", tool_execution_id="t1"))
+        await q.put(_ev(t="a"))
+        first, second = sub.get_nowait(), sub.get_nowait()
+        assert (first._log_seq, second._log_seq) == (1, 2)
+        assert format_sse_event(second).startswith("id: 2\nevent: block.delta.token\n")
+        assert "_log_seq" not in format_sse_event(second)
+        # Replayed running-tool markers keep their original position.
+        assert q.subscribe().get_nowait()._log_seq == 1
+    finally:
+        q.finish()
+        unregister_stream("c1")
+    await asyncio.sleep(0.05)  # finish() closes the log
+    assert [r[0] for r in await completion_event_log.read_after("c1", 0)] == [1, 2]
+
+
+@pytest.mark.asyncio
+async def test_relayed_events_keep_their_log_position(engine):
+    class _Recorder(event_transport.EventTransport):
+        cross_worker = True
+
+        def __init__(self):
+            super().__init__()
+            self.sent = []
+
+        def publish(self, channel, payload):
+            self.sent.append((channel, json.loads(json.dumps(payload, default=str))))
+
+    recorder = _Recorder()
+    event_transport.set_transport(recorder)
+    q = CompletionEventQueue()
+    register_stream("c2", q)
+    sub = RemoteStreamSubscription.open("c2")
+    try:
+        completion_stream._on_watch_interest({"completion_id": "c2"})
+        await q.put(SSEEvent(event="block.upsert", completion_id="c2", data={"block": {"id": "b"}}))
+        channel, payload = recorder.sent[-1]
+        assert channel == "completion.stream:c2" and payload["log_seq"] == 1
+
+        recorder._receive({"o": "owner", "c": channel, "p": payload})
+        item = await CompletionEventQueue.next_event(sub.queue, timeout=1)
+        assert item._log_seq == 1 and format_sse_event(item).startswith("id: 1\n")
+    finally:
+        sub.close()
+        q.finish()
+        unregister_stream("c2")
+        event_transport.set_transport(None)
+        await asyncio.sleep(0.05)
+
+
+@pytest.mark.asyncio
+async def test_failed_batches_are_dropped_and_retention_spares_running_runs(engine, monkeypatch):
+    log = completion_event_log.CompletionEventLog("c1")
+    log.append(_ev(t="a"))
+    monkeypatch.setattr(completion_event_log, "_engine", lambda: None)  # DB unavailable
+    await log.flush()
+    assert log.pending_after(0) == [] and completion_event_log.stats()["dropped"] == 1
+    monkeypatch.setattr(completion_event_log, "_engine", lambda: engine)
+
+    old = datetime.utcnow() - timedelta(hours=2)
+    async with engine.begin() as conn:
+        await conn.execute(text("INSERT INTO completions VALUES ('done', 'success'), ('live', 'in_progress')"))
+        for cid, created in (("done", old), ("live", old), ("done", datetime.utcnow())):
+            await conn.execute(
+                text("INSERT INTO completion_events VALUES (:c, (SELECT COUNT(*) FROM completion_events) + 1, 'e', '{}', :t)"),
+                {"c": cid, "t": created},
+            )
+    assert await completion_event_log.prune_expired() == 1
+    async with engine.connect() as conn:
+        left = (await conn.execute(text("SELECT completion_id FROM completion_events ORDER BY seq"))).scalars().all()
+    assert left == ["live", "done"]
@@ -0,0 +1,179 @@
+"""Schema and instruction sections cached across workers, versioned by writes.
+
+A second worker is simulated by clearing the in-process tier: whatever it
+finds must come from the shared table. Pinned here: a section built by one
+worker is served to another (and renders identically), a write to a table row
+bumps the owning org's stamp (and only its stamp, bulk writes included) once
+the writer commits, so no worker can reach the old section, the memory tier
+stays bounded, and an unreadable stamp table degrades to the per-process
+cache instead of failing the build.
+"""
+
+import asyncio
+import uuid
+
+import pytest
+from sqlalchemy import Boolean, Column, String, text, update
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import declarative_base
+
+from app.ai.context import context_cache
+from app.ai.context.sections.tables_schema_section import TablesSchemaContext
+from app.ai.prompt_formatters import Table, TableColumn
+from app.models.context_cache import ContextCacheEntry, ContextCacheVersion
+from app.schemas.data_source_schema import DataSourceSummarySchema
+
+ORG = "org-1"
+
+# The hooks go by model name; a stand-in keeps the app's full mapper graph out.
+_Base = declarative_base()
+
+
+class DataSourceTable(_Base):
+    __tablename__ = "datasource_tables"
+    id = Column(String(36), primary_key=True)
+    name = Column(String, nullable=False)
+    datasource_id = Column(String(36), nullable=False)
+    is_active = Column(Boolean, default=True)
+
+
+def _run(coro):
+    return asyncio.get_event_loop().run_until_complete(coro)
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'ctx.db'}")
+
+    async def _setup():
+        async with engine.begin() as conn:
+            for table in (ContextCacheVersion.__table__, ContextCacheEntry.__table__, DataSourceTable.__table__):
+                await conn.run_sync(table.create)
+            await conn.execute(text("CREATE TABLE data_sources (id VARCHAR(36), organization_id VARCHAR(36))"))
+            await conn.execute(text("INSERT INTO data_sources VALUES ('ds-1', :org)"), {"org": ORG})
+
+    loop.run_until_complete(_setup())
+    factory = async_sessionmaker(engine, expire_on_commit=False)
+    monkeypatch.setattr(context_cache, "_session_factory", factory)
+    context_cache.reset()
+    yield factory
+    context_cache.reset()
+    loop.run_until_complete(engine.dispose())
+    loop.close()
+
+
+def _schema(names):
+    return TablesSchemaContext(data_sources=[TablesSchemaContext.DataSource(
+        info=DataSourceSummarySchema(id="ds-1", name="Warehouse", type="postgresql"),
+        tables=[Table(name=n, columns=[TableColumn(name="id", dtype="int")], pks=[], fks=[]) for n in names],
+    )])
+
+
+def _key(stamps, identity="system"):
+    return (context_cache.SCHEMA, ORG, stamps[context_cache.SCHEMA], ("ds-1",), None, identity)
+
+
+def _get(key, names, builds):
+    async def _build():
+        builds.append(key)
+        return _schema(names)
+    return _run(context_cache.get_or_build(key, TablesSchemaContext, _build))
+
+
+def test_a_section_built_by_one_worker_is_served_to_another(db):
+    builds = []
+    stamps = _run(context_cache.stamps(ORG))
+    built, source = _get(_key(stamps), ["orders", "customers"], builds)
+    assert source == "built"
+    assert _get(_key(stamps), ["never"], builds)[1] == "memory"
+
+    context_cache.reset()  # another worker: empty memory tier
+    shared, source = _get(_key(stamps), ["never"], builds)
+    assert source == "shared" and len(builds) == 1
+    assert shared.render_combined(top_k_per_ds=10) == built.render_combined(top_k_per_ds=10)
+    # A different identity never shares the entry.
+    assert _get(_key(stamps, identity="user:u2"), ["mine"], builds)[1] == "built"
+
+
+def test_a_table_write_moves_every_worker_to_a_new_version(db):
+    builds = []
+    before = _run(context_cache.stamps(ORG))
+    _get(_key(before), ["orders"], builds)
+
+    async def _add_table():
+        async with db() as session:
+            session.add(DataSourceTable(id=str(uuid.uuid4()), name="refunds", datasource_id="ds-1"))
+            await session.flush()
+            # Not bumped inside the writer's own transaction, which would hold
+            # the stamp's row lock for the rest of it.
+            bumped = (await session.execute(text("SELECT COUNT(*) FROM context_cache_versions"))).scalar()
+            assert bumped == 0
+            await session.commit()
+
+    _run(_add_table())
+    after = _run(context_cache.stamps(ORG))
+    assert after[context_cache.SCHEMA] == before[context_cache.SCHEMA] + 1
+    assert after[context_cache.INSTRUCTIONS] == before[context_cache.INSTRUCTIONS]
+
+    context_cache.reset()
+    section, source = _get(_key(after), ["orders", "refunds"], builds)
+    assert source == "built"
+    assert [t.name for t in section.data_sources[0].tables] == ["orders", "refunds"]
+
+
+def test_bulk_updates_bump_only_the_orgs_they_touch_and_rollbacks_do_not(db):
+    async def _setup():
+        async with db() as session:
+            await session.execute(text("INSERT INTO data_sources VALUES ('ds-2', 'org-2')"))
+            session.add_all([
+                DataSourceTable(id=str(uuid.uuid4()), name="t", datasource_id="ds-1"),
+                DataSourceTable(id=str(uuid.uuid4()), name="u", datasource_id="ds-2"),
+            ])
+            await session.commit()
+
+    async def _deactivate(commit, datasource_id=None):
+        stmt = update(DataSourceTable).values(is_active=False)
+        if datasource_id:
+            stmt = stmt.where(DataSourceTable.datasource_id == datasource_id)
+        async with db() as session:
+            await session.execute(stmt)
+            await (session.commit() if commit else session.rollback())
+
+    def _schema_stamps():
+        return [_run(context_cache.stamps(org))[context_cache.SCHEMA] for org in (ORG, "org-2")]
+
+    _run(_setup())
+    start = _schema_stamps()
+    _run(_deactivate(commit=False))
+    assert _schema_stamps() == start
+    _run(_deactivate(commit=True, datasource_id="ds-1"))
+    assert _schema_stamps() == [start[0] + 1, start[1]]  # the other org's cache survives
+    _run(_deactivate(commit=True))
+    assert _schema_stamps() == [start[0] + 2, start[1] + 1]
+
+
+def test_the_memory_tier_is_bounded(db, monkeypatch):
+    monkeypatch.setenv("BOW_CONTEXT_CACHE_MAX_ENTRIES", "3")
+    for i in range(5):
+        context_cache.put((context_cache.SCHEMA, ORG, None, i), object())
+    assert context_cache.stats()["entries"] == 3
+    assert context_cache.get((context_cache.SCHEMA, ORG, None, 0)) is None
+    assert context_cache.get((context_cache.SCHEMA, ORG, None, 4)) is not None
+
+    context_cache.invalidate(context_cache.SCHEMA, ORG)
+    assert context_cache.stats()["entries"] == 0
+
+
+def test_unreadable_stamps_fall_back_to_the_process_cache(db, monkeypatch):
+    def _broken():
+        raise RuntimeError("database is unreachable")
+
+    monkeypatch.setattr(context_cache, "_session_factory", _broken)
+    assert _run(context_cache.stamps(ORG)) is None
+    builds = []
+    key = (context_cache.SCHEMA, ORG, None, ("ds-1",), None, "system")
+    assert _get(key, ["orders"], builds)[1] == "built"
+    assert _get(key, ["orders"], builds)[1] == "memory"
+    assert context_cache.stats()["shared_writes"] == 0
@@ -0,0 +1,182 @@
+"""Incremental refresh of custom queries.
+
+A delta is only worth taking if the relation it produces is the one a full
+rebuild would have produced. These run a real SQLite source through the real
+extractor: the rows past the mark arrive, nothing before it is fetched twice,
+a merge key replaces rather than duplicates, and anything that makes a delta
+inapplicable says so instead of writing a wrong artifact.
+"""
+
+import sqlite3
+
+import pytest
+import sqlalchemy
+
+from app.data_sources.fast import artifacts, extractor, sql_dialect
+
+
+class _SqliteClient:
+    EXTRACTION_DIALECT = "sqlite"
+
+    def __init__(self, path):
+        self.engine = sqlalchemy.create_engine(f"sqlite:///{path}")
+
+    def extraction_connect(self):
+        return self.engine.connect()
+
+
+@pytest.fixture
+def source(tmp_path, monkeypatch):
+    monkeypatch.setattr(artifacts, "_ARTIFACT_ROOT", tmp_path / "fast")
+    path = tmp_path / "src.sqlite"
+    con = sqlite3.connect(path)
+    con.execute("CREATE TABLE orders (id INTEGER, status TEXT, updated INTEGER)")
+    con.executemany(
+        "INSERT INTO orders VALUES (?, ?, ?)",
+        [(1, "new", 10), (2, "new", 20), (3, "new", 30)],
+    )
+    con.commit()
+    con.close()
+    return path
+
+
+def _add(path, *rows):
+    con = sqlite3.connect(path)
+    con.executemany("INSERT INTO orders VALUES (?, ?, ?)", rows)
+    con.commit()
+    con.close()
+
+
+def _rows(res, name="orders"):
+    con = artifacts.connect_encrypted(res.artifact_path, res.artifact_key, read_only=True)
+    try:
+        return con.execute(f'SELECT id, status, updated FROM "{name}" ORDER BY id, updated').fetchall()
+    finally:
+        con.close()
+
+
+SQL = "SELECT id, status, updated FROM orders"
+
+
+def _full(source):
+    return extractor.extract_to_artifact(
+        _SqliteClient(source), SQL, "orders", "c1", watermark_column="updated"
+    )
+
+
+def _delta(source, prev, **kw):
+    return extractor.extract_incremental(
+        _SqliteClient(source), SQL, "orders", "c1",
+        previous_path=prev.artifact_path, previous_key=prev.artifact_key,
+        watermark_column="updated", watermark=prev.watermark, **kw,
+    )
+
+
+def test_a_full_refresh_records_the_high_water_mark(source):
+    res = _full(source)
+    assert res.mode == "full"
+    assert res.watermark == {"type": "number", "value": "30"}
+
+
+def test_a_delta_appends_only_rows_past_the_mark(source):
+    first = _full(source)
+    _add(source, (4, "new", 40))
+    res = _delta(source, first)
+    assert res.mode == "incremental"
+    assert res.delta_rows == 1
+    assert res.row_count == 4
+    assert res.watermark == {"type": "number", "value": "40"}
+    assert [r[0] for r in _rows(res)] == [1, 2, 3, 4]
+    assert res.columns == first.columns
+    # The previous artifact is a copy source, never modified in place.
+    assert len(_rows(first)) == 3
+
+
+def test_a_merge_key_replaces_the_changed_row(source):
+    first = _full(source)
+    _add(source, (2, "shipped", 50), (2, "delivered", 60), (5, "new", 55))
+    res = _delta(source, first, merge_key="id")
+    assert _rows(res) == [
+        (1, "new", 10), (2, "delivered", 60), (3, "new", 30), (5, "new", 55),
+    ]
+
+
+def test_an_empty_delta_keeps_the_relation_and_the_mark(source):
+    first = _full(source)
+    res = _delta(source, first)
+    assert res.delta_rows == 0
+    assert res.row_count == 3
+    assert res.watermark == first.watermark
+    assert res.columns == first.columns  # not the untyped columns of an empty delta
+
+
+def test_the_row_cap_applies_to_the_delta_not_the_total(source):
+    first = _full(source)
+    _add(source, (4, "new", 40))
+    res = _delta(source, first, max_rows=2)
+    assert res.row_count == 4
+    _add(source, (5, "new", 50), (6, "new", 60), (7, "new", 70))
+    with pytest.raises(extractor.ExtractionAborted):
+        _delta(source, res, max_rows=2)
+
+
+def test_a_missing_watermark_column_cannot_run_a_delta(source):
+    first = _full(source)
+    with pytest.raises(extractor.IncrementalUnavailable):
+        extractor.extract_incremental(
+            _SqliteClient(source), "SELECT id, status FROM orders", "orders", "c1",
+            previous_path=first.artifact_path, previous_key=first.artifact_key,
+            watermark_column="updated", watermark=first.watermark,
+        )
+
+
+def test_an_unreadable_previous_artifact_asks_for_a_full_rebuild(source):
+    first = _full(source)
+    with pytest.raises(extractor.IncrementalUnavailable):
+        extractor.extract_incremental(
+            _SqliteClient(source), SQL, "orders", "c1",
+            previous_path=first.artifact_path, previous_key=artifacts.new_artifact_key(),
+            watermark_column="updated", watermark=first.watermark,
+        )
+
+
+# --------------------------------------------------------------------------
+# Watermark literals
+# --------------------------------------------------------------------------
+
+@pytest.mark.parametrize("mark, dialect, expected", [
+    ({"type": "number", "value": "42"}, "postgresql", "42"),
+    ({"type": "timestamp", "value": "2026-01-02 03:04:05"}, "postgresql", "'2026-01-02 03:04:05'"),
+    ({"type": "timestamp", "value": "2026-01-02 03:04:05"}, "oracle", "TIMESTAMP '2026-01-02 03:04:05'"),
+    ({"type": "date", "value": "2026-01-02"}, "oracle", "DATE '2026-01-02'"),
+    ({"type": "timestamp", "value": "2026-01-02 03:04:05.123456"}, "mssql",
+     "CAST('2026-01-02 03:04:05.123456' AS DATETIME2)"),
+    ({"type": "string", "value": "it's"}, "mysql", "'it''s'"),
+])
+def test_watermark_literals_per_dialect(mark, dialect, expected):
+    assert sql_dialect.watermark_literal(mark, dialect) == expected
+
+
+def test_a_numeric_mark_that_is_not_a_number_is_refused():
+    with pytest.raises(ValueError):
+        sql_dialect.watermark_literal({"type": "number", "value": "1; DROP TABLE x"}, "postgresql")
+
+
+@pytest.mark.parametrize("value", ["nan", "inf", "-Infinity"])
+def test_a_non_finite_numeric_mark_is_refused(value):
+    with pytest.raises(ValueError, match="not a finite number"):
+        sql_dialect.watermark_literal({"type": "number", "value": value}, "postgresql")
+
+
+def test_a_watermark_column_must_be_a_plain_identifier():
+    with pytest.raises(ValueError):
+        sql_dialect.delta_sql(SQL, "updated; --", {"type": "number", "value": "1"}, "sqlite")
+
+
+def test_zoned_timestamps_are_stored_in_utc():
+    import datetime as dt
+
+    v = dt.datetime(2026, 1, 2, 5, 0, tzinfo=dt.timezone(dt.timedelta(hours=2)))
+    assert extractor.encode_watermark(v) == {
+        "type": "timestamptz", "value": "2026-01-02 03:00:00+00:00",
+    }
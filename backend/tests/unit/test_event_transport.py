@@ -0,0 +1,219 @@
+"""Cross-worker event transport.
+
+Pinned here: the polling transport delivering between two "workers" over one
+SQLite database (and never back to the sender), ``auto`` choosing it only
+when asked for, Postgres spilling oversized
+NOTIFY payloads to the table, the completion stream publishing only while a
+remote watcher has announced itself, the watcher side of that exchange, and
+the completion event bus relaying to other workers' handlers.
+"""
+import asyncio
+import json
+
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.models.event_transport_message import EventTransportMessage
+from app.schemas.sse_schema import SSEEvent
+from app.streaming import completion_event_bus, completion_stream, event_transport
+from app.streaming.completion_stream import (
+    STREAM_DONE,
+    CompletionEventQueue,
+    RemoteStreamSubscription,
+    register_stream,
+    unregister_stream,
+)
+
+
+class _Recorder(event_transport.EventTransport):
+    """Cross-worker transport that records what it would send."""
+
+    name = "recorder"
+    cross_worker = True
+
+    def __init__(self):
+        super().__init__()
+        self.sent = []
+
+    def publish(self, channel, payload):
+        self.sent.append((channel, json.loads(json.dumps(payload, default=str))))
+
+
+@pytest.fixture
+def recorder():
+    transport = _Recorder()
+    event_transport.set_transport(transport)
+    yield transport
+    event_transport.set_transport(None)
+
+
+@pytest.mark.asyncio
+async def test_polling_transport_delivers_between_workers(tmp_path, monkeypatch):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'events.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(EventTransportMessage.__table__.create)
+    monkeypatch.setattr(event_transport, "_engine", lambda: engine)
+    monkeypatch.setenv("BOW_EVENT_POLL_INTERVAL_S", "0.01")
+
+    sender, receiver = event_transport.PollingTransport(), event_transport.PollingTransport()
+    got, echoed = [], []
+    receiver.listen("report.events", got.append)
+    sender.listen("report.events", echoed.append)
+    try:
+        await asyncio.sleep(0.1)  # both pollers found the tail
+        sender.publish("report.events", {"report_id": "r1", "n": 1})
+        sender.publish("other.channel", {"n": 2})
+        for _ in range(100):
+            if got:
+                break
+            await asyncio.sleep(0.02)
+        await asyncio.sleep(0.05)
+    finally:
+        await sender.stop()
+        await receiver.stop()
+        await engine.dispose()
+
+    assert got == [{"report_id": "r1", "n": 1}]
+    assert echoed == []  # never delivered back to the sender
+    assert sender.stats()["sent"] == 2 and receiver.stats()["delivered"] == 1
+
+
+class _Result:
+    def __init__(self, value):
+        self.value = value
+
+    def scalar_one(self):
+        return self.value
+
+
+class _Conn:
+    def __init__(self, log):
+        self.log = log
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, stmt, params=None):
+        self.log.append((str(stmt), params))
+        return _Result(41)
+
+    async def commit(self):
+        self.log.append(("COMMIT", None))
+
+
+@pytest.mark.parametrize("dialect, expected", [
+    ("postgresql", "postgres"), ("sqlite", "inprocess"), ("", "inprocess"),
+])
+def test_auto_only_goes_cross_worker_on_postgres(monkeypatch, dialect, expected):
+    # Polling would write a row per ORM update on a single-worker SQLite
+    # install, with nobody to read it; it stays available when asked for.
+    monkeypatch.delenv("BOW_EVENT_TRANSPORT", raising=False)
+    monkeypatch.setattr(event_transport, "_database_dialect", lambda: dialect)
+    assert event_transport._select().name == expected
+    monkeypatch.setenv("BOW_EVENT_TRANSPORT", "polling")
+    assert event_transport._select().name == "polling"
+
+
+@pytest.mark.asyncio
+async def test_postgres_spills_oversized_payloads(monkeypatch):
+    log = []
+    monkeypatch.setattr(event_transport, "_engine", lambda: type("E", (), {"connect": lambda self: _Conn(log)})())
+    monkeypatch.setenv("BOW_EVENT_NOTIFY_MAX_BYTES", "512")
+    transport = event_transport.PostgresNotifyTransport()
+    small = transport._envelope("c", {"text": "hi"})
+    large = transport._envelope("c", {"text": "x" * 2000})
+
+    await transport._send([("c", small), ("c", large)])
+
+    insert, notify, commit = log
+    assert insert[0].startswith("INSERT INTO event_transport_messages") and insert[1]["p"] == large
+    notes = notify[1]["notes"]
+    assert notes[0] == small and json.loads(notes[1]) == {"o": transport.origin, "c": "c", "s": 41}
+    assert commit[0] == "COMMIT" and transport.stats()["spilled"] == 1
+
+    # Inline notifications are delivered; the sender's own are not.
+    got = []
+    transport.listen("c", got.append)
+    other = json.dumps({"o": "elsewhere", "c": "c", "p": {"n": 1}})
+    transport._on_notify(None, 1, event_transport.NOTIFY_CHANNEL, other)
+    transport._on_notify(None, 1, event_transport.NOTIFY_CHANNEL, small)
+    assert got == [{"n": 1}]
+
+
+@pytest.mark.asyncio
+async def test_owner_publishes_only_while_a_remote_watcher_is_announced(recorder):
+    q = CompletionEventQueue()
+    register_stream("c1", q)
+    try:
+        assert ("completion.watch", completion_stream._on_watch_interest) in [
+            (ch, h) for ch, hs in recorder._handlers.items() for h in hs
+        ]
+        # Registering tells early remote watchers the run is here.
+        assert recorder.sent == [("completion.ready", {"completion_id": "c1"})]
+        recorder.sent.clear()
+        await q.put(SSEEvent(event="tool.started", completion_id="c1", data={"tool_execution_id": "t1"}))
+        assert recorder.sent == []
+
+        recorder._receive({"o": "other", "c": "completion.watch", "p": {"completion_id": "c1"}})
+        # The announcement replays running tools, like a local subscribe().
+        assert [json.loads(p["json"])["event"] for _, p in recorder.sent] == ["tool.started"]
+        await q.put(SSEEvent(event="block.delta.token", completion_id="c1", data={"t": "a"}))
+        q.finish()
+        channels = {ch for ch, _ in recorder.sent}
+        assert channels == {"completion.stream:c1"}
+        assert json.loads(recorder.sent[-2][1]["json"])["data"] == {"t": "a"}
+        assert recorder.sent[-1][1] == {"done": True}
+    finally:
+        unregister_stream("c1")
+
+
+@pytest.mark.asyncio
+async def test_remote_subscription_announces_and_reads_relayed_events(recorder):
+    sub = RemoteStreamSubscription.open("c2")
+    try:
+        assert recorder.sent == [("completion.watch", {"completion_id": "c2"})]
+        # The run's owner registering (e.g. an agent worker picking up a
+        # queued run) prompts an immediate re-announcement.
+        recorder._receive({"o": "owner", "c": "completion.ready", "p": {"completion_id": "c2"}})
+        recorder._receive({"o": "owner", "c": "completion.ready", "p": {"completion_id": "other"}})
+        assert recorder.sent[1:] == [("completion.watch", {"completion_id": "c2"})]
+        event = SSEEvent(event="block.upsert", completion_id="c2", data={"block": {"id": "b"}})
+        recorder._receive({"o": "owner", "c": "completion.stream:c2", "p": {"event": event.model_dump(mode="json")}})
+        recorder._receive({"o": "owner", "c": "completion.stream:c2", "p": {"done": True}})
+
+        item = await CompletionEventQueue.next_event(sub.queue, timeout=1)
+        assert isinstance(item, SSEEvent) and item.data == {"block": {"id": "b"}}
+        assert await CompletionEventQueue.next_event(sub.queue, timeout=1) is STREAM_DONE
+    finally:
+        sub.close()
+    assert "completion.stream:c2" not in recorder._handlers
+    assert "completion.ready" not in recorder._handlers
+
+    # Without a cross-worker transport the caller keeps its DB tail.
+    event_transport.set_transport(event_transport.EventTransport())
+    assert RemoteStreamSubscription.open("c3") is None
+
+
+@pytest.mark.asyncio
+async def test_event_bus_relays_to_other_workers_handlers(recorder):
+    bus = completion_event_bus.CompletionEventBus()
+    seen = []
+
+    async def handler(message):
+        seen.append(json.loads(message))
+
+    bus.add_handler(handler)
+    try:
+        await bus.broadcast_to_report("r1", json.dumps({"event": "update_completion", "report_id": "r1"}))
+        assert recorder.sent[-1][0] == completion_event_bus.REPORT_EVENTS_CHANNEL
+        relayed = json.dumps({"event": "insert_completion", "report_id": "r2"})
+        recorder._receive({"o": "other", "c": completion_event_bus.REPORT_EVENTS_CHANNEL, "p": {"message": relayed}})
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+    finally:
+        bus.remove_handler(handler)
+    assert [m["event"] for m in seen] == ["update_completion", "insert_completion"]
+    assert completion_event_bus.REPORT_EVENTS_CHANNEL not in recorder._handlers
@@ -0,0 +1,199 @@
+"""Routing source SQL to the FAST relations that cover it.
+
+A routed query is only acceptable if the caller cannot tell it was routed: the
+same rows, the same column names, the same NULL ordering and integer
+arithmetic the Postgres source would have produced. Everything the router is
+unsure of — an uncovered table or column, a stale or row-filtered relation, a
+function it does not know, text ordering or timestamptz arithmetic on a source
+not known to collate C and run in UTC — must stay on the source. So must every
+query of a connection that has not opted into routing.
+"""
+
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from app.data_sources.fast import artifacts, query_router, rls, session_pool
+from app.data_sources.fast.fast_client import FastQueryClient, FastRelation
+
+
+@pytest.fixture(autouse=True)
+def _clean():
+    query_router.reset()
+    session_pool.clear()
+    yield
+    session_pool.clear()
+
+
+@pytest.fixture
+def artifact(tmp_path):
+    key = artifacts.new_artifact_key()
+    path = tmp_path / "orders.duckdb"
+    con = artifacts.connect_encrypted(path, key)
+    con.execute("CREATE TABLE accel_orders (id INTEGER, status VARCHAR, amount INTEGER)")
+    con.executemany(
+        "INSERT INTO accel_orders VALUES (?, ?, ?)",
+        [(1, "open", 7), (2, "open", None), (3, "closed", 4)],
+    )
+    con.close()
+    return str(path), key
+
+
+# A source whose connection opted into routing.
+POSTGRES = SimpleNamespace(pg_uri="postgresql://source", _bow_connection_fast_route_staleness=900)
+
+
+def _fast(artifact, definition="SELECT * FROM orders", refreshed_at=None, **kw):
+    path, key = artifact
+    columns = [
+        {"name": "id", "dtype": "int32"}, {"name": "status", "dtype": "string"},
+        {"name": "amount", "dtype": "int32"}, {"name": "created_at", "dtype": "timestamp[us, tz=UTC]"},
+    ]
+    rel = FastRelation(
+        name="accel_orders", artifact_path=path, artifact_key=key, columns=columns,
+        definition_sql=definition,
+        refreshed_at=refreshed_at or datetime.utcnow() - timedelta(minutes=1),
+        **kw,
+    )
+    return FastQueryClient([rel], identity_key="u1")
+
+
+def _run(sql, fast, source=POSTGRES):
+    route, reason = query_router.plan(sql, source, fast)
+    assert route is not None, reason
+    return route.client.execute_query(route.sql)
+
+
+def test_a_covered_query_is_rewritten_onto_the_relation(artifact):
+    fast = _fast(artifact)
+    route, _ = query_router.plan(
+        "SELECT o.status, sum(o.amount) AS total FROM public.orders o GROUP BY o.status", POSTGRES, fast,
+    )
+    assert route.relations == ["accel_orders"]
+    df = route.client.execute_query(route.sql).sort_values("status")
+    assert list(df["total"]) == [4, 7]
+    assert query_router.stats() == {}
+
+
+def test_postgres_integer_division_and_null_ordering_are_preserved(artifact):
+    df = _run("SELECT id, amount / 2 AS half FROM orders ORDER BY amount DESC", _fast(artifact))
+    # Postgres sorts NULL first in a descending sort and truncates 7 / 2.
+    assert list(df["id"]) == [2, 1, 3]
+    assert list(df["half"].fillna(-1)) == [-1, 3, 2]
+
+
+def test_unaliased_columns_get_the_names_postgres_gives_them(artifact):
+    df = _run("SELECT count(*), max(amount), amount + 1, Status FROM orders GROUP BY amount, status",
+              _fast(artifact))
+    assert list(df.columns) == ["count", "max", "?column?", "status"]
+
+
+@pytest.mark.parametrize("sql,reason", [
+    ("SELECT * FROM customers", "table_not_covered"),
+    ("SELECT * FROM orders JOIN customers c ON c.id = orders.id", "table_not_covered"),
+    ("SELECT now(), id FROM orders", "function:now"),
+    ("SELECT id FROM orders WHERE created_at > current_date", "function:clock"),
+    ("SELECT amount::float FROM orders", "cast:float"),
+    ("SELECT TOP 5 id FROM orders", "parse"),
+    ("DELETE FROM orders", "parse"),
+])
+def test_anything_in_doubt_stays_on_the_source(artifact, sql, reason):
+    route, why = query_router.plan(sql, POSTGRES, _fast(artifact))
+    assert route is None and why == reason
+    assert query_router.stats()[reason] == 1
+
+
+def test_only_columns_the_relation_materialized_are_routed(artifact):
+    fast = _fast(artifact, definition="SELECT id, amount FROM public.orders")
+    assert query_router.plan("SELECT sum(amount) FROM orders", POSTGRES, fast)[0] is not None
+    assert query_router.plan("SELECT status FROM orders", POSTGRES, fast)[1] == "column_not_covered"
+    assert query_router.plan("SELECT * FROM orders", POSTGRES, fast)[1] == "column_not_covered"
+
+
+def test_stale_incremental_or_row_filtered_relations_are_not_routes(artifact):
+    sql = "SELECT count(*) FROM orders"
+    stale = _fast(artifact, refreshed_at=datetime.utcnow() - timedelta(days=1))
+    incremental = _fast(artifact, incremental=True)
+    filtered = _fast(artifact, rls_filter=rls.Filter(column="status", allowed_values=["open"]))
+    for fast in (stale, incremental, filtered):
+        assert query_router.plan(sql, POSTGRES, fast) == (None, "no_candidates")
+
+
+def test_routing_is_opt_in_per_connection_and_bounded(artifact, monkeypatch):
+    fast = _fast(artifact)
+    never_asked = SimpleNamespace(pg_uri="postgresql://source")
+    off = SimpleNamespace(pg_uri="postgresql://source", _bow_connection_fast_route_staleness=0)
+    for source in (never_asked, off):
+        assert query_router.plan("SELECT 1 FROM orders", source, fast) == (None, "disabled")
+
+    greedy = SimpleNamespace(pg_uri="postgresql://source", _bow_connection_fast_route_staleness=86400)
+    monkeypatch.setenv("BOW_FAST_ROUTE_MAX_STALENESS_SECONDS", "30")
+    assert query_router.max_staleness_seconds(greedy) == 30
+    assert query_router.plan("SELECT 1 FROM orders", greedy, fast) == (None, "no_candidates")  # a minute old
+
+
+def test_other_dialects_stay_on_the_source(artifact):
+    fast = _fast(artifact)
+    mysql = SimpleNamespace(mysql_uri="mysql://source")
+    assert query_router.plan("SELECT 1 FROM orders", mysql, fast) == (None, "dialect")
+
+
+@pytest.mark.parametrize("definition,expected", [
+    ("SELECT * FROM public.orders;", ("public", "orders", None)),
+    ("select id, amount as amount from orders", ("", "orders", frozenset({"id", "amount"}))),
+    ("SELECT id AS order_id FROM orders", None),
+    ("SELECT * FROM orders WHERE status = 'open'", None),
+    ("SELECT status, count(*) FROM orders GROUP BY status", None),
+])
+def test_only_bare_projections_cover_a_source_table(definition, expected):
+    assert query_router.coverage(definition) == expected
+
+
+class _Source:
+    """A Postgres source that reports (collates byte-wise, runs in UTC)."""
+
+    pg_uri = "postgresql://source"
+    _bow_connection_fast_route_staleness = 900
+
+    def __init__(self, collates_c, utc):
+        self._bow_connection_id = f"src-{collates_c}-{utc}"  # settings are cached per connection
+        self.row = (collates_c, utc)
+        self.reads = 0
+
+    @contextmanager
+    def connect(self):
+        self.reads += 1
+        yield SimpleNamespace(execute=lambda sql: SimpleNamespace(fetchone=lambda: self.row))
+
+
+@pytest.mark.parametrize("sql,reason", [
+    ("SELECT status FROM orders ORDER BY status", "collation"),
+    ("SELECT status AS s FROM orders ORDER BY 1 DESC", "collation"),
+    ("SELECT min(status) FROM orders", "collation"),
+    ("SELECT id FROM orders WHERE status > 'm'", "collation"),
+    ("SELECT id, row_number() OVER (ORDER BY upper(status)) AS n FROM orders", "collation"),
+    ("SELECT date_trunc('day', created_at) AS d FROM orders", "timezone"),
+    ("SELECT id FROM orders WHERE created_at >= '2026-01-01'", "timezone"),
+    ("SELECT CAST(created_at AS DATE) AS d FROM orders", "timezone"),
+    ("SELECT id FROM orders WHERE created_at IN ('2026-01-01 00:00')", "timezone"),
+])
+def test_collation_and_time_zone_dependent_queries_need_a_c_utc_source(artifact, sql, reason):
+    fast = _fast(artifact)
+    assert query_router.plan(sql, POSTGRES, fast) == (None, reason)  # settings unreadable
+    assert query_router.plan(sql, _Source(collates_c=reason != "collation", utc=reason != "timezone"),
+                             fast) == (None, reason)
+    assert query_router.plan(sql, _Source(collates_c=True, utc=True), fast)[0] is not None
+
+
+def test_settings_are_read_once_and_only_when_a_query_depends_on_them(artifact):
+    fast = _fast(artifact)
+    source = _Source(collates_c=True, utc=True)
+    for sql in ("SELECT id FROM orders WHERE amount > 3 ORDER BY amount", "SELECT max(created_at) FROM orders"):
+        assert query_router.plan(sql, source, fast)[0] is not None
+    assert source.reads == 0
+    assert list(_run("SELECT status FROM orders ORDER BY status, id", fast, source)["status"]) == \
+        ["closed", "open", "open"]
+    assert query_router.plan("SELECT min(status) FROM orders", source, fast)[0] is not None
+    assert source.reads == 1
@@ -0,0 +1,140 @@
+"""Pooled FAST serving sessions.
+
+Reuse is only worth having if it cannot widen what a query sees. The tests
+below pin the two halves of that: a burst of reads against one catalog builds
+the session once, and nothing a query does — a write, a different identity, a
+policy edit, a refresh — lets a pooled session serve rows it would not have
+served fresh.
+"""
+
+import duckdb
+import pytest
+
+from app.data_sources.fast import artifacts, rls, session_pool
+from app.data_sources.fast.fast_client import FastQueryClient, FastRelation
+
+
+@pytest.fixture(autouse=True)
+def _clean_pool():
+    session_pool.clear()
+    yield
+    session_pool.clear()
+
+
+@pytest.fixture
+def artifact(tmp_path):
+    key = artifacts.new_artifact_key()
+    path = tmp_path / "sales.duckdb"
+    con = artifacts.connect_encrypted(path, key)
+    con.execute("CREATE TABLE sales (region VARCHAR, amount INTEGER)")
+    con.executemany(
+        "INSERT INTO sales VALUES (?, ?)",
+        [("EMEA", 10), ("EMEA", 20), ("APAC", 30), ("AMER", 40)],
+    )
+    con.close()
+    return str(path), key
+
+
+def _client(artifact, rls_filter=None, identity_key="u1"):
+    path, key = artifact
+    return FastQueryClient(
+        [FastRelation(name="sales", artifact_path=path, artifact_key=key,
+                      columns=[{"name": "region"}, {"name": "amount"}],
+                      rls_filter=rls_filter)],
+        identity_key=identity_key,
+    )
+
+
+def _count(client) -> int:
+    return int(client.execute_query("SELECT COUNT(*) AS n FROM sales").iloc[0]["n"])
+
+
+def test_a_burst_of_reads_builds_the_session_once(artifact):
+    f = rls.Filter(column="region", allowed_values=["EMEA"])
+    for _ in range(6):
+        assert _count(_client(artifact, f)) == 2
+    s = session_pool.stats()
+    assert s["misses"] == 1
+    assert s["hits"] == 5
+    assert s["idle_sessions"] == 1
+    assert s["setup_ms_total"] > 0
+
+
+def test_a_pooled_session_is_still_locked_down(artifact):
+    client = _client(artifact)
+    _count(client)
+    with pytest.raises(duckdb.PermissionException, match="file system operations are disabled"):
+        client.execute_query("SELECT * FROM read_csv_auto('/etc/passwd')")
+    assert session_pool.stats()["hits"] == 1
+
+
+def test_a_write_runs_unpooled_and_cannot_poison_the_next_reader(artifact):
+    f = rls.Filter(column="region", allowed_values=["EMEA"])
+    client = _client(artifact, f)
+    assert _count(client) == 2
+    client.execute_query("INSERT INTO sales VALUES ('EMEA', 99)")
+    client.execute_query("SELECT 1; DROP TABLE sales")
+    assert _count(client) == 2
+    assert session_pool.stats()["unpooled"] == 2
+
+
+def test_sessions_are_never_shared_between_identities(artifact):
+    """Even identical compiled filters get their own session per person."""
+    f = rls.Filter(column="region", allowed_values=["EMEA"])
+    _count(_client(artifact, f, identity_key="alice"))
+    _count(_client(artifact, f, identity_key="bob"))
+    s = session_pool.stats()
+    assert s["misses"] == 2
+    assert s["hits"] == 0
+
+
+def test_a_filtered_catalog_without_an_identity_is_not_pooled(artifact):
+    f = rls.Filter(column="region", allowed_values=["EMEA"])
+    assert _count(_client(artifact, f, identity_key=None)) == 2
+    s = session_pool.stats()
+    assert s["idle_sessions"] == 0
+    assert s["unpooled"] == 1
+
+
+def test_a_policy_change_misses_rather_than_serving_the_old_slice(artifact):
+    assert _count(_client(artifact, rls.Filter(column="region", allowed_values=["EMEA"]))) == 2
+    assert _count(_client(artifact, rls.Filter(column="region", allowed_values=["APAC"]))) == 1
+    assert _count(_client(artifact, rls.Filter(column="region", deny_all=True))) == 0
+    assert session_pool.stats()["misses"] == 3
+
+
+def test_invalidating_an_artifact_closes_its_idle_sessions(artifact):
+    _count(_client(artifact))
+    assert session_pool.stats()["idle_sessions"] == 1
+    assert session_pool.invalidate_artifact(artifact[0]) == 1
+    assert session_pool.stats()["idle_sessions"] == 0
+
+
+def test_idle_sessions_stay_within_the_session_cap(artifact, monkeypatch):
+    monkeypatch.setenv("BOW_FAST_SESSION_POOL_SIZE", "2")
+    for who in ("a", "b", "c"):
+        _count(_client(artifact, rls.Filter(column="region", allowed_values=["EMEA"]),
+                       identity_key=who))
+    s = session_pool.stats()
+    assert s["idle_sessions"] == 2
+    assert s["evictions"] == 1
+
+
+def test_a_zero_budget_disables_pooling(artifact, monkeypatch):
+    monkeypatch.setenv("BOW_FAST_SESSION_POOL_BYTES", "0")
+    assert _count(_client(artifact)) == 4
+    s = session_pool.stats()
+    assert s["idle_sessions"] == 0
+    assert s["hits"] == s["misses"] == 0
+
+
+@pytest.mark.parametrize("sql, expected", [
+    ("SELECT 1", True),
+    ("WITH t AS (SELECT 1) SELECT * FROM t", True),
+    ("SELECT 1; DROP TABLE sales", False),
+    ("CREATE TABLE x AS SELECT 1", False),
+    ("SET enable_external_access = true", False),
+    ("not sql at all", False),
+])
+def test_only_plain_selects_count_as_read_only(sql, expected):
+    assert session_pool.is_read_only(sql) is expected
@@ -0,0 +1,95 @@
+"""The per-build inverted index ranks exactly like the scorer it replaces.
+
+`instruction_index` exists only to make `_load_from_build` cheaper; if it ever
+disagreed with `_combined_score` the agent would silently load different
+instructions. These tests score a synthetic corpus both ways and require the
+same floats — not approximately equal ones — for every query.
+"""
+
+import random
+from types import SimpleNamespace
+
+import pytest
+
+from app.ai.context.builders import instruction_index
+from app.ai.context.builders.instruction_context_builder import InstructionContextBuilder
+
+VOCAB = [
+    "revenue", "revenues", "churn", "churned", "customer", "customers", "invoice",
+    "invoiceline", "billing", "country", "cancel", "cancelling", "cancellation",
+    "order", "orders", "refund", "margin", "gross", "net", "arr", "mrr", "fiscal",
+    "quarter", "region", "emea", "sales", "pipeline", "matches", "box", "company",
+    "companies", "dim_customer", "fct_orders", "the", "by", "of", "x1", "q4",
+]
+
+
+@pytest.fixture(autouse=True)
+def _clean():
+    instruction_index.reset()
+    yield
+    instruction_index.reset()
+
+
+def _builder() -> InstructionContextBuilder:
+    return InstructionContextBuilder(None, SimpleNamespace(id="org"))
+
+
+def _corpus(n, seed=7):
+    rnd = random.Random(seed)
+    docs = []
+    for i in range(n):
+        body = " ".join(rnd.choice(VOCAB) for _ in range(rnd.randint(0, 30)))
+        title = " ".join(rnd.choice(VOCAB) for _ in range(rnd.randint(0, 3)))
+        refs = rnd.choice(["", "fct_orders.amount", "dim_customer", "invoices"])
+        priority = " ".join(p for p in (title, refs) if p)
+        docs.append((f"v{i}", body, priority))
+    return docs
+
+
+@pytest.mark.parametrize("query", [
+    "revenue by country",
+    "churned customers last quarter",
+    "cancellations and refunds",
+    "invoice",
+    "gross margin emea q4",
+    "companies with boxes",
+    "xyz nothing matches zz",
+])
+def test_index_scores_equal_the_scorer(query):
+    b = _builder()
+    docs = _corpus(400)
+    keywords = b._extract_keywords(query)
+    index = instruction_index.for_build("b1", b._extract_keywords, b._stem)
+    scores = index.score(keywords, docs)
+    for doc_id, body, priority in docs:
+        assert scores.get(doc_id, 0.0) == b._combined_score(body, priority, keywords), doc_id
+
+
+def test_text_is_tokenized_once_per_build():
+    b = _builder()
+    docs = _corpus(50)
+    for query in ("revenue", "churn", "orders by region"):
+        instruction_index.for_build("b1", b._extract_keywords, b._stem).score(
+            b._extract_keywords(query), docs
+        )
+    s = instruction_index.stats()
+    assert s["docs_indexed"] == 50
+    assert (s["misses"], s["hits"]) == (1, 2)
+
+
+def test_a_relabelled_instruction_is_rescored_not_served_stale():
+    b = _builder()
+    kws = b._extract_keywords("refund")
+    index = instruction_index.for_build("b1", b._extract_keywords, b._stem)
+    assert index.score(kws, [("v1", "how we report", "finance")]) == {}
+    assert index.score(kws, [("v1", "how we report", "finance refund")])["v1"] > 0
+
+
+def test_builds_are_evicted_least_recently_used_first(monkeypatch):
+    monkeypatch.setenv("BOW_INSTRUCTION_INDEX_BUILDS", "2")
+    b = _builder()
+    first = instruction_index.for_build("b1", b._extract_keywords, b._stem)
+    instruction_index.for_build("b2", b._extract_keywords, b._stem)
+    instruction_index.for_build("b3", b._extract_keywords, b._stem)
+    assert instruction_index.stats()["builds"] == 2
+    assert instruction_index.for_build("b1", b._extract_keywords, b._stem) is not first
@@ -0,0 +1,114 @@
+"""Provider SDK clients are shared across `LLM` instances.
+
+Pinned here: wrappers built for the same provider, endpoint and credentials
+share one SDK client (and so one connection pool), different credentials
+never do, async clients never cross event loops, and the transport counters
+show requests riding an existing connection instead of a new handshake.
+"""
+
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.ai.llm.clients import client_pool
+from app.ai.llm.clients.anthropic_client import Anthropic
+from app.ai.llm.clients.bedrock_client import BedrockClient
+from app.ai.llm.clients.openai_client import OpenAi
+
+
+@pytest.fixture(autouse=True)
+def _fresh_pool():
+    client_pool.reset()
+    yield
+    client_pool.reset()
+
+
+def _in_loop(fn):
+    loop = asyncio.new_event_loop()
+    try:
+        async def _call():
+            return fn()
+        return loop.run_until_complete(_call())
+    finally:
+        loop.close()
+
+
+def test_same_provider_and_key_share_one_sdk_client():
+    def _build():
+        a = OpenAi(api_key="key-a", base_url="http://localhost:9999/v1", temperature=0.1)
+        b = OpenAi(api_key="key-a", base_url="http://localhost:9999/v1", temperature=0.9)
+        c = OpenAi(api_key="key-b", base_url="http://localhost:9999/v1")
+        return a, b, c
+
+    a, b, c = _in_loop(_build)
+    assert a.async_client is b.async_client and a.client is b.client
+    assert c.async_client is not a.async_client and c.client is not a.client
+    # Per-model wrapper state is still the wrapper's own.
+    assert (a.temperature, b.temperature) == (0.1, 0.9)
+    assert client_pool.stats()["hits"] == 2
+
+
+def test_async_clients_are_not_shared_across_event_loops():
+    first = _in_loop(lambda: Anthropic(api_key="k"))
+    second = _in_loop(lambda: Anthropic(api_key="k"))
+    assert first.client is second.client
+    assert first.async_client is not second.async_client
+
+    # Built with no loop running: usable anywhere, so never pooled.
+    loose = Anthropic(api_key="k")
+    assert loose.async_client is not first.async_client
+    assert client_pool.stats()["unpooled"] == 1
+
+
+def test_bedrock_clients_are_pooled_per_credentials():
+    a = BedrockClient(region="eu-west-1", auth_mode="api_key", api_key="key-a")
+    b = BedrockClient(region="eu-west-1", auth_mode="api_key", api_key="key-a")
+    c = BedrockClient(region="eu-west-1", auth_mode="api_key", api_key="key-b")
+    assert a.client is b.client
+    assert c.client is not a.client
+
+
+def test_the_pool_is_bounded(monkeypatch):
+    monkeypatch.setenv("BOW_LLM_CLIENT_POOL_SIZE", "2")
+    for i in range(4):
+        OpenAi(api_key=f"key-{i}", base_url="http://localhost:9999/v1")
+    stats = client_pool.stats()
+    assert stats["clients"] == 2 and stats["evictions"] >= 2
+
+
+class _Ok(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, *args):
+        pass
+
+
+def test_requests_reuse_the_pooled_connection():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Ok)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/"
+    try:
+        async def _three():
+            client = client_pool.async_http_client()
+            try:
+                for _ in range(3):
+                    assert (await client.get(url)).status_code == 200
+            finally:
+                await client.aclose()
+
+        asyncio.run(_three())
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    stats = client_pool.stats()
+    assert (stats["requests"], stats["connections_opened"], stats["reused_requests"]) == (3, 1, 2)
+    assert stats["tls_handshakes"] == 0
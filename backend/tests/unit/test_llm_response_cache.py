@@ -0,0 +1,162 @@
+"""Opted-in auxiliary LLM calls are answered from the response cache.
+
+Pinned here: a byte-identical call is served without reaching the provider
+and leaves a zero-cost ``cache_hit`` usage record; the key covers the model's
+temperature, so changing it never replays an old answer; a response the call
+site refuses is not stored (the Judge's parse-retry must not replay its own
+failure); streaming calls replay the stored payload; expired entries are
+never served and purging is scoped to one organization.
+"""
+
+import asyncio
+import types
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.ai.llm import response_cache
+from app.ai.llm.llm import LLM
+from app.models.llm_response_cache import LLMResponseCacheEntry
+
+
+class _FakeClient:
+    def __init__(self, reply="Quarterly Revenue", temperature=None):
+        self.reply = reply
+        self.temperature = temperature
+        self.calls = 0
+
+    def inference(self, model_id, prompt, images=None):
+        self.calls += 1
+        return self.reply
+
+    async def inference_stream(self, model_id, prompt, images=None):
+        self.calls += 1
+        for part in ('{"instructions": ', '[{"title": "T"}]}'):
+            yield part
+
+
+def _llm(client, org="org-1"):
+    llm = LLM.__new__(LLM)
+    llm.model = types.SimpleNamespace(id="model-row-1", model_id="small-1", organization_id=org)
+    llm.model_id = "small-1"
+    llm.provider = "custom"
+    llm.client = client
+    llm._organization_id = org
+    llm._pii_loaded, llm._pii_redactor = True, None
+    llm._usage_limit_context = None
+    llm._loop = None
+    llm.records = []
+    llm._schedule_usage_record = lambda **kw: llm.records.append(kw)
+    return llm
+
+
+@pytest.fixture
+def loop(tmp_path, monkeypatch):
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'rc.db'}")
+
+    async def _setup():
+        async with engine.begin() as conn:
+            await conn.run_sync(LLMResponseCacheEntry.__table__.create)
+
+    loop.run_until_complete(_setup())
+    monkeypatch.setattr(response_cache, "_session_factory", async_sessionmaker(engine, expire_on_commit=False))
+    response_cache.reset()
+    yield loop
+    loop.run_until_complete(engine.dispose())
+    loop.close()
+
+
+def _infer(loop, llm, prompt="Title for: revenue by quarter", **kw):
+    kw.setdefault("usage_scope", "report.title")
+    kw.setdefault("cache_response", True)
+
+    async def _call():
+        # Through a worker thread, as every call site does.
+        llm._loop = asyncio.get_running_loop()
+        result = await asyncio.to_thread(llm.inference, prompt, **kw)
+        await asyncio.sleep(0.05)  # let the fire-and-forget write land
+        return result
+    return loop.run_until_complete(_call())
+
+
+def test_a_repeated_call_is_served_from_the_cache_at_zero_cost(loop):
+    client = _FakeClient()
+    llm = _llm(client)
+    assert _infer(loop, llm) == "Quarterly Revenue"
+    assert _infer(loop, llm) == "Quarterly Revenue"
+    assert client.calls == 1
+
+    hit = llm.records[-1]
+    assert hit["cache_hit"] is True
+    assert (hit["prompt_tokens"], hit["completion_tokens"], hit["scope"]) == (0, 0, "report.title")
+    assert not llm.records[0].get("cache_hit")
+    assert response_cache.stats()["hits"] == 1
+
+    # Not opted in: always the provider.
+    _infer(loop, llm, cache_response=False)
+    assert client.calls == 2
+
+
+def test_temperature_and_organization_are_part_of_the_key(loop):
+    client = _FakeClient()
+    _infer(loop, _llm(client))
+    _infer(loop, _llm(client, org="org-2"))
+    client.temperature = 0.7
+    _infer(loop, _llm(client))
+    assert client.calls == 3
+
+
+def test_a_refused_response_is_not_stored(loop):
+    client = _FakeClient(reply="not json")
+    llm = _llm(client)
+    accept = lambda r: r.startswith("{")
+    _infer(loop, llm, usage_scope="judge.test_case", cache_accept=accept)
+    _infer(loop, llm, usage_scope="judge.test_case", cache_accept=accept)
+    assert client.calls == 2
+    assert response_cache.stats()["rejected"] == 2
+
+
+def test_streaming_calls_replay_the_stored_payload(loop):
+    client = _FakeClient()
+    llm = _llm(client)
+
+    async def _stream():
+        out = []
+        async for chunk in llm.inference_stream("suggest", usage_scope="suggest_instructions.training",
+                                                cache_response=True):
+            out.append(chunk)
+        await asyncio.sleep(0.05)
+        return "".join(out)
+
+    first = loop.run_until_complete(_stream())
+    again = loop.run_until_complete(_stream())
+    assert again == first == '{"instructions": [{"title": "T"}]}'
+    assert client.calls == 1
+
+
+def test_expired_entries_are_not_served_and_purge_is_org_scoped(loop):
+    client = _FakeClient()
+    _infer(loop, _llm(client))
+    _infer(loop, _llm(client, org="org-2"))
+
+    async def _expire_and_purge():
+        async with response_cache._sessions()() as session:
+            await session.execute(
+                text("UPDATE llm_response_cache_entries SET expires_at = :t WHERE organization_id = 'org-2'"),
+                {"t": datetime.utcnow() - timedelta(seconds=1)},
+            )
+            await session.commit()
+        async with response_cache._sessions()() as session:
+            deleted = await response_cache.purge(session, "org-1", scope="judge.test_case")
+            deleted += await response_cache.purge(session, "org-1")
+            await session.commit()
+        return deleted, await response_cache.prune_expired()
+
+    assert loop.run_until_complete(_expire_and_purge()) == (1, 1)
+    _infer(loop, _llm(client))
+    _infer(loop, _llm(client, org="org-2"))
+    assert client.calls == 4
@@ -8,7 +8,9 @@ Contract under test:
   * an invalid custom regex is rejected at validation time and never crashes
     redaction at runtime,
   * the match summary carries no raw matched values (no PII in telemetry),
-  * a disabled / empty config yields no redactor (cheap no-op path).
+  * a disabled / empty config yields no redactor (cheap no-op path),
+  * the prefiltered, memoized engine attributes hits per rule, keeps rule
+    priority where matches overlap and leaves no detectable PII behind.
 """
 
 import re
@@ -16,6 +18,7 @@ import re
 import pytest
 
 from app.ai.llm.pii.builtin_rules import BUILTIN_PII_RULES, builtin_rule_ids
+from app.ai.llm.pii import redactor as pii_redactor
 from app.ai.llm.pii.redactor import (
     PiiPromptBlockedError,
     build_redactor,
@@ -246,3 +249,86 @@ def test_redact_deep_masks_nested_rows_info_and_stats():
     assert "a@b.com" not in s and "c@d.io" not in s
     # a non-PII key/value is preserved
     assert out["data"]["info"]["column_info"]["Email"]["top"] == "[REDACTED_EMAIL]"
+
+
+# --- single-pass engine ------------------------------------------------------
+
+def _only(*custom, mode="replace"):
+    return build_redactor({
+        "enabled": True, "mode": mode, "custom_rules": list(custom),
+        "builtin_overrides": {rid: {"enabled": False} for rid in builtin_rule_ids()},
+    })
+
+
+def test_repeated_long_message_is_served_from_the_memo():
+    pii_redactor.reset()
+    redactor = build_redactor({"enabled": True, "mode": "replace"})
+    text = "contact jane@acme.com about the refund. " + "revenue by region " * 40
+    first = redactor.scan(text)
+    again = redactor.scan(text)
+    assert again.text == first.text and "jane@acme.com" not in again.text
+    assert again.matches == first.matches
+    assert pii_redactor.stats()["memo_hits"] == 1
+
+    # A different policy never reuses another policy's result.
+    masked = build_redactor({"enabled": True, "mode": "replace",
+                             "builtin_overrides": {"email": {"replacement": "<EMAIL>"}}})
+    assert "<EMAIL>" in masked.scan(text).text
+    assert pii_redactor.stats()["memo_hits"] == 1
+
+
+def test_text_without_any_rule_literal_skips_the_regex_pass():
+    pii_redactor.reset()
+    redactor = _only({"id": "emp", "name": "Employee", "patterns": [r"EMP-\d{4}"], "replacement": "[EMP]"})
+    assert redactor.scan("nothing to see here").matches == []
+    assert pii_redactor.stats()["prefiltered"] == 1
+    assert redactor.scan("ticket emp-1234").text == "ticket [EMP]"
+
+
+def test_hits_are_counted_per_rule_across_its_patterns():
+    redactor = _only(
+        {"id": "emp", "name": "Employee", "patterns": [r"EMP-\d{4}", r"E\d{6}"], "replacement": "[EMP]"},
+        {"id": "ord", "name": "Order", "patterns": [r"ORD-\d{5}"], "replacement": "[ORD]"},
+    )
+    result = redactor.scan("EMP-1234 and E123456 placed ORD-00042, EMP-9999 too")
+    assert result.text == "[EMP] and [EMP] placed [ORD], [EMP] too"
+    assert {m["id"]: m["count"] for m in result.matches} == {"emp": 3, "ord": 1}
+
+
+def test_backreferences_and_replacement_templates_work():
+    redactor = _only(
+        {"id": "rep", "name": "Repeat", "patterns": [r"\b(\w{3})-\1\b"], "replacement": "[R]"},
+        {"id": "acct", "name": "Account", "patterns": [r"ACCT-(?P<bank>\d{2})\d{6}"], "replacement": r"ACCT-\g<bank>******"},
+    )
+    assert redactor.scan("code abc-abc vs abc-xyz").text == "code [R] vs abc-xyz"
+    assert redactor.scan("pay ACCT-12345678 now").text == "pay ACCT-12****** now"
+
+
+@pytest.mark.parametrize("text", ["paid with +4111111111111111 yesterday", "ref 1(4111111111 111111"])
+def test_overlapping_rules_resolve_by_rule_priority(text):
+    # Both inputs also read as a phone number starting before the card; the
+    # card rule runs first and must still take the whole card.
+    redactor = build_redactor({"enabled": True, "mode": "replace"})
+    result = redactor.scan(text)
+    assert "4111" not in result.text and not re.search(r"\d{4}", result.text)
+    assert "[REDACTED_CC]" in result.text
+    assert {m["id"] for m in result.matches} == {"credit_card"}
+
+
+def test_a_match_exposed_by_a_replacement_is_redacted_too():
+    # The email token's closing bracket puts a word boundary in front of the
+    # SSN that was glued to it.
+    redactor = build_redactor({"enabled": True, "mode": "replace"})
+    out = redactor.scan("jane.roe@example.com078-05-1120").text
+    assert "078-05-1120" not in out and "example.com" not in out
+    assert redactor.scan(out).matches == []
+
+
+def test_a_later_pass_leaves_earlier_tokens_alone():
+    redactor = build_redactor({
+        "enabled": True, "mode": "replace",
+        "custom_rules": [{"id": "word", "name": "Word", "patterns": [r"REDACTED\w*"], "replacement": "[W]"}],
+    })
+    result = redactor.scan("mail jane@acme.com, REDACTED_NOTE here")
+    assert result.text == "mail [REDACTED_EMAIL], [W] here"
+    assert {m["id"]: m["count"] for m in result.matches} == {"email": 1, "word": 1}
@@ -0,0 +1,176 @@
+"""Provider-neutral prompt-cache breakpoints.
+
+The planner marks the stable prefix once (`CacheBreakpoints`); each client
+turns the marks into its own mechanism and reports cache reads and writes on
+the usage event. Pinned here: Bedrock's Converse cache points (and the
+fallback when a model refuses them), OpenAI's prompt_cache_key, Gemini's
+explicit context cache, and the per-provider cost of cached tokens.
+"""
+import asyncio
+from types import SimpleNamespace
+
+from app.ai.llm.clients import bedrock_client, google_client
+from app.ai.llm.clients.bedrock_client import BedrockClient
+from app.ai.llm.clients.google_client import Google
+from app.ai.llm.clients.openai_responses_client import OpenAIResponsesClient
+from app.ai.llm.types import CacheBreakpoints, Message, ToolSpec, UsageEvent
+from app.services.llm_usage_recorder import LLMUsageRecorderService
+
+_TOOLS = [ToolSpec(name="run_query", description="Run SQL", input_schema={"type": "object", "properties": {}})]
+_MESSAGES = [
+    Message(role="user", content="static context"),
+    Message(role="assistant", content=[{"type": "tool_use", "id": "c0", "name": "run_query", "input": {}}]),
+    Message(role="user", content=[{"type": "tool_result", "tool_use_id": "c0", "content": "3 rows"}]),
+]
+
+
+def _drain(agen):
+    async def _run():
+        return [evt async for evt in agen]
+    return asyncio.run(_run())
+
+
+def _usage(events):
+    return next(e for e in events if isinstance(e, UsageEvent))
+
+
+class _Converse:
+    def __init__(self, reject_cache_points=False):
+        self.calls = []
+        self.reject_cache_points = reject_cache_points
+
+    def converse_stream(self, **kwargs):
+        self.calls.append(kwargs)
+        if self.reject_cache_points and "cachePoint" in str(kwargs):
+            err = Exception("ValidationException: prompt caching is not supported for this model")
+            err.response = {"Error": {"Code": "ValidationException"}}
+            raise err
+        usage = {"inputTokens": 40, "outputTokens": 5, "cacheReadInputTokens": 9000, "cacheWriteInputTokens": 120}
+        return {"stream": [{"messageStop": {"stopReason": "end_turn"}}, {"metadata": {"usage": usage}}]}
+
+
+def _bedrock(converse):
+    client = BedrockClient.__new__(BedrockClient)
+    client._last_usage = None
+    client.client = converse
+    return client
+
+
+def test_bedrock_places_cache_points_and_reports_cache_usage():
+    converse = _Converse()
+    events = _drain(_bedrock(converse).inference_stream_v2(
+        model_id="us.anthropic.claude-sonnet-4-20250514-v1:0",
+        messages=_MESSAGES, system="SYSTEM", tools=_TOOLS,
+        cache=CacheBreakpoints.for_prefix("SYSTEM", _TOOLS),
+    ))
+    sent = converse.calls[0]
+    assert sent["system"][-1] == {"cachePoint": {"type": "default"}}
+    assert sent["toolConfig"]["tools"][-1] == {"cachePoint": {"type": "default"}}
+    # On the last settled turn only, never the newest one.
+    assert sent["messages"][-2]["content"][-1] == {"cachePoint": {"type": "default"}}
+    assert "cachePoint" not in str(sent["messages"][-1])
+    usage = _usage(events)
+    assert (usage.input_tokens, usage.cache_read_tokens, usage.cache_creation_tokens) == (40, 9000, 120)
+
+
+def test_bedrock_models_without_prompt_caching_get_no_cache_points():
+    converse = _Converse()
+    _drain(_bedrock(converse).inference_stream_v2(
+        model_id="anthropic.claude-3-5-sonnet-20240620-v1:0",
+        messages=_MESSAGES, system="SYSTEM", tools=_TOOLS, cache=CacheBreakpoints(),
+    ))
+    assert "cachePoint" not in str(converse.calls[0])
+
+    # A model that still refuses them is retried without, and remembered.
+    model = "amazon.nova-lite-v1:0"
+    refusing = _Converse(reject_cache_points=True)
+    try:
+        _drain(_bedrock(refusing).inference_stream_v2(
+            model_id=model, messages=_MESSAGES, system="SYSTEM", cache=CacheBreakpoints(),
+        ))
+        assert len(refusing.calls) == 2 and "cachePoint" not in str(refusing.calls[1])
+        assert bedrock_client._cache_point_targets(model) == frozenset()
+    finally:
+        bedrock_client._cache_point_rejected.discard(model)
+
+
+def test_openai_gets_a_prompt_cache_key_and_azure_does_not():
+    sent = []
+
+    class _Responses:
+        async def create(self, **kwargs):
+            sent.append(kwargs)
+
+            async def _empty():
+                return
+                yield
+            return _empty()
+
+    for base_url in (None, "https://example.openai.azure.com/openai/v1/"):
+        client = OpenAIResponsesClient.__new__(OpenAIResponsesClient)
+        client._last_usage = None
+        client.enable_web_search = False
+        client.base_url = base_url
+        client.async_client = SimpleNamespace(responses=_Responses())
+        _drain(client.inference_stream_v2(
+            model_id="gpt-5", messages=_MESSAGES, system="SYSTEM", tools=_TOOLS,
+            cache=CacheBreakpoints.for_prefix("SYSTEM", _TOOLS),
+        ))
+    assert sent[0]["prompt_cache_key"] == CacheBreakpoints.for_prefix("SYSTEM", _TOOLS).key
+    assert "prompt_cache_key" not in sent[1]
+    # The key follows the prefix, not the run.
+    assert CacheBreakpoints.for_prefix("SYSTEM v2", _TOOLS).key != sent[0]["prompt_cache_key"]
+
+
+def test_gemini_reuses_one_context_cache_for_the_prefix(monkeypatch):
+    monkeypatch.setenv("BOW_GEMINI_CONTEXT_CACHE_MIN_TOKENS", "1")
+    google_client._context_caches.clear()
+    created, configs = [], []
+
+    def _create(model, config):
+        created.append(config)
+        return SimpleNamespace(name="cachedContents/abc", usage_metadata=SimpleNamespace(total_token_count=30000))
+
+    def _stream(model, contents, config):
+        configs.append(config)
+        usage = SimpleNamespace(prompt_token_count=30100, candidates_token_count=7, cached_content_token_count=30000)
+        return [SimpleNamespace(usage_metadata=usage, candidates=[])]
+
+    client = Google.__new__(Google)
+    client._last_usage = None
+    client.temperature = 0.3
+    client.credentials = "digest"
+    client.client = SimpleNamespace(
+        caches=SimpleNamespace(create=_create), models=SimpleNamespace(generate_content_stream=_stream),
+    )
+    try:
+        usages = [
+            _usage(_drain(client.inference_stream_v2(
+                model_id="gemini-2.5-pro", messages=_MESSAGES, system="SYSTEM " * 100, tools=_TOOLS,
+                cache=CacheBreakpoints(),
+            )))
+            for _ in range(2)
+        ]
+    finally:
+        google_client._context_caches.clear()
+
+    assert len(created) == 1 and created[0].system_instruction.startswith("SYSTEM")
+    for config in configs:
+        assert config.cached_content == "cachedContents/abc"
+        assert config.system_instruction is None and config.tools is None
+    assert [(u.cache_read_tokens, u.cache_creation_tokens) for u in usages] == [(30000, 30000), (30000, 0)]
+
+
+def test_cached_tokens_are_priced_per_provider():
+    model = SimpleNamespace(get_input_cost_rate=lambda: 1.0)
+    cost = LLMUsageRecorderService._calc_input_cost
+    # Bedrock reports cache reads and writes beside inputTokens, like Anthropic.
+    assert round(cost(model, 1_000_000, 1_000_000, 1_000_000, "bedrock"), 4) == round(1 + 0.1 + 1.25, 4)
+    assert round(cost(model, 1_000_000, 1_000_000, 0, "anthropic"), 4) == 1.1
+    # OpenAI and Gemini count cache reads inside prompt_tokens.
+    assert round(cost(model, 1_000_000, 500_000, 0, "openai"), 4) == 0.75
+    assert round(cost(model, 1_000_000, 1_000_000, 0, "google"), 4) == 0.25
+    # Providers without cache pricing pay full rate.
+    assert cost(model, 1_000_000, 1_000_000, 1_000_000, "custom") == 1.0
+    assert LLMUsageRecorderService.uncached_prompt_tokens("google", 1000, 800) == 200
+    assert LLMUsageRecorderService.uncached_prompt_tokens("bedrock", 1000, 800) == 1000
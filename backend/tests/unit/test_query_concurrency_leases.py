@@ -0,0 +1,230 @@
+"""The cluster-wide concurrency cap holds across replicas and survives crashes.
+
+With BOW_QUERY_CONCURRENCY_SCOPE=global each query also takes a lease row in
+the app DB. Another replica is simulated by writing leases directly through
+the service, the way a different process would. Pinned here: a slot held
+elsewhere makes this replica wait (and fail legibly past the budget), the
+queue is first come first served, a dead worker's lease is reclaimed, a live
+one is kept alive for as long as its query runs, paths that carry no usage
+context (step reruns, widgets, exports) take one too, and an unreachable lease
+table degrades to the per-replica cap instead of failing queries.
+"""
+
+import asyncio
+import re
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+# Register every model so the lease's FK to connections resolves.
+_env_src = (Path(__file__).resolve().parents[2] / "alembic" / "env.py").read_text()
+for _stmt in re.findall(r"^from app\.models\S* import \([^)]*\)|^from app\.models[^\n]+", _env_src, re.M):
+    exec(_stmt)  # noqa: S102 — test-only, mirrors env.py verbatim
+
+from app.data_sources import query_concurrency as qcc
+from app.data_sources.query_concurrency import ConnectionBusyError
+from app.models.base import Base
+from app.models.query_concurrency_lease import QueryConcurrencyLease
+from app.services import query_lease_service as leases
+
+CONN = "conn-1"
+
+
+class LoopContext:
+    """The bits of `query_concurrency._LeaseLoop` the lease path uses: a
+    session maker and `run_blocking` onto an event loop in another thread."""
+
+    def __init__(self, session_maker, loop):
+        self.session_maker = session_maker
+        self.loop = loop
+
+    def run_blocking(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+
+
+class BrokenContext(LoopContext):
+    def run_blocking(self, coroutine):
+        coroutine.close()
+        raise RuntimeError("database is unreachable")
+
+
+@pytest.fixture
+def ctx(tmp_path, monkeypatch):
+    monkeypatch.setenv("BOW_QUERY_CONCURRENCY_SCOPE", "global")
+    monkeypatch.setenv("BOW_QUERY_LEASE_POLL_SECONDS", "0.05")
+    qcc.reset()
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'leases.db'}")
+
+    async def _setup():
+        async with engine.begin() as conn:
+            await conn.run_sync(
+                lambda c: Base.metadata.create_all(c, tables=[QueryConcurrencyLease.__table__])
+            )
+
+    asyncio.run_coroutine_threadsafe(_setup(), loop).result()
+    context = LoopContext(async_sessionmaker(engine, expire_on_commit=False), loop)
+    yield context
+    qcc.reset()
+    asyncio.run_coroutine_threadsafe(engine.dispose(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(timeout=5)
+
+
+def _other_replica(ctx, *, limit=1, enqueued_at=None, ttl=30.0, claim=True):
+    """Queue (and optionally claim) a lease as a different process would."""
+    common = dict(
+        lease_id=str(uuid.uuid4()), connection_id=CONN, holder="other-host:1",
+        enqueued_at=enqueued_at or datetime.utcnow(),
+    )
+    ctx.run_blocking(leases.with_session(ctx, leases.enqueue, ttl_seconds=ttl, **common))
+    if claim:
+        claimed, _ = ctx.run_blocking(
+            leases.with_session(ctx, leases.try_claim, limit=limit, ttl_seconds=ttl, **common)
+        )
+        assert claimed
+    return common
+
+
+def _depth(ctx):
+    return ctx.run_blocking(leases.with_session(ctx, leases.queue_depth, connection_id=CONN))
+
+
+def test_a_slot_held_on_another_replica_counts_against_the_cap(ctx):
+    other = _other_replica(ctx, limit=1)
+    with pytest.raises(ConnectionBusyError, match="limit 1"):
+        with qcc.slot(CONN, 1, wait_seconds=1, lease_context=ctx):
+            pass
+    # The timed-out waiter left the queue.
+    assert _depth(ctx) == {"held": 1, "waiting": 0}
+
+    ctx.run_blocking(leases.with_session(ctx, leases.release, lease_id=other["lease_id"]))
+    with qcc.slot(CONN, 1, wait_seconds=1, lease_context=ctx):
+        assert _depth(ctx) == {"held": 1, "waiting": 0}
+    assert _depth(ctx) == {"held": 0, "waiting": 0}
+
+
+def test_the_queue_is_first_come_first_served(ctx):
+    earlier = _other_replica(ctx, enqueued_at=datetime.utcnow() - timedelta(seconds=1), claim=False)
+    late = dict(lease_id=str(uuid.uuid4()), connection_id=CONN, holder="me:2",
+                enqueued_at=datetime.utcnow())
+    ctx.run_blocking(leases.with_session(ctx, leases.enqueue, ttl_seconds=30, **late))
+
+    # The slot is free, but someone queued first.
+    claimed, waiting = ctx.run_blocking(
+        leases.with_session(ctx, leases.try_claim, limit=1, ttl_seconds=30, **late)
+    )
+    assert (claimed, waiting) == (False, 2)
+    claimed, _ = ctx.run_blocking(
+        leases.with_session(ctx, leases.try_claim, limit=1, ttl_seconds=30, **earlier)
+    )
+    assert claimed
+
+
+def test_a_dead_workers_lease_expires(ctx):
+    _other_replica(ctx, limit=1, ttl=0.2)  # never renewed: its process "died"
+    time.sleep(0.3)
+    with qcc.slot(CONN, 1, wait_seconds=1, lease_context=ctx):
+        assert _depth(ctx)["held"] == 1
+
+
+def test_a_running_query_keeps_its_lease_alive(ctx, monkeypatch):
+    monkeypatch.setenv("BOW_QUERY_LEASE_TTL_SECONDS", "0.3")
+    with qcc.slot(CONN, 1, wait_seconds=1, lease_context=ctx):
+        time.sleep(0.8)  # well past the TTL; the renewer keeps it
+        assert _depth(ctx) == {"held": 1, "waiting": 0}
+        assert qcc.stats()["held_leases"] == 1
+    assert qcc.stats()["held_leases"] == 0
+
+
+def test_waiters_are_exported_as_queue_depth(ctx):
+    other = _other_replica(ctx, limit=1)
+    seen = {}
+
+    def waiter():
+        with qcc.slot(CONN, 2, wait_seconds=5, lease_context=ctx):
+            pass
+
+    # Both cluster slots are taken elsewhere, so this replica has to queue.
+    second = _other_replica(ctx, limit=2)
+    t = threading.Thread(target=waiter)
+    t.start()
+    deadline = time.monotonic() + 2
+    while time.monotonic() < deadline and not seen:
+        entry = qcc.stats()["connections"].get(CONN)
+        if entry and entry["waiting"] == 1 and entry["cluster_waiting"] == 1:
+            seen.update(entry)
+        time.sleep(0.02)
+    assert seen and qcc.queue_depth(CONN) == 1
+    for lease in (other, second):
+        ctx.run_blocking(leases.with_session(ctx, leases.release, lease_id=lease["lease_id"]))
+    t.join(timeout=5)
+    assert not t.is_alive() and qcc.queue_depth(CONN) == 0
+
+
+def test_an_unreachable_lease_table_falls_back_to_the_replica_cap(ctx):
+    broken = BrokenContext(ctx.session_maker, ctx.loop)
+    with qcc.slot(CONN, 1, wait_seconds=1, lease_context=broken):
+        assert qcc.in_flight(CONN) == 1
+    assert qcc.in_flight(CONN) == 0
+
+
+def test_the_default_scope_never_touches_the_lease_table(ctx, monkeypatch):
+    monkeypatch.delenv("BOW_QUERY_CONCURRENCY_SCOPE")
+    _other_replica(ctx, limit=1)
+    with qcc.slot(CONN, 1, wait_seconds=1, lease_context=ctx):
+        assert _depth(ctx)["held"] == 1  # only the foreign one
+
+
+def test_a_step_rerun_takes_a_lease_without_a_usage_context(ctx, monkeypatch):
+    from app.services.step_service import StepService
+
+    monkeypatch.setattr(qcc, "_lease_loop", ctx)  # the process's own lease loop
+    seen = []
+
+    class Client:
+        _bow_connection_id = CONN
+
+        def execute_query(self, sql):
+            seen.append(_depth(ctx))
+            return pd.DataFrame({"n": [1]})
+
+    code = "def generate_df(ds_clients, excel_files):\n    return ds_clients['shop'].execute_query('SELECT 42')\n"
+    df = asyncio.run(StepService()._run_step_code(
+        code, SimpleNamespace(files=[]), {"shop": Client()}, None, {}, raw=True,
+    ))
+    assert list(df["n"]) == [1]
+    assert seen == [{"held": 1, "waiting": 0}]
+    assert _depth(ctx) == {"held": 0, "waiting": 0}
+
+
+def test_a_lease_loop_that_cannot_be_built_is_not_rebuilt_per_query(ctx, monkeypatch, caplog):
+    builds = []
+
+    def _unbuildable():
+        builds.append(1)
+        raise RuntimeError("no app database")
+
+    monkeypatch.setattr(qcc, "_lease_loop", None)
+    monkeypatch.setattr(qcc, "_LeaseLoop", _unbuildable)
+    with caplog.at_level("WARNING", logger=qcc.__name__):
+        for _ in range(3):
+            with qcc.slot(CONN, 1, wait_seconds=1):
+                assert qcc.in_flight(CONN) == 1
+    assert len(builds) == 1
+    assert len([r for r in caplog.records if "per-replica cap" in r.getMessage()]) == 1
+
+    # Once the backoff has passed the next query tries again.
+    monkeypatch.setattr(qcc, "_lease_loop_failed_at", time.monotonic() - qcc.lease_loop_retry_seconds())
+    monkeypatch.setattr(qcc, "_LeaseLoop", lambda: ctx)
+    assert qcc._default_lease_context() is ctx
+    assert qcc._lease_loop_failed_at is None
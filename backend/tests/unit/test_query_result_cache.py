@@ -0,0 +1,208 @@
+"""Repeated agent queries are answered without going back to the source.
+
+A cached answer is only acceptable if it is the answer the source would have
+given the same caller moments ago. These pin both halves: a repeat within the
+TTL never reaches the client (nor its rate limit, quota or concurrency slot),
+and anything that could make a reused answer wrong — a different credential,
+volatile SQL, a write, an expired entry, a caller mutating its frame — goes to
+the source or gets its own copy.
+"""
+
+import time
+
+import pandas as pd
+import pytest
+
+from app.ai.code_execution.code_execution import QueryCapturingClientWrapper
+from app.data_sources import query_result_cache as qrc
+
+
+@pytest.fixture(autouse=True)
+def _clean(tmp_path, monkeypatch):
+    monkeypatch.setenv("BOW_RESULT_CACHE_DIR", str(tmp_path / "spill"))
+    qrc.clear()
+    yield
+    qrc.clear()
+
+
+class _Client:
+    def __init__(self, identity="creds-a", connection_id="conn-1"):
+        self.calls = 0
+        self._bow_connection_id = connection_id
+        self._bow_credential_identity = identity
+
+    def execute_query(self, query):
+        self.calls += 1
+        return pd.DataFrame({"region": ["EMEA", "APAC"], "n": [self.calls, self.calls]})
+
+
+def _wrap(client, ttl=60, timings=None):
+    return QueryCapturingClientWrapper(
+        client, [], timings if timings is not None else [],
+        usage_context=None, client_key="main", query_timeout_seconds=5,
+        result_cache_ttl_seconds=ttl,
+    )
+
+
+# --------------------------------------------------------------------------
+# Through the wrapper
+# --------------------------------------------------------------------------
+
+def test_a_repeated_query_is_served_from_the_cache():
+    client = _Client()
+    timings = []
+    w = _wrap(client, timings=timings)
+    first = w.execute_query("SELECT region, n FROM t")
+    second = w.execute_query("select region, n\n  FROM t -- again\n;")
+    assert client.calls == 1
+    pd.testing.assert_frame_equal(first, second)
+    assert "cache" not in timings[0]
+    assert timings[1]["cache"] == "hit"
+    assert timings[1]["rows"] == 2
+    assert timings[1]["result_bytes"] == timings[0]["result_bytes"]
+    assert len(w._captured_queries) == 2
+
+
+def test_a_hit_spends_no_rate_limit_quota_or_slot(monkeypatch):
+    client = _Client()
+    w = _wrap(client)
+    w.execute_query("SELECT 1 AS x")
+
+    def boom(*_a, **_k):
+        raise AssertionError("a cache hit must not consume budget")
+
+    monkeypatch.setattr(w, "_enforce_rate_limit", boom)
+    monkeypatch.setattr(w, "_consume_query_quota", boom)
+    monkeypatch.setattr(w, "_consume_data_bytes_quota", boom)
+    monkeypatch.setattr(
+        "app.data_sources.query_concurrency.slot", boom,
+    )
+    w.execute_query("SELECT 1 AS x")
+    assert client.calls == 1
+
+
+def test_callers_get_their_own_copy():
+    client = _Client()
+    w = _wrap(client)
+    df = w.execute_query("SELECT region, n FROM t")
+    df["n"] = -1
+    again = w.execute_query("SELECT region, n FROM t")
+    assert list(again["n"]) == [1, 1]
+
+
+def test_entries_are_not_shared_across_credentials():
+    a, b = _Client(identity="alice-token"), _Client(identity="bob-token")
+    _wrap(a).execute_query("SELECT 1")
+    _wrap(b).execute_query("SELECT 1")
+    assert (a.calls, b.calls) == (1, 1)
+
+
+def test_a_client_without_a_credential_identity_is_never_cached():
+    client = _Client(identity=None)
+    w = _wrap(client)
+    w.execute_query("SELECT 1")
+    w.execute_query("SELECT 1")
+    assert client.calls == 2
+    assert qrc.stats()["bypassed"] == 2
+
+
+def test_a_zero_ttl_always_queries_the_source():
+    client = _Client()
+    w = _wrap(client, ttl=0)
+    w.execute_query("SELECT 1")
+    w.execute_query("SELECT 1")
+    assert client.calls == 2
+
+
+def test_an_expired_entry_goes_back_to_the_source(monkeypatch):
+    client = _Client()
+    w = _wrap(client, ttl=1)
+    w.execute_query("SELECT 1")
+    real = time.monotonic
+    monkeypatch.setattr(qrc.time, "monotonic", lambda: real() + 5)
+    w.execute_query("SELECT 1")
+    assert client.calls == 2
+    assert qrc.stats()["expired"] == 1
+
+
+def test_failed_queries_are_not_cached():
+    class _Flaky(_Client):
+        def execute_query(self, query):
+            self.calls += 1
+            if self.calls == 1:
+                raise RuntimeError("connection reset")
+            return super().execute_query(query)
+
+    client = _Flaky()
+    w = _wrap(client)
+    with pytest.raises(RuntimeError):
+        w.execute_query("SELECT 1")
+    w.execute_query("SELECT 1")
+    assert client.calls == 2
+
+
+def test_large_results_spill_and_read_back_intact(monkeypatch):
+    monkeypatch.setenv("BOW_RESULT_CACHE_SPILL_BYTES", "1")
+    client = _Client()
+    w = _wrap(client)
+    first = w.execute_query("SELECT region, n FROM t")
+    second = w.execute_query("SELECT region, n FROM t")
+    assert client.calls == 1
+    pd.testing.assert_frame_equal(first, second)
+    s = qrc.stats()
+    assert s["spills"] == 1
+    assert s["memory_bytes"] == 0 and s["disk_bytes"] > 0
+
+
+def test_the_memory_tier_stays_within_its_budget(monkeypatch):
+    monkeypatch.setenv("BOW_RESULT_CACHE_BYTES", "600")
+    client = _Client()
+    w = _wrap(client)
+    for i in range(5):
+        w.execute_query(f"SELECT {i} AS x")
+    s = qrc.stats()
+    assert s["memory_bytes"] <= 600
+    assert s["evictions"] > 0
+
+
+# --------------------------------------------------------------------------
+# What counts as cacheable
+# --------------------------------------------------------------------------
+
+@pytest.mark.parametrize("sql, cacheable", [
+    ("SELECT * FROM orders", True),
+    ("WITH t AS (SELECT 1) SELECT * FROM t", True),
+    ("SELECT * FROM orders WHERE note = 'now()'", True),
+    ("SELECT * FROM orders WHERE d > NOW() - INTERVAL '1 day'", False),
+    ("SELECT * FROM orders WHERE d = CURRENT_DATE", False),
+    ("SELECT * FROM orders ORDER BY RANDOM() LIMIT 10", False),
+    ("SELECT GETDATE()", False),
+    ("SELECT 1; DELETE FROM orders", False),
+    ("DELETE FROM orders", False),
+    ("", False),
+])
+def test_only_deterministic_single_reads_are_cacheable(sql, cacheable):
+    assert (qrc.cacheable_sql(sql) is not None) is cacheable
+
+
+def test_normalization_keeps_quoted_text_verbatim():
+    assert qrc.normalize_sql("SELECT  'a  b' /* c */ FROM\tt;") == "SELECT 'a  b' FROM t"
+
+
+def test_connection_ttl_overrides_the_org_default():
+    class _Settings:
+        def get_config(self, name):
+            return type("C", (), {"value": 300})()
+
+    client = _Client()
+    assert qrc.effective_ttl(client, _Settings()) == 300
+    client._bow_connection_result_cache_ttl = 0
+    assert qrc.effective_ttl(client, _Settings()) == 0
+    assert qrc.effective_ttl(_Client(), None) == qrc.DEFAULT_TTL_SECONDS
+
+
+def test_reuse_is_off_until_an_org_or_connection_opts_in():
+    from app.schemas.organization_settings_schema import OrganizationSettingsConfig
+
+    assert qrc.effective_ttl(_Client(), None) == 0
+    assert OrganizationSettingsConfig().query_result_cache_ttl_seconds.value == 0
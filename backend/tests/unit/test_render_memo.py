@@ -0,0 +1,73 @@
+"""Planner sections are re-rendered only when their content changes.
+
+`refresh_warm` hands the loop a new section object every iteration; the memo
+must see through that to the content, return the exact string it rendered
+before (so the prompt prefix stays byte-identical), and never serve a stale
+render for a section that did change.
+"""
+
+from app.ai.context.render_memo import SectionRenderMemo
+from app.ai.context.sections.base import ContextSection
+from app.ai.context.sections.messages_section import MessageItem, MessagesSection
+from app.ai.context.sections.resources_section import ResourcesSection
+
+
+def _messages(*texts):
+    return MessagesSection(items=[MessageItem(role="user", text=t) for t in texts])
+
+
+def test_a_rebuilt_section_with_the_same_content_is_not_rendered_again():
+    memo = SectionRenderMemo()
+    first = memo.render(_messages("revenue by month"))
+    again = memo.render(_messages("revenue by month"))
+    assert again is first
+    assert memo.take_iteration_stats()["hits"] == 1
+
+    changed = memo.render(_messages("revenue by month", "now by region"))
+    assert "now by region" in changed
+    assert changed == _messages("revenue by month", "now by region").render()
+    stats = memo.take_iteration_stats()
+    assert (stats["hits"], stats["misses"], stats["hit_ratio"]) == (0, 1, 0.0)
+
+
+def test_method_and_arguments_are_part_of_the_key():
+    memo = SectionRenderMemo()
+    repo = ResourcesSection.Repository(
+        name="dbt", resources=[{"name": f"model_{i}", "type": "model"} for i in range(30)],
+    )
+    section = ResourcesSection(repositories=[repo])
+    small = memo.render(section, "render_combined", top_k_per_repo=2, index_limit=5)
+    large = memo.render(section, "render_combined", top_k_per_repo=20, index_limit=50)
+    assert small == section.render_combined(top_k_per_repo=2, index_limit=5)
+    assert large == section.render_combined(top_k_per_repo=20, index_limit=50)
+    assert memo.render(section) == section.render()
+    assert memo.totals["misses"] == 3
+
+
+def test_sections_that_cannot_be_dumped_are_rendered_every_time():
+    class Opaque(ContextSection):
+        tag_name = "opaque"
+        payload: object = None
+
+        def render(self) -> str:
+            return "<opaque/>"
+
+    memo = SectionRenderMemo()
+    section = Opaque(payload=object())
+    assert memo.render(section) == memo.render(section) == "<opaque/>"
+    assert memo.take_iteration_stats()["uncacheable"] == 2
+    assert memo.render(None) == ""
+
+
+def test_static_prefix_change_is_reported():
+    memo = SectionRenderMemo()
+    assert memo.static_prefix(["<instructions/>", "<schemas/>"]) is True
+    assert memo.static_prefix(["<instructions/>", "<schemas/>"]) is False
+    assert memo.static_prefix(["<instructions/>", "<schemas a='1'/>"]) is True
+
+
+def test_the_memo_is_bounded():
+    memo = SectionRenderMemo(max_entries=3)
+    for i in range(10):
+        memo.render(_messages(f"q{i}"))
+    assert len(memo) == 3
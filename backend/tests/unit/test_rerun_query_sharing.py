@@ -0,0 +1,106 @@
+"""Identical queries within one report rerun reach the source once.
+
+A rerun executes a dashboard's steps concurrently against the same clients,
+and dashboards repeat themselves. The run-scoped memo lets the first step to
+issue a statement run it while every other step issuing the same statement
+waits for a copy. These pin that the source sees one execution, that each
+step still gets its own timing entry and its own frame, and that a failure is
+shared rather than retried N times or silently swallowed.
+"""
+
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from app.ai.code_execution.code_execution import QueryCapturingClientWrapper
+from app.data_sources.query_result_cache import RunMemo
+
+
+class _SlowClient:
+    def __init__(self, fail: bool = False):
+        self.calls = 0
+        self.fail = fail
+        self._bow_connection_id = None
+
+    def execute_query(self, query):
+        self.calls += 1
+        time.sleep(0.1)
+        if self.fail:
+            raise RuntimeError("relation does not exist")
+        return pd.DataFrame({"n": [1, 2, 3]})
+
+
+def _wrap(client, memo, timings):
+    return QueryCapturingClientWrapper(
+        client, [], timings, usage_context=None, client_key="main",
+        query_timeout_seconds=5, query_memo=memo,
+    )
+
+
+def _burst(client, memo, n, sql="SELECT n FROM t"):
+    timings = [[] for _ in range(n)]
+    results, errors = [None] * n, [None] * n
+
+    def step(i):
+        try:
+            results[i] = _wrap(client, memo, timings[i]).execute_query(sql)
+        except Exception as e:
+            errors[i] = e
+
+    threads = [threading.Thread(target=step, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results, errors, timings
+
+
+def test_concurrent_identical_queries_run_once():
+    client, memo = _SlowClient(), RunMemo()
+    results, errors, timings = _burst(client, memo, 4)
+    assert client.calls == 1
+    assert errors == [None] * 4
+    assert all(len(r) == 3 for r in results)
+    assert sum(1 for t in timings if t[0].get("cache") == "shared") == 3
+    assert all(t[0]["rows"] == 3 for t in timings)
+
+
+def test_each_step_gets_its_own_frame():
+    client, memo = _SlowClient(), RunMemo()
+    results, _, _ = _burst(client, memo, 2)
+    results[0]["n"] = 0
+    assert list(results[1]["n"]) == [1, 2, 3]
+
+
+def test_a_failure_is_shared_and_recorded_on_every_step():
+    client, memo = _SlowClient(fail=True), RunMemo()
+    _, errors, timings = _burst(client, memo, 3)
+    assert client.calls == 1
+    assert all(isinstance(e, RuntimeError) for e in errors)
+    assert all("error" in t[0] for t in timings)
+
+
+def test_different_statements_are_not_shared():
+    client, memo = _SlowClient(), RunMemo()
+    timings = []
+    w = _wrap(client, memo, timings)
+    w.execute_query("SELECT n FROM t")
+    w.execute_query("SELECT n FROM t WHERE n > 1")
+    assert client.calls == 2
+
+
+def test_without_a_memo_nothing_is_shared():
+    client = _SlowClient()
+    _burst(client, None, 3)
+    assert client.calls == 3
+
+
+@pytest.mark.parametrize("sql", ["DELETE FROM t", "SELECT NOW()"])
+def test_writes_and_volatile_statements_always_run(sql):
+    client, memo = _SlowClient(), RunMemo()
+    w = _wrap(client, memo, [])
+    w.execute_query(sql)
+    w.execute_query(sql)
+    assert client.calls == 2
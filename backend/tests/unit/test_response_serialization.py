@@ -0,0 +1,168 @@
+"""Fast JSON encoding and response compression.
+
+Pinned here: every available encoder producing exactly pydantic's JSON for
+SSE events, an event being serialized once no matter how many streams and
+logs send it, `FastJSONResponse` matching FastAPI's default rendering, and
+the compression middleware compressing only large one-shot responses in an
+encoding the client accepts.
+"""
+import asyncio
+import gzip
+import json
+from datetime import datetime, timezone
+from decimal import Decimal
+from enum import Enum
+from uuid import UUID
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel, Field
+from starlette.responses import JSONResponse, StreamingResponse
+
+from app.core import compression, serialization
+from app.core.compression import CompressionMiddleware
+from app.core.serialization import FastJSONResponse
+from app.schemas.sse_schema import SSEEvent, format_sse_event
+from app.streaming import completion_event_log
+
+
+class _Color(Enum):
+    RED = "red"
+
+
+class _Nested(BaseModel):
+    name: str
+    when: datetime
+
+
+def _tricky_event():
+    return SSEEvent(
+        event="block.upsert",
+        completion_id="c1",
+        seq=7,
+        timestamp=datetime(2026, 1, 2, 3, 4, 5, 600),
+        data={
+            "text": "naïve — ✓ \"quoted\"\n",
+            "nan": float("nan"),
+            "big": 2**70,
+            "money": Decimal("12.50"),
+            "id": UUID("12345678-1234-5678-1234-567812345678"),
+            "aware": datetime(2026, 1, 2, tzinfo=timezone.utc),
+            "color": _Color.RED,
+            "tags": {"a"},
+            "model": _Nested(name="n", when=datetime(2026, 1, 1)),
+            "nested": [{"k": None, 1: (1, 2.5)}],
+        },
+        extra_field="kept",
+    )
+
+
+@pytest.mark.parametrize("backend_name", ["orjson", "msgspec", "pydantic"])
+def test_every_backend_matches_pydantic_json(backend_name):
+    if not serialization._BACKENDS[backend_name]:
+        pytest.skip(f"{backend_name} is not installed")
+    event = _tricky_event()
+    encoded = serialization.encode_sse_event(event, backend_name=backend_name)
+    assert encoded == event.model_dump_json()
+    assert "naïve" in encoded  # UTF-8 left unescaped, like pydantic
+
+    plain = {"a": [1, 2.5, None], "t": datetime(2026, 1, 1), "s": "x"}
+    assert serialization.dumps(plain, backend_name=backend_name) == b'{"a":[1,2.5,null],"t":"2026-01-01T00:00:00","s":"x"}'
+
+
+@pytest.mark.asyncio
+async def test_an_event_is_serialized_once_for_all_its_consumers(monkeypatch):
+    monkeypatch.setattr(completion_event_log, "_engine", lambda: None)  # no DB here
+    serialization.reset()
+    event = SSEEvent(event="block.delta.token", completion_id="c1", data={"t": "a"})
+    log = completion_event_log.CompletionEventLog("c1")
+    log.append(event)
+    frames = {format_sse_event(event) for _ in range(5)}
+
+    assert serialization.stats()["events"] == 1
+    assert log.pending_after(0)[0][2] == event.model_dump_json()
+    assert len(frames) == 1 and frames.pop().endswith(f"data: {event.model_dump_json()}\n\n")
+    await log.close()
+
+
+def test_fast_json_response_renders_like_fastapi():
+    class _Block(BaseModel):
+        block_id: str = Field(alias="blockId")
+        created_at: datetime
+        content: dict
+
+    class _Payload(BaseModel):
+        blocks: list[_Block]
+        has_more: bool = False
+
+    payload = _Payload(blocks=[_Block(blockId="b1", created_at=datetime(2026, 1, 1, 12), content={"rows": [[1, "x"]]})])
+    assert json.loads(FastJSONResponse(payload).body) == jsonable_encoder(payload)
+    plain = {"title": "r", "created_at": "2026-01-01T00:00:00", "completions": [{"id": "c1"}]}
+    assert json.loads(FastJSONResponse(plain).body) == plain
+    assert FastJSONResponse(plain).headers["content-type"] == "application/json"
+
+
+async def _call(app, accept_encoding=None):
+    headers = [(b"accept-encoding", accept_encoding.encode())] if accept_encoding else []
+    scope = {"type": "http", "method": "GET", "path": "/", "headers": headers, "query_string": b""}
+    sent = []
+    requests = [{"type": "http.request", "body": b"", "more_body": False}]
+
+    async def receive():
+        if requests:
+            return requests.pop()
+        await asyncio.Event().wait()  # the client stays connected
+
+    async def send(message):
+        sent.append(message)
+
+    await CompressionMiddleware(app, minimum_size=1024)(scope, receive, send)
+    start = sent[0]
+    body = b"".join(m.get("body", b"") for m in sent[1:])
+    return {k.decode(): v.decode() for k, v in start["headers"]}, body
+
+
+@pytest.mark.asyncio
+async def test_large_json_is_compressed_in_a_negotiated_encoding(monkeypatch):
+    monkeypatch.setenv("BOW_RESPONSE_COMPRESSION_ENCODINGS", "gzip")
+    compression.reset()
+    payload = {"blocks": [{"id": i, "text": "revenue by region " * 5} for i in range(200)]}
+    app = JSONResponse(payload, headers={"Vary": "Origin"})
+
+    headers, body = await _call(app, "br;q=1.0, gzip;q=0.8, deflate")
+    assert headers["content-encoding"] == "gzip"
+    assert headers["vary"] == "Origin, Accept-Encoding"
+    assert int(headers["content-length"]) == len(body)
+    assert json.loads(gzip.decompress(body)) == payload
+    stats = compression.stats()
+    assert stats["compressed"] == 1 and stats["bytes_out"] * 5 < stats["bytes_in"]
+
+    monkeypatch.delenv("BOW_RESPONSE_COMPRESSION_ENCODINGS")
+    if "zstd" in compression.available_encodings():
+        assert compression.negotiate("gzip, zstd") == "zstd"
+    assert compression.negotiate("gzip;q=0, identity") is None
+    assert compression.negotiate("*") == next(iter(compression.available_encodings()))
+
+
+@pytest.mark.asyncio
+async def test_small_streaming_and_unnegotiated_responses_pass_through(monkeypatch):
+    big = {"x": "y" * 5000}
+    for app, accept in (
+        (JSONResponse({"ok": True}), "gzip"),  # under the threshold
+        (JSONResponse(big), None),  # client accepts no encoding
+        (JSONResponse(big, headers={"Content-Encoding": "identity"}), "gzip"),
+    ):
+        headers, body = await _call(app, accept)
+        assert "content-encoding" not in headers or headers["content-encoding"] == "identity"
+        assert json.loads(body) == json.loads(app.body)
+
+    async def events():
+        for i in range(3):
+            yield format_sse_event(SSEEvent(event="tick", data={"i": i, "pad": "p" * 2000}))
+
+    headers, body = await _call(StreamingResponse(events(), media_type="text/event-stream"), "gzip")
+    assert "content-encoding" not in headers and body.count(b"event: tick") == 3
+
+    monkeypatch.setenv("BOW_RESPONSE_COMPRESSION", "0")
+    headers, _ = await _call(JSONResponse(big), "gzip")
+    assert "content-encoding" not in headers
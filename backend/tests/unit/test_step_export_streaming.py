@@ -0,0 +1,112 @@
+"""Streamed step exports write the file the buffered export wrote.
+
+The export moved from one DataFrame → one BytesIO → one Response to batches
+streamed through a generator. A user opening the download must not be able to
+tell: same BOM, one header, every row in order, and the counter the audit
+entry reads must match what was written.
+"""
+
+import io
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+from openpyxl import load_workbook
+
+from app.services import step_export, step_result_store as store
+
+
+def _grid(n):
+    rows = [{"id": i, "name": f"n{i}", "amount": i / 2} for i in range(n)]
+    cols = [
+        {"headerName": "ID", "field": "id"},
+        {"headerName": "Name", "field": "name"},
+        {"headerName": "Amount", "field": "amount"},
+    ]
+    return {"rows": rows, "columns": cols}
+
+
+def _buffered_csv(data):
+    """What the export route produced before streaming."""
+    fields = [c["field"] for c in data["columns"]]
+    headers = [c["headerName"] for c in data["columns"]]
+    df = pd.DataFrame([[r.get(f) for f in fields] for r in data["rows"]], columns=headers)
+    return df.to_csv(index=False).encode("utf-8-sig")
+
+
+@pytest.fixture(autouse=True)
+def _root(tmp_path, monkeypatch):
+    monkeypatch.setattr(store, "_STORE_ROOT", tmp_path / "step_results")
+    monkeypatch.setenv("BOW_STEP_PREVIEW_ROWS", "10")
+
+
+def test_streamed_csv_matches_the_buffered_export():
+    data = _grid(25)
+    counter = step_export.ExportCounter()
+    body = b"".join(step_export.csv_stream(store.iter_frames(None, data, 4), counter))
+    assert body == _buffered_csv(data)
+    assert (counter.rows, counter.complete) == (25, True)
+
+
+@pytest.mark.asyncio
+async def test_a_stored_step_exports_every_row_not_the_preview():
+    data = _grid(50)
+    step = SimpleNamespace(data=None, result_path=None, result_key_enc=None, result_rows=None)
+    await store.persist(step, data)
+    assert len(step.data["rows"]) == 10
+    counter = step_export.ExportCounter()
+    body = b"".join(step_export.csv_stream(store.iter_frames(store.ref(step), step.data, 7), counter))
+    assert body == _buffered_csv(data)
+    assert counter.rows == 50
+
+
+def test_an_empty_result_still_has_its_header():
+    data = {"rows": [], "columns": _grid(0)["columns"]}
+    counter = step_export.ExportCounter()
+    body = b"".join(step_export.csv_stream(store.iter_frames(None, data, 4), counter))
+    assert body.decode("utf-8-sig").strip() == "ID,Name,Amount"
+    assert counter.rows == 0
+
+
+def test_xlsx_is_written_in_write_only_mode_with_all_rows():
+    data = _grid(25)
+    counter = step_export.ExportCounter()
+    fileobj = step_export.write_xlsx(store.iter_frames(None, data, 4), counter)
+    wb = load_workbook(io.BytesIO(b"".join(step_export.file_chunks(fileobj))))
+    values = list(wb.active.values)
+    assert values[0] == ("ID", "Name", "Amount")
+    assert len(values) == 26 and values[-1] == (24, "n24", 12.0)
+    assert counter.rows == 25
+
+
+def test_xlsx_refuses_more_rows_than_a_sheet_holds(monkeypatch):
+    monkeypatch.setattr(step_export, "XLSX_MAX_ROWS", 5)
+    with pytest.raises(step_export.ExportTooLargeError, match="CSV"):
+        step_export.write_xlsx(store.iter_frames(None, _grid(8), 4), step_export.ExportCounter())
+
+
+def test_live_frames_are_sliced_without_copying_everything_up_front():
+    df = pd.DataFrame({"a": range(10)})
+    parts = list(step_export.frame_batches(df, 4))
+    assert [len(p) for p in parts] == [4, 4, 2]
+    counter = step_export.ExportCounter()
+    body = b"".join(step_export.csv_stream(iter(parts), counter))
+    assert body == df.to_csv(index=False).encode("utf-8-sig")
+
+
+@pytest.mark.asyncio
+async def test_a_live_export_the_user_may_not_run_stays_a_403(monkeypatch):
+    from fastapi import HTTPException
+    from app.routes import step as step_routes
+
+    async def _forbidden(*args, **kwargs):
+        # What DataSourceService.construct_clients raises for the re-run.
+        raise HTTPException(status_code=403, detail="You do not have access to this data source")
+
+    monkeypatch.setattr(step_routes.step_service, "export_step_stream", _forbidden)
+    with pytest.raises(HTTPException) as exc:
+        await step_routes.export_step.__wrapped__(
+            "step-1", request=None, format="csv", live=True,
+            current_user=SimpleNamespace(id="u1"), organization=SimpleNamespace(id="o1"), db=None,
+        )
+    assert exc.value.status_code == 403
@@ -0,0 +1,151 @@
+"""Large step results live in the row store; pages come back exactly.
+
+Step.data keeps only a bounded preview of a large result; the rows live in a
+columnar file beside it. That is only acceptable if nothing a reader sees
+changes: a page is the rows the full grid would have had in that position, a
+full read (export, load_step, GET /steps/{id}) returns every row with its
+original values, and the store is only consulted for the shared snapshot — a
+viewer's own result is paged from its own JSON.
+"""
+
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import step_result_store as store
+from app.services.viewer_data_policy import StepDataResolution
+
+
+def _grid(n):
+    rows = [
+        {
+            "id": i,
+            "region": ["EMEA", "APAC", "AMER"][i % 3],
+            "amount": None if i % 7 == 0 else i * 1.5,
+            "day": f"2026-01-{(i % 28) + 1:02d}",
+            "tags": {"k": i} if i % 2 else ["x"],
+        }
+        for i in range(n)
+    ]
+    cols = [{"headerName": c, "field": c} for c in ("id", "region", "amount", "day", "tags")]
+    return {"rows": rows, "columns": cols, "info": {"total_rows": n}}
+
+
+@pytest.fixture(autouse=True)
+def _root(tmp_path, monkeypatch):
+    monkeypatch.setattr(store, "_STORE_ROOT", tmp_path / "step_results")
+    monkeypatch.setenv("BOW_STEP_PREVIEW_ROWS", "10")
+
+
+async def _stored_step(n=50):
+    step = SimpleNamespace(data=None, result_path=None, result_key_enc=None, result_rows=None)
+    await store.persist(step, _grid(n))
+    return step
+
+
+@pytest.mark.asyncio
+async def test_small_results_stay_inline():
+    step = SimpleNamespace(data=None, result_path=None, result_key_enc=None, result_rows=None)
+    await store.persist(step, _grid(10))
+    assert step.result_path is None
+    assert len(step.data["rows"]) == 10 and "paged" not in step.data
+
+
+@pytest.mark.asyncio
+async def test_large_results_keep_a_preview_inline_and_the_rows_in_a_store():
+    step = await _stored_step(50)
+    assert os.path.exists(step.result_path)
+    assert step.result_rows == 50
+    assert step.data["rows"] == _grid(50)["rows"][:10]
+    assert step.data["truncated"] and step.data["paged"]
+    assert step.data["total_rows"] == 50 and store.row_count(step.data) == 50
+
+
+@pytest.mark.asyncio
+async def test_full_data_returns_every_row_unchanged():
+    step = await _stored_step(50)
+    full = await store.full_data(step)
+    assert full["rows"] == _grid(50)["rows"]
+    assert full["info"] == {"total_rows": 50}
+    assert not {"paged", "truncated", "total_rows"} & set(full)
+
+
+@pytest.mark.asyncio
+async def test_rewriting_a_step_hands_back_the_old_file():
+    step = await _stored_step(50)
+    old = step.result_path
+    stale = await store.persist(step, _grid(5))
+    assert stale == old and step.result_path is None
+
+
+@pytest.mark.asyncio
+async def test_pages_sort_filter_and_project_like_the_inline_grid():
+    step = await _stored_step(50)
+    page = store.read_page(
+        store.ref(step), step.data, offset=2, limit=3, columns=["id", "amount"],
+        sort=[{"column": "amount", "desc": True}],
+        filters=[{"column": "region", "op": "eq", "value": "APAC"}],
+    )
+    expected = sorted(
+        (r for r in _grid(50)["rows"] if r["region"] == "APAC"),
+        key=lambda r: (r["amount"] is None, -(r["amount"] or 0)),
+    )
+    assert page["source"] == "store"
+    assert page["total_rows"] == len(expected)
+    assert page["rows"] == [{"id": r["id"], "amount": r["amount"]} for r in expected[2:5]]
+    assert [c["field"] for c in page["columns"]] == ["id", "amount"]
+
+
+@pytest.mark.asyncio
+async def test_text_filters_treat_wildcards_literally():
+    step = await _stored_step(50)
+    page = store.read_page(
+        store.ref(step), step.data, filters=[{"column": "region", "op": "contains", "value": "%"}],
+    )
+    assert page["total_rows"] == 0
+
+
+@pytest.mark.asyncio
+async def test_unknown_columns_are_rejected():
+    step = await _stored_step(50)
+    with pytest.raises(store.StepRowsQueryError):
+        store.read_page(store.ref(step), step.data, sort=[{"column": "id; DROP TABLE result"}])
+
+
+@pytest.mark.asyncio
+async def test_a_viewer_result_is_paged_from_its_own_rows():
+    step = await _stored_step(50)
+    mine = _grid(3)
+    resolution = StepDataResolution(data=mine, snapshot=False)
+    assert await store.full_data(step, resolution) is mine
+    page = store.read_page(None, mine, limit=100)
+    assert page["source"] == "inline" and page["rows"] == mine["rows"]
+
+
+@pytest.mark.asyncio
+async def test_a_missing_file_falls_back_to_the_preview():
+    step = await _stored_step(50)
+    os.unlink(step.result_path)
+    page = store.read_page(store.ref(step), step.data, limit=100)
+    assert page["source"] == "inline" and page["total_rows"] == 10
+    assert await store.full_data(step) is step.data
+
+
+@pytest.mark.asyncio
+async def test_a_deleted_steps_file_goes_only_once_the_delete_commits(monkeypatch):
+    from app.models import step as step_model
+
+    session = SimpleNamespace(info={})
+    monkeypatch.setattr(step_model, "object_session", lambda target: session)
+    kept, dropped = await _stored_step(50), await _stored_step(50)
+
+    step_model.after_delete_step(None, None, kept)
+    assert os.path.exists(kept.result_path)  # flushed, not committed
+    step_model._keep_store_files_after_rollback(session)
+    step_model._delete_store_files_after_commit(session)
+    assert os.path.exists(kept.result_path)
+
+    step_model.after_delete_step(None, None, dropped)
+    step_model._delete_store_files_after_commit(session)
+    assert not os.path.exists(dropped.result_path)
@@ -0,0 +1,89 @@
+"""Query-aware table retrieval for the schema context.
+
+On a catalog of thousands of tables the composite score alone decides which
+ten the planner sees; `table_index` adds how well each table matches the
+prompt. These pin that the match lands on the right tables, that a
+re-introspection only re-tokenizes what changed, and that a table which is
+gone stops counting toward idf.
+"""
+
+import random
+
+import pytest
+
+from app.ai.context.builders import table_index
+
+
+@pytest.fixture(autouse=True)
+def _clean():
+    table_index.reset()
+    yield
+    table_index.reset()
+
+
+def _catalog(n, seed=3):
+    rnd = random.Random(seed)
+    words = ["event", "log", "raw", "stage", "tmp", "audit", "session", "click", "device", "page"]
+    items = []
+    for i in range(n):
+        name = f"{rnd.choice(words)}_{rnd.choice(words)}_{i}"
+        cols = [{"name": f"{rnd.choice(words)}_id"} for _ in range(rnd.randint(2, 12))]
+        items.append({"table_id": f"t{i}", "name": name, "columns": cols})
+    return items
+
+
+def test_the_table_the_prompt_is_about_ranks_first():
+    items = _catalog(2000)
+    items.append({
+        "table_id": "inv", "name": "FctInvoiceLines",
+        "columns": [{"name": "invoice_id"}, {"name": "net_amount"}, {"name": "country_code"}],
+        "description": "One row per invoice line, net of tax.",
+    })
+    items.append({
+        "table_id": "cust", "name": "dim_customer",
+        "columns": [{"name": "customer_id"}, {"name": "country"}],
+        "metadata_json": {"tags": ["crm"], "description": "Customers and their billing country"},
+    })
+    rel = table_index.relevance(("ds", "canonical"), items, "net revenue from invoices by country")
+    ranked = sorted(range(len(items)), key=lambda i: rel[i], reverse=True)
+    assert items[ranked[0]]["table_id"] == "inv"
+    assert items[ranked[1]]["table_id"] == "cust"
+    assert rel[ranked[0]] == 1.0
+    assert max(rel[:2000]) == 0.0
+
+
+def test_reintrospection_reindexes_only_changed_tables():
+    items = _catalog(300)
+    table_index.relevance(("ds", "canonical"), items, "session")
+    assert table_index.stats()["tables_indexed"] == 300
+
+    items[7] = {**items[7], "columns": items[7]["columns"] + [{"name": "refund_reason"}]}
+    rel = table_index.relevance(("ds", "canonical"), items, "refunds")
+    assert table_index.stats()["tables_indexed"] == 301
+    assert rel[7] == 1.0 and sum(rel) == 1.0
+
+
+def test_a_complete_build_prunes_tables_that_are_gone():
+    items = _catalog(50)
+    key = ("ds", "canonical")
+    table_index.relevance(key, items, "click", complete=True)
+    table_index.relevance(key, items[:10], "click")
+    assert table_index.stats()["tables"] == 50
+    table_index.relevance(key, items[:10], "click", complete=True)
+    assert table_index.stats()["tables"] == 10
+    assert table_index.stats()["tables_pruned"] == 40
+
+
+def test_views_do_not_share_an_index():
+    canonical = [{"table_id": "t1", "name": "orders", "columns": [{"name": "margin_pct"}]}]
+    overlay = [{"table_id": "t1", "name": "orders", "columns": []}]
+    assert table_index.relevance(("ds", "canonical"), canonical, "margin") == [1.0]
+    assert table_index.relevance(("ds", "user:u1"), overlay, "margin") == [0.0]
+    assert table_index.stats()["sources"] == 2
+
+
+def test_identifiers_split_and_stem_like_the_prompt():
+    assert table_index.tokenize("fct_OrderLines.customerID") == [
+        "fct", "order", "line", "customer", "id",
+    ]
+    assert table_index.query_terms("Show me the orders by Customer") == ["order", "customer"]
@@ -0,0 +1,135 @@
+"""Delta-encoded planning text snapshots.
+
+Pinned here: `block.delta.text.append` offsets and lengths in UTF-16 units
+with a CRC-32 of the preceding text, letting a client rebuild the text from
+appends alone; no snapshot when nothing changed; a full `block.delta.text`
+only when the text stops extending the last snapshot; and persistence that
+appends to the stored field, falling back to a full rewrite.
+"""
+import zlib
+
+import pytest
+
+from app.streaming.text_streamer import PlanningTextStreamer
+
+
+def _streamer(**kwargs):
+    events = []
+    counter = iter(range(1, 10_000))
+
+    async def emit(event):
+        events.append(event)
+
+    async def seq():
+        return next(counter)
+
+    streamer = PlanningTextStreamer(
+        emit=emit, seq_fn=seq, completion_id="c1", agent_execution_id="e1", block_id="b1",
+        snapshot_every_ms=0, **kwargs,
+    )
+    return streamer, events
+
+
+def _client_apply(local: str, data: dict) -> str:
+    """What the report page does with an append, in JS string indices."""
+    units = local.encode("utf-16-le")
+    offset = data["offset"]
+    assert len(units) // 2 >= offset
+    prefix = units[: offset * 2].decode("utf-16-le")
+    assert zlib.crc32(prefix.encode("utf-8")) == data["checksum"]
+    return prefix + data["text"]
+
+
+def _of(events, name, field=None):
+    return [e.data for e in events if e.event == name and (field is None or e.data["field"] == field)]
+
+
+@pytest.mark.asyncio
+async def test_appends_carry_utf16_offsets_and_checksums():
+    streamer, events = _streamer()
+    text = ""
+    for piece in ("Plan: ", "join orders 😀 ", "naïve — by region", " then chart"):
+        text += piece
+        await streamer.update(text, None)
+
+    appends = _of(events, "block.delta.text.append", "reasoning")
+    assert len(appends) == 4 and not _of(events, "block.delta.text")
+    local = ""
+    for data in appends:
+        local = _client_apply(local, data)
+        assert data["length"] == len(data["text"].encode("utf-16-le")) // 2
+    assert local == text
+    assert appends[2]["offset"] == len("Plan: join orders 😀 ") + 1  # the emoji is a surrogate pair
+
+
+@pytest.mark.asyncio
+async def test_no_snapshot_when_text_is_unchanged():
+    streamer, events = _streamer()
+    await streamer.update("thinking", "Answer")
+    count = len(events)
+    await streamer.update("thinking", "Answer")
+    await streamer.update(None, "Answer")  # a missing field doesn't resend the other
+    assert len(events) == count
+    assert sum(len(d["text"]) for d in _of(events, "block.delta.text.append")) == len("thinking") + len("Answer")
+
+
+@pytest.mark.asyncio
+async def test_full_snapshot_only_when_text_stops_extending():
+    streamer, events = _streamer()
+    await streamer.update(None, "Draft answer")
+    await streamer.update(None, "Final answer", reset_on_source_change=True)
+    replace = _of(events, "block.delta.text", "content")
+    assert replace == [{"block_id": "b1", "field": "content", "text": "Final answer", "replace": True}]
+
+    await streamer.update(None, "Final answer is 42")
+    assert _of(events, "block.delta.text.append")[-1] == {
+        "block_id": "b1", "field": "content", "offset": len("Final answer"),
+        "length": len(" is 42"), "checksum": zlib.crc32(b"Final answer"), "text": " is 42",
+    }
+
+    await streamer.update("rethink", "Final answer: 42")  # rewritten without a source switch
+    assert _of(events, "block.delta.text", "content")[-1] == {"block_id": "b1", "field": "content", "text": "Final answer: 42"}
+
+
+@pytest.mark.asyncio
+async def test_persistence_appends_and_compacts_on_mismatch():
+    calls = []
+    accept = {"ok": True}
+
+    async def persist(reasoning, content):
+        calls.append(("full", reasoning, content))
+
+    async def persist_append(field, offset, text):
+        calls.append(("append", field, offset, text))
+        return accept["ok"]
+
+    streamer, _ = _streamer(persist=persist, persist_append=persist_append)
+    await streamer.update("a", None)
+    await streamer.update("abc", None)
+    await streamer.update("abc", None)
+    await streamer.update("abcd", "x")
+    assert calls == [
+        ("full", "a", ""),
+        ("append", "reasoning", 1, "bc"),
+        ("append", "reasoning", 3, "d"),
+        ("full", "abcd", "x"),  # nothing stored for content yet
+    ]
+
+    calls.clear()
+    accept["ok"] = False  # the stored row diverged
+    await streamer.update("abcde", "x")
+    assert calls == [("append", "reasoning", 4, "e"), ("full", "abcde", "x")]
+
+
+@pytest.mark.asyncio
+async def test_complete_sends_the_tail_as_an_append_then_markers():
+    streamer, events = _streamer()
+    await streamer.update("step one", "Result")
+    streamer.snapshot_every_ms = 60_000
+    await streamer.update("step one, step two", "Result")
+    events.clear()
+
+    await streamer.complete()
+    assert [e.event for e in events] == ["block.delta.text.append", "block.delta.text.complete", "block.delta.text.complete"]
+    assert events[0].data["offset"] == len("step one") and events[0].data["text"] == ", step two"
+    assert [e.seq for e in events] == sorted(e.seq for e in events)
@@ -0,0 +1,118 @@
+"""Token accounting for transcript budgeting.
+
+Pinned here: the script-aware estimate (JSON and non-Latin text are no
+longer undercounted as ``len/4``), parts counted once and reused, the
+ladder's running total, calibration against provider-reported usage, and
+exact tokenizers with their memo.
+"""
+import json
+import sys
+from pathlib import Path
+
+BACKEND_ROOT = Path(__file__).resolve().parents[2]
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+
+import pytest  # noqa: E402
+
+from app.ai.context.parts import TextPart, ToolCallPart, ToolResultPart, part_tokens  # noqa: E402
+from app.ai.context.transcript import Transcript  # noqa: E402
+from app.ai.utils import token_counter  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def _fresh_counter():
+    token_counter.reset()
+    yield
+    token_counter.reset()
+    token_counter.register_tokenizer("acme", None)
+
+
+def test_estimate_weighs_json_and_non_latin_text_heavier():
+    prose = "the quick brown fox jumps over the lazy dog " * 20
+    rows = json.dumps([{"id": i, "amount": i * 1.5, "ok": True} for i in range(40)])
+    hebrew = "שלום עולם מה שלומך היום " * 20
+    cjk = "总收入是多少" * 20
+
+    naive = token_counter.estimate_tokens_fast
+    assert token_counter.estimate_tokens(prose) == pytest.approx(naive(prose), rel=0.05)
+    assert token_counter.estimate_tokens(rows) > 1.5 * naive(rows)
+    assert token_counter.estimate_tokens(hebrew) > 2.5 * naive(hebrew)
+    assert token_counter.estimate_tokens(cjk) >= len(cjk)
+    assert token_counter.estimate_tokens("") == 0
+
+
+def test_parts_are_counted_once_and_the_count_is_reused():
+    text = TextPart(text="revenue by month " * 50)
+    call = ToolCallPart(id="c0", tool_name="run_query", args={"sql": "select 1"})
+    n = part_tokens(text)
+    assert text.tokens == n and part_tokens(call) == call.tokens > 0
+
+    # A stored count is authoritative: nothing re-reads the text.
+    text.tokens = 7
+    assert part_tokens(text) == 7
+    # Stored counts do not affect equality.
+    assert TextPart(text="a", tokens=1) == TextPart(text="a", tokens=99)
+
+    result = ToolResultPart(call_id="c0", tool_name="run_query", content="x" * 400, digest="3 rows")
+    assert result.tokens == 0 and part_tokens(result) > 0 and result.tokens == part_tokens(result)
+
+
+def _transcript(provider=None, model_id=None, steps=6):
+    t = Transcript(provider=provider, model_id=model_id)
+    t.add_user_text("what is total revenue?")
+    for i in range(steps):
+        t.add_assistant_step(calls=[ToolCallPart(id=f"c{i}", tool_name="run_query", args={"i": i})])
+        t.add_tool_results([ToolResultPart(
+            call_id=f"c{i}", tool_name="run_query", content="row " * 300, digest="300 rows",
+        )])
+    return t
+
+
+def test_fit_to_budget_keeps_a_running_total_that_matches_a_recount():
+    t = _transcript()
+    before = t.tokens()
+    stats = t.fit_to_budget(before // 2)
+    assert stats["before"] == before and stats["digested"] > 0
+    # The running total the ladder stopped on is the real size.
+    assert stats["after"] == t.tokens() <= before // 2
+    assert stats["calibration"] == 1.0
+
+
+def test_calibration_learns_from_reported_usage_and_scales_budgets():
+    assert token_counter.observe_usage("anthropic", "m", 100, 1000) is None  # too small to learn from
+    assert token_counter.observe_usage("anthropic", "m", 1000, 1500) == pytest.approx(1.5)
+    # Moving average, not the last sample.
+    assert token_counter.observe_usage("anthropic", "m", 1000, 2000) == pytest.approx(1.6)
+    # Outliers are clamped.
+    token_counter.observe_usage("openai", "m", 1000, 100_000)
+    assert token_counter.calibration_factor("openai", "m") == 4.0
+    assert token_counter.calibration_factor("google", "m") == 1.0
+
+    raw = _transcript().tokens()
+    calibrated = _transcript(provider="anthropic", model_id="m")
+    assert calibrated.raw_tokens() == raw
+    assert calibrated.tokens() == pytest.approx(raw * 1.6, abs=1)
+    assert calibrated.fit_to_budget(raw)["digested"] > 0
+    assert token_counter.count_tokens("word " * 100, "m", provider="anthropic") == pytest.approx(
+        token_counter.estimate_tokens("word " * 100) * 1.6, abs=1
+    )
+
+
+def test_registered_tokenizer_counts_exactly_and_memoizes_large_texts():
+    calls = []
+
+    def _factory(model_id):
+        return lambda text: calls.append(text) or len(text.split())
+
+    token_counter.register_tokenizer("acme", _factory)
+    big = "alpha beta " * 600
+    assert token_counter.count_tokens(big, "acme-1", provider="acme") == 1200
+    assert token_counter.count_tokens(big, "acme-1", provider="acme") == 1200
+    assert token_counter.count_tokens("short text", "acme-1", provider="acme") == 2
+    assert len(calls) == 2
+    stats = token_counter.stats()
+    assert (stats["exact"], stats["memo_hits"], stats["memo_entries"]) == (2, 1, 1)
+
+    # Other providers keep the estimate.
+    assert token_counter.count_tokens(big, "m", provider="openai") == token_counter.estimate_tokens(big)
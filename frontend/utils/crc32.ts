@@ -0,0 +1,31 @@
+// CRC-32 (IEEE, same as Python's zlib.crc32) over the UTF-8 bytes of a
+// string. The streaming planner sends it with `block.delta.text.append` so
+// the client can check its local text still matches the server's before
+// splicing an appended run onto it.
+//
+// Pass the CRC of the text so far as `crc` to extend it over `text`, as
+// zlib.crc32(data, value) does; the stream's offsets never split a character,
+// so the pieces encode to the same bytes as the whole.
+
+let TABLE: Uint32Array | null = null
+
+function table(): Uint32Array {
+  if (TABLE) return TABLE
+  TABLE = new Uint32Array(256)
+  for (let n = 0; n < 256; n++) {
+    let c = n
+    for (let k = 0; k < 8; k++) c = c & 1 ? 0xedb88320 ^ (c >>> 1) : c >>> 1
+    TABLE[n] = c >>> 0
+  }
+  return TABLE
+}
+
+const encoder = typeof TextEncoder !== 'undefined' ? new TextEncoder() : null
+
+export function crc32Utf8(text: string, crc = 0): number {
+  const t = table()
+  const bytes = encoder ? encoder.encode(text) : new Uint8Array(0)
+  crc = (crc ^ 0xffffffff) >>> 0
+  for (let i = 0; i < bytes.length; i++) crc = t[(crc ^ bytes[i]) & 0xff] ^ (crc >>> 8)
+  return (crc ^ 0xffffffff) >>> 0
+}